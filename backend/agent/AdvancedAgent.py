@@ -77,7 +77,10 @@ class BankingAgent:
             "Asla <think> veya herhangi bir düşünme içeriğini kullanıcıya yazma; sadece nihai cevabı ver.\n"
             "Customer ID otomatik olarak tool'lara eklenir, kullanıcıdan isteme.\n\n"
             "ÖNEMLİ: Kullanıcı işlem geçmişi (transactions) istiyorsa ama hangi hesabı belirtmemişse, önce hangi hesabın işlem geçmişini göstermek istediğini sor. "
-            "Hesap numarası belirtilmeden işlem geçmişi gösterme. Kullanıcı hesap belirttikten sonra transactions_list tool'unu kullan."
+            "Hesap numarası belirtilmeden işlem geçmişi gösterme. Kullanıcı hesap belirttikten sonra transactions_list tool'unu kullan. "
+            "Kullanıcı daha fazla işlem görmek isterse önceki yanıttaki next_cursor değerini aynı hesap ve tarih aralığıyla cursor parametresinde gönder.\n"
+            "Transfer onayında mesajda confirm_token varsa payment_request/payment_request_by_type çağrısına confirm=True ile birlikte aynen ilet. "
+            "payment_batch'i confirm=True ile asla kendiliğinden çağırma; toplu transfer onayı kullanıcının onay kartından yapılır."
         )
         self.system_prompt += "\n" + SYSTEM_POLICY_APPEND
 
@@ -101,7 +104,8 @@ class BankingAgent:
             "get_exchange_rates", "get_interest_rates", "get_fee", "get_all_fees",
             "branch_atm_search", "transactions_list", "transactions_list_by_type", "loan_amortization_schedule",
             "interest_compute", "run_roi_simulation", "list_portfolios", "fx_convert",
-            "payment_request", "payment_request_by_type"
+            "payment_request", "payment_request_by_type", "payment_batch", "loan_quote_grid", "transactions_export",
+            "loan_prepayment_simulate", "loan_effective_cost", "run_portfolio_stress_test"
         }
 
     # ---------- lifecycle ----------
@@ -452,6 +456,22 @@ class BankingAgent:
                 if nested_json.get("phase") == "precheck" and nested_json.get("ok") == True:
                     payment_data = nested_json
         
+        if payment_data and isinstance(payment_data.get("items"), list):  ##toplu transfer: payment_batch_confirmation UI
+            msg = payment_data.get("message") or "Toplu transfer ön kontrolü tamamlandı."
+            if not payment_data.get("confirm_token"):
+                return self._safe_return(msg, None)
+            return {"text": msg, "YANIT": msg, "ui_component": {
+                "type": "payment_batch_confirmation",
+                "data": {
+                    "atomic": payment_data.get("atomic", True),
+                    "count": payment_data.get("count"),
+                    "total_amount": payment_data.get("total_amount"),
+                    "limits": payment_data.get("limits", {}),
+                    "items": payment_data.get("items", []),
+                    "confirm_token": payment_data.get("confirm_token"),
+                },
+            }}
+
         if payment_data:  ##kullanıcıya özet + payment_confirmation UI
             suggested= payment_data.get("suggested_client_ref") 
             preview= payment_data.get("preview",{})
@@ -477,6 +497,7 @@ class BankingAgent:
                 "fee": fee,
                 "note": note,
                 "limits": limits,
+                "confirm_token": payment_data.get("confirm_token"),
                     },
                 },
             }
@@ -496,6 +517,15 @@ class BankingAgent:
                 if nested_json.get("phase") == "commit" and nested_json.get("ok") == True:
                     commit_data = nested_json
         
+        if commit_data and isinstance(commit_data.get("results"), list):  ##toplu transfer sonucu
+            msg = (f"Toplu transfer tamamlandı ✅\n"
+                   f"İşlenen: {commit_data.get('posted', 0)}, başarısız: {commit_data.get('failed', 0)}\n"
+                   f"Toplam: {commit_data.get('total_amount')}")
+            return {"text": msg, "YANIT": msg, "ui_component": {
+                "type": "payment_batch_result",
+                "data": {k: commit_data.get(k) for k in ("batch_id", "mode", "posted", "failed", "total_amount", "results")},
+            }}
+
         if commit_data:  ##kullanıcıya tamamlandı + transfer_receipt UI
             txn=commit_data.get("txn",{})
             receipt=commit_data.get("receipt",{})
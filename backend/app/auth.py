@@ -15,6 +15,9 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Token’ın geçerlilik süresi
+ACCESS_TOKEN_TYPE = "access"  # yalnızca bu typ'teki token oturum açar (ör. ödeme onay token'ları reddedilir)
+# Yönetim uçlarına (arşiv/depolama) erişebilen müşteri id'leri; boşsa kimse erişemez
+ADMIN_CUSTOMER_IDS = {int(x) for x in os.getenv("ADMIN_CUSTOMER_IDS", "").split(",") if x.strip().isdigit()}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -25,7 +28,10 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> int: # int döndür
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
+        # aud taşıyan token'lar (ör. ödeme onayı) audience verilmediği için burada JWTError verir
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("typ") != ACCESS_TOKEN_TYPE:
+            raise credentials_exception
         customer_id_from_token: str = payload.get("sub") # customer_no yerine customer_id_from_token olarak adlandırıldı
         if customer_id_from_token is None:
             raise credentials_exception
@@ -46,9 +52,15 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> int: # int döndür
         raise credentials_exception
 
 
+def get_admin_user(current_user: int = Depends(get_current_user)) -> int:
+    if current_user not in ADMIN_CUSTOMER_IDS:
+        raise HTTPException(status_code=403, detail="Bu işlem için yönetici yetkisi gerekli")
+    return current_user
+
+
 # Token oluşturma fonksiyonu
 def create_access_token(data: dict, expires_delta: Optional[datetime.timedelta] = None):
-    to_encode = data.copy()
+    to_encode = {**data, "typ": ACCESS_TOKEN_TYPE}
     if expires_delta:
         expire = datetime.datetime.now(datetime.UTC) + expires_delta # utcnow() yerine now(datetime.UTC) kullanıldı
     else:
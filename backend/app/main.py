@@ -1,10 +1,11 @@
 # backend/app/main.py
-import re, sys, os, time, uuid, json
+import re, sys, os, time, uuid, json, asyncio
 from anyio import to_thread
 from datetime import datetime, timezone
 from typing import Optional
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -14,6 +15,7 @@ if ROOT not in sys.path:
 from common.logging_setup import get_logger
 from common.http_middleware import install_http_logging
 from common.pii import mask_text
+from common.export_store import ExportStore
 
 from .auth import router as auth_router, get_current_user
 from chat.chat_history import (
@@ -21,11 +23,16 @@ from chat.chat_history import (
     save_message_sync,
     ensure_session_exists_sync,
     update_session_updated_at_sync,
+    archive_inactive_chats_sync,
 )
 from agent.AdvancedAgent import agent_handle_message_async
 from mcp_server.tools.general_tools import GeneralTools
 from mcp_server.data.sqlite_repo import SQLiteRepository
-from config_local import DB_PATH
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+from mcp_server.data.migrations import run_migrations
+from mcp_server.data.id_gen import acquire_node_lease
+from mcp_server.tools.payment_tools import PaymentService
+from config_local import DB_PATH, SECRET_KEY
 
 app = FastAPI(title="InterChat API", description="InterChat- Modül 1", version="1.0.0")
 
@@ -48,6 +55,15 @@ app.add_middleware(
 app.include_router(chat_router)
 app.include_router(auth_router)
 
+# Sohbet arşiv turunun aralığı (sn); ilk tur başlangıçta çalışır
+CHAT_ARCHIVE_INTERVAL_S = float(os.getenv("CHAT_ARCHIVE_INTERVAL_S", "3600"))
+
+# MCP tool'larının yazdığı CSV/XLSX dosyaları (aynı EXPORT_DIR)
+exports = ExportStore()
+
+# Onay kartından gelen toplu transfer onayı LLM'e uğramadan buradan işlenir
+payments = PaymentService(SQLitePaymentRepository(DB_PATH), secret_key=SECRET_KEY)
+
 def _strip_think(text: str) -> str:
     if not isinstance(text, str):
         return text
@@ -60,6 +76,9 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     chat_id: Optional[str] = None
 
+class BatchConfirmRequest(BaseModel):
+    confirm_token: str
+
 class ChatResponse(BaseModel):
     session_id: str
     message_id: str
@@ -68,6 +87,38 @@ class ChatResponse(BaseModel):
     ui_component: Optional[dict] = None
     chat_id: str
 
+@app.on_event("startup")
+async def run_bank_migrations():
+    # Banka DB şeması/indeksleri başlangıçta bir kez (istek yolunda DDL yok)
+    try:
+        report = await to_thread.run_sync(run_migrations, DB_PATH)
+        log.info("db_migrations", extra={"event": "db_migrations", "meta": report})
+        # toplu transfer onayı bu süreçte id üretir → MCP server'dan farklı bir node kirala
+        node = await to_thread.run_sync(acquire_node_lease, DB_PATH)
+        log.info("id_node_lease", extra={"event": "id_node_lease", "meta": {"node": node}})
+    except Exception as e:
+        log.error("db_migrations_error", extra={"event": "db_migrations_error", "error": str(e)})
+
+async def _archive_loop():
+    # Hareketsiz sohbetleri periyodik olarak soğuk depolamaya taşı (sqlite senkron → threadpool)
+    while True:
+        try:
+            report = await to_thread.run_sync(archive_inactive_chats_sync)
+            log.info("chat_archive_run", extra={"event": "chat_archive_run", "meta": report})
+        except Exception as e:
+            log.error("chat_archive_error", extra={"event": "chat_archive_error", "error": str(e)})
+        await asyncio.sleep(CHAT_ARCHIVE_INTERVAL_S)
+
+@app.on_event("startup")
+async def start_chat_archiver():
+    app.state.archive_task = asyncio.create_task(_archive_loop())
+
+@app.on_event("shutdown")
+async def stop_chat_archiver():
+    task = getattr(app.state, "archive_task", None)
+    if task is not None:
+        task.cancel()
+
 @app.get("/")
 async def root():
     return {"message": "InterChat API - InterChat Chatbot"}
@@ -218,3 +269,75 @@ async def get_user_accounts(current_user: int = Depends(get_current_user)):
             "user_id": current_user
         })
         return {"error": "Hesaplar alınırken bir hata oluştu"}
+
+# İşlem listesi "daha fazla göster": sonraki sayfa LLM'e uğramadan doğrudan repo'dan
+@app.get("/accounts/{account_id}/transactions")
+async def get_account_transactions(
+    account_id: int,
+    cursor: str,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    limit: int = 50,
+    current_user: int = Depends(get_current_user),
+):
+    """
+    transactions_list kartındaki next_cursor ile sonraki sayfa. from_date / to_date / limit kartın
+    ilk sorgusundakilerle aynı olmalıdır; cursor başka hesap veya aralıkla kullanılırsa 400 döner.
+    Hesap oturumdaki müşteriye ait değilse sorgu boş döner (repo customer_id ile filtreler).
+    """
+    repo = SQLiteRepository(DB_PATH)
+    try:
+        page = await to_thread.run_sync(
+            lambda: repo.list_transactions_page(account_id, current_user, from_date, to_date,
+                                                max(1, min(int(limit), 500)), cursor)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [{
+        "id": r.get("txn_id"),
+        "datetime": r.get("txn_date"),
+        "amount": r.get("amount"),
+        "amount_formatted": f"{float(r['amount']):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+                            if r.get("amount") is not None else None,
+        "currency": r.get("currency") or "TRY",
+        "type": r.get("txn_type"),
+        "description": r.get("description"),
+        "balance_after": r.get("balance_after"),
+        "account_id": r.get("account_id") or account_id,
+    } for r in page["transactions"]]
+    return {"account_id": account_id, "items": items, "next_cursor": page["next_cursor"]}
+
+# Export indirme endpoint'i
+@app.get("/exports/{handle}")
+async def download_export(handle: str, current_user: int = Depends(get_current_user)):
+    """
+    MCP tool'larının hazırladığı export dosyasını parça parça akıtır (sabit bellek).
+    Handle kısa ömürlüdür; müşteriye ait export'u yalnızca o müşteri indirebilir.
+    """
+    found = exports.open(handle, owner_id=current_user)
+    if not found:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı veya süresi doldu")
+    path, meta = found
+    log.info("export_download", extra={"event": "export_download", "user_id": current_user,
+                                       "meta": {"format": meta["format"], "rows": meta["rows"], "bytes": meta["bytes"]}})
+    return StreamingResponse(
+        exports.iter_file(path),
+        media_type=meta["media_type"],
+        headers={
+            "Content-Disposition": f'attachment; filename="{meta["filename"]}"',
+            "Content-Length": str(meta["bytes"]),
+        },
+    )
+
+# Toplu transfer onayı (payment_batch_confirmation kartı)
+@app.post("/payments/batch/confirm")
+async def confirm_payment_batch(request: BatchConfirmRequest, current_user: int = Depends(get_current_user)):
+    """
+    payment_batch önizlemesindeki confirm_token ile toplu transferi işler. Token oturumdaki müşteriye
+    bağlıdır; aynı token ile tekrar çağrı (çift tık, yeniden deneme) ilk sonucu döndürür.
+    """
+    res = await to_thread.run_sync(payments.commit_batch_confirmed, current_user, request.confirm_token)
+    log.info("payment_batch_confirm", extra={"event": "payment_batch_confirm", "user_id": current_user,
+                                              "meta": {"ok": res.get("ok"), "batch_id": res.get("batch_id"),
+                                                       "posted": res.get("posted"), "replayed": res.get("replayed")}})
+    return {"phase": "commit", **res}
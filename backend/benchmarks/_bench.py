@@ -0,0 +1,52 @@
+# backend/benchmarks/_bench.py
+"""
+Benchmark betikleri için ortak yardımcılar.
+
+- Repo kökü ve backend/ import yoluna eklenir
+- bank_copy(): dummy_bank.db'nin migration'ları uygulanmış geçici kopyası; env'ler
+  (BANK_DB_PATH, LOG_DIR, EXPORT_DIR, ID_NODE) modüller import edilmeden önce ona yönlendirilir
+- per_call(): bir çağrının ortalama süresi (µs)
+
+Betikler tek başına çalışır:  python backend/benchmarks/bench_<konu>.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+for _p in (REPO_DIR, BACKEND_DIR):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+SOURCE_DB = os.path.join(BACKEND_DIR, "dummy_bank.db")
+WORK_DIR = tempfile.mkdtemp(prefix="bank-bench-")
+os.environ.setdefault("ID_NODE", "1")
+os.environ.setdefault("LOG_DIR", os.path.join(WORK_DIR, "logs"))
+os.environ.setdefault("EXPORT_DIR", os.path.join(WORK_DIR, "exports"))
+os.environ.setdefault("BANK_DB_PATH", os.path.join(WORK_DIR, "bank.db"))
+os.environ.setdefault("CHAT_DB_PATH", os.path.join(WORK_DIR, "chat.db"))
+
+
+def bank_copy(name: str = "bank.db", migrate: bool = True) -> str:
+    path = os.path.join(WORK_DIR, name)
+    shutil.copyfile(SOURCE_DB, path)
+    if migrate:
+        from mcp_server.data.migrations import run_migrations
+        run_migrations(path)
+    return path
+
+
+# server.py ve config_local import anında BANK_DB_PATH'i okur; varsayılan kopya hazır olsun
+if not os.path.exists(os.environ["BANK_DB_PATH"]):
+    shutil.copyfile(SOURCE_DB, os.environ["BANK_DB_PATH"])
+
+
+def per_call(fn, n: int, *args, **kwargs) -> float:
+    """fn(*args, **kwargs)'ı n kez çağırır; çağrı başına ortalama süre (µs)."""
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(*args, **kwargs)
+    return (time.perf_counter() - t0) / n * 1e6
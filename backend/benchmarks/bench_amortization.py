@@ -0,0 +1,181 @@
+# backend/benchmarks/bench_amortization.py
+"""
+Ödeme planı: eski ay ay döngü (user-041 öncesi) ile amortization.py motoru.
+%42 yıllık faiz, n=360 ve 480; tam plan (loan_amortization_schedule) ve 24 satırlık sayfa
+(interest_compute(schedule=True)). Eski tarafta yalnızca satır döngüsü, motor tarafında tool
+çağrısının tamamı ölçülür (özet ve oran çözümleme dahil). Ayrıca rastgele planlarda 60 haneli
+Decimal referansa göre farklı satır sayısı ve en büyük fark raporlanır.
+Olaylı simülasyon: 480 ay, 100 olay (erken ödeme / faiz / vade değişikliği) — ay ay döngü ile
+loan_prepayment_simulate (olaysız temel plan + senaryo + 24 satırlık sayfa) karşılaştırılır.
+"""
+import random
+from decimal import Decimal, localcontext
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.calculation_tools import CalculationTools
+
+KEYS = ("installment", "interest", "principal", "remaining")
+SIM_EVENTS, SIM_TERM = 100, 480
+
+
+def legacy_schedule(principal, annual_rate, n, limit=None):
+    """Karşılaştırma için user-041 öncesi döngü (satırlar float ile taşınır)."""
+    i = annual_rate / 12.0
+    if i == 0:
+        installment = principal / n
+    else:
+        factor = (1.0 + i) ** n
+        installment = principal * (i * factor) / (factor - 1.0)
+    remaining, rows = float(principal), []
+    for month in range(1, n + 1):
+        interest = remaining * i
+        principal_part = installment - interest
+        installment_eff = installment
+        if month == n:
+            principal_part = remaining
+            installment_eff = principal_part + interest
+        remaining = max(0.0, remaining - principal_part)
+        if limit is None or month <= limit:
+            rows.append({"month": month, "installment": round(installment_eff, 2), "interest": round(interest, 2),
+                         "principal": round(principal_part, 2), "remaining": round(remaining, 2)})
+    return rows
+
+
+def reference_schedule(principal, annual_rate, n):
+    with localcontext() as ctx:
+        ctx.prec = 60
+        P, i = Decimal(repr(principal)), Decimal(repr(annual_rate)) / 12
+        A = P / n if i == 0 else P * i * (1 + i) ** n / ((1 + i) ** n - 1)
+        rows, rem = [], P
+        for k in range(1, n + 1):
+            interest = rem * i
+            principal_part, payment = A - interest, A
+            if k == n:
+                principal_part, payment = rem, rem + interest
+            rem = max(Decimal(0), rem - principal_part)
+            rows.append({"installment": round(float(payment), 2), "interest": round(float(interest), 2),
+                         "principal": round(float(principal_part), 2), "remaining": round(float(rem), 2)})
+        return rows
+
+
+def accuracy(tools):
+    rnd = random.Random(1)
+    stats = {"legacy": [0, 0.0], "engine": [0, 0.0]}
+    total = 0
+    for _ in range(200):
+        p = rnd.choice([1000, 50000, 123456.78, 2_500_000])
+        r = rnd.choice([0, 0.0001, 0.12, 0.36, 0.55, 1.2])
+        n = rnd.choice([1, 2, 12, 36, 120, 360, 480])
+        ref = reference_schedule(p, r, n)
+        total += n
+        for label, rows in (("legacy", legacy_schedule(p, r, n)),
+                            ("engine", tools.loan_amortization_schedule(p, r, n)["schedule"])):
+            diffs = [max(abs(a[k] - b[k]) for k in KEYS) for a, b in zip(rows, ref)]
+            stats[label][0] += sum(d > 1e-9 for d in diffs)
+            stats[label][1] = max(stats[label][1], max(diffs))
+    for label, (rows, max_diff) in stats.items():
+        print(f"{label:<7} {rows:5d} / {total} rows differ from Decimal reference, max diff {max_diff:.2f}")
+
+
+def sim_events(seed=7):
+    """Tool biçiminde SIM_EVENTS olay; vade değişiklikleri planı 480 ay civarında tutar."""
+    rnd = random.Random(seed)
+    events = []
+    for month in sorted(rnd.randint(1, SIM_TERM - 1) for _ in range(SIM_EVENTS)):
+        kind = rnd.choice(["prepayment", "rate_change", "term_change"])
+        ev = {"month": month, "type": kind}
+        if kind == "prepayment":
+            ev.update(amount=rnd.uniform(100, 5_000), mode=rnd.choice(["reduce_term", "reduce_installment"]))
+        elif kind == "rate_change":
+            ev["annual_rate"] = rnd.uniform(0.1, 0.6)
+        else:
+            ev["term"] = SIM_TERM - month
+        events.append(ev)
+    return events
+
+
+def loop_simulate(principal, annual_rate, n, events, limit=24):
+    """Karşılaştırma için ay ay döngü: temel plan + olaylı plan, ilk olaydan sonraki `limit` satır."""
+    def run(evs):
+        i = annual_rate / 12.0
+        B, left = float(principal), n
+        A = B / left if i == 0 else B * i / (1 - (1 + i) ** -left)
+        month = paid = interest = 0
+        rows, pending = [], sorted(evs, key=lambda e: e["month"])
+        while True:
+            while pending and pending[0]["month"] == month:
+                ev = pending.pop(0)
+                if left <= 0:
+                    continue
+                if ev["type"] == "prepayment":
+                    extra = min(ev["amount"], B)
+                    B -= extra
+                    paid += extra
+                    if B <= 1e-9:
+                        B, left = 0.0, 0
+                        continue
+                    if ev["mode"] == "reduce_term":
+                        left, b = 0, B
+                        while True:  # taksit sabit: kapanana kadar say
+                            left += 1
+                            if b * (1 + i) <= A:
+                                break
+                            b = b * (1 + i) - A
+                        continue
+                elif ev["type"] == "rate_change":
+                    i = ev["annual_rate"] / 12.0
+                else:
+                    left = ev["term"]
+                A = B / left if i == 0 else B * i / (1 - (1 + i) ** -left)
+            if left <= 0:
+                break
+            month += 1
+            int_m = B * i
+            pay = B + int_m if left == 1 else A
+            B = max(0.0, B - (pay - int_m))
+            paid += pay
+            interest += int_m
+            left -= 1
+            rows.append({"month": month, "installment": round(pay, 2), "interest": round(int_m, 2),
+                         "principal": round(pay - int_m, 2), "remaining": round(B, 2)})
+        return month, paid, interest, rows
+
+    base = run([])
+    sim = run(events)
+    first = min(e["month"] for e in events)
+    return base[:3], sim[:3], sim[3][first:first + limit]
+
+
+def simulation(tools):
+    events = sim_events()
+    res = tools.loan_prepayment_simulate(2_500_000, SIM_TERM, events, rate=0.42)
+    assert "error" not in res, res
+    _, (term, paid, interest), rows = loop_simulate(2_500_000, 0.42, SIM_TERM, events)
+    assert res["scenario"]["term_months"] == term and [r["month"] for r in res["schedule"]] == \
+        [r["month"] for r in rows]
+    loop_ms = _bench.per_call(loop_simulate, 50, 2_500_000, 0.42, SIM_TERM, events) / 1000
+    tool_ms = _bench.per_call(tools.loan_prepayment_simulate, 50, 2_500_000, SIM_TERM, events, rate=0.42) / 1000
+    print(f"{SIM_EVENTS} events / {SIM_TERM} months (scenario {term} months): month loop {loop_ms:.2f} ms -> "
+          f"loan_prepayment_simulate {tool_ms:.2f} ms   "
+          f"total payment diff {abs(res['scenario']['total_payment'] - paid):.2f}, "
+          f"interest diff {abs(res['scenario']['total_interest'] - interest):.2f}")
+
+
+def main():
+    tools = CalculationTools(SQLiteRepository(_bench.bank_copy("amortization.db")))
+    accuracy(tools)
+    for n in (360, 480):
+        legacy_full = _bench.per_call(legacy_schedule, 300, 250_000, 0.42, n) / 1000
+        engine_full = _bench.per_call(tools.loan_amortization_schedule, 300, 250_000, 0.42, n) / 1000
+        legacy_page = _bench.per_call(legacy_schedule, 300, 250_000, 0.42, n, limit=24) / 1000
+        engine_page = _bench.per_call(tools.interest_compute, 300, "loan", 250_000, n, "monthly", rate=0.42,
+                                      term_unit="months", schedule=True, schedule_limit=24) / 1000
+        print(f"n={n}: full schedule {legacy_full:.2f} -> {engine_full:.2f} ms   "
+              f"24-row page {legacy_page:.2f} -> {engine_page:.2f} ms")
+    simulation(tools)
+
+
+if __name__ == "__main__":
+    main()
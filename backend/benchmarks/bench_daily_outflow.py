@@ -0,0 +1,76 @@
+# backend/benchmarks/bench_daily_outflow.py
+"""
+Günlük çıkış toplamı: eski payments SUM sorgusu (034 indeksiyle) ile daily_outflow PK araması.
+Kopya DB'ye 100k ödeme (%10'u posted değil) eklenir; backfill süresi ve 50 rastgele
+(müşteri, gün) için iki yolun aynı toplamı verdiği de kontrol edilir.
+"""
+import random
+import sqlite3
+import time
+
+import _bench
+
+from mcp_server.data.migrations import run_migrations
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+
+PAYMENTS = 100_000
+LEGACY_SUM = """
+SELECT COALESCE(SUM(amount), 0) FROM payments
+WHERE status='posted'
+  AND from_account IN (SELECT account_id FROM accounts WHERE customer_id=?)
+  AND substr(created_at,1,10)=?
+"""
+
+
+def main():
+    rnd = random.Random(0)
+    db = _bench.bank_copy("outflow.db", migrate=False)
+    con = sqlite3.connect(db)
+    accounts = con.execute("SELECT account_id, customer_id FROM accounts").fetchall()
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS payments (
+      payment_id TEXT PRIMARY KEY, customer_id INTEGER NOT NULL, from_account INTEGER NOT NULL,
+      to_account INTEGER NOT NULL, amount REAL NOT NULL, currency TEXT NOT NULL, fee REAL NOT NULL DEFAULT 0,
+      note TEXT, status TEXT NOT NULL, created_at TEXT NOT NULL, posted_at TEXT,
+      from_balance_after REAL, to_balance_after REAL
+    )""")
+    rows = []
+    for i in range(PAYMENTS):
+        acc, cust = rnd.choice(accounts)
+        day = f"2025-{rnd.randint(1, 9):02d}-{rnd.randint(1, 28):02d}T10:00:00Z"
+        status = "failed" if rnd.random() < 0.1 else "posted"
+        rows.append((f"P{i}", cust, acc, rnd.choice(accounts)[0], round(rnd.uniform(1, 500), 2), "TRY", 0,
+                     None, status, day, day, 0, 0))
+    con.executemany("INSERT INTO payments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+    t0 = time.perf_counter()
+    run_migrations(db)
+    print(f"migrations incl. daily_outflow backfill of {PAYMENTS} payments: {time.perf_counter() - t0:.2f} s")
+
+    repo = SQLitePaymentRepository(db)
+    con = sqlite3.connect(db)
+    probes = [(cust, f"2025-{rnd.randint(1, 9):02d}-{rnd.randint(1, 28):02d}") for _, cust in rnd.sample(accounts, 50)]
+    mismatched = sum(
+        abs(con.execute(LEGACY_SUM, p).fetchone()[0] - repo.get_daily_out_total(*p)) > 1e-6 for p in probes)
+    print("mismatched probes:", mismatched)
+
+    rounds = probes * 20
+    t0 = time.perf_counter()
+    for p in rounds:
+        con.execute(LEGACY_SUM, p).fetchone()
+    legacy_us = (time.perf_counter() - t0) / len(rounds) * 1e6
+    t0 = time.perf_counter()
+    for p in rounds:
+        con.execute("SELECT total FROM daily_outflow WHERE customer_id=? AND day=?", p).fetchone()
+    new_us = (time.perf_counter() - t0) / len(rounds) * 1e6
+    plan = [r[3] for r in con.execute(
+        "EXPLAIN QUERY PLAN SELECT total FROM daily_outflow WHERE customer_id=? AND day=?", probes[0])]
+    con.close()
+    print(f"raw query: payments SUM {legacy_us:.0f} us -> daily_outflow {new_us:.0f} us   plan: {plan}")
+    print(f"get_daily_out_total() incl. connect: {_bench.per_call(repo.get_daily_out_total, 1000, *probes[0]):.0f} us")
+
+
+if __name__ == "__main__":
+    main()
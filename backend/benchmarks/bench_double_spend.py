@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_double_spend.py
+"""
+Çift harcama stres testi: N thread aynı hesaptan (19 → 21, müşteri 1) 100 TRY'lik transferler yapar.
+Eski yol (deferred BEGIN + SELECT + Python'da bakiye kontrolü + UPDATE, user-036 öncesi) ile
+korumalı düşüm (BEGIN IMMEDIATE + UPDATE ... WHERE balance >= ? RETURNING, busy'de retry).
+Bakiye 1000 (yarış) ve 100000 (yalnızca kilit çakışması) için; bakiye eksiye düşmemeli, toplam korunmalı.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import _bench
+
+from mcp_server.data.id_gen import new_id
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+
+THREADS, TRANSFERS, AMOUNT = 16, 20, 100.0
+CUSTOMER, SRC, DST = 1, 19, 21
+
+
+def legacy_insert_payment_posted(repo, customer_id, from_account, to_account, amount, currency, fee, note):
+    """Karşılaştırma için user-036 öncesi yol (payment_id çakışmasın diye new_id ile)."""
+    now = repo._now()
+    con = repo._connect()
+    try:
+        con.isolation_level = None
+        cur = con.cursor()
+        cur.execute("BEGIN")
+        r = cur.execute("SELECT balance FROM accounts WHERE account_id=?", (from_account,)).fetchone()
+        if not r:
+            raise ValueError("from_account_not_found")
+        if float(r[0]) < amount + fee:
+            raise ValueError("insufficient_funds")
+        cur.execute("UPDATE accounts SET balance = balance - ? WHERE account_id=?", (amount + fee, from_account))
+        cur.execute("UPDATE accounts SET balance = balance + ? WHERE account_id=?", (amount, to_account))
+        from_after = float(cur.execute("SELECT balance FROM accounts WHERE account_id=?", (from_account,)).fetchone()[0])
+        to_after = float(cur.execute("SELECT balance FROM accounts WHERE account_id=?", (to_account,)).fetchone()[0])
+        cur.execute("""
+          INSERT INTO daily_outflow(customer_id, day, total, count)
+          SELECT customer_id, ?, ?, 1 FROM accounts WHERE account_id=?
+          ON CONFLICT(customer_id, day) DO UPDATE SET total = total + excluded.total, count = count + 1
+        """, (now[:10], amount, from_account))
+        cur.execute("""
+          INSERT INTO payments(payment_id, customer_id, from_account, to_account, amount, currency, fee, note, status,
+                               created_at, posted_at, from_balance_after, to_balance_after)
+          VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'posted', ?, ?, ?, ?)
+        """, (new_id("TX"), customer_id, from_account, to_account, amount, currency, fee, note, now, now,
+              from_after, to_after))
+        cur.execute("COMMIT")
+    except Exception:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+
+
+def run(mode: str, balance: float) -> None:
+    db = _bench.bank_copy(f"double_spend_{mode}_{int(balance)}.db")
+    repo = SQLitePaymentRepository(db)
+    post = repo.insert_payment_posted if mode == "guarded" else \
+        lambda *a: legacy_insert_payment_posted(repo, *a)
+    con = sqlite3.connect(db)
+    con.execute("UPDATE accounts SET balance = ? WHERE account_id = ?", (balance, SRC))
+    con.commit()
+    total_before = con.execute("SELECT SUM(balance) FROM accounts").fetchone()[0]
+
+    outcomes, lock = Counter(), threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def worker():
+        start.wait()
+        for _ in range(TRANSFERS):
+            try:
+                post(CUSTOMER, SRC, DST, AMOUNT, "TRY", 0.0, "çift harcama")
+                out = "ok"
+            except (ValueError, sqlite3.OperationalError) as e:
+                out = str(e)
+            with lock:
+                outcomes[out] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(THREADS)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    final = con.execute("SELECT balance FROM accounts WHERE account_id = ?", (SRC,)).fetchone()[0]
+    conserved = abs(con.execute("SELECT SUM(balance) FROM accounts").fetchone()[0] - total_before) < 1e-6
+    con.close()
+    print(f"{mode:<8} balance {balance:>9,.0f}: {dict(outcomes)}  final {final:,.0f}  "
+          f"conserved={conserved}  {elapsed * 1000:.0f} ms")
+
+
+def main():
+    print(f"{THREADS} threads x {TRANSFERS} transfers of {AMOUNT:.0f} from account {SRC}")
+    for balance in (1000.0, 100_000.0):
+        for mode in ("legacy", "guarded"):
+            run(mode, balance)
+
+
+if __name__ == "__main__":
+    main()
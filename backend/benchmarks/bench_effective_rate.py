@@ -0,0 +1,45 @@
+# backend/benchmarks/bench_effective_rate.py
+"""
+loan_effective_cost: 10 anapara × 10 vade (3..240 ay) × (9 oran + "loan" ürün oranı) = 1000 teklif.
+Tool çağrısının tamamı ve yalnızca irr() (tek matris) ile satır satır irr() karşılaştırılır.
+"""
+import time
+
+import numpy as np
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.calculation_tools import CalculationTools
+from mcp_server.tools.effective_rate import irr, loan_cashflows
+
+PRINCIPALS = np.linspace(10_000, 500_000, 10).tolist()
+TERMS = [3, 6, 12, 18, 24, 36, 48, 60, 120, 240]
+RATES = np.linspace(0.1, 0.6, 9).tolist()
+REPS = 10
+
+
+def main():
+    tools = CalculationTools(SQLiteRepository(_bench.bank_copy("effective_rate.db")))
+    kwargs = dict(principals=PRINCIPALS, terms=TERMS, rates=RATES, products=["loan"],
+                  fee_codes=["credit_check"], upfront_fee_rate=0.005)
+    res = tools.loan_effective_cost(**kwargs)
+    assert "error" not in res, res
+    cells = len(PRINCIPALS) * len(TERMS) * len(res["rates"])
+    tool_ms = _bench.per_call(tools.loan_effective_cost, REPS, **kwargs) / 1000
+    print(f"loan_effective_cost: {cells} offers, {tool_ms:.1f} ms per call, max iterations {res['iterations_max']}")
+
+    inst = np.asarray(res["installment"], dtype=float).ravel()
+    P = np.repeat(PRINCIPALS, len(TERMS) * len(res["rates"]))
+    n = np.tile(np.repeat(TERMS, len(res["rates"])), len(PRINCIPALS))
+    cf = loan_cashflows(P, inst, n, upfront_fee=10 + 0.005 * P)
+    matrix_ms = _bench.per_call(irr, REPS, cf) / 1000
+    t0 = time.perf_counter()
+    for row in cf:
+        irr(row)
+    rowwise_ms = (time.perf_counter() - t0) * 1000
+    print(f"irr(): one {cf.shape} matrix {matrix_ms:.1f} ms vs row by row {rowwise_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# backend/benchmarks/bench_http_middleware.py
+"""
+CorrelationLoggingMiddleware: BaseHTTPMiddleware tabanlı eski sürüm ile saf ASGI sürümü.
+httpx ASGITransport, ardışık GET'ler, log handler'ı NullHandler (ölçülen yalnızca middleware).
+Ayrıca streaming yanıtta ttfb_ms / duration_ms ayrımını gösterir.
+"""
+import asyncio
+import logging
+import time
+import uuid
+
+import _bench  # noqa: F401  (import yolu)
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from common.http_middleware import CorrelationLoggingMiddleware
+
+REQUESTS = 3000
+
+
+class LegacyCorrelationLoggingMiddleware(BaseHTTPMiddleware):
+    """Karşılaştırma için user-029 öncesi uygulama (call_next + response.headers)."""
+
+    def __init__(self, app, logger=None):
+        super().__init__(app)
+        self.log = logger
+
+    async def dispatch(self, request, call_next):
+        corr_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        request.state.corr_id = corr_id
+        t0 = time.perf_counter()
+        response = None
+        try:
+            response = await call_next(request)
+            return response
+        finally:
+            if response is not None and "X-Request-ID" not in response.headers:
+                response.headers["X-Request-ID"] = corr_id
+            self.log.info("http_request", extra={
+                "event": "http_request", "corr_id": corr_id,
+                "meta": {"path": request.url.path, "method": request.method,
+                         "status": getattr(response, "status_code", None)},
+                "duration_ms": int((time.perf_counter() - t0) * 1000),
+            })
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_app(middleware, logger) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def gen():
+            for _ in range(4):
+                yield b"x"
+                await asyncio.sleep(0.1)
+        return StreamingResponse(gen())
+
+    app.add_middleware(middleware, logger=logger)
+    return app
+
+
+async def throughput(middleware) -> float:
+    log = logging.getLogger(f"bench.{middleware.__name__}")
+    log.addHandler(logging.NullHandler())
+    log.propagate = False
+    app = make_app(middleware, log)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        await c.get("/ping")
+        t0 = time.perf_counter()
+        for _ in range(REQUESTS):
+            await c.get("/ping")
+        return REQUESTS / (time.perf_counter() - t0)
+
+
+async def streaming_timings() -> dict:
+    cap = _Capture()
+    log = logging.getLogger("bench.stream")
+    log.addHandler(cap)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    app = make_app(CorrelationLoggingMiddleware, log)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        r = await c.get("/stream")
+    rec = cap.records[-1]
+    return {"x_request_id": r.headers.get("x-request-id"), "ttfb_ms": rec.meta["ttfb_ms"],
+            "duration_ms": rec.duration_ms}
+
+
+def main():
+    for name, mw in (("BaseHTTPMiddleware", LegacyCorrelationLoggingMiddleware),
+                     ("pure ASGI", CorrelationLoggingMiddleware)):
+        print(f"{name:<20} {asyncio.run(throughput(mw)):8.0f} req/s")
+    print("streaming (4 x 100 ms):", asyncio.run(streaming_timings()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_payment_batch.py
+"""
+N adet transfer: ardışık payment_request çağrıları ile tek payment_batch (preview + onaylı commit).
+Müşteri 32'nin kendi hesapları arasında 10 TRY'lik transferler, MCP aracı fonksiyonları doğrudan
+çağrılır (log_tool sarmalayıcısı dahil; araç log'ları kapalı).
+"""
+import logging
+import os
+import sqlite3
+import time
+
+import _bench
+
+os.environ["BANK_DB_PATH"] = _bench.bank_copy("batch.db")
+
+from mcp_server import server  # noqa: E402
+
+CUSTOMER, SRC, DST = 32, 1, 2
+
+
+def _tool(name):
+    t = getattr(server, name)
+    return getattr(t, "fn", t)
+
+
+def _json(res):
+    return res["data"]["value"][0]["json"]
+
+
+payment_request, payment_batch = _tool("payment_request"), _tool("payment_batch")
+
+
+def sequential(n: int, with_token: bool) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        if with_token:
+            pre = _json(payment_request(SRC, DST, 10.0, CUSTOMER))
+            res = _json(payment_request(SRC, DST, 10.0, CUSTOMER, confirm=True, confirm_token=pre["confirm_token"]))
+        else:
+            res = _json(payment_request(SRC, DST, 10.0, CUSTOMER, confirm=True))
+        assert res["ok"], res
+    return (time.perf_counter() - t0) * 1000
+
+
+def batch(n: int) -> float:
+    transfers = [{"from_account": SRC, "to_account": DST, "amount": 10.0}] * n
+    t0 = time.perf_counter()
+    pre = _json(payment_batch(transfers, CUSTOMER))
+    res = _json(payment_batch([], CUSTOMER, confirm=True, confirm_token=pre["confirm_token"]))
+    elapsed = (time.perf_counter() - t0) * 1000
+    assert res["ok"] and res["posted"] == n, res
+    return elapsed
+
+
+def main():
+    logging.getLogger("mcp_server").disabled = True
+    con = sqlite3.connect(os.environ["BANK_DB_PATH"])
+    con.execute("UPDATE accounts SET balance = 1e7 WHERE account_id IN (?, ?)", (SRC, DST))
+    con.execute("DELETE FROM daily_outflow")  # limit ölçümü kesmesin
+    con.commit()
+    for n in (50, 100):
+        seq = sequential(n, with_token=False)
+        seq_tok = sequential(n, with_token=True)
+        con.execute("DELETE FROM daily_outflow")
+        con.commit()
+        b = batch(n)
+        con.execute("DELETE FROM daily_outflow")
+        con.commit()
+        print(f"N={n:<4} sequential {seq:7.1f} ms  sequential+token {seq_tok:7.1f} ms  "
+              f"payment_batch {b:6.1f} ms  (x{seq / b:.0f})")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
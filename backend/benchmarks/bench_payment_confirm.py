@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_payment_confirm.py
+"""
+Onaylı tekil transfer başına maliyet: token'sız commit (create: precheck + yazma) ile onay token'lı
+commit (commit_confirmed: precheck yok, korumalı UPDATE). Doğrudan yazma modu (writer yok).
+Transfer başına açılan bağlantı ve çalışan SQL ifadesi sayısı da raporlanır.
+"""
+import sqlite3
+import time
+
+import _bench
+
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+from mcp_server.tools.payment_tools import PaymentService
+
+CUSTOMER, SRC, DST = 1, 19, 21
+N = 300
+
+_connect = sqlite3.connect
+_counts = {"connections": 0, "statements": 0}
+
+
+def _counting_connect(*args, **kwargs):
+    con = _connect(*args, **kwargs)
+    _counts["connections"] += 1
+    con.set_trace_callback(lambda _sql: _counts.__setitem__("statements", _counts["statements"] + 1))
+    return con
+
+
+def measure(label, fn, args_list):
+    _counts.update(connections=0, statements=0)
+    sqlite3.connect = _counting_connect
+    try:
+        for args in args_list[:20]:
+            assert fn(*args)["ok"]
+    finally:
+        sqlite3.connect = _connect
+    conns, stmts = _counts["connections"] / 20, _counts["statements"] / 20
+
+    t0 = time.perf_counter()
+    for args in args_list[20:]:
+        assert fn(*args)["ok"]
+    ms = (time.perf_counter() - t0) / (len(args_list) - 20) * 1000
+    print(f"{label:<7} {ms:5.2f} ms/transfer  {conns:.0f} connections  {stmts:.0f} statements")
+
+
+def main():
+    db = _bench.bank_copy("confirm.db")
+    con = _connect(db)
+    con.execute("UPDATE accounts SET balance = 1e7 WHERE account_id IN (?, ?)", (SRC, DST))
+    con.commit()
+    con.close()
+    svc = PaymentService(SQLitePaymentRepository(db), secret_key="bench-secret")
+
+    measure("legacy", svc.create, [(CUSTOMER, SRC, DST, 10.0, "TRY", "bench")] * N)
+
+    # token'lar preview'da (ölçüm dışında) üretilir; commit ölçülür
+    tokens = [svc.issue_confirm_token(CUSTOMER, svc.precheck(SRC, DST, 10.0, "TRY", "bench", CUSTOMER))
+              for _ in range(N)]
+    measure("token", svc.commit_confirmed, [(CUSTOMER, t, SRC, DST, 10.0) for t in tokens])
+
+
+if __name__ == "__main__":
+    main()
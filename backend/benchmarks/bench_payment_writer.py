@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_payment_writer.py
+"""
+Transfer/s: doğrudan yazma (her transfer kendi BEGIN IMMEDIATE'i) ile PaymentWriter (group commit).
+40 hesap arasında 1 TRY'lik transferler, 1 / 16 / 64 thread. Toplam bakiye korunmalı.
+"""
+import sqlite3
+import threading
+import time
+
+import _bench
+
+from mcp_server.data.payment_writer import PaymentWriter
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+
+TRANSFERS_PER_THREAD = {1: 500, 16: 50, 64: 20}
+
+
+def run(mode: str, threads: int) -> None:
+    db = _bench.bank_copy(f"writer_{mode}_{threads}.db")
+    repo = SQLitePaymentRepository(db)
+    writer = None
+    if mode == "writer":
+        writer = PaymentWriter(db)
+        repo.attach_writer(writer)
+    con = sqlite3.connect(db)
+    accounts = con.execute("SELECT account_id, customer_id FROM accounts ORDER BY account_id LIMIT 40").fetchall()
+    con.execute("UPDATE accounts SET balance = 1e7")
+    con.commit()
+    total_before = con.execute("SELECT SUM(balance) FROM accounts").fetchone()[0]
+
+    n = TRANSFERS_PER_THREAD[threads]
+    errors = []
+
+    def worker(i):
+        src, cust = accounts[i % len(accounts)]
+        dst = accounts[(i + 1) % len(accounts)][0]
+        for _ in range(n):
+            try:
+                repo.insert_payment_posted(cust, src, dst, 1.0, "TRY", 0.0, "bench")
+            except Exception as e:
+                errors.append(str(e))
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    conserved = abs(con.execute("SELECT SUM(balance) FROM accounts").fetchone()[0] - total_before) < 1e-3
+    con.close()
+    extra = ""
+    if writer is not None:
+        stats = writer.stats()
+        writer.stop()
+        extra = f"avg batch {stats['avg_batch']}"
+    print(f"{mode:<7} {threads:>3} threads  {threads * n / elapsed:7.0f} transfers/s  "
+          f"errors={len(errors)} conserved={conserved} {extra}")
+
+
+def main():
+    for threads in (1, 16, 64):
+        for mode in ("direct", "writer"):
+            run(mode, threads)
+
+
+if __name__ == "__main__":
+    main()
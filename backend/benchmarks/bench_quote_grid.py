@@ -0,0 +1,50 @@
+# backend/benchmarks/bench_quote_grid.py
+"""
+loan_quote_grid: ızgara boyutuna göre tool çağrısı (tek broadcasting + hücre başına round) ile
+hücre hücre AnnuitySchedule döngüsü (taksit + total_payment) karşılaştırılır.
+Boyutlar 1 → 1000 hücre (varsayılan LOAN_GRID_MAX_CELLS) ve sınır kaldırılarak 8000 hücre.
+"""
+import numpy as np
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools import calculation_tools as ct
+from mcp_server.tools.amortization import AnnuitySchedule
+from mcp_server.tools.calculation_tools import CalculationTools
+
+SIZES = [(1, 1, 1), (5, 5, 4), (10, 10, 10), (20, 20, 20)]
+
+
+def cell_loop(principals, terms, rates):
+    """Karşılaştırma için hücre başına skaler plan (aynı yuvarlama)."""
+    out = []
+    for p in principals:
+        for n in terms:
+            for r in rates:
+                s = AnnuitySchedule(p, r / 12, n)
+                total = s.total_payment()
+                out.append((round(s.installment, 2), total, round(total - p, 2)))
+    return out
+
+
+def main():
+    tools = CalculationTools(SQLiteRepository(_bench.bank_copy("quote_grid.db")))
+    ct.LOAN_GRID_MAX_CELLS = max(a * b * c for a, b, c in SIZES)
+    for a, b, c in SIZES:
+        principals = np.linspace(10_000, 2_500_000, a).tolist()
+        terms = np.linspace(3, 480, b).round().astype(int).tolist()
+        rates = np.linspace(0.0, 0.6, c).tolist()
+        res = tools.loan_quote_grid(principals, terms, rates=rates)
+        assert "error" not in res, res
+        grid = list(zip(*(np.ravel(res[k]).tolist() for k in ("installment", "total_payment", "total_interest"))))
+        assert grid == cell_loop(principals, terms, rates)
+        reps = max(5, 2000 // (a * b * c))
+        tool_ms = _bench.per_call(tools.loan_quote_grid, reps, principals, terms, rates=rates) / 1000
+        loop_ms = _bench.per_call(cell_loop, reps, principals, terms, rates) / 1000
+        print(f"{a}x{b}x{c} = {a * b * c:5d} cells: loan_quote_grid {tool_ms:7.3f} ms   "
+              f"per-cell AnnuitySchedule {loop_ms:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# backend/benchmarks/bench_rate_resolver.py
+"""
+Faiz oranı çözümleme: eski yol (her çağrıda bağlantı + datetime() ile ORDER BY) ile
+RateResolver bellek indeksi. _resolve_rate_via_repo_or_db(None, "ihtiyaç kredisi", ...) çağrısı.
+"""
+import sqlite3
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+CALLS = 20_000
+PRODUCT = "ihtiyaç kredisi"
+_legacy_columns = {}
+
+
+def legacy_get_interest_rate(db_path: str, product: str) -> float:
+    """Karşılaştırma için user-044 öncesi get_interest_rate (kolon keşfi önbellekli, bağlantı her çağrıda)."""
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    try:
+        cols = _legacy_columns.get(db_path)
+        if cols is None:
+            cols = _legacy_columns[db_path] = {r[1] for r in con.execute("PRAGMA table_info('interest_rates')")}
+        rate_col = "annual_rate" if "annual_rate" in cols else "rate_apy"
+        date_col = "effective_date" if "effective_date" in cols else "updated_at"
+        row = con.execute(f"""
+            SELECT {rate_col} AS rate_value FROM interest_rates
+            WHERE product = ? COLLATE NOCASE
+            ORDER BY COALESCE(datetime({date_col}), datetime('1970-01-01')) DESC, rowid DESC
+            LIMIT 1
+        """, (product,)).fetchone()
+        if not row or row["rate_value"] is None:
+            raise ValueError(f"Interest rate not found for product={product}")
+        value = float(row["rate_value"])
+        return value / 100.0 if rate_col == "rate_apy" else value
+    finally:
+        con.close()
+
+
+def main():
+    db = _bench.bank_copy("rates.db")
+    repo = SQLiteRepository(db)
+    new = repo._resolve_rate_via_repo_or_db(None, PRODUCT, PRODUCT, currency="TRY")[0]
+    assert legacy_get_interest_rate(db, PRODUCT) == new
+
+    legacy_us = _bench.per_call(legacy_get_interest_rate, CALLS, db, PRODUCT)
+    new_us = _bench.per_call(repo._resolve_rate_via_repo_or_db, CALLS, None, PRODUCT, PRODUCT, currency="TRY")
+    print(f"{CALLS} calls: legacy {legacy_us:.1f} us -> RateResolver {new_us:.2f} us per call")
+    print("resolver stats:", repo._rates().stats())
+
+
+if __name__ == "__main__":
+    main()
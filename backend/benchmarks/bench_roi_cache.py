@@ -0,0 +1,31 @@
+# backend/benchmarks/bench_roi_cache.py
+"""
+ROI sonuç önbelleği: önbellek kapalı (her çağrı simülasyon) ile önbellekte isabet (sürüm okuma + kopya).
+run() ve stress_test(), Dengeli Portföy, aylık 1000, 10 yıl, 1000 simülasyon.
+"""
+import logging
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+PORTFOLIO, MONTHLY, YEARS = "Dengeli Portföy", 1000.0, 10
+CALLS = 50
+
+
+def main():
+    logging.getLogger("mcp_server").disabled = True
+    db = _bench.bank_copy("roi_cache.db")
+    uncached = ROISimulatorTool(SQLiteRepository(db), cache_size=0)
+    cached = ROISimulatorTool(SQLiteRepository(db))
+    for kind in ("run", "stress_test"):
+        miss_ms = _bench.per_call(getattr(uncached, kind), CALLS, PORTFOLIO, MONTHLY, YEARS) / 1000
+        assert getattr(cached, kind)(PORTFOLIO, MONTHLY, YEARS) == getattr(uncached, kind)(PORTFOLIO, MONTHLY, YEARS)
+        hit_ms = _bench.per_call(getattr(cached, kind), CALLS, PORTFOLIO, MONTHLY, YEARS) / 1000
+        print(f"{kind}: miss {miss_ms:.1f} ms -> hit {hit_ms:.2f} ms per call")
+    print("cache stats:", cached.cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# backend/benchmarks/bench_roi_compiled.py
+"""
+İstek başına portföy hazırlığı: eski yol (DataFrame filtresi + dizi kurulumu + moment + Cholesky,
+user-050 öncesi) ile yükleme anında derlenmiş tablodan okuma. Simülasyon hariç; Dengeli Portföy.
+"""
+import numpy as np
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.asset_mc import portfolio_moments
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+PORTFOLIO = "Dengeli Portföy"
+CALLS = 5000
+
+
+def legacy_setup(tool, portfolio_name):
+    """Karşılaştırma için user-050 öncesi _portfolio_inputs + moment/Cholesky hesabı."""
+    portfolio_series = tool.df_portfolios[tool.df_portfolios['portfoy_adi'] == portfolio_name]
+    if portfolio_series.empty:
+        return {"error": f"Portfolio '{portfolio_name}' not found."}
+    asset_mix = portfolio_series.iloc[0]['parsed_allocation']
+    assets = list(asset_mix)
+    idx = np.array([tool._asset_index[a] for a in assets])
+    weights = np.array([asset_mix[a] for a in assets]) / 100.0
+    annual_returns = tool.df_assets['ortalama_yillik_getiri'].to_numpy(dtype=float)[idx] / 100.0
+    annual_vols = tool.df_assets['yillik_volatilite'].to_numpy(dtype=float)[idx] / 100.0
+    corr = tool._corr[np.ix_(idx, idx)]
+    moments = portfolio_moments(weights, annual_returns, annual_vols, corr)
+    return assets, idx, weights, moments, np.linalg.cholesky(corr)
+
+
+def compiled_setup(data, portfolio_name):
+    row, assets, idx, weights = data._portfolio_inputs(portfolio_name)
+    return (assets, idx, weights, (data._portfolio_returns[row], data._portfolio_vols[row],
+                                   data._risk_shares[row, idx]), data._portfolio_chol[row])
+
+
+def main():
+    roi = ROISimulatorTool(SQLiteRepository(_bench.bank_copy("roi_compiled.db")), cache_size=0)
+    data = roi._data
+    old, new = legacy_setup(data, PORTFOLIO), compiled_setup(data, PORTFOLIO)
+    assert old[0] == new[0] and np.allclose(old[2], new[2]) and np.allclose(old[3][1], new[3][1])
+
+    legacy_us = _bench.per_call(legacy_setup, CALLS, data, PORTFOLIO)
+    compiled_us = _bench.per_call(compiled_setup, CALLS, data, PORTFOLIO)
+    print(f"per-request setup: legacy {legacy_us:.0f} us -> compiled {compiled_us:.1f} us")
+    run_ms = _bench.per_call(roi.run, 200, PORTFOLIO, 1000, 1, num_simulations=100) / 1000
+    print(f"run(1 year, 100 simulations, cache off): {run_ms:.2f} ms per call")
+
+
+if __name__ == "__main__":
+    main()
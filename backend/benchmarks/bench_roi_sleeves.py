@@ -0,0 +1,59 @@
+# backend/benchmarks/bench_roi_sleeves.py
+"""
+ROI simülasyonu: eski tek varlıklı ay döngüsü (user-047 öncesi, volatiliteler doğrusal toplanır) ile
+korelasyonlu varlık dilimleri (asset_mc.simulate_sleeves). Dengeli Portföy, aylık 1000, 10 yıl.
+Önbellek dışı ölçüm: hesaplama doğrudan snapshot üzerinde çağrılır.
+"""
+import time
+
+import numpy as np
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+PORTFOLIO, MONTHLY, YEARS, SIMS = "Dengeli Portföy", 1000.0, 10, 1000
+
+
+def legacy_run(weights, annual_returns, annual_vols, monthly_investment, years, num_simulations, rng):
+    """Karşılaştırma için user-047 öncesi döngü: portföy tek varlık, volatilite ağırlıklı toplam."""
+    monthly_return = (1 + weights @ annual_returns) ** (1 / 12) - 1
+    monthly_volatility = (weights @ annual_vols) / np.sqrt(12)
+    final_balances = []
+    for _ in range(num_simulations):
+        balance = 0.0
+        for _ in range(years * 12):
+            balance += monthly_investment
+            balance *= 1 + monthly_return + rng.normal(0, 1) * monthly_volatility
+        final_balances.append(balance)
+    return np.asarray(final_balances)
+
+
+def main():
+    roi = ROISimulatorTool(SQLiteRepository(_bench.bank_copy("roi.db")), cache_size=0)
+    data = roi._data
+    row, assets, idx, weights = data._portfolio_inputs(PORTFOLIO)
+    returns, vols = data._asset_returns[idx], data._asset_vols[idx]
+
+    t0 = time.perf_counter()
+    legacy = legacy_run(weights, returns, vols, MONTHLY, YEARS, SIMS, np.random.default_rng(0))
+    legacy_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    res = ROISimulatorTool._simulate(data, PORTFOLIO, MONTHLY, YEARS, SIMS, np.random.default_rng(0))
+    new_ms = (time.perf_counter() - t0) * 1000
+
+    monthly = (1 + returns) ** (1 / 12) - 1
+    analytic = float((MONTHLY * weights * ((1 + monthly)[:, None] ** np.arange(1, YEARS * 12 + 1)).sum(axis=1)).sum())
+    big = ROISimulatorTool._simulate(data, PORTFOLIO, MONTHLY, YEARS, 100_000, np.random.default_rng(1))
+    print(f"{SIMS} simulations: legacy loop {legacy_ms:.0f} ms -> sleeves {new_ms:.1f} ms")
+    print(f"volatility: linear {res['undiversified_volatility']:.3f} -> correlated {res['annual_volatility']:.3f}")
+    print(f"25/75 band: legacy {np.percentile(legacy, 75) - np.percentile(legacy, 25):,.0f} -> "
+          f"sleeves {res['good_scenario_outcome (75th percentile)'] - res['bad_scenario_outcome (25th percentile)']:,.0f}")
+    print(f"mean (100k sims) {big['average_outcome']:,.0f} vs analytic {analytic:,.0f} "
+          f"({(big['average_outcome'] / analytic - 1) * 100:+.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
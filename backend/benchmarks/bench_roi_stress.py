@@ -0,0 +1,49 @@
+# backend/benchmarks/bench_roi_stress.py
+"""
+Portföy stres testi: tüm makro senaryolar tek toplu simülasyonda (baz + S senaryo, ortak çekilişler).
+Süre 10 ve 30 yıl için ölçülür; ayrıca senaryo farkının (senaryo - baz) tohumlar arası standart sapması
+ortak çekilişlerle ve baz/senaryo ayrı ayrı simüle edilerek karşılaştırılır.
+"""
+import time
+
+import numpy as np
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.asset_mc import simulate_sleeves
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+PORTFOLIO, MONTHLY, SIMS, SEEDS = "Dengeli Portföy", 1000.0, 1000, 20
+
+
+def main():
+    roi = ROISimulatorTool(SQLiteRepository(_bench.bank_copy("roi_stress.db")), cache_size=0)
+    data = roi._data
+    for years in (10, 30):
+        t0 = time.perf_counter()
+        res = ROISimulatorTool._stress_test(data, PORTFOLIO, MONTHLY, years, SIMS, np.random.default_rng(0))
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{years} years: baseline + {len(res['scenarios'])} scenarios x {SIMS} simulations in {ms:.0f} ms")
+
+    worst = res["scenarios"][0]["scenario"]
+    k = 1 + data._scenario_names.index(worst)
+    row, assets, idx, weights = data._portfolio_inputs(PORTFOLIO)
+    base_m, base_s = data._stress_monthly_returns[0, idx], data._stress_monthly_vols[0, idx]
+    shock_m, shock_s = data._stress_monthly_returns[k, idx], data._stress_monthly_vols[k, idx]
+    chol, months = data._portfolio_chol[row], 10 * 12
+
+    shared, independent = [], []
+    for seed in range(SEEDS):
+        res = ROISimulatorTool._stress_test(data, PORTFOLIO, MONTHLY, 10, SIMS, np.random.default_rng(seed))
+        shared.append(next(s["change_vs_baseline"] for s in res["scenarios"] if s["scenario"] == worst))
+        rng = np.random.default_rng(1000 + seed)
+        a = simulate_sleeves(base_m, base_s, chol, weights, MONTHLY, months, SIMS, rng=rng).sum(axis=1).mean()
+        b = simulate_sleeves(shock_m, shock_s, chol, weights, MONTHLY, months, SIMS, rng=rng).sum(axis=1).mean()
+        independent.append(b - a)
+    print(f"'{worst}' change over {SEEDS} seeds: mean {np.mean(shared):,.0f}, "
+          f"sd shared draws {np.std(shared):,.0f} vs independent runs {np.std(independent):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
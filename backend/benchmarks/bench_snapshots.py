@@ -0,0 +1,112 @@
+# backend/benchmarks/bench_snapshots.py
+"""
+İşlem listesi snapshot'ları: eski txn_snapshots (satır başına kopya, tek tek INSERT) ile
+snapshot_header + snapshot_items (delta, 32'lik batch'ler) karşılaştırması.
+
+Aynı hesaplar tekrar tekrar listelenir (her seferinde baştan 0..3 satır kayar); boyutlar dbstat'tan.
+Ayrıca örnek DB'deki eski snapshot'ların migration süresi ölçülür.
+"""
+import random
+import sqlite3
+import time
+
+import _bench
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+LISTINGS = 1000
+ACCOUNTS = 20
+BATCH = 32
+
+LEGACY_DDL = """
+CREATE TABLE txn_snapshots (
+    snapshot_id INTEGER PRIMARY KEY, snapshot_at TIMESTAMP, account_id INTEGER, range_from DATE,
+    range_to DATE, request_limit INTEGER, txn_id INTEGER, txn_date TIMESTAMP, amount REAL,
+    txn_type TEXT, description TEXT
+)
+"""
+
+
+def legacy_save(db_path, job):
+    """user-033 öncesi yazım: listelenen her satır kolonlarıyla birlikte ayrı INSERT."""
+    con = sqlite3.connect(db_path)
+    try:
+        for tx in job["transactions"]:
+            con.execute(
+                "INSERT INTO txn_snapshots (snapshot_at, account_id, range_from, range_to, request_limit, "
+                "txn_id, txn_date, amount, txn_type, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job["snapshot_at"], job["account_id"], job["from_date"], job["to_date"], job["limit"],
+                 tx["txn_id"], tx["txn_date"], tx["amount"], tx["txn_type"], tx["description"]),
+            )
+        con.commit()
+    finally:
+        con.close()
+
+
+def table_kb(db_path, like):
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name LIKE ?", (like,)).fetchone()[0] / 1024
+    finally:
+        con.close()
+
+
+def make_jobs(repo):
+    rnd = random.Random(1)
+    con = sqlite3.connect(repo.db_path)
+    accounts = [a for (a,) in con.execute(
+        "SELECT account_id FROM txns GROUP BY account_id HAVING COUNT(*) >= 60 LIMIT ?", (ACCOUNTS,))]
+    owner = dict(con.execute("SELECT account_id, customer_id FROM accounts"))
+    con.close()
+    jobs = []
+    for _ in range(LISTINGS):
+        acc = rnd.choice(accounts)
+        rows = repo.list_transactions(acc, owner[acc], limit=50)[rnd.randint(0, 3):]
+        jobs.append({"snapshot_at": "2099-01-01 00:00:00", "account_id": acc, "from_date": None,
+                     "to_date": None, "limit": 50, "transactions": rows})
+    return jobs
+
+
+def main():
+    t0 = time.perf_counter()
+    migrated = _bench.bank_copy("migrate.db")
+    print(f"migrate sample DB (all migrations incl. legacy snapshots): {time.perf_counter() - t0:.2f} s")
+
+    old_db = _bench.bank_copy("old.db", migrate=False)
+    con = sqlite3.connect(old_db)
+    con.execute("DROP TABLE txn_snapshots")
+    con.execute(LEGACY_DDL)
+    con.commit()
+    con.close()
+
+    new_db = _bench.bank_copy("new.db")
+    con = sqlite3.connect(new_db)
+    con.execute("DELETE FROM snapshot_items")
+    con.execute("DELETE FROM snapshot_header")
+    con.commit()
+    con.execute("VACUUM")
+    con.close()
+
+    repo = SQLiteRepository(new_db)
+    jobs = make_jobs(SQLiteRepository(migrated))
+    rows = sum(len(j["transactions"]) for j in jobs)
+
+    t0 = time.perf_counter()
+    for job in jobs:
+        legacy_save(old_db, job)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(0, len(jobs), BATCH):
+        repo.save_transaction_snapshots(jobs[i:i + BATCH])
+    t_new = time.perf_counter() - t0
+
+    report = repo.transaction_snapshot_report()
+    print(f"{len(jobs)} listings / {rows} rows over {ACCOUNTS} accounts")
+    print(f"old txn_snapshots : {table_kb(old_db, 'txn_snapshots'):7.0f} KB  {rows / t_old:9.0f} rows/s")
+    print(f"header + items    : {table_kb(new_db, 'snapshot_%') + table_kb(new_db, 'idx_snapshot%'):7.0f} KB  "
+          f"{rows / t_new:9.0f} rows/s  (stored items {report['stored_items']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 # backend/chat/chat_history.py
 import os
+import json
+import zlib
+import hashlib
 import sqlite3
-from typing import List, Optional
-from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth import get_admin_user
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -14,6 +19,11 @@ router = APIRouter(prefix="/chat", tags=["Chat"])
 # =========================
 DB_PATH = os.getenv("CHAT_DB_PATH", os.path.join(os.getcwd(), "chat.db"))
 USE_LOCAL_TIME = os.getenv("USE_LOCAL_TIME", "0") in ("1", "true", "True")  # 1 ise Europe/Istanbul kaydet
+ARCHIVE_AFTER_DAYS = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "30"))  # bu kadar gün hareketsiz sohbet arşive taşınır
+ARCHIVE_ZLIB_LEVEL = int(os.getenv("CHAT_ARCHIVE_ZLIB_LEVEL", "6"))
+ARCHIVE_MAX_CHATS = int(os.getenv("CHAT_ARCHIVE_MAX_CHATS", "500"))  # tek arşiv turunda taşınacak en çok sohbet
+UI_BLOB_ZLIB_LEVEL = int(os.getenv("CHAT_UI_BLOB_ZLIB_LEVEL", "6"))
+STATS_PREVIEW_CHARS = 120  # kenar çubuğundaki son mesaj önizlemesi
 
 def get_conn() -> sqlite3.Connection:
     """
@@ -36,6 +46,155 @@ def ts_iso() -> str:
         return datetime.now(ZoneInfo("Europe/Istanbul")).isoformat(timespec="seconds")
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
+def ts_days_ago(days: int) -> str:
+    """
+    ts_iso() ile aynı biçimde, `days` gün öncesinin zaman damgası (string karşılaştırma için).
+    """
+    tz = ZoneInfo("Europe/Istanbul") if USE_LOCAL_TIME else timezone.utc
+    return (datetime.now(tz) - timedelta(days=days)).isoformat(timespec="seconds")
+
+# =========================
+# ui_component blob deposu (içerik adresli, sıkıştırılmış)
+# =========================
+def _ui_hash(ui_component_json: str) -> str:
+    return hashlib.sha256(ui_component_json.encode("utf-8")).hexdigest()
+
+def _store_ui_blob(conn: sqlite3.Connection, ui_component_json: str) -> str:
+    """
+    ui_component JSON'unu ui_blobs'a yazar (aynı içerik varsa sadece ref_count artar) ve hash'i döner.
+    Sıkıştırma yalnızca ilk kez görülen içerik için yapılır. Commit çağırana aittir.
+    """
+    h = _ui_hash(ui_component_json)
+    cur = conn.execute("UPDATE ui_blobs SET ref_count = ref_count + 1 WHERE hash = ?", (h,))
+    if cur.rowcount == 0:
+        raw = ui_component_json.encode("utf-8")
+        blob = zlib.compress(raw, UI_BLOB_ZLIB_LEVEL)
+        conn.execute(
+            "INSERT INTO ui_blobs (hash, raw_bytes, stored_bytes, ref_count, payload, created_at) VALUES (?, ?, ?, 1, ?, ?)",
+            (h, len(raw), len(blob), blob, ts_iso()),
+        )
+    return h
+
+def _release_ui_blobs(conn: sqlite3.Connection, refs: Iterable[Optional[str]]) -> None:
+    """
+    Silinen mesajların blob referanslarını düşer; referansı kalmayan blob'ları siler.
+    """
+    counts: Dict[str, int] = {}
+    for ref in refs:
+        if ref:
+            counts[ref] = counts.get(ref, 0) + 1
+    if not counts:
+        return
+    conn.executemany(
+        "UPDATE ui_blobs SET ref_count = ref_count - ? WHERE hash = ?",
+        [(n, h) for h, n in counts.items()],
+    )
+    conn.executemany(
+        "DELETE FROM ui_blobs WHERE hash = ? AND ref_count <= 0",
+        [(h,) for h in counts],
+    )
+
+def _load_ui_components(conn: sqlite3.Connection, refs: Iterable[Optional[str]]) -> Dict[str, str]:
+    """
+    Verilen hash'lerin JSON içeriklerini tek sorguda okur; her blob sayfa başına bir kez açılır.
+    """
+    wanted = sorted({r for r in refs if r})
+    out: Dict[str, str] = {}
+    for i in range(0, len(wanted), 500):  # SQLite parametre sınırı
+        chunk = wanted[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT hash, payload FROM ui_blobs WHERE hash IN ({marks})", chunk):
+            out[row["hash"]] = zlib.decompress(row["payload"]).decode("utf-8")
+    return out
+
+def _migrate_inline_ui_components(conn: sqlite3.Connection, batch: int = 500) -> int:
+    """
+    Eski kayıtlarda messages.ui_component'te inline duran JSON'ları ui_blobs'a taşır.
+    """
+    moved = 0
+    while True:
+        rows = conn.execute(
+            "SELECT message_id, ui_component FROM messages WHERE ui_component IS NOT NULL AND ui_ref IS NULL LIMIT ?",
+            (batch,),
+        ).fetchall()
+        if not rows:
+            return moved
+        for r in rows:
+            ref = _store_ui_blob(conn, r["ui_component"])
+            conn.execute(
+                "UPDATE messages SET ui_ref = ?, ui_component = NULL WHERE message_id = ?",
+                (ref, r["message_id"]),
+            )
+        conn.commit()
+        moved += len(rows)
+
+# =========================
+# Oturum özetleri (chat_session_stats)
+# =========================
+def _message_bytes(text: Optional[str], ui_component_json: Optional[str]) -> int:
+    return len((text or "").encode("utf-8")) + len((ui_component_json or "").encode("utf-8"))
+
+def _bump_session_stats(conn: sqlite3.Connection, user_id: str, chat_id: str, message_id: int,
+                        text: str, sender: str, ui_component_json: Optional[str]) -> None:
+    """
+    Mesaj eklenirken aynı transaction içinde oturum özetini artımlı günceller.
+    """
+    conn.execute(
+        """
+        INSERT INTO chat_session_stats
+            (chat_id, user_id, message_count, last_message_id, last_sender, last_text_preview, bytes_used)
+        VALUES (?, ?, 1, ?, ?, ?, ?)
+        ON CONFLICT(chat_id, user_id) DO UPDATE SET
+            message_count     = message_count + 1,
+            last_message_id   = excluded.last_message_id,
+            last_sender       = excluded.last_sender,
+            last_text_preview = excluded.last_text_preview,
+            bytes_used        = bytes_used + excluded.bytes_used
+        """,
+        (chat_id, user_id, message_id, sender, (text or "")[:STATS_PREVIEW_CHARS],
+         _message_bytes(text, ui_component_json)),
+    )
+
+def _backfill_session_stats(conn: sqlite3.Connection) -> int:
+    """
+    Özeti olmayan oturumlar için chat_session_stats'ı mevcut mesajlardan (sıcak + arşiv) bir kez üretir.
+    """
+    missing = conn.execute(
+        "SELECT cs.chat_id, cs.user_id FROM chat_sessions cs "
+        "WHERE NOT EXISTS (SELECT 1 FROM chat_session_stats s WHERE s.chat_id = cs.chat_id AND s.user_id = cs.user_id)"
+    ).fetchall()
+    for sess in missing:
+        chat_id, user_id = sess["chat_id"], sess["user_id"]
+        msgs: List[Dict[str, Any]] = [dict(r) for r in conn.execute(
+            "SELECT message_id, text, sender, ui_component, ui_ref FROM messages "
+            "WHERE user_id=? AND chat_id=? ORDER BY message_id ASC",
+            (user_id, chat_id),
+        )]
+        archived = conn.execute(
+            "SELECT payload FROM chat_archive WHERE chat_id=? AND user_id=?", (chat_id, user_id)
+        ).fetchone()
+        if archived:
+            msgs = _unpack_messages(zlib.decompress(archived["payload"])) + msgs
+            msgs.sort(key=lambda m: m["message_id"])
+        ui_by_ref = _load_ui_components(conn, (m["ui_ref"] for m in msgs))
+        used = sum(
+            _message_bytes(m["text"], ui_by_ref.get(m["ui_ref"]) if m["ui_ref"] else m["ui_component"])
+            for m in msgs
+        )
+        last = msgs[-1] if msgs else None
+        conn.execute(
+            "INSERT INTO chat_session_stats "
+            "(chat_id, user_id, message_count, last_message_id, last_sender, last_text_preview, bytes_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (chat_id, user_id, len(msgs),
+             last["message_id"] if last else None,
+             last["sender"] if last else None,
+             (last["text"] or "")[:STATS_PREVIEW_CHARS] if last else None,
+             used),
+        )
+    conn.commit()
+    return len(missing)
+
 def ensure_schema() -> None:
     """
     Tablo/indeksleri oluşturur. Uygulama import edilirken bir kez çağrılır.
@@ -65,12 +224,57 @@ def ensure_schema() -> None:
             )
             """
         )
+        # İçerik adresli ui_component deposu: messages.ui_ref -> ui_blobs.hash
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ui_blobs (
+                hash         TEXT PRIMARY KEY,    -- sha256(ui_component JSON)
+                raw_bytes    INTEGER NOT NULL,
+                stored_bytes INTEGER NOT NULL,
+                ref_count    INTEGER NOT NULL DEFAULT 0,
+                payload      BLOB NOT NULL,       -- zlib(ui_component JSON)
+                created_at   TEXT
+            )
+            """
+        )
+        # Kenar çubuğu için oturum başına artımlı özet (save_message_sync günceller)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_session_stats (
+                chat_id           TEXT NOT NULL,
+                user_id           TEXT NOT NULL,
+                message_count     INTEGER NOT NULL DEFAULT 0,
+                last_message_id   INTEGER,
+                last_sender       TEXT,
+                last_text_preview TEXT,
+                bytes_used        INTEGER NOT NULL DEFAULT 0,   -- text + ui_component (sıkıştırılmamış)
+                PRIMARY KEY (chat_id, user_id)
+            )
+            """
+        )
+        msg_cols = {r[1] for r in conn.execute("PRAGMA table_info('messages')")}
+        if "ui_ref" not in msg_cols:
+            conn.execute("ALTER TABLE messages ADD COLUMN ui_ref TEXT")
+        # Soğuk depolama: hareketsiz sohbetlerin mesajları tek zlib blob olarak
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_archive (
+                chat_id       TEXT NOT NULL,
+                user_id       TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                raw_bytes     INTEGER NOT NULL,   -- sıkıştırılmamış JSON boyutu
+                stored_bytes  INTEGER NOT NULL,   -- zlib blob boyutu
+                payload       BLOB NOT NULL,      -- zlib({"cols": [...], "rows": [[...], ...]})
+                archived_at   TEXT NOT NULL,
+                PRIMARY KEY (chat_id, user_id)
+            )
+            """
+        )
         conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_user_chat ON messages(user_id, chat_id, message_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_updated ON chat_sessions(user_id, updated_at)")
         conn.commit()
-
-# Uygulama import edildiğinde şemayı garanti altına al
-ensure_schema()
+        _migrate_inline_ui_components(conn)
+        _backfill_session_stats(conn)
 
 # =========================
 # (MAIN tarafından da kullanılacak) Yardımcılar
@@ -78,10 +282,13 @@ ensure_schema()
 def save_message_sync(user_id: str, chat_id: str, text: str, sender: str, ui_component_json: Optional[str] = None, timestamp: Optional[str] = None) -> None:
     ts = timestamp or ts_iso()
     with get_conn() as conn:
-        conn.execute(
-            "INSERT INTO messages (user_id, chat_id, text, sender, ui_component, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_id, chat_id, text, sender, ui_component_json, ts),
+        # ui_component inline yazılmaz; içerik adresli blob'a referans tutulur
+        ui_ref = _store_ui_blob(conn, ui_component_json) if ui_component_json else None
+        cur = conn.execute(
+            "INSERT INTO messages (user_id, chat_id, text, sender, ui_component, ui_ref, timestamp) VALUES (?, ?, ?, ?, NULL, ?, ?)",
+            (user_id, chat_id, text, sender, ui_ref, ts),
         )
+        _bump_session_stats(conn, user_id, chat_id, cur.lastrowid, text, sender, ui_component_json)
         conn.commit()
 
 def ensure_session_exists_sync(chat_id: str, user_id: str, title: str, timestamp: Optional[str] = None) -> None:
@@ -107,6 +314,145 @@ def update_session_updated_at_sync(chat_id: str, user_id: str, timestamp: Option
         )
         conn.commit()
 
+# =========================
+# Arşiv (soğuk depolama)
+# =========================
+_ARCHIVE_COLS = ("message_id", "text", "sender", "ui_component", "ui_ref", "timestamp")
+
+def _pack_messages(rows: List[sqlite3.Row]) -> bytes:
+    doc = {"cols": list(_ARCHIVE_COLS), "rows": [[r[c] for c in _ARCHIVE_COLS] for r in rows]}
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _unpack_messages(raw: bytes) -> List[Dict[str, Any]]:
+    doc = json.loads(raw.decode("utf-8"))
+    cols = doc["cols"]
+    return [{"ui_ref": None, **dict(zip(cols, row))} for row in doc["rows"]]
+
+def _archive_chat(conn: sqlite3.Connection, user_id: str, chat_id: str) -> Optional[Dict[str, int]]:
+    """
+    Tek sohbetin sıcak tablodaki mesajlarını sıkıştırıp chat_archive'a taşır.
+    Sohbetin önceden arşivlenmiş kısmı varsa onunla birleştirir (sohbet başına tek blob).
+    Commit çağırana aittir.
+    """
+    rows = conn.execute(
+        "SELECT message_id, text, sender, ui_component, ui_ref, timestamp "
+        "FROM messages WHERE user_id=? AND chat_id=? ORDER BY message_id ASC",
+        (user_id, chat_id),
+    ).fetchall()
+    if not rows:
+        return None
+
+    merged: List[Any] = list(rows)
+    old = conn.execute(
+        "SELECT payload FROM chat_archive WHERE chat_id=? AND user_id=?", (chat_id, user_id)
+    ).fetchone()
+    if old:
+        merged = _unpack_messages(zlib.decompress(old["payload"])) + merged
+        merged.sort(key=lambda m: m["message_id"])
+
+    raw = _pack_messages(merged)
+    blob = zlib.compress(raw, ARCHIVE_ZLIB_LEVEL)
+    conn.execute(
+        "INSERT OR REPLACE INTO chat_archive "
+        "(chat_id, user_id, message_count, raw_bytes, stored_bytes, payload, archived_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (chat_id, user_id, len(merged), len(raw), len(blob), blob, ts_iso()),
+    )
+    conn.execute("DELETE FROM messages WHERE user_id=? AND chat_id=?", (user_id, chat_id))
+    return {"messages": len(rows), "raw_bytes": len(raw), "stored_bytes": len(blob)}
+
+def _archived_messages(conn: sqlite3.Connection, user_id: str, chat_id: str) -> List[Dict[str, Any]]:
+    """
+    Arşivdeki sohbetin mesajlarını salt-okunur açar; sıcak tabloya geri yazılmaz.
+    Arşivlenmiş sohbete yeni mesaj gelirse sıcak tabloya düşer ve sohbet yeniden hareketsiz
+    kaldığında periyodik arşiv turu bunları mevcut blob'la birleştirir.
+    Arşiv yoksa tek bir PK okumasıyla boş liste döner.
+    """
+    row = conn.execute(
+        "SELECT payload FROM chat_archive WHERE chat_id=? AND user_id=?", (chat_id, user_id)
+    ).fetchone()
+    if not row:
+        return []
+    return _unpack_messages(zlib.decompress(row["payload"]))
+
+def archive_inactive_chats_sync(days: Optional[int] = None, max_chats: Optional[int] = None) -> Dict[str, int]:
+    """
+    `days` gündür güncellenmemiş (chat_sessions.updated_at) ve sıcak tabloda mesajı olan
+    sohbetleri arşive taşır. Her sohbet ayrı transaction'da taşınır; yarıda kesilse de tutarlıdır.
+    `days` ARCHIVE_AFTER_DAYS'ten kısa, `max_chats` ARCHIVE_MAX_CHATS'ten büyük olamaz.
+    """
+    days = ARCHIVE_AFTER_DAYS if days is None else max(int(days), ARCHIVE_AFTER_DAYS)
+    max_chats = ARCHIVE_MAX_CHATS if not max_chats else min(int(max_chats), ARCHIVE_MAX_CHATS)
+    cutoff = ts_days_ago(days)
+    sql = (
+        "SELECT cs.chat_id, cs.user_id FROM chat_sessions cs "
+        "WHERE cs.updated_at < ? "
+        "AND EXISTS (SELECT 1 FROM messages m WHERE m.user_id = cs.user_id AND m.chat_id = cs.chat_id) "
+        "ORDER BY cs.updated_at ASC LIMIT ?"
+    )
+    params: List[Any] = [cutoff, max_chats]
+
+    report = {"chats": 0, "messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+    with get_conn() as conn:
+        candidates = conn.execute(sql, params).fetchall()
+        for c in candidates:
+            moved = _archive_chat(conn, c["user_id"], c["chat_id"])
+            conn.commit()
+            if not moved:
+                continue
+            report["chats"] += 1
+            report["messages"] += moved["messages"]
+            report["raw_bytes"] += moved["raw_bytes"]
+            report["stored_bytes"] += moved["stored_bytes"]
+    return report
+
+def archive_report_sync() -> Dict[str, Any]:
+    """
+    Arşivin toplam boyutu ve sıkıştırmayla kazanılan byte miktarı.
+    """
+    with get_conn() as conn:
+        a = conn.execute(
+            "SELECT COUNT(*) AS chats, COALESCE(SUM(message_count), 0) AS messages, "
+            "COALESCE(SUM(raw_bytes), 0) AS raw_bytes, COALESCE(SUM(stored_bytes), 0) AS stored_bytes "
+            "FROM chat_archive"
+        ).fetchone()
+        hot = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    raw_bytes, stored_bytes = int(a["raw_bytes"]), int(a["stored_bytes"])
+    return {
+        "hot_messages": int(hot),
+        "archived_chats": int(a["chats"]),
+        "archived_messages": int(a["messages"]),
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "bytes_saved": raw_bytes - stored_bytes,
+        "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+    }
+
+def ui_blob_report_sync() -> Dict[str, Any]:
+    """
+    ui_component deposunun tekilleştirme + sıkıştırma kazancı.
+    logical_bytes: her mesaj inline saklasaydı tutulacak JSON boyutu.
+    """
+    with get_conn() as conn:
+        r = conn.execute(
+            "SELECT COUNT(*) AS blobs, COALESCE(SUM(ref_count), 0) AS refs, "
+            "COALESCE(SUM(raw_bytes * ref_count), 0) AS logical_bytes, "
+            "COALESCE(SUM(raw_bytes), 0) AS unique_bytes, COALESCE(SUM(stored_bytes), 0) AS stored_bytes "
+            "FROM ui_blobs"
+        ).fetchone()
+    logical, stored = int(r["logical_bytes"]), int(r["stored_bytes"])
+    return {
+        "blobs": int(r["blobs"]),
+        "references": int(r["refs"]),
+        "logical_bytes": logical,
+        "unique_bytes": int(r["unique_bytes"]),
+        "stored_bytes": stored,
+        "bytes_saved": logical - stored,
+    }
+
+# Uygulama import edildiğinde şemayı garanti altına al (yardımcılar tanımlandıktan sonra)
+ensure_schema()
+
 # =========================
 # API Endpoints (router)
 # =========================
@@ -125,30 +471,38 @@ def send_message_api(
 @router.get("/messages/{user_id}/{chat_id}")
 def get_messages(user_id: str, chat_id: str) -> List[dict]:
     with get_conn() as conn:
-        rows = conn.execute(
-            "SELECT message_id, user_id, chat_id, text, sender, ui_component, timestamp "
+        # Arşivlenmiş kısım salt-okunur açılır; sohbet arşivde kalır
+        msgs: List[Dict[str, Any]] = _archived_messages(conn, user_id, chat_id)
+        msgs += [dict(r) for r in conn.execute(
+            "SELECT message_id, text, sender, ui_component, ui_ref, timestamp "
             "FROM messages WHERE user_id=? AND chat_id=? ORDER BY message_id ASC",
             (user_id, chat_id),
-        ).fetchall()
+        )]
+        msgs.sort(key=lambda m: m["message_id"])
+        ui_by_ref = _load_ui_components(conn, (m["ui_ref"] for m in msgs))
     return [
         {
-            "message_id": r["message_id"],
-            "user_id": r["user_id"],
-            "chat_id": r["chat_id"],
-            "text": r["text"],
-            "sender": r["sender"],
-            "ui_component": r["ui_component"],
-            "timestamp": r["timestamp"],
+            "message_id": m["message_id"],
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "text": m["text"],
+            "sender": m["sender"],
+            "ui_component": ui_by_ref.get(m["ui_ref"]) if m["ui_ref"] else m["ui_component"],
+            "timestamp": m["timestamp"],
         }
-        for r in rows
+        for m in msgs
     ]
 
 @router.get("/sessions/{user_id}")
 def get_user_sessions(user_id: str) -> List[dict]:
+    # Tek sorgu: oturumlar (idx_sessions_user_updated) + özet satırı (PK araması); messages taranmaz
     with get_conn() as conn:
         rows = conn.execute(
-            "SELECT chat_id, user_id, title, created_at, updated_at "
-            "FROM chat_sessions WHERE user_id=? ORDER BY updated_at DESC",
+            "SELECT cs.chat_id, cs.user_id, cs.title, cs.created_at, cs.updated_at, "
+            "       s.message_count, s.last_message_id, s.last_sender, s.last_text_preview, s.bytes_used "
+            "FROM chat_sessions cs "
+            "LEFT JOIN chat_session_stats s ON s.chat_id = cs.chat_id AND s.user_id = cs.user_id "
+            "WHERE cs.user_id=? ORDER BY cs.updated_at DESC",
             (user_id,)
         ).fetchall()
     return [
@@ -158,6 +512,11 @@ def get_user_sessions(user_id: str) -> List[dict]:
             "title": r["title"],
             "created_at": r["created_at"],
             "updated_at": r["updated_at"],
+            "message_count": r["message_count"] or 0,
+            "last_message_id": r["last_message_id"],
+            "last_sender": r["last_sender"],
+            "last_message_preview": r["last_text_preview"],
+            "bytes_used": r["bytes_used"] or 0,
         }
         for r in rows
     ]
@@ -187,7 +546,18 @@ def update_session_title(
 @router.delete("/session/{chat_id}")
 def delete_session(chat_id: str, user_id: str):
     with get_conn() as conn:
+        refs = [r["ui_ref"] for r in conn.execute(
+            "SELECT ui_ref FROM messages WHERE chat_id = ? AND user_id = ? AND ui_ref IS NOT NULL", (chat_id, user_id)
+        )]
+        archived = conn.execute(
+            "SELECT payload FROM chat_archive WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+        ).fetchone()
+        if archived:
+            refs += [m["ui_ref"] for m in _unpack_messages(zlib.decompress(archived["payload"]))]
+        _release_ui_blobs(conn, refs)
         conn.execute("DELETE FROM messages WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
+        conn.execute("DELETE FROM chat_archive WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
+        conn.execute("DELETE FROM chat_session_stats WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
         conn.execute("DELETE FROM chat_sessions WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
         conn.commit()
     return {"status": "ok"}
@@ -206,6 +576,7 @@ def search_messages(
     Kullanıcının eski mesajlarında metin araması yapar.
     - Mesaj içeriğinde (messages.text) LIKE araması
     - Son mesaj zamanına göre sıralı
+    - Arşivdeki (chat_archive) mesajlar aranmaz
     """
     # Hem q hem query destekle (geriye dönük uyumluluk)
     search_term = q if q is not None else query
@@ -249,4 +620,27 @@ def search_messages(
             "sender": r["sender"],
         }
         for r in rows
-    ]
\ No newline at end of file
+    ]
+
+# -------------------------
+# Arşiv yönetimi
+# -------------------------
+@router.post("/archive/run")
+def run_archive(
+    days: Optional[int] = Query(None, ge=ARCHIVE_AFTER_DAYS),
+    max_chats: Optional[int] = Query(None, ge=1, le=ARCHIVE_MAX_CHATS),
+    admin_id: int = Depends(get_admin_user),
+):
+    """
+    `days` (varsayılan CHAT_ARCHIVE_AFTER_DAYS) gündür hareketsiz sohbetleri arşive taşır.
+    Periyodik tur API içinde zaten çalışır; bu uç yalnızca yöneticiler için elle tetiklemedir.
+    """
+    return {"status": "ok", "archived": archive_inactive_chats_sync(days, max_chats)}
+
+@router.get("/archive/report")
+def get_archive_report(admin_id: int = Depends(get_admin_user)):
+    return archive_report_sync()
+
+@router.get("/storage/report")
+def get_storage_report(admin_id: int = Depends(get_admin_user)):
+    return {"archive": archive_report_sync(), "ui_blobs": ui_blob_report_sync()}
@@ -0,0 +1,194 @@
+# data/id_gen.py
+"""
+Zaman sıralı, çakışmasız kayıt kimlikleri (snowflake benzeri).
+
+Biçim: <PREFIX><YYYYMMDDHHMMSS><mmm><node:2><seq:4>
+  örn. TX20251019120000123 07 0042 → "TX20251019120000123070042"
+
+- PREFIX: TX (ödeme), RC (dekont), LR (kart limit talebi)
+- Aynı milisaniyede sıra numarası artar (10.000 id/ms'e kadar); dolarsa
+  mantıksal saat bir sonraki milisaniyeye ilerler
+- Sistem saati geri giderse son zaman kullanılmaya devam eder → id'ler monoton
+- node: aynı DB'ye yazan süreçleri ayırır. Ya ID_NODE env ile sabitlenir (tüm süreçlerde
+  farklı değerler), ya da başlangıçta acquire_node_lease(db_path) ile DB'deki id_node_leases
+  tablosundan kiralanır (MCP server, API, worker'lar aynı DB'de çakışmayan node alır).
+  İkisi de yoksa id üretilmez (RuntimeError) — pid'den tahmin edilen node çakışabilir.
+- Thread-safe; tüm prefix'ler tek sayaç paylaşır
+"""
+import atexit
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+_SEQ_MAX = 10_000
+NODE_COUNT = 100
+NODE_LEASE_TTL_S = float(os.getenv("ID_NODE_LEASE_TTL_S", "600"))  # yenilenmeyen kira bu süre sonra boşa düşer
+
+
+def _env_node() -> int | None:
+    env = os.getenv("ID_NODE")
+    if env is not None and env.strip().isdigit():
+        return int(env) % NODE_COUNT
+    return None
+
+
+class NodeLease:
+    """
+    id_node_leases tablosundan node kiralar. Kira süresi dolmadan (TTL/3'te bir) yenilenir;
+    kira başka sürece geçmişse yeni node alınır. Süreç kapanırken kira bırakılır.
+    """
+
+    def __init__(self, db_path: str, ttl_s: float = NODE_LEASE_TTL_S):
+        self.db_path = db_path
+        self.ttl_s = ttl_s
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.node: int | None = None
+        self.valid_until = 0.0  # time.monotonic(); bu andan sonra id üretmeden önce yenilenir
+        self._renew_lock = threading.Lock()  # heartbeat ve next_id aynı anda yenilemesin
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def acquire(self) -> int:
+        now = time.time()
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute("DELETE FROM id_node_leases WHERE heartbeat_at < ?", (now - self.ttl_s,))
+                taken = {r[0] for r in con.execute("SELECT node FROM id_node_leases")}
+                free = next((n for n in range(NODE_COUNT) if n not in taken), None)
+                if free is None:
+                    raise RuntimeError("id_node_exhausted")
+                con.execute("INSERT INTO id_node_leases (node, owner, heartbeat_at) VALUES (?, ?, ?)",
+                            (free, self.owner, now))
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+        finally:
+            con.close()
+        self.node = free
+        self.valid_until = time.monotonic() + self.ttl_s
+        return free
+
+    def renew(self) -> int:
+        """Kirayı yeniler; kira kaybedilmişse (süre doldu, başkası aldı) yeni node kiralar."""
+        with self._renew_lock:
+            return self._renew_locked()
+
+    def ensure_valid(self) -> int:
+        """Kira geçerliyse node'u döner; süresi dolmuşsa yeniler (aynı anda bekleyenler tek yenilemeyi paylaşır)."""
+        with self._renew_lock:
+            if time.monotonic() < self.valid_until:
+                return self.node
+            return self._renew_locked()
+
+    def _renew_locked(self) -> int:
+        started = time.monotonic()
+        con = self._connect()
+        try:
+            cur = con.execute("UPDATE id_node_leases SET heartbeat_at = ? WHERE node = ? AND owner = ?",
+                              (time.time(), self.node, self.owner))
+            kept = cur.rowcount == 1
+        finally:
+            con.close()
+        if not kept:
+            return self.acquire()
+        self.valid_until = started + self.ttl_s
+        return self.node
+
+    def release(self) -> None:
+        if self.node is None:
+            return
+        try:
+            con = self._connect()
+            try:
+                con.execute("DELETE FROM id_node_leases WHERE node = ? AND owner = ?", (self.node, self.owner))
+            finally:
+                con.close()
+        except sqlite3.Error:
+            pass  # kapanışta; kira TTL sonunda zaten boşa düşer
+        self.node = None
+
+
+class IdGenerator:
+    def __init__(self, node: int | None = None):
+        # None → ID_NODE env; o da yoksa acquire_node_lease çağrılana kadar id üretilmez
+        self.node = _env_node() if node is None else int(node) % NODE_COUNT
+        self.lease: NodeLease | None = None
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._seq = 0
+
+    def use_lease(self, lease: NodeLease) -> None:
+        with self._lock:
+            self.lease = lease
+            self.node = lease.node
+
+    def _tick(self) -> tuple[int, int, int]:
+        lease = self.lease
+        if lease is not None and time.monotonic() >= lease.valid_until:
+            # heartbeat yetişmediyse (uzun duraklama) kira doğrulanmadan id üretilmez;
+            # DB yenilemesi kilit dışında → meşgul DB yalnızca yenileme bekleyenleri durdurur
+            node = lease.ensure_valid()
+            with self._lock:
+                self.node = node
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if self.node is None:
+                raise RuntimeError("id_node_not_configured: set ID_NODE or call acquire_node_lease(db_path)")
+            if now_ms > self._last_ms:
+                self._last_ms, self._seq = now_ms, 0
+            else:
+                self._seq += 1
+                if self._seq >= _SEQ_MAX:
+                    self._last_ms, self._seq = self._last_ms + 1, 0
+            return self._last_ms, self._seq, self.node
+
+    def next_id(self, prefix: str) -> str:
+        ms, seq, node = self._tick()
+        ts = datetime.fromtimestamp(ms // 1000, tz=timezone.utc).strftime("%Y%m%d%H%M%S")
+        return f"{prefix}{ts}{ms % 1000:03d}{node:02d}{seq:04d}"
+
+
+_default = IdGenerator()
+
+
+def acquire_node_lease(db_path: str, generator: IdGenerator | None = None) -> int:
+    """
+    Süreç başlangıcında çağrılır (MCP server / API). ID_NODE verilmişse o kullanılır, kira alınmaz.
+    Aksi halde DB'den node kiralanır; arka planda TTL/3'te bir yenilenir, çıkışta bırakılır.
+    """
+    gen = generator or _default
+    if gen.lease is None and gen.node is not None:
+        return gen.node
+    if gen.lease is not None:
+        return gen.lease.node
+    lease = NodeLease(db_path)
+    lease.acquire()
+    gen.use_lease(lease)
+
+    def heartbeat() -> None:
+        while lease.node is not None:
+            time.sleep(lease.ttl_s / 3)
+            try:
+                if lease.node is not None:
+                    node = lease.renew()  # DB yazması üretici kilidi dışında
+                    with gen._lock:
+                        gen.node = node
+            except Exception:
+                pass  # bir sonraki turda / next_id'de yeniden denenir
+
+    threading.Thread(target=heartbeat, name="id-node-lease", daemon=True).start()
+    atexit.register(lease.release)
+    return lease.node
+
+
+def new_id(prefix: str) -> str:
+    """Süreç genelindeki üreticiden yeni kimlik."""
+    return _default.next_id(prefix)
@@ -0,0 +1,261 @@
+# data/migrations.py
+"""
+Banka DB'si için sürümlü şema migration'ları.
+
+- schema_version tablosu uygulanan migration'ları tutar
+- run_migrations() MCP server ve API başlangıcında BİR KEZ çağrılır; istek yolunda DDL yok
+- Her migration kendi BEGIN IMMEDIATE transaction'ında çalışır; aynı anda açılan iki süreçten
+  yalnızca biri uygular, diğeri sürümü görüp atlar
+- Yeni migration eklemek: MIGRATIONS listesinin sonuna (sürüm, ad, fonksiyon) ekle
+"""
+import sqlite3
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+
+from .snapshot_store import SCHEMA_STATEMENTS as SNAPSHOT_SCHEMA, migrate_legacy_snapshots
+
+
+def _m001_payments_and_card_limit_requests(con: sqlite3.Connection) -> None:
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS payments (
+      payment_id TEXT PRIMARY KEY,
+      customer_id INTEGER NOT NULL,
+      from_account INTEGER NOT NULL,
+      to_account INTEGER NOT NULL,
+      amount REAL NOT NULL,
+      currency TEXT NOT NULL,
+      fee REAL NOT NULL DEFAULT 0,
+      note TEXT,
+      status TEXT NOT NULL,              -- draft|pending|posted|failed|canceled
+      created_at TEXT NOT NULL,
+      posted_at TEXT,
+      from_balance_after REAL,
+      to_balance_after REAL
+    )
+    """)
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS card_limit_requests (
+      request_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+      created_at      TEXT NOT NULL,
+      card_id         INTEGER NOT NULL,
+      customer_id     INTEGER NOT NULL,
+      requested_limit REAL NOT NULL,
+      reason          TEXT,
+      status          TEXT NOT NULL   -- received|approved|rejected
+    )
+    """)
+
+
+def _m002_payment_and_card_limit_indexes(con: sqlite3.Connection) -> None:
+    # günlük çıkış toplamı: from_account + gün aralığı
+    con.execute("CREATE INDEX IF NOT EXISTS idx_payments_from_created ON payments(from_account, created_at)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_payments_customer ON payments(customer_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_card_limit_requests_card ON card_limit_requests(card_id)")
+
+
+def _m003_snapshot_header_items(con: sqlite3.Connection) -> None:
+    # idx_snapshot_header_account(account_id, snapshot_id) → eski txn_snapshots(account_id) ihtiyacını karşılar
+    for stmt in SNAPSHOT_SCHEMA:
+        con.execute(stmt)
+    migrate_legacy_snapshots(con)
+
+
+def backfill_daily_outflow(con: sqlite3.Connection) -> int:
+    """
+    daily_outflow'u payments'tan yeniden kurar (çağıranın transaction'ı içinde).
+    Gün = created_at'ın ilk 10 karakteri; müşteri = gönderen hesabın sahibi (get_daily_out_total ile aynı).
+    """
+    con.execute("DELETE FROM daily_outflow")
+    cur = con.execute("""
+        INSERT INTO daily_outflow (customer_id, day, total, count)
+        SELECT a.customer_id, substr(p.created_at, 1, 10), SUM(p.amount), COUNT(*)
+        FROM payments p
+        JOIN accounts a ON a.account_id = p.from_account
+        WHERE p.status = 'posted'
+        GROUP BY a.customer_id, substr(p.created_at, 1, 10)
+    """)
+    return cur.rowcount
+
+
+def _m004_daily_outflow(con: sqlite3.Connection) -> None:
+    # Günlük limit kontrolü için önceden toplanmış çıkışlar: precheck tek PK lookup
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS daily_outflow (
+      customer_id INTEGER NOT NULL,
+      day         TEXT NOT NULL,          -- YYYY-MM-DD (payments.created_at ile aynı gün)
+      total       REAL NOT NULL DEFAULT 0,
+      count       INTEGER NOT NULL DEFAULT 0,
+      PRIMARY KEY (customer_id, day)
+    ) WITHOUT ROWID
+    """)
+    backfill_daily_outflow(con)
+
+
+def _m005_card_limit_request_ref(con: sqlite3.Connection) -> None:
+    # Dışarıya gösterilen, zaman sıralı talep numarası (LR...); eski kayıtlar NULL kalır
+    con.execute("ALTER TABLE card_limit_requests ADD COLUMN request_ref TEXT")
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_card_limit_requests_ref ON card_limit_requests(request_ref)")
+
+
+def _m006_account_version(con: sqlite3.Connection) -> None:
+    # Hesabın statik alanları (durum, para birimi, sahip) değiştikçe artan sürüm.
+    # Bakiye değişimi sürümü ARTIRMAZ: onay token'ı bakiyeyi zaten korumalı UPDATE ile doğrular.
+    con.execute("ALTER TABLE accounts ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    con.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_accounts_version
+    AFTER UPDATE OF status, currency, customer_id ON accounts
+    BEGIN
+      UPDATE accounts SET version = version + 1 WHERE account_id = NEW.account_id;
+    END
+    """)
+
+
+# Temel varlık sınıfları arası varsayılan korelasyonlar (aylık getiriler).
+# "X - ETF / Fon / Spot / Endeks" türevleri kendi satırı yoksa temel sınıfın değerini kullanır
+# (bkz. tools/asset_mc.correlation_matrix). Tablo elle güncellenebilir; migration mevcut satırlara dokunmaz.
+DEFAULT_ASSET_CORRELATIONS = [
+    ("BIST 100 Hisseleri", "ABD Teknoloji Hisseleri", 0.45),
+    ("BIST 100 Hisseleri", "Altın (Gram)", -0.10),
+    ("BIST 100 Hisseleri", "TL Mevduat", 0.00),
+    ("BIST 100 Hisseleri", "Devlet Tahvili (TL)", 0.30),
+    ("BIST 100 Hisseleri", "Kripto Varlıklar", 0.30),
+    ("ABD Teknoloji Hisseleri", "Altın (Gram)", 0.05),
+    ("ABD Teknoloji Hisseleri", "TL Mevduat", 0.00),
+    ("ABD Teknoloji Hisseleri", "Devlet Tahvili (TL)", 0.10),
+    ("ABD Teknoloji Hisseleri", "Kripto Varlıklar", 0.45),
+    ("Altın (Gram)", "TL Mevduat", 0.00),
+    ("Altın (Gram)", "Devlet Tahvili (TL)", -0.05),
+    ("Altın (Gram)", "Kripto Varlıklar", 0.15),
+    ("TL Mevduat", "Devlet Tahvili (TL)", 0.40),
+    ("TL Mevduat", "Kripto Varlıklar", 0.00),
+    ("Devlet Tahvili (TL)", "Kripto Varlıklar", 0.05),
+]
+
+
+def _m007_asset_correlations(con: sqlite3.Connection) -> None:
+    # ROI simülasyonu için varlık çiftleri korelasyonu; (a, b) ve (b, a) aynı anlamda, tek satır yeter
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS asset_correlations (
+      asset_a     TEXT NOT NULL,
+      asset_b     TEXT NOT NULL,
+      correlation REAL NOT NULL CHECK (correlation BETWEEN -1 AND 1),
+      updated_at  TEXT NOT NULL,
+      PRIMARY KEY (asset_a, asset_b)
+    ) WITHOUT ROWID
+    """)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    con.executemany(
+        "INSERT OR IGNORE INTO asset_correlations (asset_a, asset_b, correlation, updated_at) VALUES (?, ?, ?, ?)",
+        [(a, b, rho, now) for a, b, rho in DEFAULT_ASSET_CORRELATIONS],
+    )
+
+
+# Sürümü izlenen kaynak tablolar: her INSERT/UPDATE/DELETE data_versions satırını artırır.
+# Okuyucular (ör. ROISimulatorTool) tabloyu yeniden okumadan tek PK sorgusuyla değişikliği görür.
+VERSIONED_TABLES = ("asset_performance", "portfolio_mixes", "asset_correlations", "macro_scenarios")
+
+
+def _m008_data_versions(con: sqlite3.Connection) -> None:
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+      name    TEXT PRIMARY KEY,
+      version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """)
+    for table in VERSIONED_TABLES:
+        con.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (table,))
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            con.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{op.lower()}
+            AFTER {op} ON {table}
+            BEGIN
+              UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+            END
+            """)
+
+
+def _m009_payment_batches(con: sqlite3.Connection) -> None:
+    # Onaylı toplu transferin idempotency kaydı: kalemlerle AYNI transaction'da yazılır;
+    # aynı batch_id ile tekrar commit bu satırdaki sonucu döndürür (yeni kayıt açılmaz)
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS payment_batches (
+      batch_id     TEXT PRIMARY KEY,
+      customer_id  INTEGER NOT NULL,
+      mode         TEXT NOT NULL,              -- atomic|per_item
+      item_count   INTEGER NOT NULL,
+      posted_count INTEGER NOT NULL,
+      results_json TEXT NOT NULL,
+      created_at   TEXT NOT NULL
+    )
+    """)
+
+
+def _m010_id_node_leases(con: sqlite3.Connection) -> None:
+    # id_gen node kiraları: aynı DB'ye yazan her süreç çakışmayan bir node (0-99) alır
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS id_node_leases (
+      node         INTEGER PRIMARY KEY,
+      owner        TEXT NOT NULL,
+      heartbeat_at REAL NOT NULL           -- epoch saniye; TTL'den eskiyse kira boşa düşer
+    )
+    """)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "payments_and_card_limit_requests", _m001_payments_and_card_limit_requests),
+    (2, "payment_and_card_limit_indexes", _m002_payment_and_card_limit_indexes),
+    (3, "snapshot_header_items", _m003_snapshot_header_items),
+    (4, "daily_outflow", _m004_daily_outflow),
+    (5, "card_limit_request_ref", _m005_card_limit_request_ref),
+    (6, "account_version", _m006_account_version),
+    (7, "asset_correlations", _m007_asset_correlations),
+    (8, "data_versions", _m008_data_versions),
+    (9, "payment_batches", _m009_payment_batches),
+    (10, "id_node_leases", _m010_id_node_leases),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(con: sqlite3.Connection) -> int:
+    row = con.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return int(row[0] or 0)
+
+
+def run_migrations(db_path: str) -> dict:
+    """
+    Eksik migration'ları sırayla uygular.
+    Dönüş: {"version": <güncel sürüm>, "applied": [<uygulanan sürümler>]}
+    """
+    con = sqlite3.connect(db_path, timeout=30, isolation_level=None)  # transaction'lar elle
+    try:
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+              version    INTEGER PRIMARY KEY,
+              name       TEXT NOT NULL,
+              applied_at TEXT NOT NULL
+            )
+        """)
+        if current_version(con) >= LATEST_VERSION:
+            return {"version": LATEST_VERSION, "applied": []}
+
+        applied = []
+        for version, name, fn in MIGRATIONS:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                if con.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                    con.execute("COMMIT")
+                    continue
+                fn(con)
+                con.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")),
+                )
+                con.execute("COMMIT")
+                applied.append(version)
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+        return {"version": current_version(con), "applied": applied}
+    finally:
+        con.close()
@@ -0,0 +1,211 @@
+# data/payment_writer.py
+"""
+Ödeme yazmaları için tek yazıcı (single-writer) thread + group commit.
+
+- Yazma bağlantısının sahibi tek bir thread'dir; MCP worker thread'leri SQLite
+  yazma kilidi için yarışmaz, komutlarını kuyruğa bırakıp Future ile sonucu bekler
+- Writer kuyrukta biriken komutları (en fazla max_batch) TEK transaction'da
+  uygular → N transfer için tek COMMIT (tek fsync)
+- Her komut kendi SAVEPOINT'inde çalışır: iş kuralı hatası (ör. insufficient_funds)
+  yalnızca o komutu geri alır, batch'in geri kalanı commit edilir
+- Sonuçlar COMMIT'ten SONRA çözülür; commit başarısızsa batch'teki tüm Future'lar hata alır
+- Kuyruk FIFO ve tek tüketicili → aynı hesaba gelen komutlar gönderim sırasıyla uygulanır
+- 'database is locked' (başka süreç yazıyor) → batch baştan, artan beklemeyle yeniden denenir
+- Zaman aşımı: çağıran Future'ı iptal eder; writer iptal edilmiş komutu uygulamaz. Komut zaten
+  batch'e alınmışsa (iptal edilemez) çağıran sonucu sonuna kadar bekler → "hata döndü ama
+  sonradan commit edildi" durumu (ve retry'da çift transfer) oluşmaz
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+
+from .sql_payment_repo import POST_BACKOFF_S, POST_BUSY_TIMEOUT_S, POST_MAX_RETRIES, _is_busy  # retry ayarları posting yolu ile ortak
+
+PAYMENT_WRITER_QUEUE_MAX = int(os.getenv("PAYMENT_WRITER_QUEUE_MAX", "10000"))
+PAYMENT_WRITER_MAX_BATCH = int(os.getenv("PAYMENT_WRITER_MAX_BATCH", "64"))      # tek COMMIT'teki en fazla komut
+PAYMENT_WRITER_TIMEOUT_S = float(os.getenv("PAYMENT_WRITER_TIMEOUT_S", "30"))    # çağıranın sonuç bekleme süresi
+
+log = logging.getLogger("mcp_server")
+
+# op: açık transaction içindeki cursor'ı alıp sonuç dict'i döndüren fonksiyon
+Op = Callable[[sqlite3.Cursor], Any]
+
+
+class PaymentWriter:
+    def __init__(
+        self,
+        db_path: str,
+        max_batch: int = PAYMENT_WRITER_MAX_BATCH,
+        max_queue: int = PAYMENT_WRITER_QUEUE_MAX,
+        timeout_s: float = PAYMENT_WRITER_TIMEOUT_S,
+    ):
+        self.db_path = db_path
+        self.max_batch = max(1, max_batch)
+        self.timeout_s = timeout_s
+        self._queue: "queue.Queue[Optional[Tuple[Future, Op]]]" = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._con: Optional[sqlite3.Connection] = None  # yalnızca writer thread kullanır
+        self._stats = {"submitted": 0, "committed": 0, "failed": 0, "batches": 0,
+                       "last_batch": 0, "max_batch_seen": 0, "busy_retries": 0, "cancelled": 0}
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.stop)
+
+    # ----------------- çağıran tarafı -----------------
+    def submit(self, op: Op) -> Future:
+        """Komutu kuyruğa bırakır; sonuç/hata Future üzerinden döner."""
+        self._ensure_started()
+        fut: Future = Future()
+        try:
+            self._queue.put((fut, op), timeout=self.timeout_s)
+        except queue.Full:
+            raise RuntimeError("payment_writer_queue_full")
+        self._bump(submitted=1)
+        return fut
+
+    def execute(self, op: Op) -> Any:
+        """
+        submit + commit edilene kadar bekle. timeout_s içinde sonuç yoksa komut iptal edilir;
+        iptal başarılıysa komut HİÇ uygulanmaz ve RuntimeError("payment_writer_timeout") döner.
+        Writer komutu çoktan aldıysa iptal edilemez → commit/rollback sonucu beklenir.
+        """
+        fut = self.submit(op)
+        try:
+            return fut.result(timeout=self.timeout_s)
+        except FutureTimeoutError:
+            if fut.cancel():
+                self._bump(cancelled=1)
+                raise RuntimeError("payment_writer_timeout")
+            return fut.result()
+
+    # ----------------- writer thread -----------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="payment-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        self._con = sqlite3.connect(self.db_path, timeout=POST_BUSY_TIMEOUT_S, isolation_level=None)
+        stop = False
+        try:
+            while not stop:
+                items = []
+                item = self._queue.get()
+                while True:
+                    if item is None:
+                        stop = True
+                        self._queue.task_done()
+                        break
+                    items.append(item)
+                    if len(items) >= self.max_batch:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                # iptal edilmiş (zaman aşımına uğramış) komutlar atlanır; kalanlar artık iptal edilemez
+                live = [it for it in items if it[0].set_running_or_notify_cancel()]
+                if live:
+                    self._commit_batch(live)
+                for _ in items:
+                    self._queue.task_done()
+        finally:
+            self._con.close()
+            self._con = None
+
+    def _commit_batch(self, items: List[Tuple[Future, Op]]) -> None:
+        attempt = 0
+        while True:
+            try:
+                results = self._apply(items)
+                break
+            except sqlite3.OperationalError as e:
+                if _is_busy(e) and attempt < POST_MAX_RETRIES:
+                    self._bump(busy_retries=1)
+                    time.sleep(POST_BACKOFF_S * (2 ** attempt) * (0.5 + random.random()))
+                    attempt += 1
+                    continue
+                self._fail_all(items, e)
+                return
+            except Exception as e:
+                self._fail_all(items, e)
+                return
+
+        ok = 0
+        for (fut, _), (success, value) in zip(items, results):
+            if success:
+                ok += 1
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+        with self._lock:
+            self._stats["committed"] += ok
+            self._stats["failed"] += len(items) - ok
+            self._stats["batches"] += 1
+            self._stats["last_batch"] = len(items)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(items))
+
+    def _apply(self, items: List[Tuple[Future, Op]]) -> List[Tuple[bool, Any]]:
+        con = self._con
+        cur = con.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            results: List[Tuple[bool, Any]] = []
+            for _, op in items:
+                cur.execute("SAVEPOINT item")
+                try:
+                    results.append((True, op(cur)))
+                    cur.execute("RELEASE item")
+                except Exception as e:
+                    if isinstance(e, sqlite3.OperationalError) and _is_busy(e):
+                        raise
+                    cur.execute("ROLLBACK TO item")
+                    cur.execute("RELEASE item")
+                    results.append((False, e))
+            cur.execute("COMMIT")
+            return results
+        except Exception:
+            if con.in_transaction:
+                try: cur.execute("ROLLBACK")
+                except Exception: pass
+            raise
+
+    def _fail_all(self, items: List[Tuple[Future, Op]], exc: Exception) -> None:
+        for fut, _ in items:
+            fut.set_exception(exc)
+        self._bump(failed=len(items), batches=1)
+        log.error("payment_writer_batch_failed", extra={"event": "payment_writer_batch_failed", "error": str(exc)})
+
+    def _bump(self, **deltas: int) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                self._stats[k] += v
+
+    # ----------------- yönetim -----------------
+    def flush(self) -> None:
+        """Kuyruktaki tüm komutlar commit edilene kadar bekler."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        out["queue_depth"] = self._queue.qsize()
+        out["avg_batch"] = round((out["committed"] + out["failed"]) / out["batches"], 2) if out["batches"] else 0.0
+        return out
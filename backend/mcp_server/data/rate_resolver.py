@@ -0,0 +1,158 @@
+# data/rate_resolver.py
+"""
+Faiz oranı çözümleyici: şema keşfi bir kez, oranlar bellekte.
+
+- İlk kullanımda oran tablosu ve kolonları bulunur (interest_rates öncelikli; yoksa adında
+  interest/rate geçen, oran + ürün kolonu olan ilk tablo). Sonraki çağrılarda PRAGMA /
+  sqlite_master taraması yok
+- Tablonun tamamı ürün → [(geçerlilik, para birimi, oran)] indeksine (geçerlilik DESC) yüklenir;
+  (ürün, para birimi, as_of) sonuçları ayrıca memoize edilir
+- Tazelik: en fazla RATE_CHECK_INTERVAL_S'de bir tek satırlık imza sorgusu
+  (COUNT, MAX(tarih), TOTAL(oran)); imza değiştiyse indeks yeniden kurulur.
+  Aralık içindeki çağrılar SQLite'a hiç dokunmaz
+- rate_apy kolonu yüzde olarak tutulur → 100'e bölünür (eski get_interest_rate ile aynı)
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+RATE_CHECK_INTERVAL_S = float(os.getenv("RATE_CHECK_INTERVAL_S", "5"))
+
+_PREFERRED_TABLES = ["interest_rates", "rates", "deposit_rates", "loan_rates", "bank_interest_rates", "interest"]
+_EPOCH = "1970-01-01 00:00:00"
+
+# ürün (lower) → [(geçerlilik 'YYYY-MM-DD HH:MM:SS', para birimi | None, oran)], geçerlilik DESC
+RateIndex = Dict[str, List[Tuple[str, Optional[str], float]]]
+
+
+class RateResolver:
+    def __init__(self, db_path: str, check_interval_s: float = RATE_CHECK_INTERVAL_S):
+        self.db_path = db_path
+        self.check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._schema: Optional[Dict[str, Any]] = None
+        self._index: RateIndex = {}
+        self._memo: Dict[Tuple[str, str, Optional[str]], Tuple[float, dict]] = {}
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._stats = {"hits": 0, "misses": 0, "checks": 0, "reloads": 0}
+
+    # ----------------- sorgu -----------------
+    def resolve(self, product: str, currency: str = "TRY", as_of: Optional[str] = None) -> Tuple[float, dict]:
+        """
+        (ürün, para birimi, as_of) için geçerli en güncel oran.
+        Dönüş: (oran, meta); bulunamazsa ValueError.
+        """
+        as_of_date = None
+        if as_of:
+            try:
+                as_of_date = datetime.fromisoformat(as_of).date().isoformat()
+            except Exception:
+                raise ValueError("as_of must be ISO date YYYY-MM-DD")
+
+        self._maybe_refresh()
+        key = ((product or "").strip().lower(), (currency or "").strip().upper(), as_of_date)
+        memo = self._memo  # yeniden yüklemede nesne değişir; yerel referans tutarlı kalır
+        hit = memo.get(key)
+        if hit is not None:
+            self._stats["hits"] += 1
+            return hit[0], dict(hit[1])
+
+        self._stats["misses"] += 1
+        schema = self._schema
+        for eff, ccy, rate in self._index.get(key[0], ()):
+            if ccy is not None and key[1] and ccy != key[1]:
+                continue
+            if as_of_date and eff[:10] > as_of_date:
+                continue
+            meta = {"source": "db", "table": schema["table"], "product": product,
+                    "effective": None if eff == _EPOCH else eff}
+            memo[key] = (rate, meta)
+            return rate, dict(meta)
+        raise ValueError(f"Interest rate not found for product={product}")
+
+    # ----------------- tazelik -----------------
+    def _maybe_refresh(self) -> None:
+        if self._schema is not None and time.monotonic() - self._checked_at < self.check_interval_s:
+            return
+        with self._lock:
+            if self._schema is not None and time.monotonic() - self._checked_at < self.check_interval_s:
+                return
+            con = sqlite3.connect(self.db_path)
+            try:
+                if self._schema is None:
+                    self._schema = self._introspect(con)
+                sig = self._read_signature(con)
+                self._stats["checks"] += 1
+                if sig != self._signature:
+                    self._index = self._load(con)
+                    self._memo = {}
+                    self._signature = sig
+                    self._stats["reloads"] += 1
+            finally:
+                con.close()
+            self._checked_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Bir sonraki çağrıda imza kontrolünü zorlar (ör. oran güncellemesinden hemen sonra)."""
+        self._checked_at = 0.0
+
+    # ----------------- şema / yükleme -----------------
+    @staticmethod
+    def _introspect(con: sqlite3.Connection) -> Dict[str, Any]:
+        tbls = [r[0] for r in con.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND (lower(name) LIKE '%interest%' OR lower(name) LIKE '%rate%')"
+        ).fetchall()]
+        tbls.sort(key=lambda t: (_PREFERRED_TABLES.index(t) if t in _PREFERRED_TABLES else 999, t))
+
+        for tbl in tbls:
+            cols = {r[1] for r in con.execute(f"PRAGMA table_info('{tbl}')")}
+            def pick(cands):
+                for c in cands:
+                    if c in cols: return c
+                return None
+
+            rate_col = pick(["annual_rate", "rate_apy", "rate", "apr"])
+            product_col = pick(["product", "product_type", "category"])
+            if not rate_col or not product_col:
+                continue
+            return {
+                "table": tbl,
+                "rate": rate_col,
+                "product": product_col,
+                "currency": pick(["currency", "ccy", "iso_currency"]),
+                "effective": pick(["effective_date", "valid_from", "updated_at", "date"]),
+                "divisor": 100.0 if rate_col == "rate_apy" else 1.0,
+            }
+        raise ValueError("No interest/rate tables found in DB")
+
+    def _read_signature(self, con: sqlite3.Connection) -> tuple:
+        s = self._schema
+        eff = s["effective"] or "NULL"
+        return tuple(con.execute(
+            f"SELECT COUNT(*), MAX({eff}), TOTAL({s['rate']}) FROM '{s['table']}'"
+        ).fetchone())
+
+    def _load(self, con: sqlite3.Connection) -> RateIndex:
+        s = self._schema
+        eff = f"COALESCE(datetime({s['effective']}), '{_EPOCH}')" if s["effective"] else f"'{_EPOCH}'"
+        ccy = f"UPPER({s['currency']})" if s["currency"] else "NULL"
+        rows = con.execute(f"""
+            SELECT {s['product']}, {ccy}, {eff} AS eff, {s['rate']}
+            FROM '{s['table']}'
+            WHERE {s['rate']} IS NOT NULL AND {s['product']} IS NOT NULL
+            ORDER BY eff DESC, rowid DESC
+        """).fetchall()
+        index: RateIndex = {}
+        for product, ccy_val, eff_val, rate in rows:
+            index.setdefault(str(product).strip().lower(), []).append((eff_val, ccy_val, float(rate) / s["divisor"]))
+        return index
+
+    def stats(self) -> dict:
+        out = dict(self._stats)
+        out["products"] = len(self._index)
+        out["memo_size"] = len(self._memo)
+        return out
@@ -0,0 +1,188 @@
+# data/snapshot_recorder.py
+"""
+İşlem listesi snapshot'larını okuma yolundan ayıran arka plan yazıcısı.
+
+- Tool'lar submit() ile işi kuyruğa bırakır ve hemen döner (bloklamaz)
+- Tek bir writer thread kuyruktaki işleri toplar, repo.save_transaction_snapshots ile
+  tek transaction + executemany olarak yazar
+- Kuyruk doluysa (backpressure) drop politikası uygulanır:
+    drop_newest → yeni iş reddedilir
+    drop_oldest → en eski iş atılır, yenisi kuyruğa girer
+- Saklama politikası (repo.prune_transaction_snapshots) yine bu thread'de,
+  SNAPSHOT_PRUNE_INTERVAL_S aralıklarla çalışır (0 → kapalı)
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SNAPSHOT_QUEUE_MAX = int(os.getenv("SNAPSHOT_QUEUE_MAX", "1000"))          # kuyruktaki en fazla iş
+SNAPSHOT_BATCH_JOBS = int(os.getenv("SNAPSHOT_BATCH_JOBS", "64"))          # tek transaction'daki en fazla iş
+SNAPSHOT_DROP_POLICY = os.getenv("SNAPSHOT_DROP_POLICY", "drop_newest")    # drop_newest | drop_oldest
+SNAPSHOT_PRUNE_INTERVAL_S = int(os.getenv("SNAPSHOT_PRUNE_INTERVAL_S", "3600"))
+STOP_POLL_S = 0.5  # writer boşta iken durma sinyalini bu aralıkla kontrol eder
+
+log = logging.getLogger("mcp_server")
+
+
+class SnapshotRecorder:
+    def __init__(
+        self,
+        repo,
+        max_queue: int = SNAPSHOT_QUEUE_MAX,
+        batch_jobs: int = SNAPSHOT_BATCH_JOBS,
+        drop_policy: str = SNAPSHOT_DROP_POLICY,
+        prune_interval_s: int = SNAPSHOT_PRUNE_INTERVAL_S,
+    ):
+        self.repo = repo
+        self.batch_jobs = max(1, batch_jobs)
+        self.drop_policy = drop_policy if drop_policy in ("drop_newest", "drop_oldest") else "drop_newest"
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self.prune_interval_s = prune_interval_s
+        self._last_prune: Optional[float] = None  # None → ilk batch'ten sonra bir kez çalışır
+        self._stats = {"submitted": 0, "dropped": 0, "written_jobs": 0, "written_rows": 0, "failed_jobs": 0, "batches": 0, "pruned": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        atexit.register(self.stop)  # kapanışta kuyrukta kalanlar yazılsın
+
+    # ----------------- okuma yolu -----------------
+    def submit(
+        self,
+        account_id: int,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        limit: int,
+        transactions: List[dict],
+    ) -> dict:
+        """Snapshot işini kuyruğa bırakır; yazmayı beklemez."""
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        if not transactions:
+            return {"snapshot_at": now, "queued": 0}
+        self._ensure_started()
+
+        job = {
+            "snapshot_at": now,
+            "account_id": account_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "limit": limit,
+            "transactions": transactions,
+        }
+        dropped = False
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            if self.drop_policy == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    dropped = True
+                self._bump(dropped=1)
+            else:
+                dropped = True
+                self._bump(dropped=1)
+
+        if dropped:
+            return {"snapshot_at": now, "queued": 0, "dropped": True}
+        self._bump(submitted=1)
+        return {"snapshot_at": now, "queued": len(transactions)}
+
+    # ----------------- writer thread -----------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="snapshot-recorder", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        # Durma sinyali ayrı bir Event'tir: kuyruğa konan None yalnızca uyandırır, drop_oldest onu
+        # atsa bile writer timeout'ta Event'i görür; kuyruk boşalınca çıkar (kalanlar yazılır)
+        while True:
+            jobs = []
+            try:
+                job = self._queue.get(timeout=STOP_POLL_S)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            while True:
+                if job is None:
+                    self._queue.task_done()
+                else:
+                    jobs.append(job)
+                if len(jobs) >= self.batch_jobs:
+                    break
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if jobs:
+                self._write(jobs)
+                for _ in jobs:
+                    self._queue.task_done()
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _write(self, jobs: List[dict]) -> None:
+        try:
+            rows = self.repo.save_transaction_snapshots(jobs)
+            self._bump(written_jobs=len(jobs), written_rows=rows, batches=1)
+        except Exception as e:
+            self._bump(failed_jobs=len(jobs))
+            log.error("snapshot_write_failed", extra={"event": "snapshot_write_failed", "error": str(e)})
+        self._maybe_prune()
+
+    def _maybe_prune(self) -> None:
+        if self.prune_interval_s <= 0:
+            return
+        if self._last_prune is not None and time.monotonic() - self._last_prune < self.prune_interval_s:
+            return
+        self._last_prune = time.monotonic()
+        try:
+            res = self.repo.prune_transaction_snapshots()
+            self._bump(pruned=res.get("deleted_snapshots", 0))
+        except Exception as e:
+            log.error("snapshot_prune_failed", extra={"event": "snapshot_prune_failed", "error": str(e)})
+
+    def _bump(self, **deltas: int) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                self._stats[k] += v
+
+    # ----------------- yönetim -----------------
+    def flush(self) -> None:
+        """Kuyruktaki tüm işler yazılana kadar bekler (test/kapanış için)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(None)  # writer'ı beklemeden uyandır; kuyruk doluysa zaten uyanık
+        except queue.Full:
+            pass
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        out["queue_depth"] = self._queue.qsize()
+        out["drop_policy"] = self.drop_policy
+        return out
+
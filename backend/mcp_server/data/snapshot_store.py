@@ -0,0 +1,336 @@
+# data/snapshot_store.py
+"""
+İşlem snapshot'ları için kompakt iki tablolu yerleşim.
+
+- snapshot_header : istek metadatası (hesap, aralık, limit, zaman) — snapshot başına 1 satır
+- snapshot_items  : (snapshot_id, txn_id) çiftleri — işlem kopyalanmaz, txns'ten okunur
+  Delta: hesabın bir önceki snapshot'ına göre sadece eklenen (op=1) / çıkan (op=-1) işlemler.
+  Her SNAPSHOT_FULL_EVERY snapshot'ta bir tam snapshot yazılır (zincir kısa kalsın).
+- Şema ve eski txn_snapshots tablosunun taşınması data/migrations.py'dedir (SCHEMA_STATEMENTS,
+  migrate_legacy_snapshots). Ledger'dan farklı kopyalanmış satırların değerleri item üzerinde
+  saklanır (veri kaybı yok).
+- prune(): yaş ve hesap başına adet bazlı saklama politikası
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+SNAPSHOT_DELTA = os.getenv("SNAPSHOT_DELTA", "1") in ("1", "true", "True")
+SNAPSHOT_FULL_EVERY = max(1, int(os.getenv("SNAPSHOT_FULL_EVERY", "10")))
+SNAPSHOT_RETENTION_DAYS = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "90"))
+SNAPSHOT_KEEP_PER_ACCOUNT = int(os.getenv("SNAPSHOT_KEEP_PER_ACCOUNT", "50"))
+
+SCHEMA_STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS snapshot_header (
+      snapshot_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+      snapshot_at      TEXT NOT NULL,
+      account_id       INTEGER NOT NULL,
+      range_from       TEXT,
+      range_to         TEXT,
+      request_limit    INTEGER,
+      item_count       INTEGER NOT NULL,
+      base_snapshot_id INTEGER,              -- NULL: tam snapshot, dolu: bu snapshot'a göre delta
+      chain_len        INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_snapshot_header_account ON snapshot_header(account_id, snapshot_id)",
+    """
+    CREATE TABLE IF NOT EXISTS snapshot_items (
+      snapshot_id INTEGER NOT NULL,
+      txn_id      INTEGER NOT NULL,
+      op          INTEGER NOT NULL DEFAULT 1,  -- 1: var/eklendi, -1: delta'da çıkarıldı
+      txn_date    TEXT,                        -- aşağıdakiler sadece ledger'dan farklı taşınmış satırlarda dolu
+      amount      REAL,
+      txn_type    TEXT,
+      description TEXT,
+      PRIMARY KEY (snapshot_id, txn_id)
+    ) WITHOUT ROWID
+    """,
+)
+
+_ITEM_SQL = """
+    INSERT INTO snapshot_items (snapshot_id, txn_id, op, txn_date, amount, txn_type, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# txn_id -> None (ledger ile aynı) | (txn_date, amount, txn_type, description)
+Items = Dict[int, Optional[Tuple[Any, ...]]]
+
+
+def migrate_legacy_snapshots(con: sqlite3.Connection) -> int:
+    """
+    txn_snapshots → snapshot_header + snapshot_items; sonra eski tablo silinir.
+    Çağıranın açtığı transaction içinde çalışır (commit etmez). Taşınan snapshot sayısını döner.
+    """
+    if not con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='txn_snapshots'").fetchone():
+        return 0
+    rows = con.execute("""
+        SELECT s.snapshot_at, s.account_id, s.range_from, s.range_to, s.request_limit,
+               s.txn_id, s.txn_date, s.amount, s.txn_type, s.description,
+               (t.txn_id IS NOT NULL AND t.txn_date = s.txn_date AND t.amount = s.amount
+                AND t.txn_type IS s.txn_type AND t.description IS s.description) AS same
+        FROM txn_snapshots s
+        LEFT JOIN txns t ON t.txn_id = s.txn_id
+        ORDER BY s.snapshot_id
+    """).fetchall()
+
+    # Aynı listeleme çağrısından gelen satırlar aynı metadata ile yazılmıştı
+    groups: Dict[tuple, Items] = {}
+    for r in rows:
+        items = groups.setdefault(tuple(r[0:5]), {})
+        items[r[5]] = None if r[10] else (r[6], r[7], r[8], r[9])
+
+    for (snap_at, acc_id, r_from, r_to, req_limit), items in groups.items():
+        sid = SnapshotStore._insert_header(con, snap_at, acc_id, r_from, r_to, req_limit, len(items), None, 0)
+        con.executemany(_ITEM_SQL, SnapshotStore._item_rows(sid, items, 1))
+    con.execute("DROP TABLE txn_snapshots")
+    return len(groups)
+
+
+class SnapshotStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # hesap bazında son snapshot (delta tabanı): account_id -> (snapshot_id, chain_len, items)
+        self._last: Dict[int, Tuple[int, int, Items]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        # Şema migrations.run_migrations ile başlangıçta kurulur; burada DDL yok
+        return sqlite3.connect(self.db_path)
+
+    # =============================
+    # Yazma
+    # =============================
+    @staticmethod
+    def _insert_header(con, snap_at, acc_id, r_from, r_to, req_limit, count, base_id, chain_len) -> int:
+        cur = con.execute(
+            """
+            INSERT INTO snapshot_header (
+              snapshot_at, account_id, range_from, range_to, request_limit,
+              item_count, base_snapshot_id, chain_len
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (snap_at, acc_id, r_from, r_to, req_limit, count, base_id, chain_len),
+        )
+        return cur.lastrowid
+
+    @staticmethod
+    def _item_rows(sid: int, items: Items, op: int):
+        for txn_id, ov in items.items():
+            yield (sid, txn_id, op) + (ov if ov else (None, None, None, None))
+
+    def _base_for(self, con: sqlite3.Connection, account_id: int) -> Optional[Tuple[int, int, Items]]:
+        cached = self._last.get(account_id)
+        if cached and con.execute(
+            "SELECT 1 FROM snapshot_header WHERE snapshot_id = ?", (cached[0],)
+        ).fetchone():
+            return cached
+        row = con.execute(
+            "SELECT MAX(snapshot_id) FROM snapshot_header WHERE account_id = ?", (account_id,)
+        ).fetchone()
+        if not row or row[0] is None:
+            return None
+        resolved = self._resolve(con, row[0])
+        return (row[0], resolved[0], resolved[1]) if resolved else None
+
+    def write(self, jobs: List[dict]) -> int:
+        """
+        Snapshot işlerini tek transaction'da yazar; yazılan item satırı sayısını döner.
+        jobs: [{"snapshot_at", "account_id", "from_date", "to_date", "limit", "transactions"}]
+        """
+        written = 0
+        con = self._connect()
+        try:
+            with con:
+                for job in jobs:
+                    acc_id = job["account_id"]
+                    current: Items = dict.fromkeys(tx["txn_id"] for tx in job["transactions"])
+                    req_limit = int(job["limit"]) if isinstance(job.get("limit"), int) else None
+
+                    base = self._base_for(con, acc_id) if SNAPSHOT_DELTA else None
+                    base_id, chain_len, rows = None, 0, None
+                    if base and base[1] + 1 < SNAPSHOT_FULL_EVERY:
+                        base_items = base[2]
+                        # tabanda taşınmış (ledger'dan farklı) değerle duran item yeniden eklenir → ledger değeri geçerli olur
+                        added = {k: None for k in current if k not in base_items or base_items[k] is not None}
+                        removed = {k: None for k in base_items if k not in current}
+                        if len(added) + len(removed) < len(current):
+                            base_id, chain_len = base[0], base[1] + 1
+                            rows = (added, removed)
+
+                    sid = self._insert_header(
+                        con, job["snapshot_at"], acc_id, job.get("from_date"), job.get("to_date"),
+                        req_limit, len(current), base_id, chain_len,
+                    )
+                    if rows is None:
+                        con.executemany(_ITEM_SQL, self._item_rows(sid, current, 1))
+                        written += len(current)
+                    else:
+                        con.executemany(_ITEM_SQL, self._item_rows(sid, rows[0], 1))
+                        con.executemany(_ITEM_SQL, self._item_rows(sid, rows[1], -1))
+                        written += len(rows[0]) + len(rows[1])
+                    self._last[acc_id] = (sid, chain_len, current)
+        except Exception:
+            self._last.clear()  # rollback olduysa önbellek DB ile uyumsuz olabilir
+            raise
+        finally:
+            con.close()
+        return written
+
+    # =============================
+    # Okuma
+    # =============================
+    @staticmethod
+    def _resolve(con: sqlite3.Connection, snapshot_id: int) -> Optional[Tuple[int, Items]]:
+        """Delta zincirini tam snapshot'a kadar geri yürür, item kümesini ileri doğru kurar."""
+        chain: List[int] = []
+        chain_len = None
+        sid: Optional[int] = snapshot_id
+        while sid is not None:
+            row = con.execute(
+                "SELECT base_snapshot_id, chain_len FROM snapshot_header WHERE snapshot_id = ?", (sid,)
+            ).fetchone()
+            if row is None:
+                return None
+            if chain_len is None:
+                chain_len = row[1]
+            chain.append(sid)
+            sid = row[0]
+
+        items: Items = {}
+        for sid in reversed(chain):
+            for txn_id, op, d, a, t, desc in con.execute(
+                "SELECT txn_id, op, txn_date, amount, txn_type, description FROM snapshot_items WHERE snapshot_id = ?",
+                (sid,),
+            ):
+                if op < 0:
+                    items.pop(txn_id, None)
+                else:
+                    items[txn_id] = (d, a, t, desc) if d is not None else None
+        return chain_len, items
+
+    def get(self, snapshot_id: int) -> Optional[dict]:
+        """Snapshot'ı metadata + işlem satırları olarak döndürür (txns ile birleştirilir)."""
+        con = self._connect()
+        con.row_factory = sqlite3.Row
+        try:
+            head = con.execute("SELECT * FROM snapshot_header WHERE snapshot_id = ?", (snapshot_id,)).fetchone()
+            if not head:
+                return None
+            resolved = self._resolve(con, snapshot_id)
+            items = resolved[1] if resolved else {}
+
+            ledger: Dict[int, sqlite3.Row] = {}
+            ids = list(items)
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for r in con.execute(
+                    f"SELECT txn_id, txn_date, amount, txn_type, description FROM txns WHERE txn_id IN ({marks})",
+                    chunk,
+                ):
+                    ledger[r["txn_id"]] = r
+
+            txs = []
+            for txn_id, ov in items.items():
+                if ov is not None:
+                    d, a, t, desc = ov
+                elif txn_id in ledger:
+                    r = ledger[txn_id]
+                    d, a, t, desc = r["txn_date"], r["amount"], r["txn_type"], r["description"]
+                else:
+                    continue  # ledger'dan silinmiş işlem
+                txs.append({"txn_id": txn_id, "txn_date": d, "amount": a, "txn_type": t, "description": desc})
+            txs.sort(key=lambda x: x["txn_id"])
+            txs.sort(key=lambda x: x["txn_date"], reverse=True)
+            return {**dict(head), "transactions": txs}
+        finally:
+            con.close()
+
+    # =============================
+    # Saklama politikası + rapor
+    # =============================
+    def prune(self, max_age_days: Optional[int] = None, keep_per_account: Optional[int] = None) -> dict:
+        """
+        Hesap başına en yeni keep_per_account snapshot'ı ve son max_age_days gündekileri tutar.
+        Silinen bir snapshot'a dayanan delta'lar önce tam snapshot'a çevrilir (rebase).
+        """
+        days = SNAPSHOT_RETENTION_DAYS if max_age_days is None else max_age_days
+        keep = SNAPSHOT_KEEP_PER_ACCOUNT if keep_per_account is None else keep_per_account
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+        con = self._connect()
+        try:
+            doomed = {r[0] for r in con.execute(
+                """
+                SELECT snapshot_id FROM (
+                  SELECT snapshot_id, snapshot_at,
+                         ROW_NUMBER() OVER (PARTITION BY account_id ORDER BY snapshot_id DESC) AS rn
+                  FROM snapshot_header
+                )
+                WHERE rn > ? OR snapshot_at < ?
+                """,
+                (keep, cutoff),
+            )}
+            if not doomed:
+                return {"deleted_snapshots": 0, "deleted_items": 0, "rebased": 0}
+
+            # Tabanı silinecek olan (ve kendisi kalan) delta'lar
+            orphans = [
+                sid for sid, base_id in con.execute(
+                    "SELECT snapshot_id, base_snapshot_id FROM snapshot_header WHERE base_snapshot_id IS NOT NULL"
+                )
+                if base_id in doomed and sid not in doomed
+            ]
+            rebased = {sid: self._resolve(con, sid)[1] for sid in orphans}
+
+            doomed_ids = [(sid,) for sid in doomed]
+            with con:
+                for sid, items in rebased.items():
+                    con.execute("DELETE FROM snapshot_items WHERE snapshot_id = ?", (sid,))
+                    con.executemany(_ITEM_SQL, self._item_rows(sid, items, 1))
+                    con.execute(
+                        "UPDATE snapshot_header SET base_snapshot_id = NULL, chain_len = 0, item_count = ? WHERE snapshot_id = ?",
+                        (len(items), sid),
+                    )
+                deleted_items = con.executemany("DELETE FROM snapshot_items WHERE snapshot_id = ?", doomed_ids).rowcount
+                con.executemany("DELETE FROM snapshot_header WHERE snapshot_id = ?", doomed_ids)
+            self._last.clear()
+            return {"deleted_snapshots": len(doomed), "deleted_items": deleted_items, "rebased": len(rebased)}
+        finally:
+            con.close()
+
+    def report(self) -> dict:
+        con = self._connect()
+        try:
+            headers, full, items = con.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(base_snapshot_id IS NULL), 0), COALESCE(SUM(item_count), 0)
+                FROM snapshot_header
+                """
+            ).fetchone()
+            stored_items = con.execute("SELECT COUNT(*) FROM snapshot_items").fetchone()[0]
+            out = {
+                "snapshots": headers,
+                "full": full,
+                "delta": headers - full,
+                "logical_items": items,      # tam açılmış halde toplam işlem satırı
+                "stored_items": stored_items,  # diskteki item satırı
+            }
+            try:  # dbstat derlenmişse tablo boyutları
+                out["bytes"] = {
+                    name: size for name, size in con.execute(
+                        """
+                        SELECT name, SUM(pgsize) FROM dbstat
+                        WHERE name IN ('snapshot_header', 'snapshot_items', 'idx_snapshot_header_account')
+                        GROUP BY name
+                        """
+                    )
+                }
+            except sqlite3.Error:
+                pass
+            return out
+        finally:
+            con.close()
@@ -154,13 +154,37 @@
 # --- Payment (transfer) yardımcıları ---
 import sqlite3
 import datetime
+import json
 import os
+import random
+import time
 from .sqlite_repo import SQLiteRepository
+from .migrations import backfill_daily_outflow
+from .id_gen import new_id
+
+# Posting: busy (kilitli DB) durumunda yeniden deneme ayarları
+POST_MAX_RETRIES = int(os.getenv("PAYMENT_POST_MAX_RETRIES", "5"))
+POST_BACKOFF_S = float(os.getenv("PAYMENT_POST_BACKOFF_MS", "10")) / 1000.0
+POST_BUSY_TIMEOUT_S = float(os.getenv("PAYMENT_BUSY_TIMEOUT_MS", "1000")) / 1000.0
+
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+
+class BatchItemError(ValueError):
+    """Atomik batch'te kalem hatası: hangi kalemin (index) hangi kodla (code) düştüğünü taşır."""
+    def __init__(self, index: int, code: str):
+        super().__init__(code)
+        self.index = index
+        self.code = code
+
 
 class SQLitePaymentRepository(SQLiteRepository):
     """
     Kendi hesapları arasında transfer (havale) işlemleri için repo.
-    payments tablosu yoksa otomatik oluşturur.
+    payments / card_limit_requests şeması data/migrations.py ile başlangıçta kurulur.
     """
     BASE_DIR = os.path.dirname(__file__)
     DEFAULT_DB = os.environ.get("BANK_DB_PATH", os.path.join(BASE_DIR, "dummy_bank.db"))
@@ -168,31 +192,15 @@ class SQLitePaymentRepository(SQLiteRepository):
     def __init__(self, db_path: str = None):
         super().__init__(db_path )  # SQLiteAccountRepository db_path kurar
         self.db_path = db_path 
+        self.writer = None  # PaymentWriter bağlıysa yazmalar onun üzerinden (group commit)
 
-    def _ensure_schema(self, con: sqlite3.Connection):
-        cur = con.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS payments (
-          payment_id TEXT PRIMARY KEY,
-          customer_id INTEGER NOT NULL,
-          from_account INTEGER NOT NULL,
-          to_account INTEGER NOT NULL,
-          amount REAL NOT NULL,
-          currency TEXT NOT NULL,
-          fee REAL NOT NULL DEFAULT 0,
-          note TEXT,
-          status TEXT NOT NULL,              -- draft|pending|posted|failed|canceled
-          created_at TEXT NOT NULL,
-          posted_at TEXT,
-          from_balance_after REAL,
-          to_balance_after REAL
-        )
-        """)
+    def attach_writer(self, writer) -> None:
+        """Yazma komutlarını tek yazıcı thread'e (data/payment_writer.py) yönlendirir; None → doğrudan yazma."""
+        self.writer = writer
 
     def _connect(self) -> sqlite3.Connection:
         con = sqlite3.connect(self.db_path)
         con.row_factory = sqlite3.Row
-        self._ensure_schema(con)  # <-- her bağlantıda şema garantisi
         return con
 
     def _now(self) -> str:
@@ -206,22 +214,68 @@ class SQLitePaymentRepository(SQLiteRepository):
         acc = self.get_account(account_id)
         return acc.get("customer_id") if acc else None
 
+    def get_accounts_many(self, account_ids) -> dict:
+        """Birden çok hesabı tek sorguda getirir: {account_id: {...}} (precheck / batch precheck için)."""
+        ids = sorted({int(a) for a in account_ids if a is not None})
+        if not ids:
+            return {}
+        con = self._connect()
+        try:
+            rows = con.execute(
+                f"""
+                SELECT account_id, customer_id, account_number, account_type, balance, currency, created_at, status, version
+                FROM accounts WHERE account_id IN ({",".join("?" * len(ids))})
+                """,
+                ids,
+            ).fetchall()
+            return {int(r["account_id"]): dict(r) for r in rows}
+        finally:
+            con.close()
+
+    def get_daily_out_totals(self, customer_ids, date_yyyy_mm_dd: str) -> dict:
+        """get_daily_out_total'ın çoklu hali: {customer_id: total}; kaydı olmayan müşteri 0.0."""
+        ids = sorted({int(c) for c in customer_ids if c is not None})
+        if not ids:
+            return {}
+        con = self._connect()
+        try:
+            rows = con.execute(
+                f"SELECT customer_id, total FROM daily_outflow WHERE day=? AND customer_id IN ({','.join('?' * len(ids))})",
+                [date_yyyy_mm_dd, *ids],
+            ).fetchall()
+            out = {cid: 0.0 for cid in ids}
+            out.update({int(r[0]): float(r[1]) for r in rows})
+            return out
+        finally:
+            con.close()
+
     def get_daily_out_total(self, customer_id: int, date_yyyy_mm_dd: str) -> float:
         """
         Bugün için bu müşterinin 'posted' durumundaki toplam çıkış tutarı.
+        daily_outflow aggregate'inden tek PK lookup (insert_payment_posted ile aynı transaction'da güncellenir).
         """
         con = self._connect()
         try:
-            cur = con.cursor()
-            cur.execute("""
-              SELECT COALESCE(SUM(amount), 0)
-              FROM payments
-              WHERE status='posted'
-                AND from_account IN (SELECT account_id FROM accounts WHERE customer_id=?)
-                AND substr(created_at,1,10)=?
-            """, (customer_id, date_yyyy_mm_dd))
-            row = cur.fetchone()
-            return float(row[0] or 0.0)
+            row = con.execute(
+                "SELECT total FROM daily_outflow WHERE customer_id=? AND day=?",
+                (customer_id, date_yyyy_mm_dd),
+            ).fetchone()
+            return float(row[0]) if row else 0.0
+        finally:
+            con.close()
+
+    def rebuild_daily_outflow(self) -> dict:
+        """daily_outflow'u payments'tan yeniden kurar (mutabakat / elle düzeltme için)."""
+        con = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                rows = backfill_daily_outflow(con)
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+            return {"ok": True, "rows": rows}
         finally:
             con.close()
 
@@ -236,97 +290,293 @@ class SQLitePaymentRepository(SQLiteRepository):
             con.close()
 
     def insert_payment_posted(self, customer_id: int, from_account: int, to_account: int,
-                              amount: float, currency: str, fee: float, note: str) -> dict:
+                              amount: float, currency: str, fee: float, note: str,
+                              daily_limit: float | None = None) -> dict:
         """
         Tek transaction içinde: bakiyeleri güncelle + payments'a 'posted' kayıt ekle
-        + varsa txns tablosuna 2 satır.
+        + daily_outflow aggregate'ini artır + varsa txns tablosuna 2 satır.
+        daily_limit verilirse günlük limit de korumalı düşümde (aynı transaction) kontrol edilir.
+        'database is locked' (busy) durumunda sınırlı sayıda, artan beklemeyle yeniden dener.
+        Writer bağlıysa komut kuyruğa gider ve group commit sonrası sonuç döner.
         """
-        now = self._now()
-        payment_id = f"TX{now.replace('-','').replace(':','').replace('T','').replace('Z','')}"
+        payment_id = new_id("TX")  # retry'larda aynı id → en fazla bir kayıt
+        args = (payment_id, customer_id, from_account, to_account, amount, currency, fee, note)
+        guard = {"daily_limit": daily_limit} if daily_limit is not None else None
+        return self._execute_write(lambda cur: self._post_payment_on(cur, *args, guard=guard))
+
+    def insert_payment_confirmed(self, payment_id: str, customer_id: int, from_account: int, to_account: int,
+                                 amount: float, currency: str, fee: float, note: str,
+                                 versions: tuple, daily_limit: float) -> dict:
+        """
+        Onay token'ı ile gelen transfer: statik kontroller (sahiplik, durum, para birimi) preview'da
+        yapıldı ve hesap sürümleriyle sabitlendi; burada yalnızca değişebilenler (bakiye, günlük limit,
+        sürüm) TEK korumalı UPDATE ile doğrulanır.
+        payment_id token'dan gelir → aynı token ile tekrar çağrı yeni kayıt açmaz, mevcut kaydı
+        {"replayed": True} ile döndürür.
+        """
+        args = (payment_id, customer_id, from_account, to_account, amount, currency, fee, note)
+
+        def op(cur: sqlite3.Cursor) -> dict:
+            existing = self._payment_on(cur, payment_id)
+            if existing:
+                return {**existing, "replayed": True}
+            return self._post_payment_on(cur, *args, guard={"versions": versions, "daily_limit": daily_limit})
+
+        return self._execute_write(op)
+
+    def get_payment(self, payment_id: str) -> dict | None:
         con = self._connect()
         try:
-            con.isolation_level = None  # explicit tx
-            cur = con.cursor()
-            cur.execute("BEGIN")
+            return self._payment_on(con.cursor(), payment_id)
+        finally:
+            con.close()
 
-            # bakiyeler
-            cur.execute("SELECT balance FROM accounts WHERE account_id=?", (from_account,))
-            r = cur.fetchone()
-            if not r:
-                raise ValueError("from_account_not_found")
-            from_bal = float(r[0])
-            if from_bal < amount + fee:
-                raise ValueError("insufficient_funds")
-
-            cur.execute("UPDATE accounts SET balance = balance - ? WHERE account_id=?", (amount + fee, from_account))
-            cur.execute("UPDATE accounts SET balance = balance + ? WHERE account_id=?", (amount, to_account))
-
-            # güncel bakiyeler
-            cur.execute("SELECT balance FROM accounts WHERE account_id=?", (from_account,))
-            from_bal_after = float(cur.fetchone()[0])
-            cur.execute("SELECT balance FROM accounts WHERE account_id=?", (to_account,))
-            to_bal_after = float(cur.fetchone()[0])
-
-            # payments kaydı
+    @staticmethod
+    def _payment_on(cur: sqlite3.Cursor, payment_id: str) -> dict | None:
+        row = cur.execute("""
+          SELECT payment_id, customer_id, from_account, to_account, amount, currency, fee, note,
+                 status, created_at, posted_at, from_balance_after, to_balance_after
+          FROM payments WHERE payment_id=?
+        """, (payment_id,)).fetchone()
+        if not row:
+            return None
+        return dict(zip([d[0] for d in cur.description], row))
+
+    def insert_payments_batch(self, items: list, atomic: bool = True, daily_limit: float | None = None) -> list:
+        """
+        Birden çok transferi TEK yazma transaction'ında işler.
+        items: [{customer_id, from_account, to_account, amount, currency, fee, note, payment_id?}, ...]
+        - atomic=True  → ilk hatada hepsi geri alınır, BatchItemError(index, code) fırlatılır
+        - atomic=False → her kalem kendi SAVEPOINT'inde; hatalı kalem {"error": code} olur, diğerleri işlenir
+        daily_limit verilirse her kalemin günlük limiti korumalı düşümde kontrol edilir (eşzamanlı
+        tekil transferler de aynı aggregate'i gördüğü için precheck anlık görüntüsüne güvenilmez).
+        Dönüş: kalem sırasıyla sonuç listesi (txn dict veya {"error": ...})
+        """
+        rows = self._batch_rows(items)
+        guard = {"daily_limit": daily_limit} if daily_limit is not None else None
+        return self._execute_write(lambda cur: self._post_batch_on(cur, rows, atomic, guard))
+
+    def insert_payments_batch_confirmed(self, batch_id: str, customer_id: int, items: list,
+                                        atomic: bool, daily_limit: float, rejected: list = ()) -> dict:
+        """
+        Onay token'ı ile gelen toplu transfer. Kalemler ve payment_batches kaydı TEK transaction'da
+        yazılır; aynı batch_id ile tekrar çağrı (LLM retry, çift tık) yeni kayıt açmaz, ilk
+        sonucu {"replayed": True} ile döndürür.
+        items kalemleri "index" (istekteki sıra) taşır; rejected: ön kontrolde düşen kalemler
+        [{index, error}] — kayda birlikte yazılır ki tekrar çağrı aynı sonucu görsün.
+        Dönüş: {"replayed": bool, "results": [{index, txn} | {index, error}, ...]} (index sırasıyla)
+        """
+        rows = self._batch_rows(items)
+        guard = {"daily_limit": daily_limit}
+        mode = "atomic" if atomic else "per_item"
+
+        def op(cur: sqlite3.Cursor) -> dict:
+            stored = self._payment_batch_on(cur, batch_id)
+            if stored:
+                return {"replayed": True, "results": stored["results"]}
+            posted = self._post_batch_on(cur, rows, atomic, guard)
+            results = [{"index": it.get("index", i), **({"error": r["error"]} if "error" in r else {"txn": r})}
+                       for i, (it, r) in enumerate(zip(items, posted))]
+            results = sorted(results + list(rejected), key=lambda r: r["index"])
             cur.execute("""
-              INSERT INTO payments(payment_id, customer_id, from_account, to_account, amount, currency, fee, note, status, created_at, posted_at, from_balance_after, to_balance_after)
-              VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'posted', ?, ?, ?, ?)
-            """, (payment_id, customer_id, from_account, to_account, amount, currency, fee, note, now, now, from_bal_after, to_bal_after))
+              INSERT INTO payment_batches(batch_id, customer_id, mode, item_count, posted_count, results_json, created_at)
+              VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (batch_id, customer_id, mode, len(results), sum(1 for r in results if "txn" in r),
+                  json.dumps(results, ensure_ascii=False), self._now()))
+            return {"replayed": False, "results": results}
 
-            # opsiyonel txns
-            try:
-                cur.execute("""
-                  INSERT INTO txns(account_id, ts, amount, currency, direction, desc, counterparty)
-                  VALUES (?, ?, ?, ?, 'out', ?, ?)
-                """, (from_account, now, amount + fee, currency, f"Transfer to #{to_account} | {note or ''}", str(to_account)))
-                cur.execute("""
-                  INSERT INTO txns(account_id, ts, amount, currency, direction, desc, counterparty)
-                  VALUES (?, ?, ?, ?, 'in', ?, ?)
-                """, (to_account, now, amount, currency, f"Transfer from #{from_account} | {note or ''}", str(from_account)))
-            except Exception:
-                pass
+        return self._execute_write(op)
+
+    def get_payment_batch(self, batch_id: str) -> dict | None:
+        con = self._connect()
+        try:
+            return self._payment_batch_on(con.cursor(), batch_id)
+        finally:
+            con.close()
 
+    @staticmethod
+    def _payment_batch_on(cur: sqlite3.Cursor, batch_id: str) -> dict | None:
+        row = cur.execute(
+            "SELECT batch_id, customer_id, mode, results_json, created_at FROM payment_batches WHERE batch_id=?",
+            (batch_id,),
+        ).fetchone()
+        if not row:
+            return None
+        return {"batch_id": row[0], "customer_id": row[1], "mode": row[2],
+                "results": json.loads(row[3]), "created_at": row[4]}
+
+    @staticmethod
+    def _batch_rows(items: list) -> list:
+        return [
+            (it.get("payment_id") or new_id("TX"), it["customer_id"], it["from_account"], it["to_account"],
+             it["amount"], it["currency"], it["fee"], it.get("note") or "")
+            for it in items
+        ]
+
+    def _post_batch_on(self, cur: sqlite3.Cursor, rows: list, atomic: bool, guard: dict | None) -> list:
+        out = []
+        for i, args in enumerate(rows):
+            cur.execute("SAVEPOINT batch_item")
+            try:
+                out.append(self._post_payment_on(cur, *args, guard=guard))
+                cur.execute("RELEASE batch_item")
+            except ValueError as e:
+                cur.execute("ROLLBACK TO batch_item")
+                cur.execute("RELEASE batch_item")
+                if atomic:
+                    raise BatchItemError(i, str(e))
+                out.append({"error": str(e)})
+        return out
+
+    def _execute_write(self, op):
+        """
+        op(cur) fonksiyonunu tek yazma transaction'ında çalıştırır.
+        Writer bağlıysa group commit kuyruğuna gider; değilse BEGIN IMMEDIATE + busy retry.
+        """
+        if self.writer is not None:
+            return self.writer.execute(op)
+        attempt = 0
+        while True:
+            try:
+                return self._write_once(op)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt >= POST_MAX_RETRIES:
+                    raise
+                # üstel backoff + jitter (aynı anda düşen istekler yeniden çakışmasın)
+                time.sleep(POST_BACKOFF_S * (2 ** attempt) * (0.5 + random.random()))
+                attempt += 1
+
+    def _write_once(self, op):
+        # explicit tx; busy handler kısa tutulur, asıl bekleme _execute_write'taki retry'da
+        con = sqlite3.connect(self.db_path, timeout=POST_BUSY_TIMEOUT_S, isolation_level=None)
+        cur = con.cursor()
+        try:
+            # Yazma kilidi en başta alınır → okuma→yazma kilit yükseltme çakışması (deadlock) olmaz
+            cur.execute("BEGIN IMMEDIATE")
+            out = op(cur)
             cur.execute("COMMIT")
-            return {
-                "payment_id": payment_id,
-                "customer_id": customer_id,
-                "from_account": from_account,
-                "to_account": to_account,
-                "amount": amount,
-                "currency": currency,
-                "fee": fee,
-                "note": note,
-                "status": "posted",
-                "created_at": now,
-                "posted_at": now,
-                "from_balance_after": from_bal_after,
-                "to_balance_after": to_bal_after
-            }
+            return out
         except Exception:
-            try: cur.execute("ROLLBACK")
-            except Exception: pass
+            if con.in_transaction:
+                try: cur.execute("ROLLBACK")
+                except Exception: pass
             raise
         finally:
             con.close()
 
-    def ensure_card_limit_request_schema(self, con: sqlite3.Connection):
+    def _post_payment_on(self, cur: sqlite3.Cursor, payment_id: str, customer_id: int, from_account: int,
+                         to_account: int, amount: float, currency: str, fee: float, note: str,
+                         guard: dict | None = None) -> dict:
         """
-        'card_limit_requests' tablosunu garanti eder.
-        Eğer yoksa oluşturur.
+        Posting adımları; açık bir yazma transaction'ı içindeki cursor üzerinde çalışır (commit etmez).
+        guard (ikisi de opsiyonel) aynı korumalı UPDATE'lerde kontrol edilir:
+          "versions": (v_from, v_to) → onay token'lı yol: hesap sürümleri değişmemiş olmalı
+          "daily_limit": x           → daily_outflow + tutar <= x (eşzamanlı yazmalara karşı)
         """
-        cur = con.cursor()
-        # YENİ: kart limit artış talepleri
+        now = self._now()
+        debit = amount + fee
+        versions = (guard or {}).get("versions")
+        daily_limit = (guard or {}).get("daily_limit")
+        # Korumalı düşüm: bakiye (ve varsa sürüm / günlük limit) kontrolü ve güncelleme tek statement
+        sql = "UPDATE accounts SET balance = balance - ? WHERE account_id=? AND balance >= ?"
+        params = [debit, from_account, debit]
+        if versions is not None:
+            sql += " AND version=?"
+            params.append(versions[0])
+        if daily_limit is not None:
+            sql += """ AND COALESCE((SELECT total FROM daily_outflow d
+                                     WHERE d.customer_id = accounts.customer_id AND d.day = ?), 0) + ? <= ?"""
+            params += [now[:10], amount, daily_limit]
+        r = cur.execute(sql + " RETURNING balance, customer_id", params).fetchone()
+        if not r:
+            raise ValueError(self._debit_failure_on(cur, from_account, debit, amount, now[:10], guard))
+        from_bal_after, owner_id = float(r[0]), r[1]
+
+        if versions is None:
+            r = cur.execute(
+                "UPDATE accounts SET balance = balance + ? WHERE account_id=? RETURNING balance",
+                (amount, to_account),
+            ).fetchone()
+        else:
+            r = cur.execute(
+                "UPDATE accounts SET balance = balance + ? WHERE account_id=? AND version=? RETURNING balance",
+                (amount, to_account, versions[1]),
+            ).fetchone()
+        if not r:
+            exists = cur.execute("SELECT 1 FROM accounts WHERE account_id=?", (to_account,)).fetchone()
+            raise ValueError("confirm_token_stale" if exists and versions is not None else "to_account_not_found")
+        to_bal_after = float(r[0])
+
+        # günlük çıkış aggregate'i (gönderen hesabın sahibi için, aynı transaction)
+        cur.execute("""
+          INSERT INTO daily_outflow(customer_id, day, total, count)
+          VALUES (?, ?, ?, 1)
+          ON CONFLICT(customer_id, day) DO UPDATE SET
+            total = total + excluded.total,
+            count = count + 1
+        """, (owner_id, now[:10], amount))
+
+        # payments kaydı
         cur.execute("""
-        CREATE TABLE IF NOT EXISTS card_limit_requests (
-          request_id      INTEGER PRIMARY KEY AUTOINCREMENT,
-          created_at      TEXT NOT NULL,
-          card_id         INTEGER NOT NULL,
-          customer_id     INTEGER NOT NULL,
-          requested_limit REAL NOT NULL,
-          reason          TEXT,
-          status          TEXT NOT NULL   -- received|approved|rejected
-        )
-        """)
+          INSERT INTO payments(payment_id, customer_id, from_account, to_account, amount, currency, fee, note, status, created_at, posted_at, from_balance_after, to_balance_after)
+          VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'posted', ?, ?, ?, ?)
+        """, (payment_id, customer_id, from_account, to_account, amount, currency, fee, note, now, now, from_bal_after, to_bal_after))
+
+        # opsiyonel txns
+        try:
+            cur.execute("""
+              INSERT INTO txns(account_id, ts, amount, currency, direction, desc, counterparty)
+              VALUES (?, ?, ?, ?, 'out', ?, ?)
+            """, (from_account, now, amount + fee, currency, f"Transfer to #{to_account} | {note or ''}", str(to_account)))
+            cur.execute("""
+              INSERT INTO txns(account_id, ts, amount, currency, direction, desc, counterparty)
+              VALUES (?, ?, ?, ?, 'in', ?, ?)
+            """, (to_account, now, amount, currency, f"Transfer from #{from_account} | {note or ''}", str(from_account)))
+        except sqlite3.OperationalError:
+            pass
+
+        return {
+            "payment_id": payment_id,
+            "customer_id": customer_id,
+            "from_account": from_account,
+            "to_account": to_account,
+            "amount": amount,
+            "currency": currency,
+            "fee": fee,
+            "note": note,
+            "status": "posted",
+            "created_at": now,
+            "posted_at": now,
+            "from_balance_after": from_bal_after,
+            "to_balance_after": to_bal_after
+        }
+
+    @staticmethod
+    def _debit_failure_on(cur: sqlite3.Cursor, from_account: int, debit: float, amount: float,
+                          day: str, guard: dict | None) -> str:
+        """
+        Korumalı düşüm satır döndürmediyse nedenini bulur (yalnızca hata yolunda çalışır).
+        Koşullardan hiçbiri tutmuyorsa (ör. satır arada değişti) genel "debit_rejected" döner.
+        """
+        row = cur.execute(
+            "SELECT balance, version, customer_id FROM accounts WHERE account_id=?", (from_account,)
+        ).fetchone()
+        if not row:
+            return "from_account_not_found"
+        balance, version, owner_id = row
+        guard = guard or {}
+        if guard.get("versions") is not None and version != guard["versions"][0]:
+            return "confirm_token_stale"
+        if balance < debit:
+            return "insufficient_funds"
+        if guard.get("daily_limit") is not None:
+            used = cur.execute(
+                "SELECT COALESCE((SELECT total FROM daily_outflow WHERE customer_id=? AND day=?), 0)",
+                (owner_id, day),
+            ).fetchone()[0]
+            if used + amount > guard["daily_limit"]:
+                return "daily_limit_exceeded"
+        return "debit_rejected"
 
     def save_card_limit_increase_request(
         self,
@@ -336,22 +586,21 @@ class SQLitePaymentRepository(SQLiteRepository):
         reason: str | None,
         status: str = "received",
     ) -> dict:
-        con = self._connect()
-        try:
-            now = self._now()
-            cur = con.cursor()
-            cur.execute("""
-              INSERT INTO card_limit_requests
-              (created_at, card_id, customer_id, requested_limit, reason, status)
-              VALUES (?, ?, ?, ?, ?, ?)
-            """, (now, int(card_id), int(customer_id), float(requested_limit), reason, status))
-            con.commit()
-            rid = cur.lastrowid
-            return {
-                "request_id": int(rid),
-                "created_at": now,
-                "status": status,
-                "reason": reason,
-            }
-        finally:
-            con.close()
+        args = (new_id("LR"), int(card_id), int(customer_id), float(requested_limit), reason, status)
+        return self._execute_write(lambda cur: self._insert_card_limit_request_on(cur, *args))
+
+    def _insert_card_limit_request_on(self, cur: sqlite3.Cursor, ref: str, card_id: int, customer_id: int,
+                                      requested_limit: float, reason: str | None, status: str) -> dict:
+        now = self._now()
+        cur.execute("""
+          INSERT INTO card_limit_requests
+          (created_at, card_id, customer_id, requested_limit, reason, status, request_ref)
+          VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (now, card_id, customer_id, requested_limit, reason, status, ref))
+        return {
+            "request_id": int(cur.lastrowid),
+            "request_ref": ref,
+            "created_at": now,
+            "status": status,
+            "reason": reason,
+        }
@@ -1,10 +1,43 @@
 # data/sqlite_repo.py
+import base64
+import json
 import os
 import sqlite3
 from datetime import datetime
-from typing import Any, Dict, List, Optional,Tuple
+from typing import Any, Dict, Iterator, List, Optional,Tuple
 import pandas as pd
 
+from .rate_resolver import RateResolver
+from .snapshot_store import SnapshotStore
+
+
+# =============================
+# İşlem listesi için keyset cursor
+# =============================
+# Sıralama (txn_date DESC, txn_id ASC): idx_txns_account_date(account_id, txn_date DESC)
+# indeksinin doğal sırası (aynı tarihte rowid artan) → ek sıralama (temp b-tree) gerekmez.
+# Cursor sorgu kapsamına (account_id, from_date, to_date) bağlıdır: başka hesap/aralıkla
+# kullanılırsa reddedilir (konum bilgisi yalnızca üretildiği sorguda anlamlı).
+def _encode_txn_cursor(txn_date: str, txn_id: int, scope: list) -> str:
+    raw = json.dumps([txn_date, txn_id, *scope], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_txn_cursor(cursor: str, scope: list) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        txn_date, txn_id, *cursor_scope = json.loads(raw)
+        txn_date, txn_id = str(txn_date), int(txn_id)
+    except Exception:
+        raise ValueError("geçersiz cursor")
+    if cursor_scope != list(scope):
+        raise ValueError("cursor bu hesap / tarih aralığına ait değil")
+    return txn_date, txn_id
+
+
+def _txn_cursor_scope(account_id: int, from_date: str | None, to_date: str | None) -> list:
+    return [int(account_id), from_date or None, to_date or None]
+
 
 class SQLiteRepository:
     """
@@ -369,6 +402,45 @@ class SQLiteRepository:
         finally:
             con.close()
 
+    _TXN_COLUMNS = "t.txn_id, t.account_id, t.amount, t.txn_type, t.txn_date, t.description"
+
+    def _txn_page_sql(
+        self,
+        account_id: int,
+        customer_id: int,
+        from_date: str | None,
+        to_date: str | None,
+        after: Tuple[str, int] | None,
+    ) -> Tuple[str, list]:
+        """
+        Tek sayfa işlem sorgusu (LIMIT parametresi en sona eklenir).
+        after=(txn_date, txn_id) verilirse o satırdan sonrası: indekste tek seek.
+        """
+        where = ["t.account_id = ?", "a.customer_id = ?"]
+        params: list[Any] = [account_id, customer_id]
+
+        if from_date:
+            where.append("t.txn_date >= ?")
+            params.append(from_date)
+        if to_date:
+            where.append("t.txn_date <= ?")
+            params.append(to_date)
+        if after:
+            last_date, last_id = after
+            where.append("t.txn_date <= ?")
+            where.append("(t.txn_date < ? OR t.txn_id > ?)")
+            params.extend([last_date, last_date, last_id])
+
+        sql = f"""
+            SELECT {self._TXN_COLUMNS}
+            FROM txns t
+            JOIN accounts a ON t.account_id = a.account_id
+            WHERE {" AND ".join(where)}
+            ORDER BY t.txn_date DESC, t.txn_id ASC
+            LIMIT ?
+        """
+        return sql, params
+
     def list_transactions(
         self,
         account_id: int,
@@ -376,44 +448,88 @@ class SQLiteRepository:
         from_date: str | None = None,
         to_date: str | None = None,
         limit: int = 50,
+        cursor: str | None = None,
     ) -> list[dict]:
         """
         Belirli hesabın işlem kayıtlarını tarih filtresiyle getirir ve müşteri kimliği ile doğrular.
         Tarih alanı: txns.txn_date (TEXT/DATETIME). 'YYYY-MM-DD' veya
         'YYYY-MM-DD HH:MM:SS' formatları desteklenir.
+        cursor: list_transactions_page'in döndürdüğü next_cursor (sonraki sayfa).
+        """
+        return self.list_transactions_page(
+            account_id, customer_id, from_date, to_date, limit, cursor
+        )["transactions"]
+
+    def list_transactions_page(
+        self,
+        account_id: int,
+        customer_id: int,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> dict:
+        """
+        Keyset sayfalama: limit+1 satır okunur, fazlası varsa son satırdan next_cursor üretilir.
+        Cursor yalnızca aynı account_id / from_date / to_date ile geçerlidir (aksi halde ValueError).
+        Dönüş: {"transactions": [...], "next_cursor": str | None}
         """
+        lim = limit if isinstance(limit, int) and limit > 0 else 50
+        scope = _txn_cursor_scope(account_id, from_date, to_date)
+        after = _decode_txn_cursor(cursor, scope) if cursor else None
+        sql, params = self._txn_page_sql(account_id, customer_id, from_date, to_date, after)
+        params.append(lim + 1)
+
         con = sqlite3.connect(self.db_path)
         con.row_factory = sqlite3.Row
         try:
-            cur = con.cursor()
+            rows = con.execute(sql, params).fetchall()
+        finally:
+            con.close()
 
-            where = ["t.account_id = ?", "a.customer_id = ?"]
-            params: list[Any] = [account_id, customer_id]
+        next_cursor = None
+        if len(rows) > lim:
+            rows = rows[:lim]
+            next_cursor = _encode_txn_cursor(rows[-1]["txn_date"], rows[-1]["txn_id"], scope)
+        return {"transactions": [dict(r) for r in rows], "next_cursor": next_cursor}
 
-            if from_date:
-                where.append("t.txn_date >= ?")
-                params.append(from_date)
-            if to_date:
-                where.append("t.txn_date <= ?")
-                params.append(to_date)
+    def iter_transactions(
+        self,
+        account_id: int,
+        customer_id: int,
+        from_date: str | None = None,
+        to_date: str | None = None,
+        cursor: str | None = None,
+        chunk_size: int = 200,
+    ) -> Iterator[dict]:
+        """
+        İşlemleri sabit boyutlu parçalar halinde (keyset ile) akıtan generator.
+        Tüm geçmiş belleğe alınmaz; her parça indekste tek seek'tir.
+        """
+        after = _decode_txn_cursor(cursor, _txn_cursor_scope(account_id, from_date, to_date)) if cursor else None
+        chunk = chunk_size if isinstance(chunk_size, int) and chunk_size > 0 else 200
 
-            where_sql = " AND ".join(where)
-            sql = f"""
-                SELECT
-                    t.txn_id, t.account_id, t.amount, t.txn_type,
-                    t.txn_date, t.description
-                FROM txns t
-                JOIN accounts a ON t.account_id = a.account_id
-                WHERE {where_sql}
-                ORDER BY t.txn_date DESC
-                LIMIT ?
-            """
-            params.append(limit if isinstance(limit, int) and limit > 0 else 50)
-            rows = cur.execute(sql, params).fetchall()
-            return [dict(r) for r in rows]
+        con = sqlite3.connect(self.db_path)
+        con.row_factory = sqlite3.Row
+        try:
+            while True:
+                sql, params = self._txn_page_sql(account_id, customer_id, from_date, to_date, after)
+                params.append(chunk)
+                rows = con.execute(sql, params).fetchall()
+                for r in rows:
+                    yield dict(r)
+                if len(rows) < chunk:
+                    return
+                after = (rows[-1]["txn_date"], rows[-1]["txn_id"])
         finally:
             con.close()
 
+    def _snapshots(self) -> SnapshotStore:
+        store = getattr(self, "_snapshot_store", None)
+        if store is None:
+            store = self._snapshot_store = SnapshotStore(self.db_path)
+        return store
+
     def save_transaction_snapshot(
         self,
         account_id: int,
@@ -423,99 +539,56 @@ class SQLiteRepository:
         transactions: list[dict],
     ) -> dict:
         """
-        Listelediğimiz işlemleri 'txn_snapshots' tablosuna snapshot olarak kaydeder.
-        Her işlem satırını, istek metadatasıyla birlikte saklarız.
+        Listelediğimiz işlemleri snapshot olarak kaydeder (snapshot_header + snapshot_items).
+        (Senkron yol; MCP tool'ları SnapshotRecorder üzerinden arka planda yazar.)
         """
-        con = sqlite3.connect(self.db_path)
-        try:
-            con.execute("""
-                CREATE TABLE IF NOT EXISTS txn_snapshots (
-                  snapshot_id   INTEGER PRIMARY KEY AUTOINCREMENT,
-                  snapshot_at   TEXT NOT NULL,
-                  account_id    INTEGER NOT NULL,
-                  range_from    TEXT,
-                  range_to      TEXT,
-                  request_limit INTEGER,
-                  txn_id        INTEGER NOT NULL,
-                  txn_date      TEXT NOT NULL,
-                  amount        REAL NOT NULL,
-                  txn_type      TEXT,
-                  description   TEXT,
-                  FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE,
-                  FOREIGN KEY (txn_id)     REFERENCES txns(txn_id)       ON DELETE CASCADE
-                )
-            """)
-            con.commit()
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        saved = self.save_transaction_snapshots([{
+            "snapshot_at": now,
+            "account_id": account_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "limit": limit,
+            "transactions": transactions,
+        }])
+        return {"snapshot_at": now, "saved": saved}
+
+    def save_transaction_snapshots(self, jobs: list[dict]) -> int:
+        """
+        Birden çok snapshot işini tek transaction + executemany ile yazar.
+        jobs: [{"snapshot_at", "account_id", "from_date", "to_date", "limit", "transactions"}]
+        Dönüş: yazılan item satırı sayısı (delta snapshot'larda sadece farklar).
+        """
+        if not any(job["transactions"] for job in jobs):
+            return 0
+        return self._snapshots().write([job for job in jobs if job["transactions"]])
 
-            from datetime import datetime
-            now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    def get_transaction_snapshot(self, snapshot_id: int) -> Optional[dict]:
+        """Snapshot metadata'sı + o anki işlem listesi (delta zinciri çözülerek)."""
+        return self._snapshots().get(snapshot_id)
 
-            cur = con.cursor()
-            for tx in transactions:
-                cur.execute(
-                    """
-                    INSERT INTO txn_snapshots (
-                      snapshot_at, account_id, range_from, range_to, request_limit,
-                      txn_id, txn_date, amount, txn_type, description
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        now,
-                        account_id,
-                        from_date,
-                        to_date,
-                        int(limit) if isinstance(limit, int) else None,
-                        tx["txn_id"],
-                        tx["txn_date"],
-                        tx["amount"],
-                        tx.get("txn_type"),
-                        tx.get("description"),
-                    ),
-                )
-            con.commit()
-            return {"snapshot_at": now, "saved": len(transactions)}
-        finally:
-            con.close()
+    def prune_transaction_snapshots(
+        self, max_age_days: Optional[int] = None, keep_per_account: Optional[int] = None
+    ) -> dict:
+        """Saklama politikası: eski / hesap başına fazla snapshot'ları siler."""
+        return self._snapshots().prune(max_age_days, keep_per_account)
+
+    def transaction_snapshot_report(self) -> dict:
+        return self._snapshots().report()
+
+
+    def _rates(self) -> RateResolver:
+        resolver = getattr(self, "_rate_resolver", None)
+        if resolver is None:
+            resolver = self._rate_resolver = RateResolver(self.db_path)
+        return resolver
 
-    
     def get_interest_rate(self, product: str) -> float:
         """
-        interest_rates tablosundan tek ürün için en güncel oranı döner.
-        Şema uyarlaması:
-          - Oran kolonu annual_rate varsa onu, yoksa rate_apy'yi kullanır.
-          - Tarih kolonu effective_date varsa onu, yoksa updated_at'ı kullanır.
+        Tek ürün için en güncel oranı döner (RateResolver indeksinden; SQLite'a yalnızca
+        tazelik kontrolünde gidilir). Bulunamazsa ValueError.
         """
-        con = sqlite3.connect(self.db_path)
-        con.row_factory = sqlite3.Row
-        try:
-            # kolon keşfi
-            cols = {r[1] for r in con.execute("PRAGMA table_info('interest_rates')")}
-            rate_col = "annual_rate" if "annual_rate" in cols else "rate_apy"
-            date_col = "effective_date" if "effective_date" in cols else "updated_at"
-
-            sql = f"""
-                SELECT {rate_col} AS rate_value
-                FROM interest_rates
-                WHERE product = ? COLLATE NOCASE
-                ORDER BY
-                  COALESCE(datetime({date_col}), datetime('1970-01-01')) DESC,
-                  rowid DESC
-                LIMIT 1
-            """
-            row = con.execute(sql, (product,)).fetchone()
-            if not row or row["rate_value"] is None:
-             raise ValueError(f"Interest rate not found for product={product}")
-            
-            rate_value = float(row["rate_value"])
-            
-            # rate_apy sütunundan geliyorsa 100'e böl (zaten yüzde olarak geliyor)
-            if rate_col == "rate_apy":
-                rate_value = rate_value / 100.0
-                
-            return rate_value
-        finally:
-            con.close()
+        return self._rates().resolve(product)[0]
 
     def _resolve_rate_via_repo_or_db(
     self,
@@ -527,105 +600,22 @@ class SQLiteRepository:
     ) -> Tuple[float, dict]:
         """
         1) provided_rate verilmişse onu kullanır.
-        2) repo.get_interest_rate(product) varsa onu kullanır.
-        3) Yoksa sqlite DB'de interest_rates benzeri tablodan çeker.
-        - Tablo adı: interest_rates | rates | deposit_rates | loan_rates ... (esnek)
-        - Oran sütunu: annual_rate | rate_apy | rate | apr (esnek)
-        - Ürün sütunu: product | product_type (esnek)
-        - Para birimi: currency | ccy (esnek)
-        - Tarih: effective_date | valid_from | updated_at | date (en güncel satır)
+        2) Yoksa (product or product_fallback, currency, as_of) oranını RateResolver'dan alır.
+        - Tablo/kolon keşfi (interest_rates | rates | ...; annual_rate | rate_apy | rate | apr;
+          product | product_type; currency | ccy; effective_date | valid_from | updated_at | date)
+          resolver'da bir kez yapılır; as_of verilirse o tarihte geçerli en güncel satır seçilir.
         """
         # 1) Manuel
         if provided_rate is not None:
             return float(provided_rate), {"source": "manual"}
 
-        # 2) Repo
+        # 2) DB (bellek indeksi)
         prod = product or product_fallback
-        #if repo is not None and hasattr(repo, "get_interest_rate"):
-        if prod is not None:
-            r = float(self.get_interest_rate(prod))
-            return r, {"source": "db:get_interest_rate", "product": prod}
-
-        # 3) SQLite fallback
+        if not prod:
+            raise ValueError("rate not provided; product verilmedi")
         if not self.db_path:
             raise ValueError("rate not provided; repo yok; db_path verilmedi")
-
-        as_of_date = None
-        if as_of:
-            try:
-                as_of_date = datetime.fromisoformat(as_of).date()
-            except Exception:
-                raise ValueError("as_of must be ISO date YYYY-MM-DD")
-
-        con = sqlite3.connect(self.db_path)
-        con.row_factory = sqlite3.Row
-        try:
-            # Aday tablolar
-            tbls = [r[0] for r in con.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND (lower(name) LIKE '%interest%' OR lower(name) LIKE '%rate%')"
-            ).fetchall()]
-            if not tbls:
-                raise ValueError("No interest/rate tables found in DB")
-
-            preferred = ["interest_rates", "rates", "deposit_rates", "loan_rates", "bank_interest_rates", "interest"]
-            tbls_sorted = sorted(tbls, key=lambda t: (preferred.index(t) if t in preferred else 999, t))
-
-            best_row, best_tbl, meta = None, None, {}
-            best_score = -1
-
-            for tbl in tbls_sorted:
-                cols = {r[1] for r in con.execute(f"PRAGMA table_info('{tbl}')").fetchall()}
-                def pick(cands):
-                    for c in cands:
-                        if c in cols: return c
-                    return None
-
-                rate_col     = pick(["annual_rate","rate_apy","rate","apr"])
-                product_col  = pick(["product","product_type","category"])
-                currency_col = pick(["currency","ccy","iso_currency"])
-                eff_col      = pick(["effective_date","valid_from","updated_at","date"])
-
-                if not rate_col:
-                    continue
-
-                where, params, score = [], [], 0
-                if product_col:
-                    where.append(f"LOWER({product_col}) = LOWER(?)")
-                    params.append(prod)
-                    score += 1
-                if currency_col:
-                    where.append(f"UPPER({currency_col}) = UPPER(?)")
-                    params.append(currency)
-                    score += 1
-                if as_of_date and eff_col:
-                    where.append(f"date({eff_col}) <= date(?)")
-                    params.append(as_of_date.isoformat())
-
-                sql = f"SELECT * FROM '{tbl}'"
-                if where: sql += " WHERE " + " AND ".join(where)
-                if eff_col:
-                    sql += f" ORDER BY date({eff_col}) DESC, rowid DESC LIMIT 1"
-                else:
-                    sql += " ORDER BY rowid DESC LIMIT 1"
-
-                row = con.execute(sql, params).fetchone()
-                if row is not None and score > best_score:
-                    best_score, best_row, best_tbl = score, row, tbl
-                    meta = {
-                        "source": "db",
-                        "table": tbl,
-                        "matched_columns": {
-                            "rate": rate_col, "product": product_col,
-                            "currency": currency_col, "effective": eff_col
-                        }
-                    }
-
-            if not best_row:
-                raise ValueError(f"Could not resolve rate for product={prod}, currency={currency}")
-
-            return float(best_row[meta["matched_columns"]["rate"]]), meta
-        finally:
-            con.close()
+        return self._rates().resolve(prod, currency, as_of)
     
     def _get_connection(self):
         """
@@ -657,6 +647,42 @@ class SQLiteRepository:
             df = pd.read_sql_query(query, conn)
             return df
 
+    def get_asset_correlations_data(self) -> pd.DataFrame:
+        """
+        'asset_correlations' tablosundan varlık çifti korelasyonlarını çeker (asset_a, asset_b, correlation).
+        """
+        query = "SELECT asset_a, asset_b, correlation FROM asset_correlations;"
+        with self._get_connection() as conn:
+            df = pd.read_sql_query(query, conn)
+            return df
+
+    def get_data_versions(self, names) -> Dict[str, int]:
+        """
+        data_versions tablosundan tablo sürümleri (migration 008 tetikleyicileri her yazmada artırır).
+        """
+        names = list(names)
+        if not names:
+            return {}
+        con = sqlite3.connect(self.db_path)
+        try:
+            rows = con.execute(
+                f"SELECT name, version FROM data_versions WHERE name IN ({','.join('?' * len(names))})",
+                names,
+            ).fetchall()
+            return {name: int(version) for name, version in rows}
+        finally:
+            con.close()
+
+    def get_macro_scenarios_data(self) -> pd.DataFrame:
+        """
+        'macro_scenarios' tablosundan senaryo şoklarını çeker
+        (ekonomik_senaryo, etkilenen_varlik, getiri_etikisi, volatilite_etikisi).
+        """
+        query = "SELECT * FROM macro_scenarios;"
+        with self._get_connection() as conn:
+            df = pd.read_sql_query(query, conn)
+            return df
+
     def get_portfolios(self, risk_level: Optional[str] = None) -> list[dict]:
         """
         Retrieves portfolio definitions from the 'portfolio_mixes' table.
@@ -2,9 +2,13 @@
 ###############
 import os
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from .data.sql_payment_repo import SQLitePaymentRepository
 from .data.sqlite_repo import SQLiteRepository
+from .data.snapshot_recorder import SnapshotRecorder
+from .data.payment_writer import PaymentWriter
+from .data.migrations import run_migrations
+from .data.id_gen import acquire_node_lease
 from fastmcp import FastMCP
 from .tools.general_tools import GeneralTools
 from .tools.calculation_tools import CalculationTools
@@ -17,19 +21,30 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..",".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from backend.config_local import DB_PATH ## bu import yukarıdaki kodun altında olmak zorunda yoksa çalışmaz
+from backend.config_local import DB_PATH, SECRET_KEY ## bu import yukarıdaki kodun altında olmak zorunda yoksa çalışmaz
 from common.mcp_decorators import log_tool
+from common.export_store import ExportStore
+
+# === Şema migration'ları (başlangıçta bir kez; istek yolunda DDL yok) ===
+run_migrations(DB_PATH)
+acquire_node_lease(DB_PATH)  # ödeme/dekont id'leri için bu sürece ait node (ID_NODE yoksa DB'den)
 
 # === Initialize MCP server ===
 mcp = FastMCP("Fortuna Banking Services")
 # === Initialize tool classes ===
 repo = SQLiteRepository(db_path=DB_PATH)
 general_tools = GeneralTools(repo)
-calc_tools = CalculationTools(repo)
+exports = ExportStore()  # CSV/XLSX dosyaları; FastAPI /exports/{handle} ile indirilir
+calc_tools = CalculationTools(repo, exports=exports)
 roi_simulator_tool = ROISimulatorTool(repo)
+snapshots = SnapshotRecorder(repo)  # işlem snapshot'ları arka planda yazılır
 
 repo_payment = SQLitePaymentRepository(db_path=DB_PATH)
-pay = PaymentService(repo_payment)
+if os.getenv("PAYMENT_WRITER", "1") == "1":
+    # ödeme yazmaları tek writer thread'de toplanır (group commit)
+    payment_writer = PaymentWriter(DB_PATH)
+    repo_payment.attach_writer(payment_writer)
+pay = PaymentService(repo_payment, secret_key=SECRET_KEY)
 
 
 
@@ -128,6 +143,7 @@ def transactions_list_by_type(
     from_date: str | None = None,
     to_date: str | None = None,
     limit: int = 50,
+    cursor: str | None = None,
 ) -> dict:
     """
     Hesap tipine göre TEK adımda işlem geçmişini döndürür.
@@ -137,6 +153,7 @@ def transactions_list_by_type(
       - account_type (str): "vadeli mevduat" | "vadesiz mevduat" | "maaş" | "yatırım"
       - from_date/to_date (str|None): ISO benzeri tarih aralığı
       - limit (int): döndürülecek işlem sayısı (1..500)
+      - cursor (str|None): önceki yanıttaki next_cursor; verilirse sonraki sayfa döner
     """
     # 1) Hesabı bulun
     found = pay.find_account_by_type(customer_id, account_type)
@@ -195,18 +212,22 @@ def transactions_list_by_type(
         pass
 
     try:
-        rows = repo.list_transactions(
+        page = repo.list_transactions_page(
             account_id=acc_id,
             customer_id=req_cust_id,
             from_date=f,
             to_date=t,
             limit=lim,
+            cursor=cursor.strip() if isinstance(cursor, str) and cursor.strip() else None,
         )
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
     except Exception as e:
         return {"ok": False, "error": f"okuma hatası: {e}"}
+    rows, next_cursor = page["transactions"], page["next_cursor"]
 
     try:
-        snap = repo.save_transaction_snapshot(
+        snap = snapshots.submit(
             account_id=acc_id,
             from_date=f,
             to_date=t,
@@ -244,12 +265,16 @@ def transactions_list_by_type(
         "range": {"from": f, "to": t},
         "limit": lim,
         "count": len(rows),
+        "next_cursor": next_cursor,
         "snapshot": snap,
         "transactions": rows,
         "ui_component": {
             "type": "transactions_list",
             "account_id": acc_id,
             "items": items,
+            "next_cursor": next_cursor,
+            "range": {"from": f, "to": t},  # "daha fazla göster" aynı kapsamla /accounts/{id}/transactions çağırır
+            "limit": lim,
         },
     }
 
@@ -440,13 +465,16 @@ def transactions_list(
     customer_id: int,
     from_date: str | None = None,
     to_date: str | None = None,
-    limit: int = 50
+    limit: int = 50,
+    cursor: str | None = None,
 ) -> dict:
     """
     Belirli bir hesap için, isteğe bağlı tarih aralığında işlemleri listeler.
     Tarih verilmezse tüm zamanlar sorgulanır. Erişim için hesap sahibinin customer_id’si
     accounts tablosundan alınır ve repo.list_transactions doğru parametre sırası ile çağrılır.
     Ayrıca snapshot kaydı yapılır.
+    Sayfalama: yanıttaki next_cursor doluysa, "daha fazla göster" için aynı parametrelerle
+    cursor=next_cursor gönderilir (yeniden tarama yok, indekste tek seek).
     """
     # account_id
     try:
@@ -505,19 +533,23 @@ def transactions_list(
 
     # işlemleri çek  DOĞRU parametre sırası çok önemli
     try:
-        rows = repo.list_transactions(
+        page = repo.list_transactions_page(
             account_id=acc_id,
             customer_id=req_cust_id,
             from_date=f,
             to_date=t,
             limit=lim,
+            cursor=cursor.strip() if isinstance(cursor, str) and cursor.strip() else None,
         )
+    except ValueError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"okuma hatası: {e}"}
+    rows, next_cursor = page["transactions"], page["next_cursor"]
 
-    # snapshot kaydı
+    # snapshot kaydı (kuyruğa bırakılır, okuma yolu yazmayı beklemez)
     try:
-        snap = repo.save_transaction_snapshot(
+        snap = snapshots.submit(
             account_id=acc_id,
             from_date=f,  # kullanıcıdan gelen ham değerleri yazalım
             to_date=t,
@@ -556,16 +588,76 @@ def transactions_list(
         "range": {"from": f, "to": t},
         "limit": lim,
         "count": len(rows),
+        "next_cursor": next_cursor,
         "snapshot": snap,
         "transactions": rows,
         "ui_component": {
             "type": "transactions_list",
             "account_id": acc_id,
             "items": items,
+            "next_cursor": next_cursor,
+            "range": {"from": f, "to": t},  # "daha fazla göster" aynı kapsamla /accounts/{id}/transactions çağırır
+            "limit": lim,
         },
     }
 
 
+@mcp.tool()
+@log_tool
+def transactions_export(
+    account_id: int,
+    customer_id: int,
+    from_date: str | None = None,
+    to_date: str | None = None,
+    format: str = "csv",
+) -> dict:
+    """
+    Bir hesabın işlem geçmişini (limit yok) CSV ya da XLSX dosyası olarak hazırlar.
+    Kullanıcı işlemlerini "indirmek", "Excel'e/CSV'ye aktarmak" istediğinde kullan;
+    işlemler yanıta gömülmez, kısa ömürlü bir indirme linki döner.
+
+    Parametreler:
+      - account_id (int), customer_id (int): hesap ve sahibi (sahiplik doğrulanır)
+      - from_date/to_date (str|None): ISO benzeri tarih aralığı; boşsa tüm zamanlar
+      - format (str): "csv" (varsayılan) | "xlsx"
+
+    Dönüş: {"ok": True, "export": {"url", "filename", "rows", "expires_at", ...}, "ui_component": {...}}
+    """
+    try:
+        acc_id = int(account_id)
+        req_cust_id = int(customer_id)
+    except Exception:
+        return {"error": "account_id/customer_id geçersiz (int olmalı)"}
+
+    acc = repo.get_account(acc_id)
+    if not acc:
+        return {"error": f"Hesap bulunamadı: {acc_id}"}
+    if int(acc["customer_id"]) != req_cust_id:
+        return {"error": "forbidden: account does not belong to this customer", "status_code": 403}
+
+    f = from_date.strip() if isinstance(from_date, str) and from_date.strip() else None
+    t = to_date.strip() if isinstance(to_date, str) and to_date.strip() else None
+
+    header = ["txn_id", "account_id", "txn_date", "txn_type", "amount", "description"]
+    rows = (
+        [r["txn_id"], r["account_id"], r["txn_date"], r["txn_type"], r["amount"], r["description"]]
+        for r in repo.iter_transactions(acc_id, req_cust_id, f, t)
+    )
+    try:
+        meta = exports.write(format, header, rows, filename=f"hesap_{acc_id}_islemler", owner_id=req_cust_id)
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"export hatası: {e}"}
+
+    return {
+        "ok": True,
+        "account_id": acc_id,
+        "range": {"from": f, "to": t},
+        "export": meta,
+        "ui_component": {"type": "export_download_card", "title": "İşlem Geçmişi", **meta},
+    }
+
 # ============ CALCULATION TOOL ==============#
 @mcp.tool()
 @log_tool
@@ -576,6 +668,7 @@ def loan_amortization_schedule(
     method: str = "annuity",
     currency: str | None = None,
     export: str = "none",
+    customer_id: int | None = None,
 ) -> Dict[str, Any]:
     """
         S5: Kredi ödeme planı (amortisman tablosu) ve özet değerler.
@@ -591,7 +684,10 @@ def loan_amortization_schedule(
             rate (float, ops): Yıllık nominal faiz ( >= 0, örn. 0.35 )
             term (int): Vade (ay, >= 1)
             method (str, ops.): Şimdilik sadece "annuity" desteklenir.
-            export (str, ops.): "csv" → `csv_base64` alanı döner; "none" → dönmez.
+            export (str, ops.): "csv" | "xlsx" → plan export deposuna yazılır, `export` alanında
+                kısa ömürlü indirme linki döner; "none" → dosya üretilmez.
+            customer_id (int, ops.): Export sahibi; dosyayı yalnızca bu müşteri indirebilir
+                (export istendiğinde zorunlu).
 
         Dönüş (başarı):
             {
@@ -609,7 +705,8 @@ def loan_amortization_schedule(
                 ...
             ],
             "ui_component": {...},
-            "csv_base64": "..."   # export="csv" ise yer alır
+            "export": {"handle": "...", "url": "/exports/...", "filename": "...csv",
+                       "rows": 24, "expires_at": "..."}   # export="csv"|"xlsx" ise yer alır
             }
 
         Hata (ör.):
@@ -619,7 +716,7 @@ def loan_amortization_schedule(
         Notlar:
             - Son ayda yuvarlama farkı kapatılır (kalan=0’a çekilir).
             - Hesaplama deterministiktir; DB erişimi yoktur.
-            - CSV UTF-8, başlıklar: month,installment,interest,principal,remaining
+            - CSV UTF-8 (BOM'lu), başlıklar: month,installment,interest,principal,remaining
         """
     return calc_tools.loan_amortization_schedule(
         principal=principal,
@@ -628,6 +725,166 @@ def loan_amortization_schedule(
         method=method,
         currency=currency,
         export=export,
+        customer_id=customer_id,
+    )
+
+
+@mcp.tool()
+@log_tool
+def loan_quote_grid(
+    principals: List[float],
+    terms: List[int],
+    rates: List[float] | None = None,
+    products: List[str] | None = None,
+    currency: str = "TRY",
+) -> Dict[str, Any]:
+    """
+        Kredi teklif karşılaştırması: anapara × vade × oran ızgarası tek çağrıda.
+
+        Amaç:
+            Müşteri birden fazla tutar/vade/oranı karşılaştırmak istediğinde her kombinasyon
+            için ayrı interest_compute / loan_amortization_schedule çağırmak yerine bunu kullan.
+            Aylık eşit taksit (annuity) ile taksit, toplam ödeme ve toplam faiz matrislerini döner.
+
+        Parametreler:
+            principals (list[float]): Anapara tutarları (her biri > 0), örn. [100000, 200000]
+            terms (list[int]): Vadeler (ay, >= 1), örn. [12, 24, 36]
+            rates (list[float], ops.): Yıllık nominal faizler, örn. [0.40, 0.45]
+            products (list[str], ops.): DB'den oranı çözülecek ürünler ("loan", "credit_card" veya
+                ürün adı). rates ve products verilmezse "loan" (ihtiyaç kredisi) oranı kullanılır.
+            currency (str, ops.): Para birimi (varsayılan "TRY")
+
+        Dönüş (başarı):
+            {
+            "principals": [100000.0, 200000.0],
+            "terms": [12, 24],
+            "rates": [{"label": "ihtiyaç kredisi", "annual_rate": 0.51, "source": "db"}],
+            "installment":    [[[...], [...]], ...],   # [anapara][vade][oran]
+            "total_payment":  [[[...], [...]], ...],
+            "total_interest": [[[...], [...]], ...],
+            "ui_component": {"type": "loan_quote_grid_card", "columns": [...], "rows": [...]}
+            }
+        Hata:
+            {"error": "..."}
+        """
+    return calc_tools.loan_quote_grid(
+        principals=principals,
+        terms=terms,
+        rates=rates,
+        products=products,
+        currency=currency,
+    )
+
+
+@mcp.tool()
+@log_tool
+def loan_effective_cost(
+    principals: List[float],
+    terms: List[int],
+    rates: List[float] | None = None,
+    products: List[str] | None = None,
+    fee_codes: List[str] | None = None,
+    monthly_fee_codes: List[str] | None = None,
+    upfront_fee: float = 0.0,
+    upfront_fee_rate: float = 0.0,
+    currency: str = "TRY",
+    top: int = 10,
+) -> Dict[str, Any]:
+    """
+        Ücretler dahil efektif yıllık maliyet (IRR) ve teklif sıralaması.
+
+        Amaç:
+            Müşteri "hangi kredi teklifi gerçekten daha ucuz", "masraflarla birlikte yıllık maliyet ne"
+            diye sorduğunda kullan. Her (anapara, vade, oran) teklifi için nakit akışını
+            (anapara − peşin ücretler, ardından taksitler) kurar ve efektif oranı tek çağrıda çözer.
+
+        Parametreler:
+            principals (list[float]): Anapara tutarları (her biri > 0)
+            terms (list[int]): Vadeler (ay, >= 1)
+            rates (list[float], ops.): Yıllık nominal faizler, örn. [0.40, 0.45]
+            products (list[str], ops.): DB'den oranı çözülecek ürünler (loan_quote_grid ile aynı)
+            fee_codes (list[str], ops.): fees tablosundan peşin alınan ücret kodları, örn. ["credit_check"]
+            monthly_fee_codes (list[str], ops.): Her taksitte alınan ücret kodları
+            upfront_fee (float, ops.): Ek peşin ücret tutarı (ör. dosya masrafı)
+            upfront_fee_rate (float, ops.): Anaparaya oranla peşin ücret (kesir, 0.005 = %0,5)
+            currency (str, ops.): Para birimi (varsayılan "TRY")
+            top (int, ops.): ranking listesinde dönecek teklif sayısı (varsayılan 10)
+
+        Dönüş (başarı):
+            {
+            "principals": [...], "terms": [...], "rates": [...],
+            "fees": {"upfront_by_principal": [...], ...},
+            "installment": [[[...]]],             # [anapara][vade][oran]
+            "apr": [[[...]]],                     # 12 × aylık IRR
+            "effective_annual_rate": [[[...]]],   # (1 + aylık IRR)^12 − 1
+            "total_cost": [[[...]]],              # faiz + tüm ücretler
+            "ranking": [{"principal": ..., "term_months": ..., "effective_annual_rate": ...}, ...],
+            "ui_component": {"type": "loan_quote_grid_card", ...}
+            }
+        Hata:
+            {"error": "..."}
+        """
+    return calc_tools.loan_effective_cost(
+        principals=principals,
+        terms=terms,
+        rates=rates,
+        products=products,
+        fee_codes=fee_codes,
+        monthly_fee_codes=monthly_fee_codes,
+        upfront_fee=upfront_fee,
+        upfront_fee_rate=upfront_fee_rate,
+        currency=currency,
+        top=top,
+    )
+
+
+@mcp.tool()
+@log_tool
+def loan_prepayment_simulate(
+    principal: float,
+    term: int,
+    events: List[Dict[str, Any]],
+    rate: float | None = None,
+    currency: str = "TRY",
+    schedule_limit: int = 24,
+) -> Dict[str, Any]:
+    """
+        Kredi erken ödeme / yapılandırma senaryosu ("12. ayda 10.000 TL ara ödeme yaparsam?",
+        "vadeyi kısaltırsam?", "faiz düşerse?"). Tüm olaylar TEK çağrıda işlenir.
+
+        Parametreler:
+            principal (float): Anapara ( > 0 )
+            term (int): Orijinal vade (ay, >= 1)
+            events (list[dict]): Olaylar; "month" o ayın taksitinden sonra uygulanır:
+                {"month": 12, "type": "prepayment", "amount": 10000, "mode": "reduce_term"}
+                    mode: "reduce_term" (taksit aynı, vade kısalır, varsayılan) |
+                          "reduce_installment" (vade aynı, taksit düşer)
+                {"month": 24, "type": "rate_change", "annual_rate": 0.30}
+                {"month": 36, "type": "term_change", "term": 24}   # olaydan sonra kalan ay sayısı
+            rate (float, ops.): Yıllık nominal faiz (örn. 0.40). Yoksa ihtiyaç kredisi oranı.
+            currency (str, ops.): Para birimi (varsayılan "TRY")
+            schedule_limit (int, ops.): İlk değişen aydan (ilk olay ayı + 1) itibaren plan satırı (varsayılan 24)
+
+        Dönüş (başarı):
+            {
+            "base":     {"installment", "term_months", "total_payment", "total_interest"},
+            "scenario": {"installment", "term_months", "total_payment", "total_interest", "total_prepaid"},
+            "interest_saved": 41234.56,
+            "term_reduction_months": 9,
+            "events": [{"month", "type", "skipped", "balance_before", "prepaid", "balance_after", ...}],
+            "schedule": [{"month","installment","interest","principal","remaining"}, ...],
+            "ui_component": {"type": "loan_simulation_card", ...}
+            }
+        Hata:
+            {"error": "..."}
+        """
+    return calc_tools.loan_prepayment_simulate(
+        principal=principal,
+        term=term,
+        events=events,
+        rate=rate,
+        currency=currency,
+        schedule_limit=schedule_limit,
     )
 
 
@@ -725,6 +982,8 @@ def run_roi_simulation(portfolio_name: str, monthly_investment: float, years: in
         - average_outcome: The mean final balance across all simulations.
         - good_scenario_outcome: The 75th percentile final balance.
         - bad_scenario_outcome: The 25th percentile final balance.
+        - annual_volatility: Portfolio volatility with asset correlations (diversification included).
+        - asset_contributions: Per-asset weight, average final value, outcome share and risk share.
         If the portfolio name is not found, it returns a dictionary with an 'error' key.
     """
     return roi_simulator_tool.run(
@@ -734,6 +993,37 @@ def run_roi_simulation(portfolio_name: str, monthly_investment: float, years: in
     )
 
 
+@mcp.tool()
+@log_tool
+def run_portfolio_stress_test(portfolio_name: str, monthly_investment: float, years: int) -> dict:
+    """
+    Runs a macro stress test: every scenario in 'macro_scenarios' (e.g. "Yüksek Enflasyon",
+    "Global Durgunluk", "Faiz Artışı") is applied to the portfolio's asset returns/volatilities
+    and simulated together with the baseline on the same random draws.
+
+    When to use:
+    - Questions like "What happens to the Balanced Portfolio in a recession?",
+      "Portföyüm yüksek enflasyonda nasıl etkilenir?", "Which scenario hurts my portfolio most?".
+
+    Args:
+        portfolio_name (str): The name of the portfolio (e.g., "Dengeli Portföy").
+        monthly_investment (float): The amount invested every month.
+        years (int): The investment period in years.
+
+    Returns:
+        A dictionary with:
+        - baseline: average / 25th / 75th percentile outcome and loss probability without shocks.
+        - scenarios: ranked list (worst first) with average_outcome, change_vs_baseline, change_pct,
+          loss_probability and the per-asset shocks applied.
+        If the portfolio name is not found, it returns a dictionary with an 'error' key.
+    """
+    return roi_simulator_tool.stress_test(
+        portfolio_name=portfolio_name,
+        monthly_investment=monthly_investment,
+        years=years
+    )
+
+
 
 @mcp.tool()
 @log_tool
@@ -807,26 +1097,34 @@ def payment_request(
     currency: str = "TRY",
     note: str = "",
     confirm: bool = False,
+    confirm_token: str = "",
 ):
     """
     Own-accounts transfer (preview or commit) with idempotency and safety checks.
 
     Phases (via `confirm`):
-    - False → preview/dry-run: validate and return summary + `suggested_client_ref`
-    - True  → commit: re-validate and post transfer atomically
+    - False → preview/dry-run: validate and return summary + `suggested_client_ref` + `confirm_token`
+    - True  → commit: with `confirm_token` from the preview, only balance / daily limit /
+              account versions are re-checked (single guarded update) and retries with the
+              same token return the same transfer; without it, full re-validation
 
     Params:
     from_account:int, to_account:int, amount:float,
-    currency:str="TRY", note:str="", client_ref:str="", confirm:bool=False
+    currency:str="TRY", note:str="", confirm:bool=False, confirm_token:str=""
 
     Returns:
-    - Preview: { ok, phase:"precheck", suggested_client_ref, preview{...} }
-    - Commit:  { ok, phase:"commit", txn{...}, receipt{...} }
+    - Preview: { ok, phase:"precheck", suggested_client_ref, confirm_token, preview{...} }
+    - Commit:  { ok, phase:"commit", txn{...}, receipt{...}, replayed? }
     - Error:   { ok:false, error:<code>, ... }
 
-    Rules: accounts exist/active, same currency, sufficient funds, per-txn & daily limits,
-    idempotent by `client_ref`. Reads `accounts`; writes `payments` (and optionally `txns`).
+    Rules: accounts exist/active, same currency, sufficient funds, per-txn & daily limits.
+    Reads `accounts`; writes `payments` (and optionally `txns`).
     """
+    # 0) Preview'dan gelen onay token'ı → precheck tekrarlanmaz
+    if confirm and confirm_token:
+        res = pay.commit_confirmed(customer_id, confirm_token, from_account, to_account, amount)
+        return [{"type": "json", "json": {"phase": "commit", **res}}]
+
     # 1) Her zaman precheck: güvenlik ağımız
     pre = pay.precheck(from_account, to_account, amount, currency, note, customer_id)
     if not pre.get("ok"):
@@ -839,6 +1137,7 @@ def payment_request(
             "phase": "precheck",
             "confirm_required": True,
             "suggested_client_ref": str(customer_id),  # customer_id'yi string olarak kullan
+            "confirm_token": pay.issue_confirm_token(customer_id, pre),
             "preview": {
                 "from_account": from_account,
                 "to_account": to_account,
@@ -869,6 +1168,7 @@ def payment_request_by_type(
     currency: str = "TRY",
     note: str = "",
     confirm: bool = False,
+    confirm_token: str = "",
 ) -> dict:
     """
     Account type ile para transferi (preview veya commit) - hesap numarası belirtmeye gerek yok.
@@ -885,11 +1185,11 @@ def payment_request_by_type(
     - "2000 TRY vadesiz mevduattan yatırım hesabıma transfer et"
 
     Phases (via `confirm`):
-    - False → preview/dry-run: validate and return summary
-    - True  → commit: re-validate and post transfer atomically
+    - False → preview/dry-run: validate and return summary + `confirm_token`
+    - True  → commit: `confirm_token` verilirse yalnızca değişebilenler doğrulanır (payment_request ile aynı)
 
     Returns:
-    - Preview: { ok, phase:"precheck", suggested_client_ref, preview{...} }
+    - Preview: { ok, phase:"precheck", suggested_client_ref, confirm_token, preview{...} }
     - Commit:  { ok, phase:"commit", txn{...}, receipt{...} }
     - Error:   { ok:false, error:<code>, message:<text> }
     """
@@ -906,6 +1206,10 @@ def payment_request_by_type(
     to_account_id = to_result["account"]["account_id"]
     
     # 2) Normal payment işlemini gerçekleştir
+    if confirm and confirm_token:
+        res = pay.commit_confirmed(customer_id, confirm_token, from_account_id, to_account_id, amount)
+        return [{"type": "json", "json": {"phase": "commit", **res}}]
+
     # 1) Her zaman precheck: güvenlik ağımız
     pre = pay.precheck(from_account_id, to_account_id, amount, currency, note, customer_id)
     if not pre.get("ok"):
@@ -918,6 +1222,7 @@ def payment_request_by_type(
             "phase": "precheck",
             "confirm_required": True,
             "suggested_client_ref": str(customer_id),
+            "confirm_token": pay.issue_confirm_token(customer_id, pre),
             "preview": {
                 "from_account": from_account_id,
                 "to_account": to_account_id,
@@ -938,6 +1243,55 @@ def payment_request_by_type(
     return [{"type": "json", "json": {"phase": "commit", **res}}]
 
 
+@mcp.tool()
+@log_tool
+def payment_batch(
+    transfers: list,
+    customer_id: int,
+    atomic: bool = True,
+    confirm: bool = False,
+    confirm_token: str = "",
+):
+    """
+    Toplu transfer (maaş dağıtımı, hesaplar arası süpürme) — preview veya commit.
+
+    Params:
+    transfers: [{from_account:int, to_account:int, amount:float, currency?:str, note?:str}, ...]
+    atomic:bool=True  → bir kalem bile geçersizse hiçbiri işlenmez
+                 False → geçerli kalemler işlenir, geçersizler kalem bazında hata döner
+    confirm:bool=False → False: yalnızca ön kontrol (preview) + `confirm_token`;
+                         True: preview'daki `confirm_token` ile işle (token'sız commit yapılmaz)
+    confirm_token:str  → preview'dan; kalemler token'ın içindedir, transfers boş bırakılabilir
+
+    Tüm kalemler tek ön kontrolde (tek hesap sorgusu, müşteri başına tek limit sorgusu)
+    ve tek veritabanı transaction'ında işlenir. Kalemler sırayla uygulanır; bakiye ve
+    günlük limit yazma anında kalem kalem doğrulanır. Aynı token ile tekrar çağrı aynı
+    sonucu döndürür (yeni transfer açılmaz).
+
+    Returns:
+    - Preview: { ok, phase:"precheck", confirm_required, confirm_token, atomic, count, total_amount, limits{...}, items[...] }
+    - Commit:  { ok, phase:"commit", mode, batch_id, replayed, posted, failed, total_amount, results[{index, ok, txn|error, receipt}] }
+    - Error:   { ok:false, error:<code>, message:<text>, ... }
+    """
+    if confirm:
+        res = pay.commit_batch_confirmed(customer_id, confirm_token, transfers)
+        return [{"type": "json", "json": {"phase": "commit", **res}}]
+
+    pre = pay.precheck_batch(customer_id, transfers)
+    out = {"phase": "precheck", "atomic": atomic, **pre}
+    token = pay.issue_batch_confirm_token(customer_id, pre, atomic) if "items" in pre else None
+    if token:
+        valid = [it for it in pre["items"] if it["ok"]]
+        out["ok"] = True  # per_item modda geçersiz kalemler atlanarak onaylanabilir
+        out["confirm_required"] = True
+        out["confirm_token"] = token
+        out["message"] = (
+            f"{len(valid)} adet transfer, toplam {pre['total_amount']} tutarında işlem yapmak üzeresiniz. "
+            "İşlem onay penceresi açılıyor..."
+        )
+    return [{"type": "json", "json": out}]
+
+
 @mcp.tool()
 @log_tool
 def card_limit_increase_request(
@@ -980,6 +1334,7 @@ def card_limit_increase_request(
             {
               "ok": True,
               "request_id": 101,
+              "request_ref": "LR20250904180000000070000",
               "status": "received",
               "card": {
                 "card_id": 5,
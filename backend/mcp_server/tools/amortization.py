@@ -0,0 +1,258 @@
+# backend/mcp_server/tools/amortization.py
+"""
+Eşit taksitli (annuity) kredi ödeme planı motoru — NumPy ile vektörel.
+
+Kapalı form (i = dönemsel faiz, A = taksit, P = anapara):
+    A       = P * i / (1 - (1+i)^-n)           (i = 0 → A = P / n)
+    B_k     = P * (1 - (1+i)^(k-n)) / (1 - (1+i)^-n)
+                                                k. ödemeden sonra kalan (i = 0 → P*(1 - k/n));
+                                                P*(1+i)^k - A*((1+i)^k-1)/i ile aynı, ama uzun
+                                                vade/yüksek faizde büyük sayıların farkını almaz
+    faiz_k  = B_{k-1} * i
+    anap._k = A - faiz_k                        son dönemde: anap._n = B_{n-1} (yuvarlama farkı kapanır)
+
+Herhangi bir satır aralığı [start, stop] doğrudan hesaplanır → bir sayfa O(sayfa),
+tüm plan için döngü gerekmez. Tüm fonksiyonlar NumPy broadcasting ile dizi girdileri de kabul eder.
+
+simulate_events: erken ödeme / faiz değişikliği / vade değişikliği olaylarıyla plan.
+Olaylar arası her parça sabit taksitli bir annuity'dir; parça içinde j ödeme sonrası kalan
+    B_j = A/i - (A/i - B) * (1+i)^j          (A/i ~ anapara büyüklüğünde → farkı kararlı)
+Parça toplamları O(1); satırlar yalnızca istenen pencere için vektörel üretilir.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def annuity_payment(principal, rate_per_period, periods):
+    """Dönemsel taksit; skaler ya da broadcast edilebilir diziler."""
+    P = np.asarray(principal, dtype=float)
+    i = np.asarray(rate_per_period, dtype=float)
+    n = np.asarray(periods, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pay = P * i / -np.expm1(-n * np.log1p(i))   # 1 - (1+i)^-n, küçük i'de de hassas
+    return np.where(i == 0, P / n, pay)
+
+
+def remaining_balance(principal, rate_per_period, periods, k):
+    """k ödeme sonrası kalan anapara (kapalı form)."""
+    P = np.asarray(principal, dtype=float)
+    i = np.asarray(rate_per_period, dtype=float)
+    n = np.asarray(periods, dtype=float)
+    k = np.asarray(k, dtype=float)
+    L = np.log1p(i)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bal = P * np.expm1((k - n) * L) / np.expm1(-n * L)
+    return np.where(i == 0, P * (1.0 - k / n), bal)
+
+
+class AnnuitySchedule:
+    """
+    Tek bir kredinin ödeme planı. Satırlar istenene kadar hesaplanmaz:
+        s = AnnuitySchedule(100_000, 0.36 / 12, 360)
+        s.rows(1, 24)        → ilk 24 satır (diziler)
+        s.total_payment()    → yuvarlanmış taksitlerin toplamı (O(1))
+    """
+    def __init__(self, principal: float, rate_per_period: float, periods: int):
+        self.principal = P = float(principal)
+        self.i = i = float(rate_per_period)
+        self.n = n = int(periods)
+        # skaler kısım math ile (küçük sayfalarda NumPy çağrı maliyeti baskın olmasın)
+        self._L = math.log1p(i)
+        self._denom = math.expm1(-n * self._L)          # (1+i)^-n - 1
+        self.installment = P / n if i == 0 else P * i / -self._denom
+        # son taksit = son dönem başındaki kalan + faizi
+        self.last_payment = max(0.0, self._balance_scalar(n - 1)) * (1.0 + i)
+
+    def _balance_scalar(self, k: int) -> float:
+        if self.i == 0:
+            return self.principal * (1.0 - k / self.n)
+        return self.principal * math.expm1((k - self.n) * self._L) / self._denom
+
+    def rows(self, start: int = 1, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """[start, stop] (1 tabanlı, dahil) dönemleri: period, payment, interest, principal, remaining."""
+        stop = self.n if stop is None else min(int(stop), self.n)
+        start = max(1, int(start))
+        k = np.arange(start, stop + 1, dtype=np.int64)
+        if k.size == 0:
+            empty = np.empty(0)
+            return {"period": k, "payment": empty, "interest": empty, "principal": empty, "remaining": empty}
+
+        if self.i == 0:
+            opening = self.principal * (1.0 - (k - 1) / self.n)
+        else:
+            opening = self.principal * np.expm1((k - 1 - self.n) * self._L) / self._denom
+        np.maximum(opening, 0.0, out=opening)
+        interest = opening * self.i
+        principal_part = self.installment - interest
+        payment = np.full(k.size, self.installment)
+        if stop == self.n:
+            # son dönem: kalan tamamen kapanır
+            principal_part[-1] = opening[-1]
+            payment[-1] = opening[-1] + interest[-1]
+        remaining = np.maximum(opening - principal_part, 0.0)
+        return {"period": k, "payment": payment, "interest": interest,
+                "principal": principal_part, "remaining": remaining}
+
+    def total_payment(self, digits: int = 2) -> float:
+        """Satır satır yuvarlanmış taksitlerin toplamı (ilk n-1 taksit eşit → kapalı form)."""
+        return round((self.n - 1) * round(self.installment, digits) + round(self.last_payment, digits), digits)
+
+
+def rows_as_dicts(cols: Dict[str, np.ndarray], names: Dict[str, str], digits: int = 2) -> list:
+    """
+    rows() çıktısını tool'ların satır sözlüklerine çevirir.
+    names: motor kolon adı → çıktı anahtarı; "period" ilk sırada olmalı
+           (ör. {"period": "month", "payment": "installment", ...})
+    """
+    period_key, *value_keys = names.values()
+    value_cols = [cols[src] for src in list(names)[1:]]
+    values = np.round(np.column_stack(value_cols), digits).tolist()  # tek round + tek tolist
+    return [{period_key: p, **dict(zip(value_keys, row))} for p, row in zip(cols["period"].tolist(), values)]
+
+
+# ----------------- olaylı simülasyon (erken ödeme / yapılandırma) -----------------
+EVENT_KINDS = ("prepayment", "rate_change", "term_change")
+_EPS = 1e-9
+
+# (ay, tür, değer, reduce_term) — ay: olay o ayın taksitinden SONRA uygulanır
+LoanEvent = Tuple[int, str, float, bool]
+
+
+def _annuity_scalar(B: float, i: float, n: float) -> float:
+    return B / n if i == 0 else B * i / -math.expm1(-n * math.log1p(i))
+
+
+def _nper(B: float, i: float, A: float) -> float:
+    """Taksit A sabitken kalan B'yi kapatan (kesirli) dönem sayısı: A = annuity(B, i, n*)."""
+    if i == 0:
+        return B / A
+    x = 1.0 - B * i / A
+    if x <= 0:
+        raise ValueError("installment does not cover interest")
+    return -math.log(x) / math.log1p(i)
+
+
+def simulate_events(
+    principal: float,
+    rate_per_period: float,
+    periods: int,
+    events: Sequence[LoanEvent] = (),
+    row_start: int = 1,
+    row_limit: int = 0,
+) -> Dict[str, object]:
+    """
+    Olaylarla yeniden hesaplanan plan.
+      prepayment : değer = ek anapara ödemesi; reduce_term=True → taksit aynı, vade kısalır,
+                   False → vade aynı, taksit düşer
+      rate_change: değer = yeni dönemsel faiz; kalan vade aynı, taksit yeniden hesaplanır
+      term_change: değer = olaydan sonraki kalan dönem sayısı; taksit yeniden hesaplanır
+    Kredi kapandıktan sonraki olaylar atlanır (applied[..]["skipped"]=True).
+    row_limit > 0 ise row_start'tan itibaren en fazla row_limit satır döner.
+
+    Her parça (B, i, A, n*) ile tanımlıdır; A = annuity(B, i, n*) olduğundan j ödeme sonrası
+    kalan B_j = B * expm1((j-n*)L) / expm1(-n*L) (L = log1p(i)) kararlı kapalı formla bulunur.
+    Vade kısaltmada n* kesirlidir, ödeme sayısı ceil(n*) ve son taksit kısmidir.
+    """
+    B, i, n_rem = float(principal), float(rate_per_period), int(periods)
+    ns = float(n_rem)                      # parçanın kesirli dönem sayısı
+    A = _annuity_scalar(B, i, ns)
+    lg = math.log1p(i)
+    den = math.expm1(-ns * lg)             # parça sabiti: (1+i)^-n* - 1
+    m = 0                                  # yapılmış taksit sayısı
+    paid = interest = 0.0
+    applied: List[Dict[str, object]] = []
+    row_parts: List[Tuple[np.ndarray, ...]] = []
+    row_stop = row_start + row_limit - 1   # dahil
+
+    def balance(j: float) -> float:
+        if i == 0:
+            return B * (1.0 - j / ns)
+        return B * math.expm1((j - ns) * lg) / den
+
+    def advance(L: int) -> None:
+        nonlocal B, m, n_rem, ns, den, paid, interest
+        closes = L >= n_rem
+        L = min(L, n_rem)
+        if L <= 0:
+            return
+        if row_limit > 0 and m + 1 <= row_stop and m + L >= row_start:
+            j = np.arange(max(1, row_start - m), min(L, row_stop - m) + 1)
+            if i == 0:
+                opening = B * (1.0 - (j - 1) / ns)
+            else:
+                opening = B * np.expm1((j - 1 - ns) * lg) / den
+            np.maximum(opening, 0.0, out=opening)
+            int_part = opening * i
+            pay = np.full(j.size, A)
+            if closes and j[-1] == L:
+                pay[-1] = opening[-1] + int_part[-1]
+            row_parts.append((m + j, pay, int_part, pay - int_part, np.maximum(opening - (pay - int_part), 0.0)))
+        if closes:
+            seg_paid = (L - 1) * A + max(0.0, balance(L - 1)) * (1.0 + i)
+            interest += seg_paid - B
+            B = 0.0
+        else:
+            B_end = balance(L)
+            seg_paid = L * A
+            interest += seg_paid - (B - B_end)
+            B, ns = B_end, ns - L
+            den = math.expm1(-ns * lg)
+        paid += seg_paid
+        m += L
+        n_rem -= L
+
+    for month, kind, value, reduce_term in sorted(events, key=lambda e: e[0]):
+        advance(month - m)
+        if n_rem <= 0 or B <= _EPS:
+            applied.append({"month": month, "type": kind, "skipped": True})
+            continue
+        before, extra = B, 0.0
+        if kind == "prepayment":
+            extra = min(float(value), B)
+            B -= extra
+            paid += extra
+            if B <= _EPS:
+                B, n_rem = 0.0, 0
+            elif reduce_term:
+                ns = _nper(B, i, A)
+                n_rem = max(1, math.ceil(ns - 1e-9))
+            else:
+                ns = float(n_rem)
+                A = _annuity_scalar(B, i, ns)
+        elif kind == "rate_change":
+            i = float(value)
+            ns = float(n_rem)
+            A = _annuity_scalar(B, i, ns)
+        elif kind == "term_change":
+            n_rem = int(value)
+            ns = float(n_rem)
+            A = _annuity_scalar(B, i, ns)
+        else:
+            raise ValueError(f"unknown event type: {kind}")
+        lg = math.log1p(i)
+        den = math.expm1(-ns * lg)
+        applied.append({"month": month, "type": kind, "skipped": False, "balance_before": before,
+                        "balance_after": B, "prepaid": extra, "installment_after": A if n_rem > 0 else 0.0,
+                        "remaining_periods": n_rem})
+    final_installment = A
+    advance(n_rem)
+
+    rows = None
+    if row_limit > 0:
+        if row_parts:
+            rows = {k: np.concatenate([p[c] for p in row_parts])
+                    for c, k in enumerate(("period", "payment", "interest", "principal", "remaining"))}
+        else:
+            rows = {k: np.empty(0) for k in ("period", "payment", "interest", "principal", "remaining")}
+    return {
+        "term": m,
+        "installment": final_installment,
+        "total_payment": paid,
+        "total_interest": interest,
+        "applied": applied,
+        "rows": rows,
+    }
@@ -0,0 +1,108 @@
+# backend/mcp_server/tools/asset_mc.py
+"""
+Korelasyonlu çok varlıklı Monte Carlo motoru (ROISimulatorTool için) — NumPy ile vektörel.
+
+Model (aylık, eski tek varlıklı modelle aynı parametreleme):
+    r_a,t = m_a + s_a · z_a,t,   z_t = L ε_t,  ε_t ~ N(0, I),  L Lᵀ = korelasyon matrisi
+    m_a = (1 + yıllık getiri)^(1/12) − 1,   s_a = yıllık volatilite / √12
+Her varlık kendi "dilimi" olarak simüle edilir: her ay w_a · aylık yatırım eklenir, ardından
+varlığın getirisi uygulanır. Portföy yolu = dilimlerin toplamı (ağırlıklı varlık yolları).
+Ay döngüsü yok; T ay sonundaki dilim değeri kapalı formda:
+    V_a = w_a · c · Σ_{t=1..T} Π_{s=t..T} (1 + r_a,s)     (zaman ekseninde ters cumprod + toplam)
+1 + r en az 0'a kırpılır (bir varlık aylık −%100'den fazla kaybedemez).
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+# Aynı temel sınıfın türevleri ("Altın (Gram)" ↔ "Altın (Gram) - ETF") için tablo satırı yoksa
+SAME_CLASS_CORRELATION = 0.9
+# Tek blokta üretilecek en fazla normal sayı (simülasyon × ay × varlık); bellek tavanı
+SIM_BLOCK_ELEMENTS = 2_000_000
+
+
+def base_asset(name: str) -> str:
+    """'Altın (Gram) - ETF' → 'Altın (Gram)'."""
+    return str(name).split(" - ")[0].strip()
+
+
+def correlation_matrix(assets: List[str], pairs: Iterable[Tuple[str, str, float]]) -> np.ndarray:
+    """
+    assets sırasıyla (k, k) korelasyon matrisi.
+    Öncelik: (a, b) satırı → temel sınıf çifti satırı → aynı temel sınıfsa SAME_CLASS_CORRELATION → 0.
+    Sonuç pozitif tanımlı değilse en yakın korelasyon matrisine çekilir.
+    """
+    lookup = {}
+    for a, b, rho in pairs:
+        lookup[(a, b)] = lookup[(b, a)] = float(rho)
+
+    k = len(assets)
+    C = np.eye(k)
+    bases = [base_asset(a) for a in assets]
+    for i in range(k):
+        for j in range(i + 1, k):
+            rho = lookup.get((assets[i], assets[j]))
+            if rho is None:
+                if bases[i] == bases[j]:
+                    rho = SAME_CLASS_CORRELATION
+                else:
+                    rho = lookup.get((bases[i], bases[j]), 0.0)
+            C[i, j] = C[j, i] = rho
+    return nearest_correlation(C)
+
+
+def nearest_correlation(C: np.ndarray, eps: float = 1e-8) -> np.ndarray:
+    """Negatif/sıfır özdeğerleri eps'e kırpıp köşegeni 1'e ölçekler (gerekmiyorsa C aynen döner)."""
+    w, V = np.linalg.eigh(C)
+    if w.min() > eps:
+        return C
+    C2 = (V * np.clip(w, eps, None)) @ V.T
+    d = np.sqrt(np.diag(C2))
+    C2 = C2 / np.outer(d, d)
+    np.fill_diagonal(C2, 1.0)
+    return C2
+
+
+def portfolio_moments(weights, annual_return, annual_vol, corr):
+    """
+    Yıllık beklenen getiri, korelasyonlu volatilite √(wᵀΣw) ve varlık başına risk payı w_a (Σw)_a / wᵀΣw.
+    """
+    w = np.asarray(weights, dtype=float)
+    vol = np.asarray(annual_vol, dtype=float)
+    cov = np.outer(vol, vol) * corr
+    cw = cov @ w
+    var = float(w @ cw)
+    risk_share = w * cw / var if var > 0 else np.zeros_like(w)
+    return float(w @ np.asarray(annual_return, dtype=float)), float(np.sqrt(max(var, 0.0))), risk_share
+
+
+def simulate_sleeves(monthly_return, monthly_vol, chol, weights, monthly_investment: float,
+                     months: int, num_simulations: int, rng=np.random) -> np.ndarray:
+    """
+    Dönem sonu dilim değerleri; son eksen varlık, satır toplamı portföy sonucudur.
+    - monthly_return / monthly_vol (k,) → (num_simulations, k)
+    - (S, k) verilirse S parametre seti (ör. stres senaryoları) AYNI normal çekilişlerle
+      simüle edilir (ortak rassal sayılar) → (S, num_simulations, k); senaryolar arası farkta örnekleme
+      gürültüsü büyük ölçüde birbirini götürür
+    rng: np.random modülü ya da np.random.Generator (standard_normal yeterli).
+    """
+    m = np.asarray(monthly_return, dtype=float)
+    s = np.asarray(monthly_vol, dtype=float)
+    batched = m.ndim == 2
+    m2, s2 = np.atleast_2d(m)[:, None, None, :], np.atleast_2d(s)[:, None, None, :]
+    S, k = m2.shape[0], m2.shape[-1]
+    out = np.empty((S, num_simulations, k))
+    block = max(1, SIM_BLOCK_ELEMENTS // max(1, S * months * k))
+    LT = np.asarray(chol, dtype=float).T
+    for start in range(0, num_simulations, block):
+        rows = min(block, num_simulations - start)
+        z = rng.standard_normal((rows, months, k)) @ LT
+        growth = z[None] * s2
+        growth += 1.0 + m2
+        np.maximum(growth, 0.0, out=growth)
+        # Σ_t Π_{s>=t}: ters zamanda birikimli çarpım
+        out[:, start:start + rows] = np.cumprod(growth[:, :, ::-1, :], axis=2).sum(axis=2)
+    out *= monthly_investment * np.asarray(weights, dtype=float)
+    return out if batched else out[0]
@@ -1,13 +1,17 @@
 # backend/app/tools/calculation_tools.py
 from __future__ import annotations
-import base64
-import csv
-import io
+import json
 import math
+import os
 import sqlite3
 
 from typing import Dict, Any, List, Optional, Tuple, Literal
 
+import numpy as np
+
+from .amortization import EVENT_KINDS, AnnuitySchedule, annuity_payment, remaining_balance, rows_as_dicts, simulate_events
+from .effective_rate import effective_annual, fee_amount, irr, loan_cashflows
+
 # ---- interest helpers (module-level) ----
 Compounding = Literal["annual","semiannual","quarterly","monthly","weekly","daily","continuous"]
 
@@ -88,6 +92,51 @@ def _normalize_compounding(value: str) -> Compounding:
         raise ValueError("Unsupported compounding. Use: annual|semiannual|quarterly|monthly|weekly|daily|continuous")
     return aliases[v]  # type: ignore[return-value]
 
+# amortization motoru kolonları → tool satır anahtarları
+_LOAN_SCHEDULE_KEYS = {"period": "month", "payment": "installment", "interest": "interest",
+                       "principal": "principal", "remaining": "remaining"}
+_INTEREST_SCHEDULE_KEYS = {"period": "period", "payment": "payment", "interest": "interest",
+                           "principal": "principal", "remaining": "remaining"}
+
+# export: ödeme planı satırları bu büyüklükte parçalar halinde üretilir
+EXPORT_PAGE_ROWS = 1000
+
+def _iter_schedule_rows(sched: AnnuitySchedule, digits: int = 2):
+    for start in range(1, sched.n + 1, EXPORT_PAGE_ROWS):
+        cols = sched.rows(start, start + EXPORT_PAGE_ROWS - 1)
+        for row in rows_as_dicts(cols, _LOAN_SCHEDULE_KEYS, digits):
+            yield list(row.values())
+
+# loan_quote_grid: anapara × vade × oran hücre sayısı üst sınırı
+LOAN_GRID_MAX_CELLS = int(os.getenv("LOAN_GRID_MAX_CELLS", "1000"))
+# loan_prepayment_simulate: tek çağrıdaki en fazla olay
+LOAN_SIM_MAX_EVENTS = int(os.getenv("LOAN_SIM_MAX_EVENTS", "500"))
+
+def _round_cells(a: np.ndarray, digits: int = 2) -> np.ndarray:
+    """
+    np.round, ama yarım kuruşa float hatası kadar yakın hücreler round() ile: np.round değeri
+    10^digits ile kaydırdığı için bu hücrelerde AnnuitySchedule / loan_amortization_schedule
+    özetinden 1 kuruş ayrılabiliyor.
+    """
+    out = np.round(a, digits)
+    scaled = np.abs(a) * 10.0 ** digits
+    tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-6 + 8 * np.spacing(scaled)
+    if tie.any():
+        out[tie] = [round(v, digits) for v in a[tie].tolist()]
+    return out
+
+def _grid_payments(P: np.ndarray, n: np.ndarray, annual: np.ndarray):
+    """
+    [anapara][vade][oran] matrisleri: (yuvarlanmış taksit, yuvarlanmış son taksit, toplam ödeme, toplam faiz).
+    Satır satır yuvarlanmış taksitler; son taksit yuvarlama farkını kapatır (loan_amortization_schedule ile aynı).
+    """
+    Pg, ng, ig = P[:, None, None], n[None, :, None], (annual / 12.0)[None, None, :]
+    installment = _round_cells(annuity_payment(Pg, ig, ng))
+    last_payment = _round_cells(np.maximum(remaining_balance(Pg, ig, ng, ng - 1), 0.0) * (1.0 + ig))
+    total_payment = _round_cells((ng - 1) * installment + last_payment)
+    total_interest = _round_cells(total_payment - Pg)
+    return installment, last_payment, total_payment, total_interest
+
 def _periods_per_year(c: Compounding) -> Optional[int]:
     return {
         "annual":1, "semiannual":2, "quarterly":4,
@@ -105,8 +154,9 @@ class CalculationTools:
       - Başarı: normalize edilmiş sözlük (ör. {"summary": {...}, "schedule": [...]})
       - Hata:   {"error": "mesaj"}
     """
-    def __init__(self, repo):
+    def __init__(self, repo, exports=None):
         self.repo = repo
+        self.exports = exports  # common.export_store.ExportStore (export="csv"|"xlsx" için)
 
     # ------------- helpers -------------
     @staticmethod
@@ -217,10 +267,12 @@ class CalculationTools:
         method: str = "annuity",
         currency: Optional[str] = None,
         export: str = "none",  # "csv" | "none"
+        customer_id: Optional[int] = None,  # export sahibi; dosyayı yalnızca bu müşteri indirir
     ) -> Dict[str, Any]:
         """
         installment = P * [ i(1+i)^n / ((1+i)^n - 1) ], i = r/12
         her ay: interest = remaining * i; principal_part = installment - interest
+        Satırlar tools/amortization.py motoruyla (NumPy, kapalı form) hesaplanır.
         """
         try:
             if principal is None or principal <= 0:
@@ -258,39 +310,13 @@ class CalculationTools:
             if m != "annuity":
                 return self._err("only 'annuity' method is supported")
 
-            i = resolved_rate / 12.0
             n = term
-            if i == 0:
-                installment = principal / n
-            else:
-                factor = (1.0 + i) ** n
-                installment = principal * (i * factor) / (factor - 1.0)
-
-            remaining = float(principal)
-            rows: List[Dict[str, Any]] = []
-            total_interest = 0.0
-
-            for month in range(1, n + 1):
-                interest = remaining * i
-                principal_part = installment - interest
-                if month == n:
-                    principal_part = remaining  # yuvarlama farkını son ayda kapat
-                    installment_eff = principal_part + interest
-                else:
-                    installment_eff = installment
-
-                remaining = max(0.0, remaining - principal_part)
-                #total_interest += interest
+            sched = AnnuitySchedule(principal, resolved_rate / 12.0, n)
+            installment = sched.installment
+            # son ay yuvarlama farkını kapatır (motor içinde)
+            rows: List[Dict[str, Any]] = rows_as_dicts(sched.rows(), _LOAN_SCHEDULE_KEYS)
 
-                rows.append({
-                    "month": month,
-                    "installment": self._round2(installment_eff),
-                    "interest": self._round2(interest),
-                    "principal": self._round2(principal_part),
-                    "remaining": self._round2(remaining),
-                })
-
-            total_payment = sum(r["installment"] for r in rows)
+            total_payment = sched.total_payment()
             total_interest = total_payment - principal
             
             data: Dict[str, Any] = {
@@ -321,20 +347,411 @@ class CalculationTools:
                 },
             }
 
-            if (export or "none").lower() == "csv":
-                buf = io.StringIO()
-                writer = csv.writer(buf)
-                writer.writerow(["month", "installment", "interest", "principal", "remaining"])
-                for r in rows:
-                    writer.writerow([r["month"], r["installment"], r["interest"], r["principal"], r["remaining"]])
-                csv_bytes = buf.getvalue().encode("utf-8")
-                data["csv_base64"] = base64.b64encode(csv_bytes).decode("ascii")
+            fmt = (export or "none").lower()
+            if fmt in ("csv", "xlsx"):
+                if self.exports is None:
+                    return self._err("export store not configured")
+                if customer_id is None:
+                    return self._err("customer_id is required for export")
+                # dosya, sonuç JSON'una gömülmez: export deposuna akıtılır, indirme handle'ı döner
+                data["export"] = self.exports.write(
+                    fmt,
+                    list(_LOAN_SCHEDULE_KEYS.values()),
+                    _iter_schedule_rows(sched),
+                    filename=f"kredi_odeme_plani_{int(principal)}_{n}ay",
+                    owner_id=int(customer_id),
+                )
+                data["ui_component"]["export"] = data["export"]
 
             return data
 
         except Exception as e:
             return self._err(f"loan_amortization_schedule_error: {str(e)}")
         
+    # ------------- ızgara girdileri (loan_quote_grid / loan_effective_cost) -------------
+    def _grid_inputs(
+        self,
+        principals: Optional[List[float]],
+        terms: Optional[List[int]],
+        rates: Optional[List[float]],
+        products: Optional[List[str]],
+        currency: str,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """
+        Anapara / vade / yıllık oran vektörleri ve oran kolonları [(etiket, yıllık oran, kaynak)].
+        Her ürünün oranı BİR KEZ çözülür. Geçersiz girdide ValueError.
+        """
+        P = np.asarray(principals or [], dtype=float).ravel()
+        n = np.asarray(terms or [], dtype=float).ravel()
+        if P.size == 0 or n.size == 0:
+            raise ValueError("principals and terms must be non-empty lists")
+        if not np.all(np.isfinite(P)) or np.any(P <= 0):
+            raise ValueError("principals must be > 0")
+        if np.any(n < 1) or np.any(n != np.round(n)):
+            raise ValueError("terms (months) must be integers >= 1")
+
+        # Oran kolonları: (etiket, yıllık oran, kaynak)
+        columns: List[Dict[str, Any]] = []
+        for r in rates or []:
+            columns.append({"label": f"%{float(r) * 100:.2f}", "annual_rate": float(r), "source": "manual"})
+        product_mapping = {
+            "savings": "mevduat",
+            "loan": "ihtiyaç kredisi",
+            "credit_card": "kredi kartı",
+        }
+        wanted = list(products or [])
+        if not wanted and not columns:
+            wanted = ["loan"]
+        seen = set()
+        for prod in wanted:
+            mapped_product = product_mapping.get(prod, prod)
+            if mapped_product in seen:
+                continue
+            seen.add(mapped_product)
+            try:
+                resolved_rate, _meta = self.repo._resolve_rate_via_repo_or_db(
+                    provided_rate=None,
+                    product=mapped_product,
+                    product_fallback=mapped_product,
+                    currency=currency or "TRY",
+                    as_of=None,
+                )
+            except Exception as e:
+                raise ValueError(f"rate resolution failed for product={mapped_product}: {e}")
+            columns.append({"label": mapped_product, "annual_rate": float(resolved_rate), "source": "db"})
+
+        annual = np.asarray([c["annual_rate"] for c in columns], dtype=float)
+        if not np.all(np.isfinite(annual)) or np.any(annual < 0):
+            raise ValueError("annual rate must be >= 0")
+        if P.size * n.size * annual.size > LOAN_GRID_MAX_CELLS:
+            raise ValueError(f"grid too large (max {LOAN_GRID_MAX_CELLS} cells)")
+        return P, n, annual, columns
+
+    # ------------- Kredi teklif ızgarası (anapara × vade × oran) -------------
+    def loan_quote_grid(
+        self,
+        principals: List[float],
+        terms: List[int],
+        rates: Optional[List[float]] = None,
+        products: Optional[List[str]] = None,
+        currency: str = "TRY",
+    ) -> Dict[str, Any]:
+        """
+        Tüm (anapara, vade, oran) kombinasyonları için aylık taksit, toplam ödeme ve toplam faiz.
+        - Matrisler tek NumPy broadcasting çağrısıyla: P[:,None,None] × n[None,:,None] × i[None,None,:]
+        - products verilirse her ürünün oranı BİR KEZ çözülür; rates ile birlikte de kullanılabilir
+        - İkisi de yoksa 'ihtiyaç kredisi' oranı kullanılır (loan_amortization_schedule ile aynı)
+        - Toplamlar loan_amortization_schedule ile tutarlı: satır satır yuvarlanmış taksitler,
+          son taksit yuvarlama farkını kapatır
+        Matris indeksi: [anapara][vade][oran]
+        """
+        try:
+            try:
+                P, n, annual, columns = self._grid_inputs(principals, terms, rates, products, currency)
+            except ValueError as e:
+                return self._err(str(e))
+
+            installment, _last, total_payment, total_interest = _grid_payments(P, n, annual)
+
+            term_list = n.astype(int).tolist()
+            inst_l, tot_l, int_l = installment.tolist(), total_payment.tolist(), total_interest.tolist()
+            ui_rows = [
+                {"principal": self._round2(p), "term_months": t,
+                 "installment": inst_l[a][b], "total_interest": int_l[a][b]}
+                for a, p in enumerate(P.tolist()) for b, t in enumerate(term_list)
+            ]
+            return {
+                "principals": [self._round2(p) for p in P.tolist()],
+                "terms": term_list,
+                "rates": columns,
+                "installment": inst_l,
+                "total_payment": tot_l,
+                "total_interest": int_l,
+                "currency": currency or "",
+                "method": "annuity_monthly",
+                "ui_component": {
+                    "type": "loan_quote_grid_card",
+                    "currency": currency or "",
+                    "columns": [{"label": c["label"], "annual_rate": c["annual_rate"]} for c in columns],
+                    "rows": ui_rows,
+                },
+            }
+
+        except Exception as e:
+            return self._err(f"loan_quote_grid_error: {e}")
+
+    # ------------- Efektif yıllık maliyet (ücretler dahil IRR) -------------
+    def loan_effective_cost(
+        self,
+        principals: List[float],
+        terms: List[int],
+        rates: Optional[List[float]] = None,
+        products: Optional[List[str]] = None,
+        fee_codes: Optional[List[str]] = None,
+        monthly_fee_codes: Optional[List[str]] = None,
+        upfront_fee: float = 0.0,
+        upfront_fee_rate: float = 0.0,
+        currency: str = "TRY",
+        top: int = 10,
+    ) -> Dict[str, Any]:
+        """
+        loan_quote_grid ızgarasındaki her teklif için ücretler dahil efektif maliyet.
+        - Peşin ücretler: fee_codes (fees.pricing_json, anaparaya göre) + upfront_fee + upfront_fee_rate × anapara
+        - Dönemsel ücretler: monthly_fee_codes (taksit tutarına göre), her taksite eklenir
+        - Nakit akışı: t=0 anapara − peşin ücretler, t=1..n −(taksit + dönemsel ücret); son taksit
+          yuvarlama farkını kapatır (loan_amortization_schedule ile aynı)
+        - Tüm teklifler tek matriste, vektörel Newton/bisection ile çözülür (effective_rate.irr)
+        apr = 12 × aylık IRR, effective_annual_rate = (1 + aylık IRR)^12 − 1
+        Matris indeksi: [anapara][vade][oran]; ranking efektif maliyete göre artan ilk `top` teklif.
+        """
+        try:
+            try:
+                P, n, annual, columns = self._grid_inputs(principals, terms, rates, products, currency)
+            except ValueError as e:
+                return self._err(str(e))
+            if upfront_fee is None or float(upfront_fee) < 0:
+                return self._err("upfront_fee must be >= 0")
+            if upfront_fee_rate is None or not (0 <= float(upfront_fee_rate) < 1):
+                return self._err("upfront_fee_rate must be in [0, 1)")
+
+            def load_fees(codes):
+                out = []
+                for code in codes or []:
+                    row = self.repo.get_fee(code)
+                    if not row:
+                        raise ValueError(f"fee not found: {code}")
+                    out.append((row["service_code"], json.loads(row["pricing_json"] or "{}")))
+                return out
+            try:
+                once, monthly = load_fees(fee_codes), load_fees(monthly_fee_codes)
+            except ValueError as e:
+                return self._err(str(e))
+
+            installment, last_payment, total_payment, _ = _grid_payments(P, n, annual)
+            shape = installment.shape
+
+            # peşin ücret anaparaya bağlı → (anapara,) vektörü
+            upfront = np.asarray([
+                float(upfront_fee) + float(upfront_fee_rate) * p + sum(fee_amount(pr, p) for _, pr in once)
+                for p in P.tolist()
+            ])
+            if np.any(upfront >= P):
+                return self._err("upfront fees must be smaller than principal")
+            # dönemsel ücret taksite bağlı → hücre başına
+            if monthly:
+                periodic = np.asarray([
+                    sum(fee_amount(pr, a) for _, pr in monthly) for a in installment.ravel().tolist()
+                ]).reshape(shape)
+            else:
+                periodic = np.zeros(shape)
+
+            Pc = np.broadcast_to(P[:, None, None], shape).ravel()
+            nc = np.broadcast_to(n[None, :, None], shape).ravel().astype(np.int64)
+            Fc = np.broadcast_to(upfront[:, None, None], shape).ravel()
+            cf = loan_cashflows(Pc, installment.ravel(), nc, upfront_fee=Fc,
+                                periodic_fee=periodic.ravel(), last_installment=last_payment.ravel())
+            solved = irr(cf)
+            monthly_irr = solved["rate"]
+            if not np.all(solved["converged"]):
+                return self._err("effective rate did not converge for some offers")
+
+            apr = np.round(12.0 * monthly_irr, 6).reshape(shape)
+            ear = np.round(effective_annual(monthly_irr), 6).reshape(shape)
+            total_cost = np.round(total_payment + (n[None, :, None] * periodic) + upfront[:, None, None]
+                                  - P[:, None, None], 2)
+
+            term_list = n.astype(int).tolist()
+            p_list = [self._round2(p) for p in P.tolist()]
+            inst_l, apr_l, ear_l, cost_l = installment.tolist(), apr.tolist(), ear.tolist(), total_cost.tolist()
+
+            k = max(1, min(int(top or 10), ear.size))
+            order = np.argsort(ear.ravel(), kind="stable")[:k]
+            ranking = []
+            for flat in order.tolist():
+                a, b, c = np.unravel_index(flat, shape)
+                ranking.append({
+                    "principal": p_list[a],
+                    "term_months": term_list[b],
+                    "rate_label": columns[c]["label"],
+                    "annual_rate": columns[c]["annual_rate"],
+                    "installment": inst_l[a][b][c],
+                    "apr": apr_l[a][b][c],
+                    "effective_annual_rate": ear_l[a][b][c],
+                    "total_cost": cost_l[a][b][c],
+                })
+
+            ui_rows = [
+                {"principal": p, "term_months": t,
+                 "installment": inst_l[a][b], "effective_annual_rate": ear_l[a][b], "total_cost": cost_l[a][b]}
+                for a, p in enumerate(p_list) for b, t in enumerate(term_list)
+            ]
+            return {
+                "principals": p_list,
+                "terms": term_list,
+                "rates": columns,
+                "fees": {
+                    "upfront_codes": [c for c, _ in once],
+                    "monthly_codes": [c for c, _ in monthly],
+                    "upfront_by_principal": [self._round2(x) for x in upfront.tolist()],
+                    "upfront_fee": self._round2(upfront_fee),
+                    "upfront_fee_rate": float(upfront_fee_rate),
+                },
+                "installment": inst_l,
+                "apr": apr_l,
+                "effective_annual_rate": ear_l,
+                "total_cost": cost_l,
+                "ranking": ranking,
+                "iterations_max": int(solved["iterations"].max()),
+                "currency": currency or "",
+                "method": "irr_newton_bisection",
+                "ui_component": {
+                    "type": "loan_quote_grid_card",
+                    "title": "Efektif Maliyet Karşılaştırması",
+                    "currency": currency or "",
+                    "columns": [{"label": c["label"], "annual_rate": c["annual_rate"]} for c in columns],
+                    "rows": ui_rows,
+                    "best": ranking[0] if ranking else None,
+                },
+            }
+
+        except Exception as e:
+            return self._err(f"loan_effective_cost_error: {e}")
+
+    # ------------- Erken ödeme / yapılandırma simülasyonu -------------
+    def loan_prepayment_simulate(
+        self,
+        principal: float,
+        term: int,
+        events: List[Dict[str, Any]],
+        rate: Optional[float] = None,
+        currency: str = "TRY",
+        schedule_limit: int = 24,
+    ) -> Dict[str, Any]:
+        """
+        Aylık annuity kredide olay listesiyle "ne olur" senaryosu.
+        events (ay = olayın uygulandığı taksit; olay o ayın taksitinden sonra işler):
+          {"month": 12, "type": "prepayment", "amount": 10000, "mode": "reduce_term" | "reduce_installment"}
+          {"month": 24, "type": "rate_change", "annual_rate": 0.30}
+          {"month": 36, "type": "term_change", "term": 24}        # olaydan sonra kalan ay
+        Olay öncesi plan değişmez; yalnızca etkilenen kuyruk yeniden hesaplanır (tools/amortization.py).
+        Dönüş: base / scenario özetleri, interest_saved, term_reduction_months, olay sonuçları ve
+        ilk değişen aydan (ilk olay ayı + 1) itibaren schedule_limit satırlık plan.
+        """
+        try:
+            if principal is None or principal <= 0:
+                return self._err("principal must be > 0")
+            if term is None or int(term) < 1:
+                return self._err("term (months) must be >= 1")
+            n = int(term)
+            if rate is None:
+                try:
+                    rate, _meta = self.repo._resolve_rate_via_repo_or_db(
+                        provided_rate=None,
+                        product="ihtiyaç kredisi",
+                        product_fallback="ihtiyaç kredisi",
+                        currency=currency or "TRY",
+                        as_of=None,
+                    )
+                except Exception as e:
+                    return self._err(f"rate resolution failed: {e}")
+            rate = float(rate)
+            if rate < 0:
+                return self._err("annual rate must be >= 0")
+
+            if not isinstance(events, list) or not events:
+                return self._err("events must be a non-empty list")
+            if len(events) > LOAN_SIM_MAX_EVENTS:
+                return self._err(f"too many events (max {LOAN_SIM_MAX_EVENTS})")
+            parsed = []
+            for idx, ev in enumerate(events):
+                if not isinstance(ev, dict):
+                    return self._err(f"events[{idx}] must be an object")
+                kind = str(ev.get("type") or "").strip().lower()
+                if kind not in EVENT_KINDS:
+                    return self._err(f"events[{idx}].type must be one of {', '.join(EVENT_KINDS)}")
+                try:
+                    month = int(ev.get("month"))
+                except (TypeError, ValueError):
+                    return self._err(f"events[{idx}].month must be an integer")
+                if month < 1 or month > n:
+                    return self._err(f"events[{idx}].month must be between 1 and {n}")
+                try:
+                    if kind == "prepayment":
+                        value = float(ev.get("amount"))
+                        ok = value > 0
+                    elif kind == "rate_change":
+                        value = float(ev.get("annual_rate")) / 12.0
+                        ok = value >= 0
+                    else:
+                        value = int(ev.get("term"))
+                        ok = value >= 1
+                except (TypeError, ValueError):
+                    ok = False
+                if not ok:
+                    return self._err(f"events[{idx}]: invalid value for {kind}")
+                mode = str(ev.get("mode") or "reduce_term").strip().lower()
+                if mode not in ("reduce_term", "reduce_installment"):
+                    return self._err(f"events[{idx}].mode must be reduce_term or reduce_installment")
+                parsed.append((month, kind, value, mode == "reduce_term"))
+
+            first_month = min(e[0] for e in parsed)
+            base = simulate_events(principal, rate / 12.0, n)
+            sim = simulate_events(principal, rate / 12.0, n, parsed,
+                                  row_start=first_month + 1, row_limit=max(0, int(schedule_limit)))
+
+            r2 = self._round2
+            prepaid = sum(a.get("prepaid", 0.0) for a in sim["applied"])
+            applied = []
+            for a in sim["applied"]:
+                row = {"month": a["month"], "type": a["type"], "skipped": a["skipped"]}
+                if not a["skipped"]:
+                    row.update({"balance_before": r2(a["balance_before"]), "prepaid": r2(a["prepaid"]),
+                                "balance_after": r2(a["balance_after"]),
+                                "installment_after": r2(a["installment_after"]),
+                                "remaining_months": a["remaining_periods"]})
+                applied.append(row)
+
+            base_summary = {
+                "installment": r2(base["installment"]),
+                "term_months": base["term"],
+                "total_payment": r2(base["total_payment"]),
+                "total_interest": r2(base["total_interest"]),
+            }
+            scenario = {
+                "installment": r2(sim["installment"]),
+                "term_months": sim["term"],
+                "total_payment": r2(sim["total_payment"]),
+                "total_interest": r2(sim["total_interest"]),
+                "total_prepaid": r2(prepaid),
+            }
+            interest_saved = r2(base["total_interest"] - sim["total_interest"])
+            term_reduction = base["term"] - sim["term"]
+            return {
+                "principal": r2(principal),
+                "annual_rate": rate,
+                "currency": currency or "",
+                "base": base_summary,
+                "scenario": scenario,
+                "interest_saved": interest_saved,
+                "term_reduction_months": term_reduction,
+                "events": applied,
+                "schedule": rows_as_dicts(sim["rows"], _LOAN_SCHEDULE_KEYS) if sim["rows"] is not None else [],
+                "ui_component": {
+                    "type": "loan_simulation_card",
+                    "currency": currency or "",
+                    "principal": r2(principal),
+                    "annual_rate": rate,
+                    "base": base_summary,
+                    "scenario": scenario,
+                    "interest_saved": interest_saved,
+                    "term_reduction_months": term_reduction,
+                    "event_count": len(applied),
+                },
+            }
+
+        except Exception as e:
+            return self._err(f"loan_prepayment_simulate_error: {e}")
+
     # ------------- S6: InterestCalculatorTool (deposit|loan) -------------
     def interest_compute(
         self,
@@ -500,26 +917,10 @@ class CalculationTools:
             }
 
             if schedule:
-                rows = []
-                remaining = float(principal)
-                for k in range(1, n + 1):
-                    interest = remaining * i
-                    principal_part = installment - interest if resolved_rate != 0 else installment
-                    if k == n:
-                        principal_part = remaining
-                        pay_k = principal_part + interest
-                    else:
-                        pay_k = installment
-                    remaining = max(0.0, remaining - principal_part)
-                    if len(rows) < int(schedule_limit):
-                        rows.append({
-                            "period": k,
-                            "payment": r(pay_k),
-                            "interest": r(interest),
-                            "principal": r(principal_part),
-                            "remaining": r(remaining),
-                        })
-                payload["schedule"] = rows
+                # yalnızca gösterilecek ilk schedule_limit satır hesaplanır (kapalı form)
+                sched = AnnuitySchedule(principal, i, n)
+                digits = 2 if rounding in (None, 2) else int(rounding)
+                payload["schedule"] = rows_as_dicts(sched.rows(1, int(schedule_limit)), _INTEREST_SCHEDULE_KEYS, digits)
 
             return payload
 
@@ -0,0 +1,146 @@
+# backend/mcp_server/tools/effective_rate.py
+"""
+Efektif maliyet (IRR / yıllık maliyet oranı) motoru — NumPy ile vektörel.
+
+Kredi nakit akışı (müşteri tarafı, t = 0..n dönem):
+    cf_0 = anapara - peşin ücretler      (+)
+    cf_t = -(taksit + dönemsel ücret)    (-)
+Dönemsel IRR r:  NPV(r) = Σ cf_t (1+r)^-t = 0
+    yıllık efektif maliyet = (1+r)^12 - 1,  nominal APR = 12 r
+
+irr(): satır başına bir teklif olan nakit akışı matrisini (farklı vadeler sıfırla doldurulur —
+sıfır akış NPV'yi değiştirmez) tek seferde çözer. Her adımda Newton adımı denenir; adım
+[lo, hi] aralığı dışına çıkarsa ya da türev bozuksa aralığın ortası alınır (bisection).
+Aralık her iterasyonda NPV işaretine göre daraltılır → yakınsama garantili, tipik 5-8 iterasyon.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+IRR_LO = -0.5     # dönemsel alt sınır (uzun vadede (1+r)^-t taşmasın)
+IRR_HI = 10.0     # dönemsel üst sınır (%1000 / dönem)
+
+
+def fee_amount(pricing: Dict[str, Any], amount: float) -> float:
+    """
+    fees.pricing_json için ücret:
+      flat   : {"amount": x}
+      percent: {"rate": 0.02, "min": 5, "max": 50}      (rate kesir: 0.02 = %2)
+      tiered : {"tiers": [{"threshold": 1000, "fee": 10}, ...]}  tutar <= threshold olan ilk kademe;
+               son kademenin üstü son kademe ücreti
+    """
+    kind = str(pricing.get("type") or "").lower()
+    if kind == "flat":
+        return float(pricing.get("amount") or 0.0)
+    if kind == "percent":
+        fee = float(amount) * float(pricing.get("rate") or 0.0)
+        if pricing.get("min") is not None:
+            fee = max(fee, float(pricing["min"]))
+        if pricing.get("max") is not None:
+            fee = min(fee, float(pricing["max"]))
+        return fee
+    if kind == "tiered":
+        tiers = sorted(pricing.get("tiers") or [], key=lambda t: float(t.get("threshold") or 0))
+        if not tiers:
+            return 0.0
+        for t in tiers:
+            if float(amount) <= float(t.get("threshold") or 0):
+                return float(t.get("fee") or 0.0)
+        return float(tiers[-1].get("fee") or 0.0)
+    raise ValueError(f"unsupported pricing type: {kind or '?'}")
+
+
+def irr(
+    cashflows,
+    guess: float = 0.01,
+    tol: float = 1e-12,
+    max_iter: int = 100,
+    lo: float = IRR_LO,
+    hi: float = IRR_HI,
+) -> Dict[str, np.ndarray]:
+    """
+    cashflows: (m, T+1) — her satır bir teklifin t=0..T akışları (ya da tek satır için 1B dizi).
+    Dönüş: {"rate": (m,) dönemsel IRR (aralıkta kök yoksa nan), "iterations": (m,), "converged": (m,)}
+    """
+    cf = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    m = cf.shape[0]
+    t = np.arange(cf.shape[1], dtype=float)
+    tcf = t * cf
+
+    def npv(r, rows):
+        v = np.exp(-t * np.log1p(r)[:, None])
+        return (cf[rows] * v).sum(axis=1), -(tcf[rows] * v).sum(axis=1) / (1.0 + r)
+
+    lo_v = np.full(m, lo)
+    hi_v = np.full(m, hi)
+    all_rows = np.arange(m)
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        f_lo, _ = npv(lo_v, all_rows)
+        f_hi, _ = npv(hi_v, all_rows)
+    has_root = np.sign(f_lo) != np.sign(f_hi)
+
+    r = np.clip(np.full(m, float(guess)), lo, hi)
+    iters = np.zeros(m, dtype=np.int64)
+    converged = np.zeros(m, dtype=bool)
+    active = has_root.copy()
+    s_lo = np.sign(f_lo)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            rows = np.flatnonzero(active)
+            if rows.size == 0:
+                break
+            rr = r[rows]
+            f, df = npv(rr, rows)
+            # aralığı daralt: f, lo ile aynı işaretteyse kök sağda
+            left = np.sign(f) == s_lo[rows]
+            lo_v[rows] = np.where(left, rr, lo_v[rows])
+            hi_v[rows] = np.where(left, hi_v[rows], rr)
+
+            step = rr - f / df
+            bad = ~np.isfinite(step) | (step < lo_v[rows]) | (step > hi_v[rows])
+            new = np.where(bad, 0.5 * (lo_v[rows] + hi_v[rows]), step)
+            new = np.where(f == 0, rr, new)  # tam kök: aralık ortasına kaçma
+
+            eps = tol * (1.0 + np.abs(rr))
+            done = (np.abs(new - rr) <= eps) | (hi_v[rows] - lo_v[rows] <= eps) | (f == 0)
+            r[rows] = new
+            iters[rows] += 1
+            converged[rows[done]] = True
+            active[rows[done]] = False
+
+    r = np.where(has_root, r, np.nan)
+    return {"rate": r, "iterations": iters, "converged": converged}
+
+
+def effective_annual(rate_per_period, periods_per_year: int = 12):
+    """Dönemsel orandan yıllık efektif oran: (1+r)^m - 1."""
+    r = np.asarray(rate_per_period, dtype=float)
+    return np.expm1(periods_per_year * np.log1p(r))
+
+
+def loan_cashflows(principal, installment, periods, upfront_fee=0.0, periodic_fee=0.0,
+                   last_installment=None, width: Optional[int] = None):
+    """
+    Teklif vektörlerinden (m,) nakit akışı matrisi (m, width+1); vadeden sonraki sütunlar 0.
+    last_installment verilirse n. dönem taksiti onunla değiştirilir (yuvarlama farkını kapatan son taksit).
+    """
+    P, A, n, F, pf = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(principal, dtype=float)),
+        np.asarray(installment, dtype=float),
+        np.asarray(periods, dtype=np.int64),
+        np.asarray(upfront_fee, dtype=float),
+        np.asarray(periodic_fee, dtype=float),
+    )
+    T = int(n.max()) if width is None else int(width)
+    t = np.arange(1, T + 1)
+    cf = np.zeros((P.size, T + 1))
+    cf[:, 0] = P - F
+    cf[:, 1:] = np.where(t[None, :] <= n[:, None], -(A + pf)[:, None], 0.0)
+    if last_installment is not None:
+        L = np.broadcast_to(np.asarray(last_installment, dtype=float), P.shape)
+        rows = np.arange(P.size)
+        cf[rows, n] = -(L + pf)
+    return cf
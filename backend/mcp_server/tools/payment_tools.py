@@ -1,12 +1,66 @@
 # tools/payment_service.py
 from __future__ import annotations
-import os, math, datetime
-from typing import Dict, Any
+import os, math, datetime, time, hmac, hashlib
+from typing import Dict, Any, List
+
+from jose import ExpiredSignatureError, JWTError, jwt
+
+from ..data.id_gen import new_id
+from ..data.sql_payment_repo import BatchItemError
 
 
 DAILY_LIMIT = float(os.getenv("PAYMENT_DAILY_LIMIT", "50000"))
 PER_TXN_LIMIT = float(os.getenv("PAYMENT_PER_TXN_LIMIT", "20000"))
 DEFAULT_CCY = os.getenv("DEFAULT_CURRENCY", "TRY")
+BATCH_MAX_ITEMS = int(os.getenv("PAYMENT_BATCH_MAX_ITEMS", "100"))
+CONFIRM_TOKEN_TTL_S = int(os.getenv("PAYMENT_CONFIRM_TTL_S", "300"))
+# Onay token'ı oturum token'ı DEĞİLDİR: ayrı türetilmiş anahtar + kendi aud'u (auth.get_current_user reddeder)
+CONFIRM_TOKEN_TYP = "pay_confirm"
+CONFIRM_BATCH_TOKEN_TYP = "pay_batch_confirm"
+CONFIRM_TOKEN_AUD = "payment-confirm"
+
+_CONFIRM_MESSAGES = {
+    "confirm_token_invalid": "Onay bilgisi geçersiz. Lütfen transferi yeniden başlatın.",
+    "confirm_token_mismatch": "Onaylanan transfer bilgileri ile istek uyuşmuyor.",
+    "confirm_token_expired": "Onay süresi doldu. Lütfen transferi yeniden başlatın.",
+    "confirm_token_stale": "Hesap veya limit bilgileri değişti. Lütfen transferi yeniden başlatın.",
+    "confirm_token_required": "Toplu transfer için önce ön kontrol yapılıp onaylanmalıdır.",
+}
+
+# precheck ile aynı mesajlar (toplu transferde kalem bazında döner)
+_BATCH_MESSAGES = {
+    "invalid_item": "Transfer kalemi geçersiz.",
+    "invalid_amount": "Tutar geçersiz.",
+    "per_txn_limit_exceeded": "Tek işlem limiti aşıldı.",
+    "from_account_not_found": "Kaynak hesap bulunamadı.",
+    "to_account_not_found": "Hedef hesap bulunamadı.",
+    "from_account_not_owned": "Bu hesap size ait değil.",
+    "from_account_inactive": "Kaynak hesap aktif değil.",
+    "to_account_inactive": "Hedef hesap aktif değil.",
+    "currency_mismatch": "Hesap para birimleri uyumsuz.",
+    "insufficient_funds": "Bakiye yetersiz.",
+    "daily_limit_exceeded": "Günlük transfer limiti aşıldı.",
+    "debit_rejected": "Transfer gerçekleştirilemedi, lütfen tekrar deneyin.",
+}
+
+def _norm_batch_item(t) -> Dict[str, Any] | None:
+    # LLM'den gelen kalem: hesap no'ları str/float olabilir → int; tutar → float
+    if not isinstance(t, dict):
+        return None
+    try:
+        amount = t.get("amount")
+        return {"from_account": int(t["from_account"]), "to_account": int(t["to_account"]),
+                "amount": float(amount) if amount is not None else None,
+                "currency": t.get("currency"), "note": t.get("note")}
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def derive_confirm_key(secret_key: str) -> str:
+    """Onay token'ı anahtarı: HMAC(SECRET_KEY, "pay_confirm") — login token'ları bu anahtarla doğrulanamaz."""
+    return hmac.new(secret_key.encode("utf-8"), CONFIRM_TOKEN_TYP.encode("ascii"), hashlib.sha256).hexdigest()
+
+def _confirm_error(code: str) -> Dict[str, Any]:
+    return {"ok": False, "error": code, "message": _CONFIRM_MESSAGES[code]}
 
 def today_str() -> str:
     return datetime.date.today().isoformat()
@@ -32,14 +86,16 @@ def _map_account_type_to_db(account_type: str) -> str:
     return mapping.get(account_type.lower().strip(), account_type)
 
 class PaymentService:
-    def __init__(self, repo):
+    def __init__(self, repo, secret_key: str | None = None):
       self.repo = repo
+      # onay token'ı imzası (SECRET_KEY'den türetilmiş ayrı anahtar); None → token'sız (eski) akış
+      self.confirm_key = derive_confirm_key(secret_key) if secret_key else None
 
 
     def _ensure(self):
         # payments tablosu var mı kontrol
         with self.repo._conn() if hasattr(self.repo, "_conn") else None:
-            pass  # repo _conn yoksa da sorun değil; _ensure_schema operatif olarak insert aşamasında çağrılır
+            pass  # repo _conn yoksa da sorun değil; şema data/migrations.py ile başlangıçta kurulur
 
     def find_account_by_type(self, customer_id: int, account_type: str) -> Dict[str, Any]:
         """
@@ -127,8 +183,8 @@ class PaymentService:
                     "limit": PER_TXN_LIMIT, "attempt": amount,
                     "message": "Tek işlem limiti aşıldı."}
 
-        acc_from = self.repo.get_account(from_account)
-        acc_to = self.repo.get_account(to_account)
+        accounts = self.repo.get_accounts_many([from_account, to_account])  # iki hesap tek sorguda
+        acc_from, acc_to = accounts.get(from_account), accounts.get(to_account)
         if not acc_from:
             return {"ok": False, "error": "from_account_not_found", "message": "Kaynak hesap bulunamadı."}
         if not acc_to:
@@ -165,7 +221,115 @@ class PaymentService:
 
         return {"ok": True, "from_account": from_account, "to_account": to_account,
                 "amount": round(amount,2), "currency": ccy, "fee": fee, "note": note or "",
-                "limits": {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT, "used_today": used_today}}
+                "limits": {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT, "used_today": used_today},
+                "versions": [acc_from.get("version", 0), acc_to.get("version", 0)]}
+
+    # ================= Onay token'ı (preview → commit) =================
+    def issue_confirm_token(self, customer_id: int, pre: Dict[str, Any]) -> str | None:
+        """
+        Başarılı precheck için kısa ömürlü onay token'ı (HS256, derive_confirm_key anahtarıyla).
+        İçerik: transfer parametreleri, hesap sürümleri, limit anlık görüntüsü ve commit'te
+        kullanılacak payment_id (idempotency anahtarı). Müşteri "sub" yerine "cus" claim'inde taşınır
+        ve aud=CONFIRM_TOKEN_AUD'dur; token LLM'e/sohbet geçmişine gittiği için oturum açmaya yaramamalı.
+        """
+        if not self.confirm_key:
+            return None
+        claims = {
+            "typ": CONFIRM_TOKEN_TYP,
+            "aud": CONFIRM_TOKEN_AUD,
+            "cus": int(customer_id),
+            "pid": new_id("TX"),
+            "from": pre["from_account"], "to": pre["to_account"],
+            "amt": pre["amount"], "ccy": pre["currency"], "fee": pre["fee"], "note": pre.get("note", ""),
+            "ver": pre["versions"],
+            "lim": {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT},
+            "exp": int(time.time()) + CONFIRM_TOKEN_TTL_S,
+        }
+        return jwt.encode(claims, self.confirm_key, algorithm="HS256")
+
+    def commit_confirmed(self, customer_id: int, token: str, from_account: int, to_account: int,
+                         amount: float) -> Dict[str, Any]:
+        """
+        Onay token'ı ile commit: precheck TEKRARLANMAZ. Token doğrulanır, parametrelerin token ile
+        aynı olduğu kontrol edilir; bakiye / günlük limit / hesap sürümü tek korumalı UPDATE'te doğrulanır.
+        Aynı token ile tekrar çağrı (LLM retry) aynı işlemi döndürür.
+        """
+        claims, expired = self._decode_confirm_token(token, CONFIRM_TOKEN_TYP)
+        if not claims:
+            return _confirm_error("confirm_token_invalid")
+
+        if (claims.get("cus") != int(customer_id) or claims["from"] != from_account or claims["to"] != to_account
+                or round(float(amount), 2) != claims["amt"]):
+            return _confirm_error("confirm_token_mismatch")
+
+        if expired:
+            existing = self.repo.get_payment(claims["pid"])
+            if existing:
+                return self._confirmed_result({**existing, "replayed": True})
+            return _confirm_error("confirm_token_expired")
+
+        if claims["lim"] != {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT}:
+            return _confirm_error("confirm_token_stale")
+
+        try:
+            txn = self.repo.insert_payment_confirmed(
+                payment_id=claims["pid"],
+                customer_id=customer_id,
+                from_account=from_account,
+                to_account=to_account,
+                amount=float(claims["amt"]),
+                currency=claims["ccy"],
+                fee=float(claims["fee"]),
+                note=claims.get("note") or "",
+                versions=tuple(claims["ver"]),
+                daily_limit=float(claims["lim"]["daily"]),
+            )
+        except ValueError as ve:
+            code = str(ve)
+            return {"ok": False, "error": code, "message": _CONFIRM_MESSAGES.get(code) or _BATCH_MESSAGES.get(code, code)}
+        except Exception as e:
+            return {"ok": False, "error": "create_failed", "detail": type(e).__name__}
+        return self._confirmed_result(txn)
+
+    def _decode_confirm_token(self, token: str, typ: str):
+        """
+        Onay token'ını doğrular → (claims, expired); geçersizse (None, False).
+        Süresi dolmuş token'da imza ve aud yine doğrulanır, yalnızca exp atlanır: çağıran süresi
+        dolmuş token ile ASLA yazmaz — sadece aynı pid ile daha önce işlenmiş kayıt varsa (geç gelen
+        retry) onu döndürür, yoksa confirm_token_expired.
+        """
+        if not self.confirm_key or not token:
+            return None, False
+        expired = False
+        try:
+            claims = jwt.decode(token, self.confirm_key, algorithms=["HS256"], audience=CONFIRM_TOKEN_AUD)
+        except ExpiredSignatureError:
+            try:
+                claims = jwt.decode(token, self.confirm_key, algorithms=["HS256"], audience=CONFIRM_TOKEN_AUD,
+                                    options={"verify_exp": False})
+                expired = True
+            except JWTError:
+                claims = None
+        except JWTError:
+            claims = None
+        if not claims or claims.get("typ") != typ:
+            return None, False
+        return claims, expired
+
+    @staticmethod
+    def _confirmed_result(txn: Dict[str, Any]) -> Dict[str, Any]:
+        replayed = bool(txn.pop("replayed", False))
+        receipt_id = "RC" + txn["payment_id"][2:]  # token'lı yolda dekont no da sabit (retry'da aynı)
+        return {
+            "ok": True,
+            "replayed": replayed,
+            "txn": txn,
+            "receipt": {
+                "receipt_id": receipt_id,
+                "pdf": {"filename": f"receipt_{receipt_id}.pdf"},
+                "hash": txn["payment_id"]
+            }
+        }
     
     def create(self, customer_id: int, from_account: int, to_account: int, amount: float,
                currency: str | None, note: str | None) -> Dict[str, Any]:
@@ -182,13 +346,16 @@ class PaymentService:
                 amount=float(pre["amount"]),
                 currency=pre["currency"],
                 fee=float(pre["fee"]),
-                note=pre.get("note") or ""
+                note=pre.get("note") or "",
+                daily_limit=DAILY_LIMIT,
             )
+            receipt_id = new_id("RC")
             return {
                 "ok": True,
                 "txn": txn,
                 "receipt": {
-                    "pdf": {"filename": f"receipt_{txn['payment_id']}.pdf"},
+                    "receipt_id": receipt_id,
+                    "pdf": {"filename": f"receipt_{receipt_id}.pdf"},
                     "hash": txn["payment_id"]
                 }
             }
@@ -196,7 +363,249 @@ class PaymentService:
             return {"ok": False, "error": str(ve)}
         except Exception as e:
             return {"ok": False, "error": "create_failed", "detail": type(e).__name__}
-        
+
+    # ================= Toplu transfer (batch) =================
+    def precheck_batch(self, customer_id: int, transfers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        precheck'in toplu hali: tüm hesaplar TEK sorguda, günlük kullanım müşteri başına TEK lookup.
+        Kalemler sırayla simüle edilir (bakiye ve günlük limit kalem kalem tüketilir) → DB'deki
+        uygulama sırasıyla aynı sonuç. Dönüş: {ok, count, total_amount, items:[{index, ok, ...}]}
+        """
+        if not isinstance(transfers, list) or not transfers:
+            return {"ok": False, "error": "empty_batch", "message": "Transfer listesi boş."}
+        if len(transfers) > BATCH_MAX_ITEMS:
+            return {"ok": False, "error": "batch_too_large", "limit": BATCH_MAX_ITEMS,
+                    "message": f"Tek seferde en fazla {BATCH_MAX_ITEMS} transfer yapılabilir."}
+
+        transfers = [_norm_batch_item(t) for t in transfers]
+        accounts = self.repo.get_accounts_many(
+            [t[k] for t in transfers if t for k in ("from_account", "to_account")])
+        avail = {aid: float(a["balance"]) for aid, a in accounts.items()}
+        used = self.repo.get_daily_out_totals({a["customer_id"] for a in accounts.values()}, today_str())
+        used_start = dict(used)
+
+        items, total = [], 0.0
+        for i, t in enumerate(transfers):
+            err = self._check_batch_item(customer_id, t, accounts, avail, used)
+            if err:
+                items.append({"index": i, "ok": False, "error": err, "message": _BATCH_MESSAGES.get(err, err)})
+                continue
+            acc_from, acc_to = accounts[t["from_account"]], accounts[t["to_account"]]
+            amount, fee = round(float(t["amount"]), 2), 0.0
+            # sıradaki kalemler bu kalemin etkisini görür
+            avail[acc_from["account_id"]] -= amount + fee
+            avail[acc_to["account_id"]] += amount
+            used[acc_from["customer_id"]] += amount
+            total += amount
+            items.append({"index": i, "ok": True, "from_account": acc_from["account_id"],
+                          "to_account": acc_to["account_id"], "amount": amount,
+                          "currency": acc_from["currency"], "fee": fee, "note": t.get("note") or ""})
+
+        return {"ok": all(it["ok"] for it in items), "count": len(items), "total_amount": round(total, 2),
+                "limits": {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT,
+                           "used_today": used_start.get(customer_id, 0.0)},
+                "items": items}
+
+    @staticmethod
+    def _check_batch_item(customer_id, t, accounts, avail, used) -> str | None:
+        if t is None:
+            return "invalid_item"
+        amount = t["amount"]
+        if amount is None or amount <= 0:
+            return "invalid_amount"
+        if amount > PER_TXN_LIMIT:
+            return "per_txn_limit_exceeded"
+        acc_from, acc_to = accounts.get(t.get("from_account")), accounts.get(t.get("to_account"))
+        if not acc_from:
+            return "from_account_not_found"
+        if not acc_to:
+            return "to_account_not_found"
+        if customer_id is not None and acc_from.get("customer_id") != customer_id:
+            return "from_account_not_owned"
+        if not _is_active(acc_from["status"]):
+            return "from_account_inactive"
+        if not (_is_active(acc_to["status"]) or _is_external(acc_to["status"])):
+            return "to_account_inactive"
+        ccy = t.get("currency") or acc_from["currency"]
+        if ccy != acc_from["currency"] or acc_from["currency"] != acc_to["currency"]:
+            return "currency_mismatch"
+        if avail[acc_from["account_id"]] < amount:
+            return "insufficient_funds"
+        if used[acc_from["customer_id"]] + amount > DAILY_LIMIT:
+            return "daily_limit_exceeded"
+        return None
+
+    def create_batch(self, customer_id: int, transfers: List[Dict[str, Any]], atomic: bool = True,
+                     pre: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        """
+        Toplu transfer: tek precheck + tek yazma transaction'ı (onay token'sız iç yol;
+        kullanıcı onaylı commit için commit_batch_confirmed).
+        - atomic=True  → bir kalem bile geçersizse hiçbiri işlenmez
+        - atomic=False → geçerli kalemler işlenir, geçersizler kalem bazında hata döner
+        pre: aynı istekte alınmış precheck_batch sonucu (verilirse tekrar okunmaz; bakiye ve
+        günlük limit yine de yazma sırasında korumalı UPDATE ile doğrulanır)
+        """
+        pre = pre or self.precheck_batch(customer_id, transfers)
+        if "items" not in pre:
+            return pre
+        mode = "atomic" if atomic else "per_item"
+        items = pre["items"]
+        failed = [it for it in items if not it["ok"]]
+        valid = [it for it in items if it["ok"]]
+        if (atomic and failed) or not valid:
+            return {"ok": False, "mode": mode, "error": "batch_precheck_failed",
+                    "message": "Toplu transfer ön kontrolden geçemedi.", "posted": 0,
+                    "failed": len(failed), "results": failed}
+
+        try:
+            posted = self.repo.insert_payments_batch(
+                [{"customer_id": customer_id, **{k: it[k] for k in ("from_account", "to_account", "amount", "currency", "fee", "note")}}
+                 for it in valid],
+                atomic=atomic,
+                daily_limit=DAILY_LIMIT,  # precheck anlık görüntüsü değil: yazma anındaki daily_outflow
+            )
+        except BatchItemError as be:
+            it = valid[be.index]
+            return {"ok": False, "mode": mode, "error": "batch_aborted", "posted": 0, "failed": len(items),
+                    "message": "Toplu transfer geri alındı.",
+                    "results": [{"index": it["index"], "ok": False, "error": be.code,
+                                 "message": _BATCH_MESSAGES.get(be.code, be.code)}]}
+        except Exception as e:
+            return {"ok": False, "mode": mode, "error": "create_failed", "detail": type(e).__name__}
+
+        results = {it["index"]: it for it in failed}
+        for it, txn in zip(valid, posted):
+            if "error" in txn:
+                results[it["index"]] = {"index": it["index"], "ok": False, "error": txn["error"],
+                                        "message": _BATCH_MESSAGES.get(txn["error"], txn["error"])}
+            else:
+                receipt_id = new_id("RC")
+                results[it["index"]] = {"index": it["index"], "ok": True, "txn": txn,
+                                        "receipt": {"receipt_id": receipt_id,
+                                                    "pdf": {"filename": f"receipt_{receipt_id}.pdf"},
+                                                    "hash": txn["payment_id"]}}
+        ordered = [results[i] for i in sorted(results)]
+        n_ok = sum(1 for r in ordered if r["ok"])
+        return {"ok": n_ok == len(ordered), "mode": mode, "posted": n_ok, "failed": len(ordered) - n_ok,
+                "total_amount": round(sum(r["txn"]["amount"] for r in ordered if r["ok"]), 2),
+                "results": ordered}
+
+    def issue_batch_confirm_token(self, customer_id: int, pre: Dict[str, Any], atomic: bool = True) -> str | None:
+        """
+        precheck_batch sonucu için onay token'ı (tekil transferle aynı anahtar / aud, typ farklı).
+        Geçerli kalemler token'ın içinde taşınır → commit yalnızca token ile yapılabilir, LLM'in
+        kalem listesini yeniden üretmesi gerekmez. pid: toplu transferin idempotency anahtarı.
+        atomic modda tek kalem bile geçersizse token verilmez.
+        """
+        if not self.confirm_key or "items" not in pre:
+            return None
+        valid = [it for it in pre["items"] if it["ok"]]
+        if not valid or (atomic and len(valid) != len(pre["items"])):
+            return None
+        claims = {
+            "typ": CONFIRM_BATCH_TOKEN_TYP,
+            "aud": CONFIRM_TOKEN_AUD,
+            "cus": int(customer_id),
+            "pid": new_id("TX"),
+            "atomic": bool(atomic),
+            "n": len(pre["items"]),
+            # [index, from, to, amount, currency, note]
+            "items": [[it["index"], it["from_account"], it["to_account"], it["amount"], it["currency"], it["note"]]
+                      for it in valid],
+            "lim": {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT},
+            "exp": int(time.time()) + CONFIRM_TOKEN_TTL_S,
+        }
+        return jwt.encode(claims, self.confirm_key, algorithm="HS256")
+
+    def commit_batch_confirmed(self, customer_id: int, token: str,
+                               transfers: List[Dict[str, Any]] | None = None) -> Dict[str, Any]:
+        """
+        Onay token'ı ile toplu transfer. Kalemler token'dan okunur; transfers verilirse token ile
+        aynı olmalıdır. Statik kontroller (sahiplik, durum, para birimi) token'daki kalemlerle yeniden
+        yapılır; bakiye ve günlük limit her kalem için korumalı UPDATE'te (yazma anında) doğrulanır.
+        Aynı token ile tekrar çağrı, payment_batches kaydındaki ilk sonucu döndürür.
+        """
+        claims, expired = self._decode_confirm_token(token, CONFIRM_BATCH_TOKEN_TYP)
+        if not claims:
+            return _confirm_error("confirm_token_invalid" if token else "confirm_token_required")
+        if claims.get("cus") != int(customer_id) or not self._batch_matches(claims, transfers):
+            return _confirm_error("confirm_token_mismatch")
+
+        mode = "atomic" if claims["atomic"] else "per_item"
+        stored = self.repo.get_payment_batch(claims["pid"])
+        if stored:
+            return self._batch_confirmed_result(mode, claims["pid"], stored["results"], replayed=True)
+        if expired:
+            return _confirm_error("confirm_token_expired")
+        if claims["lim"] != {"per_txn": PER_TXN_LIMIT, "daily": DAILY_LIMIT}:
+            return _confirm_error("confirm_token_stale")
+
+        indices = [row[0] for row in claims["items"]]
+        pre = self.precheck_batch(customer_id, [
+            {"from_account": f, "to_account": t, "amount": amt, "currency": ccy, "note": note}
+            for _, f, t, amt, ccy, note in claims["items"]])
+        if "items" not in pre:
+            return pre
+        valid = [it for it in pre["items"] if it["ok"]]
+        rejected = [{"index": indices[it["index"]], "error": it["error"]} for it in pre["items"] if not it["ok"]]
+        if (claims["atomic"] and rejected) or not valid:
+            return {"ok": False, "mode": mode, "batch_id": claims["pid"], "error": "batch_precheck_failed",
+                    "message": "Toplu transfer ön kontrolden geçemedi.", "posted": 0, "failed": len(rejected),
+                    "results": [self._batch_item_error(r["index"], r["error"]) for r in rejected]}
+
+        items = [{"index": indices[it["index"]], "payment_id": f"{claims['pid']}-{indices[it['index']]:03d}",
+                  "customer_id": customer_id,
+                  **{k: it[k] for k in ("from_account", "to_account", "amount", "currency", "fee", "note")}}
+                 for it in valid]
+        try:
+            out = self.repo.insert_payments_batch_confirmed(
+                claims["pid"], customer_id, items, atomic=claims["atomic"],
+                daily_limit=float(claims["lim"]["daily"]), rejected=rejected)
+        except BatchItemError as be:
+            return {"ok": False, "mode": mode, "batch_id": claims["pid"], "error": "batch_aborted", "posted": 0,
+                    "failed": len(items), "message": "Toplu transfer geri alındı.",
+                    "results": [self._batch_item_error(items[be.index]["index"], be.code)]}
+        except Exception as e:
+            return {"ok": False, "mode": mode, "error": "create_failed", "detail": type(e).__name__}
+        return self._batch_confirmed_result(mode, claims["pid"], out["results"], replayed=out["replayed"])
+
+    @staticmethod
+    def _batch_matches(claims: Dict[str, Any], transfers) -> bool:
+        # transfers verilmediyse token tek kaynak; verildiyse token'daki her kalem aynı sırada olmalı
+        if not transfers:
+            return True
+        if not isinstance(transfers, list) or len(transfers) != claims["n"]:
+            return False
+        norm = [_norm_batch_item(t) for t in transfers]
+        for idx, f, t, amt, _, _ in claims["items"]:
+            it = norm[idx]
+            if (not it or it["from_account"] != f or it["to_account"] != t
+                    or it["amount"] is None or round(it["amount"], 2) != amt):
+                return False
+        return True
+
+    @staticmethod
+    def _batch_item_error(index: int, code: str) -> Dict[str, Any]:
+        return {"index": index, "ok": False, "error": code, "message": _BATCH_MESSAGES.get(code, code)}
+
+    @classmethod
+    def _batch_confirmed_result(cls, mode: str, batch_id: str, entries: List[Dict[str, Any]],
+                                replayed: bool) -> Dict[str, Any]:
+        results = []
+        for e in entries:
+            if "txn" not in e:
+                results.append(cls._batch_item_error(e["index"], e["error"]))
+                continue
+            receipt_id = "RC" + e["txn"]["payment_id"][2:]  # token'lı yolda dekont no sabit (retry'da aynı)
+            results.append({"index": e["index"], "ok": True, "txn": e["txn"],
+                            "receipt": {"receipt_id": receipt_id, "pdf": {"filename": f"receipt_{receipt_id}.pdf"},
+                                        "hash": e["txn"]["payment_id"]}})
+        n_ok = sum(1 for r in results if r["ok"])
+        return {"ok": n_ok == len(results), "mode": mode, "batch_id": batch_id, "replayed": replayed,
+                "posted": n_ok, "failed": len(results) - n_ok,
+                "total_amount": round(sum(r["txn"]["amount"] for r in results if r["ok"]), 2),
+                "results": results}
+
 
     def card_limit_increase_request(
         self,
@@ -251,6 +660,7 @@ class PaymentService:
         return {
             "ok": True,
             "request_id": saved.get("request_id"),
+            "request_ref": saved.get("request_ref"),
             "status": saved.get("status"),
             "card": {
                 "card_id": cid,
@@ -265,6 +675,7 @@ class PaymentService:
             "ui_component": {
                 "type": "card_limit_increase_request",
                 "title": "Kart Limit Artış Talebi Alındı",
+                "request_ref": saved.get("request_ref"),
                 "card_id": cid,
                 "current_limit": current_limit,
                 "requested_limit": nl,
@@ -1,14 +1,53 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
 import pandas as pd
 import numpy as np
-import re
+
+from .asset_mc import base_asset, correlation_matrix, portfolio_moments, simulate_sleeves
+
+# macro_scenarios.etkilenen_varlik → asset_performance temel sınıf adı
+SCENARIO_ASSET_ALIASES = {"Mevduat": "TL Mevduat"}
+# Sonuç önbelleği (LRU) kapasitesi; 0 → kapalı
+ROI_CACHE_SIZE = int(os.getenv("ROI_CACHE_SIZE", "256"))
+# Sonuçları etkileyen tablolar; sürümleri data_versions'tan okunur (migration 008)
+ROI_SOURCE_TABLES = ("asset_performance", "portfolio_mixes", "asset_correlations", "macro_scenarios")
+
+# log_tool ile aynı logger (common.mcp_decorators kurar)
+log = logging.getLogger("mcp_server")
+
+
+def _request_rng(*params) -> np.random.Generator:
+    """Aynı istek parametreleri → aynı rastgele akış (süreçten ve çağrı sırasından bağımsız)."""
+    digest = hashlib.sha256(json.dumps(params, ensure_ascii=False).encode("utf-8")).digest()
+    return np.random.default_rng(int.from_bytes(digest[:16], "little"))
 
 class ROISimulatorTool:
     """
     Uses historical asset performance data and predefined portfolio mixes to simulate
     potential future investment returns using a Monte Carlo simulation method.
+
+    Assets in a portfolio are simulated jointly with the correlations in 'asset_correlations'
+    (see tools/asset_mc.py); the Cholesky factor of each portfolio's correlation block is
+    computed once and cached.
+
+    Results are reproducible: each request draws from a Generator seeded by its own parameters.
+    They are kept in an LRU cache keyed by the parameters plus the source tables' data version;
+    when a source table changes the data is reloaded and the cache is dropped.
+
+    The lock only guards the version check and cache bookkeeping; simulations run outside it on
+    an immutable data snapshot (self._data), and concurrent identical requests share one in-flight
+    computation. A reload builds a new snapshot and swaps it in only once it is complete.
     """
 
-    def __init__(self, repo):
+    def __init__(self, repo, cache_size: int = ROI_CACHE_SIZE):
         """
         Initializes the tool by fetching data via the provided repository object.
 
@@ -18,15 +57,118 @@ class ROISimulatorTool:
         """
         print("Initializing ROISimulatorTool...")
         self.repo = repo
-        df_assets = self.repo.get_asset_performance_data()
-        df_portfolios = self.repo.get_portfolio_mixes_data()
+        self._lock = threading.Lock()          # sürüm/önbellek defteri; hesaplama kilit dışında
+        self._reload_lock = threading.Lock()   # aynı anda tek yeniden yükleme
+        self._cache = OrderedDict()
+        self._inflight = {}                    # key -> Future; aynı isteği hesaplayan tek thread
+        self._cache_size = cache_size
+        self._cache_stats = {"hits": 0, "misses": 0, "coalesced": 0, "reloads": 0}
+        self._data_version = self._read_data_version()
+        self._data = self._load_data()
+
+    def _load_data(self) -> "ROISimulatorTool":
+        """
+        Builds a fully prepared data snapshot from the repository. The snapshot is a separate
+        instance, so a failure half-way leaves the current one untouched; the caller swaps it in.
+        """
+        staged = object.__new__(type(self))
+        staged.repo = self.repo
+        df_assets = staged.repo.get_asset_performance_data()
+        df_portfolios = staged.repo.get_portfolio_mixes_data()
 
         if df_assets.empty or df_portfolios.empty:
             raise ValueError("DataFrames for assets and portfolios cannot be empty.")
             
-        self.df_assets = df_assets.set_index('varlik_sinifi')
-        self.df_portfolios = df_portfolios
-        self._prepare_portfolio_data()
+        staged.df_assets = df_assets.set_index('varlik_sinifi')
+        staged.df_portfolios = df_portfolios
+        staged._prepare_portfolio_data()
+        staged._prepare_correlations()
+        staged._prepare_scenarios()
+        staged._compile_portfolios()
+        return staged
+
+    # ----------------- veri sürümü / önbellek -----------------
+    def _read_data_version(self):
+        """Kaynak tabloların sürüm demeti; data_versions yoksa None (önbellek devre dışı)."""
+        try:
+            versions = self.repo.get_data_versions(ROI_SOURCE_TABLES)
+        except Exception:
+            return None
+        return tuple(versions.get(t, 0) for t in ROI_SOURCE_TABLES)
+
+    def _refresh_if_changed(self):
+        """(version, data) döner; sürüm değiştiyse yeni snapshot kilit dışında kurulur, sonra takas edilir."""
+        version = self._read_data_version()
+        with self._lock:
+            if version is None or version == self._data_version:
+                return version, self._data
+        with self._reload_lock:
+            with self._lock:
+                if version == self._data_version:  # başka thread bu sürümü zaten yükledi
+                    return version, self._data
+            data = self._load_data()  # hata → mevcut snapshot ve sürüm aynen kalır
+            with self._lock:
+                self._data, self._data_version = data, version
+                self._cache.clear()
+                self._cache_stats["reloads"] += 1
+        return version, data
+
+    def _cached(self, kind: str, compute, portfolio_name: str, monthly_investment: float, years: int,
+                num_simulations: int) -> dict:
+        params = (kind, portfolio_name, float(monthly_investment), int(years), int(num_simulations))
+        version, data = self._refresh_if_changed()
+        key = params + (version,)
+        cacheable = version is not None and self._cache_size > 0
+        pending = None
+        with self._lock:
+            result = self._cache.get(key) if cacheable else None
+            hit = result is not None
+            if hit:
+                self._cache.move_to_end(key)
+                self._cache_stats["hits"] += 1
+            elif cacheable and key in self._inflight:
+                pending = self._inflight[key]
+                self._cache_stats["coalesced"] += 1
+            else:
+                self._cache_stats["misses"] += 1
+                if cacheable:
+                    self._inflight[key] = Future()
+
+        if pending is not None:
+            result = pending.result()
+        elif not hit:
+            try:
+                result = compute(data, portfolio_name, monthly_investment, years, num_simulations,
+                                 _request_rng(*params))
+            except BaseException as e:
+                with self._lock:
+                    owned = self._inflight.pop(key, None)
+                if owned is not None:
+                    owned.set_exception(e)
+                raise
+            with self._lock:
+                if "error" not in result and cacheable and version == self._data_version:
+                    self._cache[key] = result
+                    while len(self._cache) > self._cache_size:
+                        self._cache.popitem(last=False)
+                owned = self._inflight.pop(key, None)
+            if owned is not None:
+                owned.set_result(result)
+
+        with self._lock:
+            stats = self.cache_stats()
+        log.info("roi_cache", extra={"event": "roi_cache", "service": "mcp-server", "tool": kind,
+                                     "meta": {"hit": hit, "coalesced": pending is not None, **stats}})
+        return copy.deepcopy(result)
+
+    def cache_stats(self) -> dict:
+        total = self._cache_stats["hits"] + self._cache_stats["misses"]
+        return {
+            **self._cache_stats,
+            "hit_rate": round(self._cache_stats["hits"] / total, 4) if total else 0.0,
+            "size": len(self._cache),
+            "data_version": list(self._data_version) if self._data_version is not None else None,
+        }
 
     def _parse_allocation_string(self, allocation_str: str) -> dict:
         allocations = {}
@@ -46,48 +188,163 @@ class ROISimulatorTool:
         self.df_portfolios['parsed_allocation'] = self.df_portfolios['varlik_dagilimi'].apply(self._parse_allocation_string)
         print("Portfolio data has been prepared and parsed.")
 
-    def run(self, portfolio_name: str, monthly_investment: float, years: int, num_simulations: int = 1000) -> dict:
-        portfolio_series = self.df_portfolios[self.df_portfolios['portfoy_adi'] == portfolio_name]
-        if portfolio_series.empty:
+    def _prepare_correlations(self):
+        """Builds the full asset correlation matrix once (per-portfolio factors: _compile_portfolios)."""
+        try:
+            df_corr = self.repo.get_asset_correlations_data()
+            pairs = list(df_corr[['asset_a', 'asset_b', 'correlation']].itertuples(index=False, name=None))
+        except Exception as e:
+            print(f"Asset correlations unavailable, assets treated as uncorrelated: {e}")
+            pairs = []
+        self._asset_names = list(self.df_assets.index)
+        self._asset_index = {name: i for i, name in enumerate(self._asset_names)}
+        self._corr = correlation_matrix(self._asset_names, pairs)
+
+    @staticmethod
+    def _parse_shock(value) -> float:
+        try:
+            return float(str(value).strip().replace('+', '')) / 100.0
+        except ValueError:
+            return 0.0
+
+    def _prepare_scenarios(self):
+        """
+        Compiles 'macro_scenarios' into (scenario x asset) shock matrices for annual return and volatility.
+        Shocks are percentage points; several rows for the same (scenario, asset) are averaged.
+        A shock on a base class ("Altın (Gram)") also applies to its variants ("Altın (Gram) - ETF").
+        """
+        try:
+            df = self.repo.get_macro_scenarios_data()
+        except Exception as e:
+            print(f"Macro scenarios unavailable: {e}")
+            df = pd.DataFrame(columns=['ekonomik_senaryo', 'etkilenen_varlik', 'getiri_etikisi', 'volatilite_etikisi'])
+
+        df = df.assign(
+            target=df['etkilenen_varlik'].map(lambda a: SCENARIO_ASSET_ALIASES.get(str(a).strip(), str(a).strip())),
+            ret=df['getiri_etikisi'].map(self._parse_shock),
+            vol=df['volatilite_etikisi'].map(self._parse_shock),
+        )
+        grouped = df.groupby(['ekonomik_senaryo', 'target'])[['ret', 'vol']].mean()
+
+        self._scenario_names = sorted(df['ekonomik_senaryo'].dropna().unique().tolist())
+        self._scenario_rows = df.groupby('ekonomik_senaryo').size().to_dict()
+        bases = np.array([base_asset(a) for a in self._asset_names])
+        S, n = len(self._scenario_names), len(self._asset_names)
+        self._scenario_return_shock = np.zeros((S, n))
+        self._scenario_vol_shock = np.zeros((S, n))
+        scenario_pos = {name: i for i, name in enumerate(self._scenario_names)}
+        for (scenario, target), shock in grouped.iterrows():
+            mask = bases == target
+            self._scenario_return_shock[scenario_pos[scenario], mask] = shock['ret']
+            self._scenario_vol_shock[scenario_pos[scenario], mask] = shock['vol']
+
+    def _compile_portfolios(self):
+        """
+        Compiles every portfolio once into NumPy arrays so a request only does array lookups:
+        weight matrix (portfolio x asset), per-asset annual/monthly return and volatility,
+        per-portfolio expected return, correlated volatility, risk shares and Cholesky factor,
+        plus a name -> row map. Rerun by _load_data only when the source tables change.
+        """
+        self._asset_returns = self.df_assets['ortalama_yillik_getiri'].to_numpy(dtype=float) / 100.0
+        self._asset_vols = self.df_assets['yillik_volatilite'].to_numpy(dtype=float) / 100.0
+        self._asset_monthly_returns = (1 + self._asset_returns)**(1/12) - 1
+        self._asset_monthly_vols = self._asset_vols / np.sqrt(12)
+
+        self._portfolio_index = {}
+        self._portfolio_errors = {}
+        self._portfolio_assets = []
+        rows = []
+        for name, asset_mix in zip(self.df_portfolios['portfoy_adi'], self.df_portfolios['parsed_allocation']):
+            if name in self._portfolio_index:
+                continue  # aynı ad tekrarlanırsa ilk satır geçerli
+            weights = np.zeros(len(self._asset_names))
+            missing = [asset for asset in asset_mix if asset not in self._asset_index]
+            if not asset_mix:
+                self._portfolio_errors[name] = f"Could not parse asset allocation for portfolio '{name}'."
+            elif missing:
+                self._portfolio_errors[name] = f"Asset '{missing[0]}' found in portfolio mix but not in asset performance data."
+            else:
+                for asset, percentage in asset_mix.items():
+                    weights[self._asset_index[asset]] = percentage / 100.0
+            self._portfolio_index[name] = len(rows)
+            # ayrıştırma sırası korunur (varlık katkıları bu sırayla raporlanır)
+            self._portfolio_assets.append(
+                np.array([self._asset_index[a] for a in asset_mix], dtype=np.intp)
+                if name not in self._portfolio_errors else np.array([], dtype=np.intp)
+            )
+            rows.append(weights)
+        self._weights = np.vstack(rows)
+
+        cov = np.outer(self._asset_vols, self._asset_vols) * self._corr
+        weighted_cov = self._weights @ cov
+        variance = (weighted_cov * self._weights).sum(axis=1)
+        self._portfolio_returns = self._weights @ self._asset_returns
+        self._portfolio_vols = np.sqrt(np.maximum(variance, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._risk_shares = np.where(variance[:, None] > 0, self._weights * weighted_cov / variance[:, None], 0.0)
+        self._portfolio_chol = [
+            np.linalg.cholesky(self._corr[np.ix_(idx, idx)]) if idx.size else None
+            for idx in self._portfolio_assets
+        ]
+
+        # stres testi: satır 0 baz senaryo, 1..S şoklanmış varlık parametreleri
+        self._stress_returns = np.maximum(
+            np.vstack([self._asset_returns, self._asset_returns + self._scenario_return_shock]), -0.99)
+        self._stress_vols = np.maximum(
+            np.vstack([self._asset_vols, self._asset_vols + self._scenario_vol_shock]), 0.0)
+        self._stress_monthly_returns = (1 + self._stress_returns)**(1/12) - 1
+        self._stress_monthly_vols = self._stress_vols / np.sqrt(12)
+
+    def _portfolio_inputs(self, portfolio_name: str):
+        """Returns (row, assets, idx, weights) from the compiled table, or an error dict."""
+        row = self._portfolio_index.get(portfolio_name)
+        if row is None:
             return {"error": f"Portfolio '{portfolio_name}' not found."}
-        
-        asset_mix = portfolio_series.iloc[0]['parsed_allocation']
-        if not asset_mix:
-             return {"error": f"Could not parse asset allocation for portfolio '{portfolio_name}'."}
+        error = self._portfolio_errors.get(portfolio_name)
+        if error:
+            return {"error": error}
+        idx = self._portfolio_assets[row]
+        return row, [self._asset_names[i] for i in idx], idx, self._weights[row, idx]
 
-        portfolio_return = 0
-        portfolio_volatility = 0
-        
-        for asset, percentage in asset_mix.items():
-            weight = percentage / 100.0
-            try:
-                asset_stats = self.df_assets.loc[asset]
-                portfolio_return += weight * (asset_stats['ortalama_yillik_getiri'] / 100.0)
-                portfolio_volatility += weight * (asset_stats['yillik_volatilite'] / 100.0)
-            except KeyError:
-                return {"error": f"Asset '{asset}' found in portfolio mix but not in asset performance data."}
-
-        monthly_return = (1 + portfolio_return)**(1/12) - 1
-        monthly_volatility = portfolio_volatility / np.sqrt(12)
-        
-        final_balances = []
+    def run(self, portfolio_name: str, monthly_investment: float, years: int, num_simulations: int = 1000) -> dict:
+        return self._cached("run", ROISimulatorTool._simulate, portfolio_name, monthly_investment, years, num_simulations)
+
+    def _simulate(self, portfolio_name: str, monthly_investment: float, years: int, num_simulations: int,
+                  rng: np.random.Generator) -> dict:
+        inputs = self._portfolio_inputs(portfolio_name)
+        if isinstance(inputs, dict):
+            return inputs
+        row, assets, idx, weights = inputs
+        annual_returns, annual_vols = self._asset_returns[idx], self._asset_vols[idx]
         num_months = years * 12
 
-        for _ in range(num_simulations):
-            current_balance = 0
-            for _ in range(num_months):
-                random_shock = np.random.normal(0, 1)
-                month_return = monthly_return + random_shock * monthly_volatility
-                
-                current_balance += monthly_investment
-                current_balance *= (1 + month_return)
-            
-            final_balances.append(current_balance)
-            
-        avg_final_balance = np.mean(final_balances)
-        percentile_25 = np.percentile(final_balances, 25)
-        percentile_75 = np.percentile(final_balances, 75)
-        
+        sleeves = simulate_sleeves(
+            self._asset_monthly_returns[idx], self._asset_monthly_vols[idx], self._portfolio_chol[row],
+            weights, monthly_investment, num_months, num_simulations, rng=rng,
+        )
+        final_balances = sleeves.sum(axis=1)
+
+        avg_final_balance = float(np.mean(final_balances))
+        percentile_25 = float(np.percentile(final_balances, 25))
+        percentile_75 = float(np.percentile(final_balances, 75))
+
+        expected_return = float(self._portfolio_returns[row])
+        portfolio_volatility = float(self._portfolio_vols[row])
+        risk_share = self._risk_shares[row, idx]
+        avg_sleeves = sleeves.mean(axis=0)
+        asset_contributions = [
+            {
+                "asset": asset,
+                "weight": round(float(weights[j]), 4),
+                "expected_annual_return": round(float(annual_returns[j]), 4),
+                "annual_volatility": round(float(annual_vols[j]), 4),
+                "average_final_value": round(float(avg_sleeves[j]), 2),
+                "outcome_share": round(float(avg_sleeves[j] / avg_final_balance), 4) if avg_final_balance else 0.0,
+                "risk_share": round(float(risk_share[j]), 4),
+            }
+            for j, asset in enumerate(assets)
+        ]
+
         return {
             "portfolio_name": portfolio_name,
             "years": years,
@@ -96,6 +353,10 @@ class ROISimulatorTool:
             "good_scenario_outcome (75th percentile)": round(percentile_75, 2),
             "bad_scenario_outcome (25th percentile)": round(percentile_25, 2),
             "num_simulations_run": num_simulations,
+            "expected_annual_return": round(expected_return, 4),
+            "annual_volatility": round(portfolio_volatility, 4),
+            "undiversified_volatility": round(float(weights @ annual_vols), 4),
+            "asset_contributions": asset_contributions,
             "ui_component": {
                 "type": "roi_simulation_card",
                 "portfolio_name": portfolio_name,
@@ -104,6 +365,104 @@ class ROISimulatorTool:
                 "average_outcome": round(avg_final_balance, 2),
                 "good_scenario_outcome": round(percentile_75, 2),
                 "bad_scenario_outcome": round(percentile_25, 2),
-                "num_simulations_run": num_simulations
+                "num_simulations_run": num_simulations,
+                "annual_volatility": round(portfolio_volatility, 4),
+                "asset_contributions": [
+                    {"asset": c["asset"], "weight": c["weight"], "outcome_share": c["outcome_share"],
+                     "risk_share": c["risk_share"]}
+                    for c in asset_contributions
+                ],
+            }
+        }
+
+    def stress_test(self, portfolio_name: str, monthly_investment: float, years: int, num_simulations: int = 1000) -> dict:
+        """
+        Applies every macro scenario's return/volatility shocks to the portfolio's assets and simulates
+        the baseline and all scenarios in one batch on the same random draws.
+        Scenarios are ranked by their change in average outcome versus the baseline (worst first).
+        """
+        return self._cached("stress_test", ROISimulatorTool._stress_test, portfolio_name, monthly_investment, years, num_simulations)
+
+    def _stress_test(self, portfolio_name: str, monthly_investment: float, years: int, num_simulations: int,
+                     rng: np.random.Generator) -> dict:
+        inputs = self._portfolio_inputs(portfolio_name)
+        if isinstance(inputs, dict):
+            return inputs
+        row, assets, idx, weights = inputs
+        annual_returns, annual_vols = self._asset_returns[idx], self._asset_vols[idx]
+        if not self._scenario_names:
+            return {"error": "No macro scenarios available."}
+
+        # satır 0: baz senaryo, 1..S: şoklanmış
+        shocked_returns = self._stress_returns[:, idx]
+        shocked_vols = self._stress_vols[:, idx]
+
+        num_months = years * 12
+        sleeves = simulate_sleeves(
+            self._stress_monthly_returns[:, idx], self._stress_monthly_vols[:, idx],
+            self._portfolio_chol[row],
+            weights, monthly_investment, num_months, num_simulations, rng=rng,
+        )
+        finals = sleeves.sum(axis=2)
+        averages = finals.mean(axis=1)
+        p25, p75 = np.percentile(finals, [25, 75], axis=1)
+        total_invested = monthly_investment * num_months
+        loss_probability = (finals < total_invested).mean(axis=1)
+        corr = self._corr[np.ix_(idx, idx)]
+
+        def summary(k: int) -> dict:
+            expected_return, volatility, _ = portfolio_moments(weights, shocked_returns[k], shocked_vols[k], corr)
+            return {
+                "average_outcome": round(float(averages[k]), 2),
+                "good_scenario_outcome": round(float(p75[k]), 2),
+                "bad_scenario_outcome": round(float(p25[k]), 2),
+                "loss_probability": round(float(loss_probability[k]), 4),
+                "expected_annual_return": round(expected_return, 4),
+                "annual_volatility": round(volatility, 4),
+            }
+
+        baseline = summary(0)
+        scenarios = []
+        for i, name in enumerate(self._scenario_names, start=1):
+            change = float(averages[i] - averages[0])
+            shocks = [
+                {"asset": asset,
+                 "return_shock": round(float(shocked_returns[i, j] - annual_returns[j]), 4),
+                 "volatility_shock": round(float(shocked_vols[i, j] - annual_vols[j]), 4)}
+                for j, asset in enumerate(assets)
+                if shocked_returns[i, j] != annual_returns[j] or shocked_vols[i, j] != annual_vols[j]
+            ]
+            scenarios.append({
+                "scenario": name,
+                **summary(i),
+                "change_vs_baseline": round(change, 2),
+                "change_pct": round(change / float(averages[0]), 4) if averages[0] else 0.0,
+                "source_rows": int(self._scenario_rows.get(name, 0)),
+                "asset_shocks": shocks,
+            })
+        scenarios.sort(key=lambda r: r["change_vs_baseline"])
+        for rank, row in enumerate(scenarios, start=1):
+            row["rank"] = rank
+
+        return {
+            "portfolio_name": portfolio_name,
+            "years": years,
+            "monthly_investment": monthly_investment,
+            "total_invested": round(total_invested, 2),
+            "num_simulations_run": num_simulations,
+            "baseline": baseline,
+            "scenarios": scenarios,
+            "ui_component": {
+                "type": "portfolio_stress_card",
+                "portfolio_name": portfolio_name,
+                "years": years,
+                "monthly_investment": monthly_investment,
+                "total_invested": round(total_invested, 2),
+                "baseline": baseline,
+                "scenarios": [
+                    {k: row[k] for k in ("rank", "scenario", "average_outcome", "change_vs_baseline",
+                                         "change_pct", "loss_probability")}
+                    for row in scenarios
+                ],
             }
         }
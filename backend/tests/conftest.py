@@ -0,0 +1,51 @@
+# backend/tests/conftest.py
+"""
+Ortak test ayarları.
+
+- Repo kökü (common/) ve backend/ (mcp_server, chat, app, config_local) import yoluna eklenir
+- Modüller import anında env okuduğundan env'ler her şeyden önce geçici dizine yönlendirilir;
+  dummy_bank.db hiçbir testte yerinde değiştirilmez, her test kendi kopyasıyla çalışır
+- ID_NODE sabitlenir: testler node kiralamadan id üretebilir
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+for _p in (REPO_DIR, BACKEND_DIR):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+SOURCE_DB = os.path.join(BACKEND_DIR, "dummy_bank.db")
+_SESSION_DIR = tempfile.mkdtemp(prefix="bank-tests-")
+_SESSION_DB = os.path.join(_SESSION_DIR, "bank.db")
+shutil.copyfile(SOURCE_DB, _SESSION_DB)
+
+os.environ.setdefault("ID_NODE", "1")
+os.environ.setdefault("LOG_DIR", os.path.join(_SESSION_DIR, "logs"))
+os.environ.setdefault("EXPORT_DIR", os.path.join(_SESSION_DIR, "exports"))
+os.environ.setdefault("BANK_DB_PATH", _SESSION_DB)
+os.environ.setdefault("CHAT_DB_PATH", os.path.join(_SESSION_DIR, "chat.db"))
+
+
+@pytest.fixture
+def bank_db(tmp_path) -> str:
+    """dummy_bank.db'nin migration'ları uygulanmış, teste özel kopyası."""
+    from mcp_server.data.migrations import run_migrations
+
+    path = str(tmp_path / "bank.db")
+    shutil.copyfile(SOURCE_DB, path)
+    run_migrations(path)
+    return path
+
+
+@pytest.fixture
+def raw_bank_db(tmp_path) -> str:
+    """Migration uygulanmamış kopya (migration testleri için)."""
+    path = str(tmp_path / "bank_raw.db")
+    shutil.copyfile(SOURCE_DB, path)
+    return path
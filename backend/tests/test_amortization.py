@@ -0,0 +1,298 @@
+# backend/tests/test_amortization.py
+from decimal import Decimal, localcontext
+
+import numpy as np
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools import calculation_tools as ct
+from mcp_server.tools.amortization import (AnnuitySchedule, annuity_payment, remaining_balance, rows_as_dicts,
+                                          simulate_events)
+from mcp_server.tools.calculation_tools import CalculationTools
+
+KEYS = ("installment", "interest", "principal", "remaining")
+CASES = [
+    (1_000.0, 0.0, 12),
+    (50_000.0, 0.0001, 36),
+    (123_456.78, 0.12, 1),
+    (123_456.78, 0.36, 120),
+    (250_000.0, 0.42, 360),
+    (2_500_000.0, 0.55, 480),
+    (100_000.0, 1.2, 480),  # eski döngüde satırların anapara kadar saptığı durum
+]
+
+
+def reference_schedule(principal, annual_rate, n):
+    """Ay ay dönen klasik plan, 60 haneli Decimal ile (yuvarlama hatası birikmez)."""
+    with localcontext() as ctx:
+        ctx.prec = 60
+        P, i = Decimal(repr(principal)), Decimal(repr(annual_rate)) / 12
+        A = P / n if i == 0 else P * i * (1 + i) ** n / ((1 + i) ** n - 1)
+        rows, rem = [], P
+        for k in range(1, n + 1):
+            interest = rem * i
+            principal_part, payment = A - interest, A
+            if k == n:
+                principal_part = rem
+                payment = rem + interest
+            rem = max(Decimal(0), rem - principal_part)
+            rows.append({"month": k, "installment": float(payment), "interest": float(interest),
+                         "principal": float(principal_part), "remaining": float(rem)})
+        return A, rows
+
+
+def _max_diff(rows, ref):
+    return max(abs(a[k] - round(b[k], 2)) for a, b in zip(rows, ref) for k in KEYS)
+
+
+@pytest.mark.parametrize("principal,rate,n", CASES)
+def test_full_schedule_matches_decimal_reference(principal, rate, n):
+    res = CalculationTools(None).loan_amortization_schedule(principal, rate, n)
+    A, ref = reference_schedule(principal, rate, n)
+
+    rows = res["schedule"]
+    assert [r["month"] for r in rows] == list(range(1, n + 1))
+    assert _max_diff(rows, ref) <= 0.01 + 1e-9  # yalnızca yarım kuruş yuvarlama eşitlikleri
+    assert rows[-1]["remaining"] == 0.0
+    assert res["summary"]["installment"] == round(float(A), 2)
+    assert res["summary"]["total_payment"] == pytest.approx(round(sum(r["installment"] for r in rows), 2), abs=1e-6)
+    assert res["summary"]["total_payment"] == pytest.approx(sum(round(r["installment"], 2) for r in ref), abs=1e-5)
+
+
+def test_closed_forms_broadcast_and_match_reference():
+    principal = np.array([c[0] for c in CASES])
+    i = np.array([c[1] / 12 for c in CASES])
+    n = np.array([c[2] for c in CASES])
+    k = n // 2
+    pay, bal = annuity_payment(principal, i, n), remaining_balance(principal, i, n, k)
+    for j, (p, rate, periods) in enumerate(CASES):
+        A, ref = reference_schedule(p, rate, periods)
+        assert pay[j] == pytest.approx(float(A), rel=1e-12)
+        expected = ref[k[j] - 1]["remaining"] if k[j] else p
+        assert bal[j] == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+
+@pytest.mark.parametrize("start,stop", [(1, 24), (100, 123), (470, 480), (475, 600)])
+def test_row_pages_equal_slices_of_full_schedule(start, stop):
+    sched = AnnuitySchedule(2_500_000.0, 0.55 / 12, 480)
+    names = {"period": "month", "payment": "installment", "interest": "interest",
+             "principal": "principal", "remaining": "remaining"}
+    full = rows_as_dicts(sched.rows(), names)
+    assert rows_as_dicts(sched.rows(start, stop), names) == full[start - 1:stop]
+
+
+def test_interest_compute_page_matches_reference(bank_db):
+    tools = CalculationTools(SQLiteRepository(bank_db))
+    res = tools.interest_compute("loan", 250_000, 360, "monthly", rate=0.42, term_unit="months",
+                                 schedule=True, schedule_limit=24)
+    _, ref = reference_schedule(250_000.0, 0.42, 360)
+    page = [{"installment": r["payment"], **{k: r[k] for k in KEYS[1:]}} for r in res["schedule"]]
+    assert len(page) == 24
+    assert _max_diff(page, ref[:24]) <= 0.01 + 1e-9
+
+
+# ----------------- simulate_events / loan_prepayment_simulate -----------------
+def _annuity(B, i, n):
+    return B / n if i == 0 else B * i / (1 - (1 + i) ** -n)
+
+
+def _payments_needed(B, i, A):
+    """Taksit A ile B'yi kapatan ödeme sayısı, ay ay sayılarak."""
+    k = 0
+    while True:
+        k += 1
+        if B * (1 + i) <= A * (1 + 1e-12):
+            return k
+        B = B * (1 + i) - A
+
+
+def brute_force(principal, rate, n, events):
+    """Ay ay döngü: her ay faiz + taksit, olaylar o ayın taksitinden sonra (simulate_events birimleriyle)."""
+    B, i, left = float(principal), float(rate), int(n)
+    A = _annuity(B, i, left)
+    paid = interest = 0.0
+    month, rows, skipped = 0, [], []
+    pending = sorted(events, key=lambda e: e[0])
+
+    def apply(kind, value, reduce_term):
+        nonlocal B, i, A, left, paid
+        if kind == "prepayment":
+            extra = min(value, B)
+            B -= extra
+            paid += extra
+            if B <= 1e-9:
+                B, left = 0.0, 0
+            elif reduce_term:
+                left = _payments_needed(B, i, A)
+            else:
+                A = _annuity(B, i, left)
+        elif kind == "rate_change":
+            i = value
+            A = _annuity(B, i, left)
+        else:
+            left = int(value)
+            A = _annuity(B, i, left)
+
+    while True:
+        while pending and pending[0][0] == month:
+            _, kind, value, reduce_term = pending.pop(0)
+            if left <= 0:
+                skipped.append(True)
+                continue
+            skipped.append(False)
+            apply(kind, value, reduce_term)
+        if left <= 0:
+            break
+        month += 1
+        int_m = B * i
+        pay = B + int_m if left == 1 else A
+        B = max(0.0, B - (pay - int_m))
+        paid += pay
+        interest += int_m
+        left -= 1
+        rows.append({"period": month, "payment": pay, "interest": int_m, "principal": pay - int_m,
+                     "remaining": B})
+    skipped += [True] * len(pending)
+    return {"term": month, "installment": A, "total_payment": paid, "total_interest": interest,
+            "rows": rows, "skipped": skipped}
+
+
+def _assert_matches_brute_force(principal, rate, n, events, row_start=1, row_limit=0):
+    sim = simulate_events(principal, rate, n, events, row_start=row_start, row_limit=row_limit)
+    ref = brute_force(principal, rate, n, events)
+    assert sim["term"] == ref["term"]
+    assert sim["installment"] == pytest.approx(ref["installment"], rel=1e-9)
+    assert sim["total_payment"] == pytest.approx(ref["total_payment"], rel=1e-9, abs=1e-6)
+    assert sim["total_interest"] == pytest.approx(ref["total_interest"], rel=1e-8, abs=1e-6)
+    assert [a["skipped"] for a in sim["applied"]] == ref["skipped"]
+    if row_limit:
+        window = ref["rows"][row_start - 1:row_start - 1 + row_limit]
+        assert sim["rows"]["period"].tolist() == [r["period"] for r in window]
+        for key in ("payment", "interest", "principal", "remaining"):
+            assert sim["rows"][key].tolist() == pytest.approx([r[key] for r in window], rel=1e-9, abs=1e-6)
+    return sim, ref
+
+
+def test_no_events_equals_plain_annuity():
+    sim, ref = _assert_matches_brute_force(250_000.0, 0.42 / 12, 360, [], row_limit=360)
+    sched = AnnuitySchedule(250_000.0, 0.42 / 12, 360)
+    assert sim["term"] == 360 and sim["installment"] == pytest.approx(sched.installment, rel=1e-12)
+    # AnnuitySchedule satır satır yuvarlar: en fazla yarım kuruş × taksit sayısı fark
+    assert sim["total_payment"] == pytest.approx(sched.total_payment(), abs=0.005 * 360)
+
+
+def test_reduce_term_prepayment_ends_with_partial_installment():
+    events = [(12, "prepayment", 30_000.0, True)]
+    sim, ref = _assert_matches_brute_force(100_000.0, 0.36 / 12, 60, events, row_start=13, row_limit=60)
+    assert sim["term"] < 60
+    applied = sim["applied"][0]
+    assert applied["prepaid"] == 30_000.0 and applied["installment_after"] == pytest.approx(ref["installment"])
+    assert applied["remaining_periods"] == sim["term"] - 12
+    # son taksit kısmi: kalan + faiz, taksitten küçük ve plan sıfırda kapanır
+    last = ref["rows"][-1]
+    assert 0 < last["payment"] < ref["installment"]
+    assert sim["rows"]["payment"][-1] == pytest.approx(last["payment"], rel=1e-9)
+    assert sim["rows"]["remaining"][-1] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_reduce_installment_prepayment_keeps_term():
+    events = [(24, "prepayment", 20_000.0, False)]
+    sim, ref = _assert_matches_brute_force(120_000.0, 0.30 / 12, 48, events, row_start=20, row_limit=10)
+    base = simulate_events(120_000.0, 0.30 / 12, 48)
+    assert sim["term"] == 48 and sim["installment"] < base["installment"]
+    assert sim["applied"][0]["remaining_periods"] == 24
+
+
+@pytest.mark.parametrize("events", [
+    [(6, "rate_change", 0.24 / 12, False)],
+    [(6, "rate_change", 0.0, False), (30, "rate_change", 0.6 / 12, False)],
+    [(10, "term_change", 50, False)],
+    [(10, "term_change", 5, False), (12, "rate_change", 0.12 / 12, False)],
+    [(3, "prepayment", 5_000.0, True), (3, "rate_change", 0.5 / 12, False), (20, "term_change", 12, False),
+     (25, "prepayment", 1_000.0, False)],
+])
+def test_rate_and_term_changes(events):
+    _assert_matches_brute_force(80_000.0, 0.36 / 12, 36, events, row_start=1, row_limit=200)
+
+
+def test_zero_rate_with_events():
+    events = [(4, "prepayment", 1_500.0, True), (8, "prepayment", 700.0, False)]
+    _assert_matches_brute_force(12_000.0, 0.0, 24, events, row_start=1, row_limit=24)
+
+
+def test_events_after_payoff_are_skipped():
+    events = [(10, "prepayment", 10_000_000.0, True), (11, "rate_change", 0.1, False), (40, "term_change", 5, False)]
+    sim, ref = _assert_matches_brute_force(50_000.0, 0.3 / 12, 48, events)
+    assert sim["term"] == 10
+    assert [a["skipped"] for a in sim["applied"]] == [False, True, True]
+    assert sim["applied"][0]["prepaid"] == pytest.approx(sim["applied"][0]["balance_before"])
+    # vade kısalınca orijinal vadeden önceki olaylar da atlanır
+    shortened = [(6, "prepayment", 40_000.0, True), (40, "prepayment", 100.0, True)]
+    sim, _ = _assert_matches_brute_force(50_000.0, 0.3 / 12, 48, shortened)
+    assert sim["term"] < 40 and sim["applied"][1] == {"month": 40, "type": "prepayment", "skipped": True}
+
+
+def test_unknown_event_type_raises():
+    with pytest.raises(ValueError, match="unknown event type: fee"):
+        simulate_events(10_000.0, 0.01, 12, [(3, "fee", 1.0, False)])
+
+
+def test_long_run_with_many_events_matches_brute_force():
+    rnd = np.random.default_rng(7)
+    kinds = ["prepayment", "rate_change", "term_change"]
+    events = []
+    for month in sorted(rnd.integers(1, 480, 100).tolist()):
+        kind = kinds[int(rnd.integers(0, 3))]
+        value = {"prepayment": float(rnd.uniform(100, 5_000)), "rate_change": float(rnd.uniform(0, 0.6)) / 12,
+                 "term_change": int(rnd.integers(100, 480))}[kind]
+        events.append((month, kind, value, bool(rnd.integers(0, 2))))
+    _assert_matches_brute_force(2_500_000.0, 0.42 / 12, 480, events, row_start=200, row_limit=50)
+
+
+def test_prepayment_tool_summary():
+    tools = CalculationTools(None)
+    events = [{"month": 12, "type": "prepayment", "amount": 30_000, "mode": "reduce_term"},
+              {"month": 24, "type": "rate_change", "annual_rate": 0.24}]
+    res = tools.loan_prepayment_simulate(100_000, 60, events, rate=0.36, schedule_limit=5)
+    ref = brute_force(100_000, 0.03, 60, [(12, "prepayment", 30_000.0, True), (24, "rate_change", 0.02, False)])
+    base = brute_force(100_000, 0.03, 60, [])
+    assert res["base"]["term_months"] == 60 and res["scenario"]["term_months"] == ref["term"]
+    assert res["scenario"]["total_payment"] == pytest.approx(round(ref["total_payment"], 2), abs=0.011)
+    assert res["scenario"]["total_prepaid"] == 30_000.0
+    assert res["interest_saved"] == pytest.approx(base["total_interest"] - ref["total_interest"], abs=0.011)
+    assert res["term_reduction_months"] == 60 - ref["term"]
+    assert [r["month"] for r in res["schedule"]] == [13, 14, 15, 16, 17]
+    assert [e["type"] for e in res["events"]] == ["prepayment", "rate_change"]
+    assert res["ui_component"]["type"] == "loan_simulation_card" and res["ui_component"]["event_count"] == 2
+
+
+@pytest.mark.parametrize("kwargs,error", [
+    (dict(principal=0), "principal must be > 0"),
+    (dict(term=0), "term (months) must be >= 1"),
+    (dict(rate=-0.1), "annual rate must be >= 0"),
+    (dict(events=[]), "events must be a non-empty list"),
+    (dict(events={"month": 1}), "events must be a non-empty list"),
+    (dict(events=["x"]), "events[0] must be an object"),
+    (dict(events=[{"month": 1, "type": "fee"}]), "events[0].type must be one of prepayment, rate_change, term_change"),
+    (dict(events=[{"month": "x", "type": "prepayment", "amount": 1}]), "events[0].month must be an integer"),
+    (dict(events=[{"month": 0, "type": "prepayment", "amount": 1}]), "events[0].month must be between 1 and 12"),
+    (dict(events=[{"month": 13, "type": "prepayment", "amount": 1}]), "events[0].month must be between 1 and 12"),
+    (dict(events=[{"month": 2, "type": "prepayment", "amount": 0}]), "events[0]: invalid value for prepayment"),
+    (dict(events=[{"month": 2, "type": "prepayment"}]), "events[0]: invalid value for prepayment"),
+    (dict(events=[{"month": 2, "type": "rate_change", "annual_rate": -0.1}]),
+     "events[0]: invalid value for rate_change"),
+    (dict(events=[{"month": 2, "type": "term_change", "term": 0}]), "events[0]: invalid value for term_change"),
+    (dict(events=[{"month": 2, "type": "prepayment", "amount": 5, "mode": "both"}]),
+     "events[0].mode must be reduce_term or reduce_installment"),
+])
+def test_prepayment_tool_rejects_invalid_input(kwargs, error):
+    args = dict(principal=10_000, term=12, events=[{"month": 2, "type": "prepayment", "amount": 500}], rate=0.3)
+    assert CalculationTools(None).loan_prepayment_simulate(**{**args, **kwargs}) == {"error": error}
+
+
+def test_prepayment_tool_event_limit(monkeypatch):
+    monkeypatch.setattr(ct, "LOAN_SIM_MAX_EVENTS", 3)
+    events = [{"month": m, "type": "prepayment", "amount": 100} for m in (1, 2, 3, 4)]
+    assert CalculationTools(None).loan_prepayment_simulate(10_000, 12, events, rate=0.3) == \
+        {"error": "too many events (max 3)"}
+    assert "error" not in CalculationTools(None).loan_prepayment_simulate(10_000, 12, events[:3], rate=0.3)
@@ -0,0 +1,90 @@
+# backend/tests/test_asset_mc.py
+import numpy as np
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.asset_mc import (SAME_CLASS_CORRELATION, correlation_matrix, nearest_correlation,
+                                       portfolio_moments, simulate_sleeves)
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+
+@pytest.fixture
+def roi(bank_db):
+    return ROISimulatorTool(SQLiteRepository(bank_db))
+
+
+def _sleeve_expectation(weights, monthly_return, investment, months):
+    """E[V_a] = w_a·c·Σ_{j=1..T} (1+m_a)^j (aylık getiriler bağımsız, E[1+r] = 1+m)."""
+    growth = (1 + np.asarray(monthly_return))[:, None] ** np.arange(1, months + 1)
+    return investment * np.asarray(weights) * growth.sum(axis=1)
+
+
+def test_correlation_lookup_priority_and_fallbacks():
+    assets = ["A", "A - ETF", "B", "B - Fon", "C"]
+    C = correlation_matrix(assets, [("A", "B", 0.4), ("A - ETF", "B - Fon", 0.35)])
+    assert np.allclose(C, C.T) and np.allclose(np.diag(C), 1.0)
+    assert C[0, 1] == SAME_CLASS_CORRELATION   # aynı temel sınıf
+    assert C[0, 2] == 0.4                      # doğrudan çift
+    assert C[0, 3] == 0.4                      # temel sınıf çiftine düşer
+    assert C[1, 3] == 0.35                     # varyant çifti temel sınıftan önce gelir
+    assert C[0, 4] == 0.0                      # tablo satırı yok
+    assert np.linalg.eigvalsh(C).min() > 0
+
+
+def test_inconsistent_correlations_are_clipped_to_positive_definite():
+    C = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    assert np.linalg.eigvalsh(C).min() < 0
+    fixed = nearest_correlation(C)
+    assert np.linalg.eigvalsh(fixed).min() > 0
+    assert np.allclose(np.diag(fixed), 1.0) and np.allclose(fixed, fixed.T)
+    np.linalg.cholesky(fixed)
+
+
+def test_moments_match_explicit_covariance():
+    w = np.array([0.5, 0.3, 0.2])
+    vol = np.array([0.3, 0.2, 0.05])
+    C = np.array([[1.0, 0.45, 0.0], [0.45, 1.0, 0.1], [0.0, 0.1, 1.0]])
+    mean, sigma, share = portfolio_moments(w, [0.25, 0.18, 0.4], vol, C)
+    cov = np.diag(vol) @ C @ np.diag(vol)
+    assert mean == pytest.approx(w @ [0.25, 0.18, 0.4])
+    assert sigma == pytest.approx(np.sqrt(w @ cov @ w))
+    assert share.sum() == pytest.approx(1.0)
+
+
+def test_simulated_sleeves_match_analytic_mean_and_correlation():
+    C = np.array([[1.0, 0.6, -0.3], [0.6, 1.0, 0.0], [-0.3, 0.0, 1.0]])
+    w, m, s = np.array([0.5, 0.3, 0.2]), np.array([0.01, 0.015, 0.003]), np.array([0.05, 0.08, 0.01])
+    rng = np.random.default_rng(7)
+    sleeves = simulate_sleeves(m, s, np.linalg.cholesky(C), w, 1000.0, 60, 20_000, rng=rng)
+    assert sleeves.shape == (20_000, 3)
+    assert sleeves.mean(axis=0) == pytest.approx(_sleeve_expectation(w, m, 1000.0, 60), rel=0.01)
+
+    # tek ay: dilim = w·c·(1 + m + s·z) → dilimler arası korelasyon = C
+    one = simulate_sleeves(m, s, np.linalg.cholesky(C), w, 1000.0, 1, 200_000, rng=rng)
+    assert np.corrcoef(one.T) == pytest.approx(C, abs=0.01)
+
+
+def test_run_reports_diversified_volatility_and_unbiased_mean(roi):
+    res = roi.run("Dengeli Portföy", 1000, 10, num_simulations=20_000)
+    contrib = res["asset_contributions"]
+    assets = [c["asset"] for c in contrib]
+    w = np.array([c["weight"] for c in contrib])
+    vol = np.array([c["annual_volatility"] for c in contrib])
+    idx = [roi._data._asset_index[a] for a in assets]
+    cov = np.outer(vol, vol) * roi._data._corr[np.ix_(idx, idx)]
+
+    assert res["annual_volatility"] == pytest.approx(np.sqrt(w @ cov @ w), abs=1e-4)
+    assert res["annual_volatility"] < res["undiversified_volatility"] == pytest.approx(w @ vol, abs=1e-4)
+    assert sum(c["risk_share"] for c in contrib) == pytest.approx(1.0, abs=1e-3)
+    assert sum(c["outcome_share"] for c in contrib) == pytest.approx(1.0, abs=1e-3)
+
+    monthly = (1 + np.array([c["expected_annual_return"] for c in contrib])) ** (1 / 12) - 1
+    expected = _sleeve_expectation(w, monthly, 1000, 120)
+    assert res["average_outcome"] == pytest.approx(expected.sum(), rel=0.01)
+    assert [c["average_final_value"] for c in contrib] == pytest.approx(expected, rel=0.02)
+    assert res["bad_scenario_outcome (25th percentile)"] < res["average_outcome"] < \
+        res["good_scenario_outcome (75th percentile)"]
+
+
+def test_unknown_portfolio_is_an_error(roi):
+    assert roi.run("Yok", 1000, 1) == {"error": "Portfolio 'Yok' not found."}
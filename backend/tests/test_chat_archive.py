@@ -0,0 +1,71 @@
+# backend/tests/test_chat_archive.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import auth
+from chat import chat_history as ch
+
+OLD = "2020-01-01T00:00:00+00:00"
+
+
+@pytest.fixture
+def chat_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(ch, "DB_PATH", str(tmp_path / "chat.db"))
+    ch.ensure_schema()
+    return ch.DB_PATH
+
+
+def _seed_old_chat(chat_id="c1", user_id="1", texts=("merhaba", "bakiye?")):
+    ch.ensure_session_exists_sync(chat_id, user_id, "eski sohbet", timestamp=OLD)
+    for t in texts:
+        ch.save_message_sync(user_id, chat_id, t, "user", timestamp=OLD)
+
+
+def test_inactive_chat_is_archived_and_read_without_rehydrating(chat_db):
+    _seed_old_chat()
+    report = ch.archive_inactive_chats_sync()
+    assert report["chats"] == 1 and report["messages"] == 2
+
+    msgs = ch.get_messages("1", "c1")
+    assert [m["text"] for m in msgs] == ["merhaba", "bakiye?"]
+    # okuma sohbeti sıcak tabloya geri taşımaz
+    assert ch.archive_report_sync()["hot_messages"] == 0
+    assert ch.archive_report_sync()["archived_chats"] == 1
+
+
+def test_new_messages_on_archived_chat_are_merged_by_next_run(chat_db):
+    _seed_old_chat()
+    ch.archive_inactive_chats_sync()
+    ch.save_message_sync("1", "c1", "yeni", "user", timestamp="2020-01-02T00:00:00+00:00")
+
+    assert [m["text"] for m in ch.get_messages("1", "c1")] == ["merhaba", "bakiye?", "yeni"]
+    ch.archive_inactive_chats_sync()
+    rep = ch.archive_report_sync()
+    assert rep["hot_messages"] == 0 and rep["archived_chats"] == 1 and rep["archived_messages"] == 3
+    assert [m["text"] for m in ch.get_messages("1", "c1")] == ["merhaba", "bakiye?", "yeni"]
+
+
+def test_archive_days_cannot_go_below_configured_minimum(chat_db):
+    ch.ensure_session_exists_sync("fresh", "1", "yeni sohbet")
+    ch.save_message_sync("1", "fresh", "bugün", "user")
+    assert ch.archive_inactive_chats_sync(days=0)["chats"] == 0
+    assert ch.archive_report_sync()["hot_messages"] == 1
+
+
+def test_archive_endpoints_require_admin(chat_db, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_CUSTOMER_IDS", {1})
+    api = FastAPI()
+    api.include_router(ch.router)
+    client = TestClient(api)
+    admin = {"Authorization": f"Bearer {auth.create_access_token({'sub': '1'})}"}
+    other = {"Authorization": f"Bearer {auth.create_access_token({'sub': '2'})}"}
+
+    for method, url in (("post", "/chat/archive/run"), ("get", "/chat/archive/report"),
+                        ("get", "/chat/storage/report")):
+        assert getattr(client, method)(url).status_code == 401
+        assert getattr(client, method)(url, headers=other).status_code == 403
+        assert getattr(client, method)(url, headers=admin).status_code == 200
+
+    assert client.post("/chat/archive/run?days=1", headers=admin).status_code == 422
+    assert client.post("/chat/archive/run?max_chats=100000", headers=admin).status_code == 422
@@ -0,0 +1,108 @@
+# backend/tests/test_chat_session_stats.py
+import sqlite3
+
+import pytest
+
+from chat import chat_history as ch
+
+OLD = "2020-01-01T00:00:00+00:00"
+CARD = '{"type": "balance_card", "balance": 1500.5, "note": "güncel bakiye"}'
+
+
+@pytest.fixture
+def chat_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(ch, "DB_PATH", str(tmp_path / "chat.db"))
+    ch.ensure_schema()
+    return ch.DB_PATH
+
+
+def _seed(chat_id, user_id, messages, ts=None):
+    ch.ensure_session_exists_sync(chat_id, user_id, "sohbet", timestamp=ts)
+    for text, sender, ui in messages:
+        ch.save_message_sync(user_id, chat_id, text, sender, ui_component_json=ui, timestamp=ts)
+
+
+def _session(user_id, chat_id):
+    return next(s for s in ch.get_user_sessions(user_id) if s["chat_id"] == chat_id)
+
+
+def _expected_bytes(messages):
+    return sum(len(t.encode("utf-8")) + len((ui or "").encode("utf-8")) for t, _, ui in messages)
+
+
+def _direct_counts(db_path):
+    """Özet tablosu olmadan: sıcak mesajlar COUNT(*) + arşivdeki message_count."""
+    con = sqlite3.connect(db_path)
+    try:
+        counts = dict(((c, u), n) for c, u, n in con.execute(
+            "SELECT cs.chat_id, cs.user_id, "
+            "  (SELECT COUNT(*) FROM messages m WHERE m.chat_id = cs.chat_id AND m.user_id = cs.user_id) "
+            "+ COALESCE((SELECT a.message_count FROM chat_archive a "
+            "            WHERE a.chat_id = cs.chat_id AND a.user_id = cs.user_id), 0) "
+            "FROM chat_sessions cs"))
+        stats = dict(((c, u), n) for c, u, n in con.execute(
+            "SELECT chat_id, user_id, message_count FROM chat_session_stats"))
+        return counts, stats
+    finally:
+        con.close()
+
+
+MESSAGES = [("merhaba", "user", None), ("Bakiyeniz: 1.500,50 TL — güncel", "bot", CARD), ("teşekkürler", "user", None)]
+
+
+def test_stats_follow_inserts(chat_db):
+    _seed("c1", "1", MESSAGES)
+    s = _session("1", "c1")
+    assert s["message_count"] == 3
+    assert s["last_sender"] == "user" and s["last_message_preview"] == "teşekkürler"
+    assert s["bytes_used"] == _expected_bytes(MESSAGES)
+
+    long_text = "ş" * (ch.STATS_PREVIEW_CHARS + 50)
+    ch.save_message_sync("1", "c1", long_text, "bot")
+    s = _session("1", "c1")
+    assert s["message_count"] == 4 and s["last_sender"] == "bot"
+    assert s["last_message_preview"] == long_text[:ch.STATS_PREVIEW_CHARS]
+    assert s["last_message_id"] == ch.get_messages("1", "c1")[-1]["message_id"]
+
+
+def test_stats_survive_archive_and_are_dropped_on_delete(chat_db):
+    _seed("old", "1", MESSAGES, ts=OLD)
+    _seed("new", "1", MESSAGES[:1])
+    before = _session("1", "old")
+    assert ch.archive_inactive_chats_sync()["chats"] == 1
+    assert _session("1", "old") == before
+
+    ch.save_message_sync("1", "old", "geri döndüm", "user", timestamp=OLD)
+    assert _session("1", "old")["message_count"] == 4
+    counts, stats = _direct_counts(chat_db)
+    assert stats == counts
+
+    ch.delete_session("old", user_id="1")
+    counts, stats = _direct_counts(chat_db)
+    assert stats == counts == {("new", "1"): 1}
+    assert [s["chat_id"] for s in ch.get_user_sessions("1")] == ["new"]
+
+
+def test_backfill_matches_direct_counts(chat_db):
+    _seed("c1", "1", MESSAGES)
+    _seed("c2", "1", MESSAGES[:2])
+    _seed("c3", "2", MESSAGES * 3)
+    _seed("old", "2", MESSAGES, ts=OLD)
+    ch.archive_inactive_chats_sync()
+    ch.save_message_sync("2", "old", "arşivden sonra", "user", timestamp=OLD)
+    ch.ensure_session_exists_sync("empty", "2", "boş")
+    incremental = {(s["chat_id"], uid): s for uid in ("1", "2") for s in ch.get_user_sessions(uid)}
+
+    # özet tablosu olmayan eski kurulum: başlangıçta mevcut mesajlardan yeniden üretilir
+    con = sqlite3.connect(chat_db)
+    with con:
+        con.execute("DELETE FROM chat_session_stats")
+    con.close()
+    ch.ensure_schema()
+
+    counts, stats = _direct_counts(chat_db)
+    assert stats == counts
+    assert counts[("c3", "2")] == 9 and counts[("old", "2")] == 4 and counts[("empty", "2")] == 0
+    rebuilt = {(s["chat_id"], uid): s for uid in ("1", "2") for s in ch.get_user_sessions(uid)}
+    assert rebuilt == incremental
+    assert rebuilt[("c3", "2")]["bytes_used"] == _expected_bytes(MESSAGES * 3)
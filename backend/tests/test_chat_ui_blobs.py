@@ -0,0 +1,105 @@
+# backend/tests/test_chat_ui_blobs.py
+import sqlite3
+
+import pytest
+
+from chat import chat_history as ch
+
+OLD = "2020-01-01T00:00:00+00:00"
+CARD = '{"type": "balance_card", "account_id": 1, "balance": 1500.5, "currency": "TRY"}'
+OTHER = '{"type": "card_info_card", "card_id": 7, "limit": 20000}'
+
+
+@pytest.fixture
+def chat_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(ch, "DB_PATH", str(tmp_path / "chat.db"))
+    ch.ensure_schema()
+    return ch.DB_PATH
+
+
+def _blobs(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        return dict(con.execute("SELECT hash, ref_count FROM ui_blobs"))
+    finally:
+        con.close()
+
+
+def test_identical_payloads_share_one_blob(chat_db):
+    ch.ensure_session_exists_sync("c1", "1", "sohbet")
+    ch.ensure_session_exists_sync("c2", "2", "sohbet")
+    for _ in range(3):
+        ch.save_message_sync("1", "c1", "bakiye", "bot", ui_component_json=CARD)
+    ch.save_message_sync("2", "c2", "bakiye", "bot", ui_component_json=CARD)
+    ch.save_message_sync("2", "c2", "kart", "bot", ui_component_json=OTHER)
+    ch.save_message_sync("2", "c2", "düz metin", "user")
+
+    assert _blobs(chat_db) == {ch._ui_hash(CARD): 4, ch._ui_hash(OTHER): 1}
+    con = sqlite3.connect(chat_db)
+    assert con.execute("SELECT COUNT(*) FROM messages WHERE ui_component IS NOT NULL").fetchone()[0] == 0
+    con.close()
+    assert [m["ui_component"] for m in ch.get_messages("2", "c2")] == [CARD, OTHER, None]
+
+    rep = ch.ui_blob_report_sync()
+    assert rep["blobs"] == 2 and rep["references"] == 5
+    assert rep["logical_bytes"] == 4 * len(CARD.encode()) + len(OTHER.encode())
+
+
+def test_delete_decrements_and_removes_unreferenced_blobs(chat_db):
+    ch.ensure_session_exists_sync("c1", "1", "sohbet")
+    ch.ensure_session_exists_sync("c2", "1", "sohbet")
+    ch.save_message_sync("1", "c1", "a", "bot", ui_component_json=CARD)
+    ch.save_message_sync("1", "c1", "b", "bot", ui_component_json=CARD)
+    ch.save_message_sync("1", "c1", "c", "bot", ui_component_json=OTHER)
+    ch.save_message_sync("1", "c2", "d", "bot", ui_component_json=CARD)
+
+    ch.delete_session("c1", user_id="1")
+    assert _blobs(chat_db) == {ch._ui_hash(CARD): 1}
+    assert [m["ui_component"] for m in ch.get_messages("1", "c2")] == [CARD]
+
+    ch.delete_session("c2", user_id="1")
+    assert _blobs(chat_db) == {}
+
+
+def test_delete_releases_references_held_by_the_archive(chat_db):
+    ch.ensure_session_exists_sync("old", "1", "eski", timestamp=OLD)
+    ch.save_message_sync("1", "old", "a", "bot", ui_component_json=CARD, timestamp=OLD)
+    ch.archive_inactive_chats_sync()
+    # arşivden sonra gelen mesaj sıcak tabloda, aynı blob'a ikinci referans
+    ch.save_message_sync("1", "old", "b", "bot", ui_component_json=CARD)
+    assert _blobs(chat_db) == {ch._ui_hash(CARD): 2}
+    assert [m["ui_component"] for m in ch.get_messages("1", "old")] == [CARD, CARD]
+
+    ch.delete_session("old", user_id="1")
+    assert _blobs(chat_db) == {}
+
+
+def test_inline_ui_components_are_migrated_on_startup(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE messages (
+            message_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, chat_id TEXT NOT NULL,
+            text TEXT NOT NULL, sender TEXT NOT NULL, ui_component TEXT, timestamp TEXT);
+        CREATE TABLE chat_sessions (chat_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, title TEXT NOT NULL,
+            created_at TEXT, updated_at TEXT);
+    """)
+    con.execute("INSERT INTO chat_sessions VALUES ('c1', '1', 'eski', ?, ?)", (OLD, OLD))
+    con.executemany("INSERT INTO messages (user_id, chat_id, text, sender, ui_component, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                    [("1", "c1", "a", "bot", CARD, OLD), ("1", "c1", "b", "bot", CARD, OLD),
+                     ("1", "c1", "c", "bot", OTHER, OLD), ("1", "c1", "d", "user", None, OLD)])
+    con.commit()
+    con.close()
+
+    monkeypatch.setattr(ch, "DB_PATH", path)
+    ch.ensure_schema()
+    assert _blobs(path) == {ch._ui_hash(CARD): 2, ch._ui_hash(OTHER): 1}
+    con = sqlite3.connect(path)
+    assert con.execute("SELECT COUNT(*) FROM messages WHERE ui_component IS NOT NULL").fetchone()[0] == 0
+    assert con.execute("SELECT COUNT(*) FROM messages WHERE ui_ref IS NOT NULL").fetchone()[0] == 3
+    con.close()
+    assert [m["ui_component"] for m in ch.get_messages("1", "c1")] == [CARD, CARD, OTHER, None]
+
+    # ikinci açılış hiçbir şeyi yeniden taşımaz
+    ch.ensure_schema()
+    assert _blobs(path) == {ch._ui_hash(CARD): 2, ch._ui_hash(OTHER): 1}
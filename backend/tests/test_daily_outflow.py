@@ -0,0 +1,100 @@
+# backend/tests/test_daily_outflow.py
+import sqlite3
+import threading
+
+import pytest
+
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+from mcp_server.tools.payment_tools import DAILY_LIMIT, PaymentService, today_str
+
+CUSTOMER = 1
+ACC_A, ACC_B = 19, 21  # müşteri 1'in aktif TRY hesapları
+
+
+@pytest.fixture
+def repo(bank_db):
+    return SQLitePaymentRepository(bank_db)
+
+
+def _outflow_rows(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        return sorted(con.execute("SELECT customer_id, day, ROUND(total, 2), count FROM daily_outflow"))
+    finally:
+        con.close()
+
+
+def _posted_sum(db_path, customer_id, day):
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute(
+            "SELECT COALESCE(SUM(amount), 0) FROM payments WHERE status='posted' "
+            "AND from_account IN (SELECT account_id FROM accounts WHERE customer_id=?) "
+            "AND substr(created_at, 1, 10)=?",
+            (customer_id, day),
+        ).fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_aggregate_tracks_postings_and_matches_rebuild(repo):
+    today = repo._now()[:10]
+    before = repo.get_daily_out_total(CUSTOMER, today)
+    for amount in (100.0, 250.5, 49.5):
+        repo.insert_payment_posted(CUSTOMER, ACC_A, ACC_B, amount, "TRY", 0.0, "test")
+
+    assert repo.get_daily_out_total(CUSTOMER, today) == pytest.approx(before + 400.0)
+    assert repo.get_daily_out_total(CUSTOMER, today) == pytest.approx(_posted_sum(repo.db_path, CUSTOMER, today))
+
+    incremental = _outflow_rows(repo.db_path)
+    repo.rebuild_daily_outflow()
+    assert _outflow_rows(repo.db_path) == incremental
+
+
+def test_daily_limit_holds_under_concurrent_writes(repo):
+    today = repo._now()[:10]
+    limit = repo.get_daily_out_total(CUSTOMER, today) + 10_000.0
+    results, lock = [], threading.Lock()
+    start = threading.Barrier(12)
+
+    def worker(i):
+        start.wait()
+        src, dst = (ACC_A, ACC_B) if i % 2 else (ACC_B, ACC_A)
+        for _ in range(4):
+            try:
+                repo.insert_payment_posted(CUSTOMER, src, dst, 1000.0, "TRY", 0.0, "yarış", daily_limit=limit)
+                out = "posted"
+            except ValueError as e:
+                out = str(e)
+            with lock:
+                results.append(out)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 48
+    assert results.count("posted") == 10
+    assert set(results) == {"posted", "daily_limit_exceeded"}
+    assert repo.get_daily_out_total(CUSTOMER, today) == pytest.approx(limit)
+    assert _posted_sum(repo.db_path, CUSTOMER, today) == pytest.approx(limit)
+
+
+def test_precheck_uses_aggregate_for_daily_limit(repo):
+    svc = PaymentService(repo)
+    today = today_str()
+    con = sqlite3.connect(repo.db_path)
+    con.execute(
+        "INSERT INTO daily_outflow (customer_id, day, total, count) VALUES (?, ?, ?, 1) "
+        "ON CONFLICT(customer_id, day) DO UPDATE SET total = excluded.total",
+        (CUSTOMER, today, DAILY_LIMIT - 50.0),
+    )
+    con.commit()
+    con.close()
+
+    assert svc.precheck(ACC_A, ACC_B, 50.0, "TRY", None, CUSTOMER)["ok"] is True
+    pre = svc.precheck(ACC_A, ACC_B, 100.0, "TRY", None, CUSTOMER)
+    assert pre["ok"] is False and pre["error"] == "daily_limit_exceeded"
+    assert pre["used"] == pytest.approx(DAILY_LIMIT - 50.0)
@@ -0,0 +1,103 @@
+# backend/tests/test_effective_rate.py
+from decimal import Decimal, localcontext
+
+import numpy as np
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.calculation_tools import CalculationTools
+from mcp_server.tools.effective_rate import effective_annual, fee_amount, irr, loan_cashflows
+
+
+def reference_irr(cashflows, lo="-0.5", hi="10", steps=90):
+    """40 haneli Decimal ile düz bisection (NPV işaret değişimi)."""
+    with localcontext() as ctx:
+        ctx.prec = 40
+        cf = [Decimal(repr(float(x))) for x in cashflows]
+        lo, hi = Decimal(lo), Decimal(hi)
+
+        def npv(r):
+            return sum(c / (1 + r) ** t for t, c in enumerate(cf))
+
+        lo_positive = npv(lo) > 0
+        for _ in range(steps):
+            mid = (lo + hi) / 2
+            if (npv(mid) > 0) == lo_positive:
+                lo = mid
+            else:
+                hi = mid
+        return float((lo + hi) / 2)
+
+
+@pytest.fixture
+def tools(bank_db):
+    return CalculationTools(SQLiteRepository(bank_db))
+
+
+def test_fee_amount_pricing_types():
+    tiered = {"type": "tiered", "tiers": [{"threshold": 5000, "fee": 20}, {"threshold": 1000, "fee": 10}]}
+    assert [fee_amount(tiered, a) for a in (500, 1000, 1000.01, 5000, 9000)] == [10, 10, 20, 20, 20]
+    percent = {"type": "percent", "rate": 0.02, "min": 5, "max": 50}
+    assert [fee_amount(percent, a) for a in (100, 1000, 1_000_000)] == [5, 20, 50]
+    assert fee_amount({"type": "percent", "rate": 0.05, "min": 20}, 1_000_000) == 50_000
+    assert fee_amount({"type": "flat", "amount": 15}, 1e9) == 15
+    assert fee_amount({"type": "tiered", "tiers": []}, 100) == 0
+    with pytest.raises(ValueError, match="unsupported pricing type"):
+        fee_amount({"type": "stepped"}, 100)
+
+
+def test_irr_matches_decimal_bisection_on_padded_matrix():
+    rng = np.random.default_rng(1)
+    cf = np.zeros((12, 121))
+    for k in range(12):
+        n = int(rng.integers(2, 121))
+        cf[k, 0] = rng.uniform(1_000, 100_000)
+        cf[k, 1:n + 1] = -cf[k, 0] * rng.uniform(0.005, 0.2)
+    out = irr(cf)
+    assert out["converged"].all()
+    assert out["iterations"].max() <= 12
+    for k in range(12):
+        assert out["rate"][k] == pytest.approx(reference_irr(cf[k]), rel=1e-11, abs=1e-13)
+
+
+def test_irr_without_root_is_nan():
+    out = irr([[100.0, 10.0, 10.0], [100.0, -50.0, -60.0]])
+    assert np.isnan(out["rate"][0]) and not out["converged"][0]
+    assert out["rate"][1] == pytest.approx(reference_irr([100.0, -50.0, -60.0]), rel=1e-11)
+
+
+@pytest.mark.parametrize("a,b,c", [(0, 0, 0), (1, 2, 1), (2, 3, 2), (0, 3, 1)])
+def test_effective_cost_matches_reference_on_schedule_flows(tools, a, b, c):
+    res = tools.loan_effective_cost(principals=[10_000, 50_000, 250_000], terms=[6, 12, 36, 120],
+                                    rates=[0.0, 0.3, 0.51], fee_codes=["credit_check", "havale"],
+                                    monthly_fee_codes=["account_maintenance"], upfront_fee_rate=0.005)
+    assert "error" not in res, res
+    P, n, rate = res["principals"][a], res["terms"][b], res["rates"][c]["annual_rate"]
+    # peşin: credit_check 10 + havale %2 (5..50) + %0.5; dönemsel: account_maintenance 10
+    upfront = 10 + min(max(0.02 * P, 5), 50) + 0.005 * P
+    assert res["fees"]["upfront_by_principal"][a] == pytest.approx(upfront)
+
+    schedule = tools.loan_amortization_schedule(P, rate, n)["schedule"]
+    flows = [P - upfront] + [-(row["installment"] + 10.0) for row in schedule]
+    r = reference_irr(flows)
+    assert res["effective_annual_rate"][a][b][c] == pytest.approx(round((1 + r) ** 12 - 1, 6), abs=2e-6)
+    assert res["apr"][a][b][c] == pytest.approx(round(12 * r, 6), abs=2e-6)
+
+    ranked = [o["effective_annual_rate"] for o in res["ranking"]]
+    assert ranked == sorted(ranked)
+
+
+def test_effective_cost_without_fees_equals_nominal_rate(tools):
+    res = tools.loan_effective_cost(principals=[120_000], terms=[24], rates=[0.0, 0.36])
+    assert res["apr"][0][0] == pytest.approx([0.0, 0.36], abs=1e-5)
+    assert res["effective_annual_rate"][0][0][1] == pytest.approx(float(effective_annual(0.03)), abs=1e-5)
+
+    assert tools.loan_effective_cost(principals=[100], terms=[12], upfront_fee=100)["error"] == \
+        "upfront fees must be smaller than principal"
+    assert tools.loan_effective_cost(principals=[100], terms=[12], fee_codes=["nope"])["error"] == "fee not found: nope"
+
+
+def test_loan_cashflows_pads_shorter_terms_with_zeros():
+    cf = loan_cashflows([1000, 2000], [100, 300], [3, 5], upfront_fee=[10, 0], periodic_fee=1.0,
+                        last_installment=[99.5, 301])
+    assert cf.tolist() == [[990, -101, -101, -100.5, 0, 0], [2000, -301, -301, -301, -301, -302]]
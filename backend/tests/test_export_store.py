@@ -0,0 +1,166 @@
+# backend/tests/test_export_store.py
+import csv
+import io
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth
+from app import main as api
+from common import export_store as es
+from common.export_store import ExportStore
+from mcp_server import server
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+HEADER = ["ay", "taksit", "açıklama"]
+ROWS = [[1, 1500.25, "Ödeme — şubat"], [2, 1500.25, "çğıöşü ĞİÖŞÜ"]]
+ACCOUNT, OWNER, STRANGER = 54, 12, 13  # hesap 54: müşteri 12, en çok işlem
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ExportStore(root=str(tmp_path / "exports"), ttl_s=900)
+
+
+def _files(store):
+    return sorted(os.listdir(store.root))
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_write_renames_part_file_atomically(store):
+    seen = []
+
+    def rows():
+        for row in ROWS:
+            seen.append(_files(store))  # yazım sürerken yalnızca .part görünür
+            yield row
+
+    meta = store.write("csv", HEADER, rows(), filename="plan", owner_id=OWNER)
+    handle = meta["handle"]
+    assert seen == [[f"{handle}.bin.part"]] * 2
+    assert _files(store) == [f"{handle}.bin", f"{handle}.json"]
+    path, _ = store.open(handle, owner_id=OWNER)
+    assert _read_csv(path) == [HEADER] + [[str(v) for v in row] for row in ROWS]
+
+
+def test_failed_write_leaves_nothing_behind(store):
+    def rows():
+        yield ROWS[0]
+        raise RuntimeError("bağlantı koptu")
+
+    with pytest.raises(RuntimeError):
+        store.write("csv", HEADER, rows(), filename="plan")
+    assert _files(store) == []
+
+
+def test_sidecar_holds_meta_and_public_meta_hides_owner(store):
+    meta = store.write("csv", HEADER, iter(ROWS), filename="hesap_54_islemler", owner_id=OWNER)
+    with open(os.path.join(store.root, f"{meta['handle']}.json"), encoding="utf-8") as f:
+        sidecar = json.load(f)
+    assert sidecar["owner_id"] == OWNER and sidecar["media_type"] == es.FORMATS["csv"]
+    assert sidecar["rows"] == 2 and sidecar["bytes"] == os.path.getsize(os.path.join(store.root, f"{meta['handle']}.bin"))
+    assert meta == ExportStore.public_meta(sidecar)
+    assert meta["url"] == f"/exports/{meta['handle']}" and meta["filename"] == "hesap_54_islemler.csv"
+    assert "owner_id" not in meta and "media_type" not in meta
+
+
+def test_open_checks_owner_and_handle(store):
+    owned = store.write("csv", HEADER, iter(ROWS), filename="a", owner_id=OWNER)["handle"]
+    shared = store.write("csv", HEADER, iter(ROWS), filename="b")["handle"]
+    assert store.open(owned, owner_id=OWNER) is not None
+    assert store.open(owned, owner_id=STRANGER) is None
+    assert store.open(owned) is None
+    assert store.open(shared, owner_id=STRANGER) is not None  # sahipsiz export
+    for bad in ("../" + owned, owned[:8], None, "x" * 65):
+        assert store.open(bad, owner_id=OWNER) is None
+
+
+def test_expired_exports_are_refused_and_purged(store, monkeypatch):
+    first = store.write("csv", HEADER, iter(ROWS), filename="a", owner_id=OWNER)["handle"]
+    second = store.write("csv", HEADER, iter(ROWS), filename="b", owner_id=OWNER)["handle"]
+    later = es.time.time() + store.ttl_s + 1
+    monkeypatch.setattr(es, "time", SimpleNamespace(time=lambda: later))
+
+    assert store.open(first, owner_id=OWNER) is None
+    assert _files(store) == sorted([f"{second}.bin", f"{second}.json"])
+    # yeni export yazılırken süresi dolanlar temizlenir
+    third = store.write("csv", HEADER, iter(ROWS), filename="c", owner_id=OWNER)["handle"]
+    assert _files(store) == [f"{third}.bin", f"{third}.json"]
+
+
+def test_csv_works_and_xlsx_is_refused_without_openpyxl(store, monkeypatch):
+    monkeypatch.setattr(es, "Workbook", None)
+    with pytest.raises(ValueError, match="xlsx export requires openpyxl"):
+        store.write("xlsx", HEADER, iter(ROWS), filename="plan")
+    with pytest.raises(ValueError, match="format must be"):
+        store.write("pdf", HEADER, iter(ROWS), filename="plan")
+    assert _files(store) == []
+    assert store.write("CSV", HEADER, iter(ROWS), filename="plan")["format"] == "csv"
+
+
+def test_xlsx_round_trip(store):
+    openpyxl = pytest.importorskip("openpyxl")
+    meta = store.write("xlsx", HEADER, iter(ROWS), filename="plan", owner_id=OWNER)
+    path, _ = store.open(meta["handle"], owner_id=OWNER)
+    ws = openpyxl.load_workbook(path, read_only=True).active
+    assert [list(r) for r in ws.iter_rows(values_only=True)] == [HEADER] + ROWS
+
+
+# ----------------- transactions_export tool + /exports/{handle} -----------------
+@pytest.fixture
+def wired(bank_db, store, monkeypatch):
+    monkeypatch.setattr(server, "repo", SQLiteRepository(bank_db))
+    monkeypatch.setattr(server, "exports", store)
+    monkeypatch.setattr(api, "exports", store)
+    return store
+
+
+def _export(**kw):
+    # log_tool zarfı: {"ok": True, "data": ...} | {"ok": False, "error": ...}
+    return server.transactions_export.fn(**{"account_id": ACCOUNT, "customer_id": OWNER, **kw})
+
+
+def _auth(customer_id):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': str(customer_id)})}"}
+
+
+def test_transactions_export_streams_every_transaction(wired, bank_db):
+    res = _export()["data"]
+    assert res["ok"] and res["ui_component"]["type"] == "export_download_card"
+    txn_ids = [r["txn_id"] for r in SQLiteRepository(bank_db).iter_transactions(ACCOUNT, OWNER)]
+    assert res["export"]["rows"] == len(txn_ids) > 0
+
+    client = TestClient(api.app)
+    resp = client.get(res["export"]["url"], headers=_auth(OWNER))
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert resp.headers["content-disposition"] == f'attachment; filename="hesap_{ACCOUNT}_islemler.csv"'
+    rows = list(csv.reader(io.StringIO(resp.content.decode("utf-8-sig"))))
+    assert rows[0][0] == "txn_id" and [int(r[0]) for r in rows[1:]] == txn_ids
+
+
+def test_download_is_refused_for_strangers_and_unknown_handles(wired):
+    url = _export()["data"]["export"]["url"]
+    client = TestClient(api.app)
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=_auth(STRANGER)).status_code == 404  # varlığı da sızdırılmaz
+    assert client.get("/exports/" + "A" * 32, headers=_auth(OWNER)).status_code == 404
+    assert client.get(url, headers=_auth(OWNER)).status_code == 200
+
+
+def test_transactions_export_validation(wired, monkeypatch):
+    assert _export(customer_id=STRANGER) == {"ok": False, "error": "forbidden: account does not belong to this customer"}
+    assert _export(account_id=999_999) == {"ok": False, "error": "Hesap bulunamadı: 999999"}
+    assert _export(account_id="abc") == {"ok": False, "error": "account_id/customer_id geçersiz (int olmalı)"}
+    assert _export(format="pdf") == {"ok": False, "error": "format must be 'csv' or 'xlsx'"}
+    monkeypatch.setattr(es, "Workbook", None)
+    assert _export(format="xlsx") == {"ok": False, "error": "xlsx export requires openpyxl"}
+    assert _export(format="csv")["data"]["export"]["format"] == "csv"
+    assert len(_files(wired)) == 2
@@ -0,0 +1,135 @@
+# backend/tests/test_guarded_posting.py
+import sqlite3
+import threading
+from collections import Counter
+
+import pytest
+
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+
+CUSTOMER = 1
+ACC_A, ACC_B = 19, 21  # müşteri 1'in aktif TRY hesapları
+
+
+@pytest.fixture
+def repo(bank_db):
+    return SQLitePaymentRepository(bank_db)
+
+
+def _sql(db_path, sql, params=()):
+    con = sqlite3.connect(db_path)
+    try:
+        with con:
+            return con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+
+
+def _balance(db_path, account_id):
+    return _sql(db_path, "SELECT balance FROM accounts WHERE account_id=?", (account_id,))[0][0]
+
+
+def _versions(db_path):
+    return tuple(_sql(db_path, "SELECT version FROM accounts WHERE account_id=?", (a,))[0][0] for a in (ACC_A, ACC_B))
+
+
+def _post_with_guard(repo, amount, guard, fee=0.0):
+    args = ("TXTEST", CUSTOMER, ACC_A, ACC_B, amount, "TRY", fee, "test")
+    return repo._execute_write(lambda cur: repo._post_payment_on(cur, *args, guard=guard))
+
+
+def test_concurrent_debits_never_overdraw(repo, bank_db):
+    _sql(bank_db, "UPDATE accounts SET balance = 1250 WHERE account_id = ?", (ACC_A,))
+    total_before = _sql(bank_db, "SELECT SUM(balance) FROM accounts")[0][0]
+    outcomes, lock = Counter(), threading.Lock()
+    start = threading.Barrier(12)
+
+    def worker():
+        start.wait()
+        for _ in range(4):
+            try:
+                repo.insert_payment_posted(CUSTOMER, ACC_A, ACC_B, 90.0, "TRY", 10.0, "yarış")
+                out = "ok"
+            except ValueError as e:
+                out = str(e)
+            with lock:
+                outcomes[out] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # tutar + ücret = 100 → 1250'den tam 12 düşüm
+    assert outcomes == {"ok": 12, "insufficient_funds": 36}
+    assert _balance(bank_db, ACC_A) == pytest.approx(50.0)
+    assert _sql(bank_db, "SELECT SUM(balance) FROM accounts")[0][0] == pytest.approx(total_before - 12 * 10.0)
+    assert _sql(bank_db, "SELECT COUNT(*) FROM payments WHERE note = 'yarış'")[0][0] == 12
+
+
+def test_returning_balances_match_the_table(repo, bank_db):
+    a, b = _balance(bank_db, ACC_A), _balance(bank_db, ACC_B)
+    out = repo.insert_payment_posted(CUSTOMER, ACC_A, ACC_B, 40.0, "TRY", 2.5, "dönüş")
+    assert out["from_balance_after"] == pytest.approx(a - 42.5) == _balance(bank_db, ACC_A)
+    assert out["to_balance_after"] == pytest.approx(b + 40.0) == _balance(bank_db, ACC_B)
+
+
+def test_version_check_rejects_stale_writes(repo, bank_db):
+    versions = _versions(bank_db)
+    assert _post_with_guard(repo, 10.0, {"versions": versions})["status"] == "posted"
+
+    # kaynak hesabın statik alanı değişti → sürüm arttı
+    _sql(bank_db, "UPDATE accounts SET status = status WHERE account_id = ?", (ACC_A,))
+    assert _versions(bank_db) != versions
+    with pytest.raises(ValueError, match="confirm_token_stale"):
+        _post_with_guard(repo, 10.0, {"versions": versions})
+
+    # hedef hesap değişti: düşüm yapılmış olsa da transaction geri alınır
+    fresh = _versions(bank_db)
+    _sql(bank_db, "UPDATE accounts SET status = status WHERE account_id = ?", (ACC_B,))
+    before = (_balance(bank_db, ACC_A), _balance(bank_db, ACC_B))
+    with pytest.raises(ValueError, match="confirm_token_stale"):
+        _post_with_guard(repo, 10.0, {"versions": fresh})
+    assert (_balance(bank_db, ACC_A), _balance(bank_db, ACC_B)) == before
+    assert _sql(bank_db, "SELECT COUNT(*) FROM payments WHERE payment_id = 'TXTEST'")[0][0] == 1
+
+
+def test_daily_limit_guard(repo, bank_db):
+    day = repo._now()[:10]
+    used = repo.get_daily_out_total(CUSTOMER, day)
+    repo.insert_payment_posted(CUSTOMER, ACC_A, ACC_B, 50.0, "TRY", 0.0, "limit", daily_limit=used + 80.0)
+    with pytest.raises(ValueError, match="daily_limit_exceeded"):
+        repo.insert_payment_posted(CUSTOMER, ACC_A, ACC_B, 50.0, "TRY", 0.0, "limit", daily_limit=used + 80.0)
+    assert repo.get_daily_out_total(CUSTOMER, day) == pytest.approx(used + 50.0)
+
+
+def test_failure_reasons(repo, bank_db):
+    balance = _balance(bank_db, ACC_A)
+    with pytest.raises(ValueError, match="insufficient_funds"):
+        repo.insert_payment_posted(CUSTOMER, ACC_A, ACC_B, balance, "TRY", 1.0, "x")
+    with pytest.raises(ValueError, match="from_account_not_found"):
+        repo.insert_payment_posted(CUSTOMER, 999_999, ACC_B, 1.0, "TRY", 0.0, "x")
+    with pytest.raises(ValueError, match="to_account_not_found"):
+        repo.insert_payment_posted(CUSTOMER, ACC_A, 999_999, 1.0, "TRY", 0.0, "x")
+    assert _balance(bank_db, ACC_A) == balance
+
+
+def test_unrecognised_failure_is_generic(repo, bank_db):
+    # korumalı UPDATE'in reddettiği ama hiçbir bilinen koşulun açıklamadığı durum (ör. arada değişen satır)
+    day = repo._now()[:10]
+    used = repo.get_daily_out_total(CUSTOMER, day)
+    con = sqlite3.connect(bank_db)
+    try:
+        cur = con.cursor()
+        failure = repo._debit_failure_on
+        assert failure(cur, ACC_A, 1.0, 1.0, day, None) == "debit_rejected"
+        assert failure(cur, ACC_A, 1.0, 1.0, day, {"daily_limit": used + 100.0}) == "debit_rejected"
+        assert failure(cur, ACC_A, 1.0, 1.0, day, {"versions": _versions(bank_db)}) == "debit_rejected"
+        # bilinen nedenler öncelikli
+        assert failure(cur, ACC_A, 1.0, 1.0, day, {"daily_limit": used}) == "daily_limit_exceeded"
+        assert failure(cur, ACC_A, 1e12, 1.0, day, {"daily_limit": used + 100.0}) == "insufficient_funds"
+        assert failure(cur, ACC_A, 1.0, 1.0, day, {"versions": (-1, 0)}) == "confirm_token_stale"
+        assert failure(cur, 999_999, 1.0, 1.0, day, None) == "from_account_not_found"
+    finally:
+        con.close()
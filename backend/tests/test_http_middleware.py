@@ -0,0 +1,82 @@
+# backend/tests/test_http_middleware.py
+import asyncio
+import logging
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from common.http_middleware import install_http_logging
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _app():
+    cap = _Capture()
+    log = logging.getLogger("test.http_middleware")
+    log.handlers[:] = [cap]
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+    app = FastAPI()
+
+    @app.get("/corr")
+    async def corr(request: Request):
+        return {"corr_id": request.state.corr_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def gen():
+            for _ in range(3):
+                yield b"x"
+                await asyncio.sleep(0.05)
+        return StreamingResponse(gen())
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    install_http_logging(app, logger=log)
+    return app, cap
+
+
+async def _get(app, path, **kw):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+        return await c.get(path, **kw)
+
+
+def test_request_id_is_propagated_to_state_header_and_log():
+    app, cap = _app()
+    r = asyncio.run(_get(app, "/corr", headers={"X-Request-ID": "abc"}))
+    assert r.json() == {"corr_id": "abc"}
+    assert r.headers["x-request-id"] == "abc"
+    rec = cap.records[-1]
+    assert rec.corr_id == "abc" and rec.meta["status"] == 200
+
+
+def test_streaming_response_gets_header_and_full_duration():
+    app, cap = _app()
+    r = asyncio.run(_get(app, "/stream"))
+    assert r.text == "xxx"
+    assert r.headers.get("x-request-id")
+    rec = cap.records[-1]
+    # duration gövde akışının tamamını kapsar, ttfb yalnızca yanıt başlangıcını
+    assert rec.duration_ms >= 140
+    assert rec.meta["ttfb_ms"] < rec.duration_ms
+
+
+def test_unhandled_error_is_logged_with_corr_id():
+    app, cap = _app()
+    r = asyncio.run(_get(app, "/boom", headers={"X-Request-ID": "err-1"}))
+    assert r.status_code == 500
+    events = [getattr(rec, "event", None) for rec in cap.records]
+    assert "http_unhandled_error" in events and events[-1] == "http_request"
+    assert all(rec.corr_id == "err-1" for rec in cap.records)
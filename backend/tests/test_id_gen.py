@@ -0,0 +1,153 @@
+# backend/tests/test_id_gen.py
+import re
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from mcp_server.data import id_gen
+from mcp_server.data.id_gen import IdGenerator, NodeLease
+
+ID_RE = re.compile(r"^TX\d{14}\d{3}(\d{2})(\d{4})$")
+
+
+def test_ids_are_unique_and_sorted_across_threads():
+    gen = IdGenerator(node=7)
+    per_thread = {}
+
+    def worker(i):
+        per_thread[i] = [gen.next_id("TX") for _ in range(5000)]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    all_ids = [x for ids in per_thread.values() for x in ids]
+    assert len(set(all_ids)) == len(all_ids) == 40_000
+    for ids in per_thread.values():
+        assert ids == sorted(ids)  # aynı thread içinde zaman sıralı
+    assert all(ID_RE.match(x).group(1) == "07" for x in all_ids)
+
+
+def test_sequence_overflow_and_clock_rollback_stay_monotonic(monkeypatch):
+    gen = IdGenerator(node=1)
+    now = [1_700_000_000_000 * 1_000_000]
+    monkeypatch.setattr(id_gen.time, "time_ns", lambda: now[0])
+
+    ids = [gen.next_id("TX") for _ in range(id_gen._SEQ_MAX + 5)]  # aynı ms'te sıra taşar
+    now[0] -= 5_000 * 1_000_000  # saat 5 sn geri gider
+    ids += [gen.next_id("TX") for _ in range(10)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+
+
+def test_no_node_fails_fast(monkeypatch):
+    monkeypatch.delenv("ID_NODE", raising=False)
+    gen = IdGenerator()
+    with pytest.raises(RuntimeError, match="id_node_not_configured"):
+        gen.next_id("TX")
+
+
+def test_leases_give_distinct_nodes_and_recover_when_lost(bank_db, monkeypatch):
+    monkeypatch.delenv("ID_NODE", raising=False)
+    a, b = NodeLease(bank_db), NodeLease(bank_db)
+    assert {a.acquire(), b.acquire()} == {0, 1}
+
+    gen = IdGenerator()
+    gen.use_lease(b)
+    assert ID_RE.match(gen.next_id("TX")).group(1) == "01"
+
+    # kira başka sürece geçti (ör. TTL doldu ve silindi); geçerlilik bitince yeniden kiralanır
+    con = sqlite3.connect(bank_db)
+    con.execute("DELETE FROM id_node_leases WHERE node = ?", (b.node,))
+    con.execute("INSERT INTO id_node_leases (node, owner, heartbeat_at) VALUES (1, 'other', strftime('%s','now'))")
+    con.commit()
+    con.close()
+    b.valid_until = 0
+    node = int(ID_RE.match(gen.next_id("TX")).group(1))
+    assert node not in (0, 1) and b.node == node
+
+    b.release()
+    a.release()
+    con = sqlite3.connect(bank_db)
+    owners = [r[0] for r in con.execute("SELECT owner FROM id_node_leases")]
+    con.close()
+    assert owners == ["other"]
+
+
+def test_stale_leases_are_reclaimed(bank_db):
+    con = sqlite3.connect(bank_db)
+    con.executemany("INSERT INTO id_node_leases (node, owner, heartbeat_at) VALUES (?, 'dead', 0)",
+                    [(n,) for n in range(id_gen.NODE_COUNT)])
+    con.commit()
+    con.close()
+    assert NodeLease(bank_db, ttl_s=60).acquire() == 0
+
+
+def test_blocked_heartbeat_renewal_does_not_stall_id_generation(bank_db, monkeypatch):
+    monkeypatch.delenv("ID_NODE", raising=False)
+    entered, release = threading.Event(), threading.Event()
+
+    class _SlowLease(NodeLease):
+        block = False
+
+        def _connect(self):
+            if self.block:  # meşgul DB: bağlantı/yazma kilidi beklemede
+                entered.set()
+                release.wait(10)
+            return super()._connect()
+
+    monkeypatch.setattr(id_gen, "NodeLease", lambda db_path: _SlowLease(db_path, ttl_s=1.5))
+    gen = IdGenerator()
+    node = id_gen.acquire_node_lease(bank_db, gen)
+    lease = gen.lease
+    lease.block = True
+    try:
+        assert entered.wait(5)  # heartbeat (TTL/3) yenilemede takıldı; kira hâlâ geçerli
+        started = time.monotonic()
+        ids = [gen.next_id("TX") for _ in range(1000)]
+        assert time.monotonic() - started < 0.5
+        assert {int(ID_RE.match(x).group(1)) for x in ids} == {node}
+    finally:
+        lease.block = False
+        release.set()
+        lease.release()
+
+
+def test_expired_lease_is_renewed_once_for_concurrent_callers(bank_db, monkeypatch):
+    monkeypatch.delenv("ID_NODE", raising=False)
+    lease = NodeLease(bank_db)
+    node = lease.acquire()
+    gen = IdGenerator()
+    gen.use_lease(lease)
+
+    renewals = []
+    renew_locked = lease._renew_locked
+
+    def counting():
+        renewals.append(threading.get_ident())
+        time.sleep(0.05)
+        return renew_locked()
+
+    monkeypatch.setattr(lease, "_renew_locked", counting)
+    lease.valid_until = 0
+    start = threading.Barrier(8)
+    ids = []
+
+    def worker():
+        start.wait()
+        ids.append(gen.next_id("TX"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(renewals) == 1
+    assert len(set(ids)) == 8 and {int(ID_RE.match(x).group(1)) for x in ids} == {node}
+    assert lease.valid_until > time.monotonic()
+    lease.release()
@@ -0,0 +1,87 @@
+# backend/tests/test_loan_quote_grid.py
+import itertools
+
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools import calculation_tools as ct
+from mcp_server.tools.amortization import AnnuitySchedule
+from mcp_server.tools.calculation_tools import CalculationTools
+
+PRINCIPALS = [1_000.0, 50_000.0, 123_456.78, 2_500_000.0]
+TERMS = [1, 2, 12, 36, 120, 480]
+RATES = [0.0, 0.0001, 0.12, 0.42, 1.2]
+
+
+@pytest.fixture
+def tools(bank_db):
+    return CalculationTools(SQLiteRepository(bank_db))
+
+
+def test_every_cell_matches_the_scalar_schedule(tools):
+    res = tools.loan_quote_grid(PRINCIPALS, TERMS, rates=RATES)
+    assert "error" not in res, res
+    assert [c["annual_rate"] for c in res["rates"]] == RATES
+    for (a, p), (b, n), (c, r) in itertools.product(enumerate(PRINCIPALS), enumerate(TERMS), enumerate(RATES)):
+        sched = AnnuitySchedule(p, r / 12, n)
+        total = sched.total_payment()
+        assert res["installment"][a][b][c] == round(sched.installment, 2), (p, n, r)
+        assert res["total_payment"][a][b][c] == pytest.approx(total, abs=1e-6), (p, n, r)
+        assert res["total_interest"][a][b][c] == pytest.approx(round(total - p, 2), abs=1e-6), (p, n, r)
+
+
+def test_grid_totals_match_the_full_schedule(tools):
+    res = tools.loan_quote_grid([250_000.0], [360], rates=[0.42])
+    summary = tools.loan_amortization_schedule(250_000.0, 0.42, 360)["summary"]
+    assert res["installment"][0][0][0] == summary["installment"]
+    assert res["total_payment"][0][0][0] == summary["total_payment"]
+    assert res["total_interest"][0][0][0] == summary["total_interest"]
+
+
+def test_zero_rate_cells(tools):
+    res = tools.loan_quote_grid([1_200.0, 1_000.0], [12, 3], rates=[0.0])
+    assert (res["installment"][0][0][0], res["installment"][1][1][0]) == (100.0, 333.33)
+    assert res["total_payment"][0][0] == [1200.0] and res["total_interest"][0][0] == [0.0]
+    # 1000 / 3: kuruş farkı satır yuvarlamasında kalır, tam plan özetiyle aynı
+    summary = tools.loan_amortization_schedule(1_000.0, 0.0, 3)["summary"]
+    assert res["total_payment"][1][1] == [summary["total_payment"]] == [AnnuitySchedule(1_000.0, 0.0, 3).total_payment()]
+    assert res["rates"] == [{"label": "%0.00", "annual_rate": 0.0, "source": "manual"}]
+
+
+def test_products_are_resolved_once(tools, monkeypatch):
+    calls = []
+    resolve = tools.repo._resolve_rate_via_repo_or_db
+
+    def counting(**kw):
+        calls.append(kw["product"])
+        return resolve(**kw)
+
+    monkeypatch.setattr(tools.repo, "_resolve_rate_via_repo_or_db", counting)
+    res = tools.loan_quote_grid([10_000.0, 20_000.0], [12, 24], products=["loan", "ihtiyaç kredisi", "loan"])
+    assert calls == ["ihtiyaç kredisi"]
+    assert [c["source"] for c in res["rates"]] == ["db"]
+    default = tools.loan_quote_grid([10_000.0], [12])
+    assert default["rates"] == res["rates"]
+
+
+@pytest.mark.parametrize("kwargs,error", [
+    (dict(principals=[], terms=[12]), "principals and terms must be non-empty lists"),
+    (dict(principals=[1000], terms=[]), "principals and terms must be non-empty lists"),
+    (dict(principals=[0], terms=[12]), "principals must be > 0"),
+    (dict(principals=[-5, 1000], terms=[12]), "principals must be > 0"),
+    (dict(principals=[float("nan")], terms=[12]), "principals must be > 0"),
+    (dict(principals=[float("inf")], terms=[12]), "principals must be > 0"),
+    (dict(principals=[1000], terms=[0]), "terms (months) must be integers >= 1"),
+    (dict(principals=[1000], terms=[12.5]), "terms (months) must be integers >= 1"),
+    (dict(principals=[1000], terms=[12], rates=[-0.01]), "annual rate must be >= 0"),
+    (dict(principals=[1000], terms=[12], rates=[float("nan")]), "annual rate must be >= 0"),
+])
+def test_invalid_inputs_are_rejected(tools, kwargs, error):
+    assert tools.loan_quote_grid(**kwargs) == {"error": error}
+
+
+def test_grid_size_limit(tools, monkeypatch):
+    monkeypatch.setattr(ct, "LOAN_GRID_MAX_CELLS", 12)
+    assert "error" not in tools.loan_quote_grid([1, 2], [12, 24], rates=[0.1, 0.2, 0.3])
+    assert tools.loan_quote_grid([1, 2], [12, 24, 36], rates=[0.1, 0.2, 0.3]) == \
+        {"error": "grid too large (max 12 cells)"}
@@ -0,0 +1,116 @@
+# backend/tests/test_logging_setup.py
+import io
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import RotatingFileHandler
+
+import pytest
+
+from common import logging_setup as ls
+
+TURKISH = "Ödeme işlendi: çağrı ğüşıöç ĞÜŞİÖÇ — bakiye güncellendi"
+
+
+class _CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, s):
+        self.writes.append(s.count("\n"))
+        return super().write(s)
+
+
+def _pipeline(name, *handlers, batch_size=ls.LOG_BATCH_SIZE):
+    q = queue.SimpleQueue()
+    logger = logging.getLogger(name)
+    logger.handlers[:] = [ls._DeferredQueueHandler(q)]
+    logger.filters[:] = []
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    listener = ls.BatchingQueueListener(q, *handlers, batch_size=batch_size)
+    listener.start()
+    return logger, listener
+
+
+def test_stop_writes_every_queued_record_in_batches():
+    stream = _CountingStream()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(ls.JSONFormatter())
+    logger, listener = _pipeline("test.logging.stop", handler, batch_size=64)
+    for i in range(5000):
+        logger.info("tool_call", extra={"event": "tool_call", "meta": {"i": i}})
+    listener.stop()
+    listener.stop()  # ikinci stop zararsız
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["meta"]["i"] for line in lines] == list(range(5000))
+    assert max(stream.writes) <= 64 and sum(stream.writes) == 5000
+
+
+def test_handler_level_is_respected():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setLevel(logging.WARNING)
+    logger, listener = _pipeline("test.logging.level", handler)
+    logger.info("bilgi")
+    logger.warning("uyarı")
+    listener.stop()
+    assert stream.getvalue() == "uyarı\n"
+
+
+def test_rotation_happens_at_the_byte_limit(tmp_path):
+    path = str(tmp_path / "app.log")
+    handler = RotatingFileHandler(path, maxBytes=4000, backupCount=100, encoding="utf-8")
+    handler.setFormatter(ls.JSONFormatter())
+    logger, listener = _pipeline("test.logging.rotate", handler, batch_size=50)
+    for i in range(600):
+        logger.info(TURKISH, extra={"event": "payment", "meta": {"i": i}})
+    listener.stop()
+    handler.close()
+
+    files = [p for p in os.listdir(tmp_path) if p.startswith("app.log")]
+    assert len(files) > 10
+    assert all(os.path.getsize(tmp_path / p) < 4000 for p in files)
+    seen = []
+    for p in files:
+        with open(tmp_path / p, encoding="utf-8") as f:
+            seen += [json.loads(line)["meta"]["i"] for line in f]
+    assert sorted(seen) == list(range(600))
+
+
+def test_sampler_honours_rates_and_keeps_errors():
+    random.seed(1234)
+    sampler = ls.EventSampler(ls._parse_sample_rates("http_request=0.1, tool_call=1.5, bozuk, x=abc"))
+    assert sampler.rates == {"http_request": 0.1, "tool_call": 1.0}
+
+    def record(event, level=logging.INFO, **extra):
+        r = logging.LogRecord("t", level, __file__, 1, event, None, None)
+        r.event = event
+        r.__dict__.update(extra)
+        return r
+
+    kept = [r for r in (record("http_request") for _ in range(20_000)) if sampler.filter(r)]
+    assert len(kept) == pytest.approx(2000, abs=200)
+    assert all(r.sample_rate == 0.1 for r in kept)
+
+    assert all(sampler.filter(record("tool_call")) for _ in range(100))
+    assert all(sampler.filter(record("db_query")) for _ in range(100))
+    assert all(sampler.filter(record("http_request", logging.WARNING)) for _ in range(100))
+    assert all(sampler.filter(record("http_request", ok=False)) for _ in range(100))
+    assert all(sampler.filter(record("http_request", error="timeout")) for _ in range(100))
+    assert not hasattr(record("tool_call"), "sample_rate")
+
+
+def test_atexit_hook_drains_registered_listeners(monkeypatch):
+    stream = io.StringIO()
+    logger, listener = _pipeline("test.logging.atexit", logging.StreamHandler(stream))
+    monkeypatch.setattr(ls, "_listeners", [listener])
+    for i in range(300):
+        logger.info(f"kayıt {i}")
+    ls._stop_listeners()
+    assert ls._listeners == []
+    assert stream.getvalue().splitlines() == [f"kayıt {i}" for i in range(300)]
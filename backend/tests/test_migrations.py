@@ -0,0 +1,77 @@
+# backend/tests/test_migrations.py
+import sqlite3
+import threading
+
+import pytest
+
+from mcp_server.data import migrations
+from mcp_server.data.migrations import LATEST_VERSION, run_migrations
+
+
+def _schema(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        objects = con.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+        ).fetchall()
+        counts = {name: con.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+                  for kind, name, _ in objects if kind == "table"}
+        versions = [r[0] for r in con.execute("SELECT version FROM schema_version ORDER BY version")]
+        return objects, counts, versions
+    finally:
+        con.close()
+
+
+def test_second_run_is_a_no_op(raw_bank_db):
+    first = run_migrations(raw_bank_db)
+    assert first == {"version": LATEST_VERSION, "applied": list(range(1, LATEST_VERSION + 1))}
+    after_first = _schema(raw_bank_db)
+
+    assert run_migrations(raw_bank_db) == {"version": LATEST_VERSION, "applied": []}
+    assert _schema(raw_bank_db) == after_first
+    assert after_first[2] == list(range(1, LATEST_VERSION + 1))
+
+
+def test_concurrent_runs_apply_each_migration_once(raw_bank_db):
+    results, errors = [], []
+    start = threading.Barrier(4)
+
+    def worker():
+        start.wait()
+        try:
+            results.append(run_migrations(raw_bank_db))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    applied = sorted(v for r in results for v in r["applied"])
+    assert applied == list(range(1, LATEST_VERSION + 1))
+    assert all(r["version"] == LATEST_VERSION for r in results)
+
+
+def test_failed_migration_rolls_back_and_resumes(raw_bank_db, monkeypatch):
+    idx = next(i for i, m in enumerate(migrations.MIGRATIONS) if m[0] == 4)
+    version, name, fn = migrations.MIGRATIONS[idx]
+
+    def broken(con):
+        fn(con)
+        raise RuntimeError("boom")
+
+    patched = list(migrations.MIGRATIONS)
+    patched[idx] = (version, name, broken)
+    monkeypatch.setattr(migrations, "MIGRATIONS", patched)
+    with pytest.raises(RuntimeError, match="boom"):
+        run_migrations(raw_bank_db)
+    objects, _, versions = _schema(raw_bank_db)
+    assert versions == [1, 2, 3]
+    assert "daily_outflow" not in {obj[1] for obj in objects}  # DDL de geri alındı
+
+    monkeypatch.undo()
+    assert run_migrations(raw_bank_db)["applied"] == list(range(4, LATEST_VERSION + 1))
+    assert run_migrations(raw_bank_db)["applied"] == []
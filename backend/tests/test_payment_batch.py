@@ -0,0 +1,96 @@
+# backend/tests/test_payment_batch.py
+import sqlite3
+
+import pytest
+
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+from mcp_server.tools.payment_tools import DAILY_LIMIT, PaymentService, today_str
+
+CUSTOMER = 1
+ACC_A, ACC_B = 19, 21  # müşteri 1'in aktif TRY hesapları
+TRANSFERS = [
+    {"from_account": ACC_A, "to_account": ACC_B, "amount": 100.0},
+    {"from_account": ACC_B, "to_account": ACC_A, "amount": 40.5},
+]
+
+
+@pytest.fixture
+def svc(bank_db):
+    return PaymentService(SQLitePaymentRepository(bank_db), secret_key="test-secret")
+
+
+def _scalar(db_path, sql, params=()):
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute(sql, params).fetchone()[0]
+    finally:
+        con.close()
+
+
+def _token(svc, transfers, atomic=True):
+    pre = svc.precheck_batch(CUSTOMER, transfers)
+    return svc.issue_batch_confirm_token(CUSTOMER, pre, atomic)
+
+
+def test_commit_requires_token_and_replay_returns_first_result(svc):
+    db = svc.repo.db_path
+    assert svc.commit_batch_confirmed(CUSTOMER, "", TRANSFERS)["error"] == "confirm_token_required"
+
+    token = _token(svc, TRANSFERS)
+    payments_before = _scalar(db, "SELECT COUNT(*) FROM payments")
+    first = svc.commit_batch_confirmed(CUSTOMER, token)
+    assert first["ok"] and first["replayed"] is False and first["posted"] == 2
+    balances = _scalar(db, "SELECT group_concat(balance) FROM accounts WHERE account_id IN (?, ?)", (ACC_A, ACC_B))
+
+    again = svc.commit_batch_confirmed(CUSTOMER, token, TRANSFERS)
+    assert again["replayed"] is True
+    assert again["results"] == first["results"]
+    assert again["batch_id"] == first["batch_id"]
+    assert _scalar(db, "SELECT COUNT(*) FROM payments") == payments_before + 2
+    assert _scalar(db, "SELECT group_concat(balance) FROM accounts WHERE account_id IN (?, ?)",
+                   (ACC_A, ACC_B)) == balances
+
+
+def test_token_bound_to_items_customer_and_type(svc):
+    token = _token(svc, TRANSFERS)
+    changed = [dict(TRANSFERS[0], amount=999.0), TRANSFERS[1]]
+    assert svc.commit_batch_confirmed(CUSTOMER, token, changed)["error"] == "confirm_token_mismatch"
+    assert svc.commit_batch_confirmed(CUSTOMER + 1, token)["error"] == "confirm_token_mismatch"
+
+    single = svc.issue_confirm_token(CUSTOMER, svc.precheck(ACC_A, ACC_B, 5.0, "TRY", None, CUSTOMER))
+    assert svc.commit_batch_confirmed(CUSTOMER, single)["error"] == "confirm_token_invalid"
+    assert _scalar(svc.repo.db_path, "SELECT COUNT(*) FROM payment_batches") == 0
+
+
+def test_atomic_needs_all_items_valid_per_item_skips_invalid(svc):
+    transfers = TRANSFERS + [{"from_account": ACC_A, "to_account": ACC_B, "amount": -5}]
+    assert _token(svc, transfers, atomic=True) is None
+
+    res = svc.commit_batch_confirmed(CUSTOMER, _token(svc, transfers, atomic=False))
+    assert res["mode"] == "per_item" and res["posted"] == 2
+    assert [r["index"] for r in res["results"]] == [0, 1]
+
+
+def test_daily_limit_is_checked_at_write_time(svc):
+    db = svc.repo.db_path
+    con = sqlite3.connect(db)
+    for day in {today_str(), svc.repo._now()[:10]}:
+        con.execute(
+            "INSERT INTO daily_outflow (customer_id, day, total, count) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT(customer_id, day) DO UPDATE SET total = excluded.total",
+            (CUSTOMER, day, DAILY_LIMIT - 20_000.0),
+        )
+    con.execute("UPDATE accounts SET balance = 100000 WHERE account_id = ?", (ACC_A,))
+    con.commit()
+    con.close()
+
+    transfers = [{"from_account": ACC_A, "to_account": ACC_B, "amount": 9_000.0}] * 2
+    token = _token(svc, transfers, atomic=False)
+    assert token  # preview anında iki kalem de limite sığıyor
+
+    # preview ile commit arasında tekil transfer limitin bir kısmını tüketir
+    assert svc.create(CUSTOMER, ACC_A, ACC_B, 5_000.0, "TRY", "araya giren")["ok"]
+    res = svc.commit_batch_confirmed(CUSTOMER, token)
+    assert res["posted"] == 1
+    assert [r.get("error") for r in res["results"]] == [None, "daily_limit_exceeded"]
+    assert svc.repo.get_daily_out_total(CUSTOMER, svc.repo._now()[:10]) <= DAILY_LIMIT
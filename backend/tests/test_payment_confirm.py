@@ -0,0 +1,117 @@
+# backend/tests/test_payment_confirm.py
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app import auth
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+from mcp_server.tools import payment_tools
+from mcp_server.tools.payment_tools import PaymentService
+
+CUSTOMER = 1
+ACC_A, ACC_B = 19, 21  # müşteri 1'in aktif TRY hesapları
+
+
+@pytest.fixture
+def svc(bank_db):
+    return PaymentService(SQLitePaymentRepository(bank_db), secret_key=auth.SECRET_KEY)
+
+
+def _token(svc, amount=125.0):
+    pre = svc.precheck(ACC_A, ACC_B, amount, "TRY", "onaylı", CUSTOMER)
+    assert pre["ok"], pre
+    return svc.issue_confirm_token(CUSTOMER, pre)
+
+
+def _balance(db_path, account_id):
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute("SELECT balance FROM accounts WHERE account_id = ?", (account_id,)).fetchone()[0]
+    finally:
+        con.close()
+
+
+def _payment_count(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_retry_with_same_token_replays_the_posted_payment(svc):
+    db = svc.repo.db_path
+    token = _token(svc)
+    before, count = _balance(db, ACC_A), _payment_count(db)
+
+    first = svc.commit_confirmed(CUSTOMER, token, ACC_A, ACC_B, 125.0)
+    again = svc.commit_confirmed(CUSTOMER, token, ACC_A, ACC_B, 125.0)
+    assert first["ok"] and first["replayed"] is False
+    assert again["ok"] and again["replayed"] is True
+    assert again["txn"]["payment_id"] == first["txn"]["payment_id"]
+    assert again["receipt"] == first["receipt"]
+    assert _payment_count(db) == count + 1
+    assert _balance(db, ACC_A) == pytest.approx(before - 125.0)
+
+
+def test_account_version_change_after_preview_is_rejected(svc):
+    db = svc.repo.db_path
+    token = _token(svc)
+    con = sqlite3.connect(db)
+    # durum değişikliği sürümü artırır; eski değere dönmek sürümü geri almaz
+    con.execute("UPDATE accounts SET status = 'frozen' WHERE account_id = ?", (ACC_B,))
+    con.execute("UPDATE accounts SET status = 'active' WHERE account_id = ?", (ACC_B,))
+    con.commit()
+    con.close()
+    before, count = _balance(db, ACC_A), _payment_count(db)
+
+    res = svc.commit_confirmed(CUSTOMER, token, ACC_A, ACC_B, 125.0)
+    assert res["ok"] is False and res["error"] == "confirm_token_stale"
+    assert _balance(db, ACC_A) == pytest.approx(before)  # borç kaydı geri alındı
+    assert _payment_count(db) == count
+
+    fresh = svc.commit_confirmed(CUSTOMER, _token(svc), ACC_A, ACC_B, 125.0)
+    assert fresh["ok"]
+
+
+def test_token_parameters_and_customer_must_match(svc):
+    token = _token(svc)
+    assert svc.commit_confirmed(CUSTOMER, token, ACC_A, ACC_B, 126.0)["error"] == "confirm_token_mismatch"
+    assert svc.commit_confirmed(CUSTOMER, token, ACC_B, ACC_A, 125.0)["error"] == "confirm_token_mismatch"
+    assert svc.commit_confirmed(CUSTOMER + 1, token, ACC_A, ACC_B, 125.0)["error"] == "confirm_token_mismatch"
+    assert svc.commit_confirmed(CUSTOMER, token[:-2] + "xx", ACC_A, ACC_B, 125.0)["error"] == "confirm_token_invalid"
+
+
+def test_expired_token_never_posts_but_replays_a_posted_payment(svc, monkeypatch):
+    posted = _token(svc)
+    first = svc.commit_confirmed(CUSTOMER, posted, ACC_A, ACC_B, 125.0)
+
+    monkeypatch.setattr(payment_tools, "CONFIRM_TOKEN_TTL_S", -60)
+    expired = _token(svc)
+    count = _payment_count(svc.repo.db_path)
+    assert svc.commit_confirmed(CUSTOMER, expired, ACC_A, ACC_B, 125.0)["error"] == "confirm_token_expired"
+    assert _payment_count(svc.repo.db_path) == count
+
+    # aynı pid ile süresi dolmuş retry: yeni transfer açmadan ilk sonuç
+    claims = jwt.get_unverified_claims(expired)
+    claims["pid"] = first["txn"]["payment_id"]
+    late = jwt.encode(claims, svc.confirm_key, algorithm="HS256")
+    res = svc.commit_confirmed(CUSTOMER, late, ACC_A, ACC_B, 125.0)
+    assert res["ok"] and res["replayed"] is True
+    assert _payment_count(svc.repo.db_path) == count
+
+
+def test_confirm_tokens_do_not_authenticate_api_requests(svc):
+    assert auth.get_current_user(auth.create_access_token({"sub": str(CUSTOMER)})) == CUSTOMER
+
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(_token(svc))
+    assert exc.value.status_code == 401
+
+    # SECRET_KEY ile imzalı ama typ=access olmayan token (eski onay token'ı biçimi) de reddedilir
+    legacy = jwt.encode({"sub": str(CUSTOMER), "pid": "TX1"}, auth.SECRET_KEY, algorithm=auth.ALGORITHM)
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(legacy)
+    assert exc.value.status_code == 401
@@ -0,0 +1,113 @@
+# backend/tests/test_payment_writer.py
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from mcp_server.data.payment_writer import PaymentWriter
+from mcp_server.data.sql_payment_repo import SQLitePaymentRepository
+
+
+@pytest.fixture
+def writer(bank_db):
+    w = PaymentWriter(bank_db, timeout_s=0.2)
+    yield w
+    w.stop()
+
+
+def _blocker(release: threading.Event, started: threading.Event):
+    def op(cur):
+        started.set()
+        release.wait(5)
+        return "blocker"
+    return op
+
+
+def test_queued_op_that_times_out_is_cancelled_and_never_applied(writer):
+    release, started = threading.Event(), threading.Event()
+    blocked = writer.submit(_blocker(release, started))
+    assert started.wait(2)
+
+    ran = []
+    with pytest.raises(RuntimeError, match="payment_writer_timeout"):
+        writer.execute(lambda cur: ran.append("applied") or "late")
+
+    release.set()
+    assert blocked.result(2) == "blocker"
+    writer.flush()
+    assert ran == []
+    assert writer.stats()["cancelled"] == 1
+
+
+def test_op_already_in_batch_waits_for_real_result(writer):
+    def slow(cur):
+        time.sleep(0.5)  # timeout_s'ten uzun; writer komutu çoktan aldı → iptal edilemez
+        cur.execute("SELECT 1")
+        return "committed"
+
+    assert writer.execute(slow) == "committed"
+    assert writer.stats()["cancelled"] == 0
+
+
+def test_failing_op_rolls_back_only_itself(writer, bank_db):
+    release, started = threading.Event(), threading.Event()
+    writer.submit(_blocker(release, started))
+    assert started.wait(2)
+
+    def note(text):
+        def op(cur):
+            cur.execute("INSERT INTO card_limit_requests (created_at, card_id, customer_id, requested_limit, reason, status) "
+                        "VALUES ('now', 1, 1, 1, ?, 'received')", (text,))
+            if text == "bad":
+                raise ValueError("rule_violation")
+            return text
+        return op
+
+    futs = [writer.submit(note(t)) for t in ("ok-1", "bad", "ok-2")]
+    release.set()
+    assert futs[0].result(2) == "ok-1"
+    with pytest.raises(ValueError, match="rule_violation"):
+        futs[1].result(2)
+    assert futs[2].result(2) == "ok-2"
+
+    con = sqlite3.connect(bank_db)
+    reasons = [r[0] for r in con.execute("SELECT reason FROM card_limit_requests WHERE reason LIKE 'ok-%' OR reason = 'bad'")]
+    con.close()
+    assert sorted(reasons) == ["ok-1", "ok-2"]
+    assert writer.stats()["max_batch_seen"] >= 3
+
+
+def test_double_spend_through_writer_is_prevented(bank_db):
+    repo = SQLitePaymentRepository(bank_db)
+    writer = PaymentWriter(bank_db)
+    repo.attach_writer(writer)
+    con = sqlite3.connect(bank_db)
+    con.execute("UPDATE accounts SET balance = 1000 WHERE account_id = 19")
+    con.commit()
+    total_before = con.execute("SELECT SUM(balance) FROM accounts").fetchone()[0]
+
+    results, lock = [], threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            try:
+                repo.insert_payment_posted(1, 19, 21, 100.0, "TRY", 0.0, "çift harcama")
+                out = "ok"
+            except ValueError as e:
+                out = str(e)
+            with lock:
+                results.append(out)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.stop()
+
+    assert results.count("ok") == 10
+    assert results.count("insufficient_funds") == 30
+    assert con.execute("SELECT balance FROM accounts WHERE account_id = 19").fetchone()[0] == pytest.approx(0.0)
+    assert con.execute("SELECT SUM(balance) FROM accounts").fetchone()[0] == pytest.approx(total_before)
+    con.close()
@@ -0,0 +1,100 @@
+# backend/tests/test_rate_resolver.py
+import sqlite3
+
+import pytest
+
+from mcp_server.data.rate_resolver import RateResolver
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+
+@pytest.fixture
+def repo(bank_db):
+    return SQLiteRepository(bank_db)
+
+
+def _direct_rates(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        return {p: r / 100.0 for p, r in con.execute("SELECT product, rate_apy FROM interest_rates")}
+    finally:
+        con.close()
+
+
+def _set_rate(db_path, product, rate_apy, updated_at=None):
+    con = sqlite3.connect(db_path)
+    con.execute("UPDATE interest_rates SET rate_apy = ?, updated_at = COALESCE(?, updated_at) WHERE product = ?",
+                (rate_apy, updated_at, product))
+    con.commit()
+    con.close()
+
+
+def test_rates_match_direct_query(repo):
+    expected = _direct_rates(repo.db_path)
+    assert expected
+    for product, rate in expected.items():
+        assert repo.get_interest_rate(product) == rate
+        assert repo.get_interest_rate(product.title()) == rate  # "Kredi Kartı" → büyük/küçük harf duyarsız
+        got, meta = repo._resolve_rate_via_repo_or_db(None, product, product)
+        assert got == rate and meta["source"] == "db" and meta["table"] == "interest_rates"
+
+    assert repo._resolve_rate_via_repo_or_db(0.3, "mevduat", "mevduat") == (0.3, {"source": "manual"})
+    with pytest.raises(ValueError, match="Interest rate not found for product=yok"):
+        repo.get_interest_rate("yok")
+
+
+def test_as_of_selects_rate_valid_on_that_date(repo):
+    con = sqlite3.connect(repo.db_path)
+    updated = con.execute("SELECT updated_at FROM interest_rates WHERE product = 'mevduat'").fetchone()[0]
+    con.close()
+    assert repo._resolve_rate_via_repo_or_db(None, "mevduat", "mevduat", as_of=updated[:10])[0] > 0
+    with pytest.raises(ValueError):
+        repo._resolve_rate_via_repo_or_db(None, "mevduat", "mevduat", as_of="2000-01-01")
+    with pytest.raises(ValueError, match="as_of must be ISO date"):
+        repo._resolve_rate_via_repo_or_db(None, "mevduat", "mevduat", as_of="dün")
+
+
+def test_changes_are_picked_up_after_interval_or_invalidate(repo):
+    resolver = repo._rates()
+    before = repo.get_interest_rate("kredi kartı")
+    checks = resolver.stats()["checks"]
+
+    _set_rate(repo.db_path, "kredi kartı", 40.0)
+    for _ in range(100):
+        assert repo.get_interest_rate("kredi kartı") == before  # aralık içinde SQLite'a gidilmez
+    assert resolver.stats()["checks"] == checks
+
+    resolver.invalidate()
+    assert repo.get_interest_rate("kredi kartı") == 0.40
+    assert resolver.stats()["reloads"] == 2
+
+    resolver.check_interval_s = 0
+    _set_rate(repo.db_path, "kredi kartı", 41.0)
+    assert repo.get_interest_rate("kredi kartı") == 0.41
+
+    reloads = resolver.stats()["reloads"]
+    repo.get_interest_rate("mevduat")
+    assert resolver.stats()["reloads"] == reloads  # imza aynı → yeniden yükleme yok
+
+
+def test_generic_table_with_currency_and_effective_date(tmp_path):
+    db = str(tmp_path / "rates.db")
+    con = sqlite3.connect(db)
+    con.execute("CREATE TABLE loan_rates (product_type TEXT, ccy TEXT, annual_rate REAL, effective_date TEXT)")
+    con.executemany("INSERT INTO loan_rates VALUES (?, ?, ?, ?)", [
+        ("konut", "TRY", 0.30, "2025-01-01"),
+        ("konut", "TRY", 0.34, "2025-06-01"),
+        ("konut", "usd", 0.08, "2025-03-01"),
+        ("Taşıt", "TRY", 0.45, "2025-02-01"),
+    ])
+    con.commit()
+    con.close()
+
+    resolver = RateResolver(db)
+    assert resolver.resolve("KONUT", "TRY")[0] == 0.34
+    assert resolver.resolve("konut", "TRY", as_of="2025-05-31")[0] == 0.30
+    rate, meta = resolver.resolve("konut", "USD")
+    assert rate == 0.08 and meta == {"source": "db", "table": "loan_rates", "product": "konut",
+                                      "effective": "2025-03-01 00:00:00"}
+    assert resolver.resolve("taşıt", "try")[0] == 0.45
+    with pytest.raises(ValueError):
+        resolver.resolve("konut", "EUR")
@@ -0,0 +1,173 @@
+# backend/tests/test_roi_cache.py
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+PORTFOLIO = "Dengeli Portföy"
+THREADS = 8
+
+
+@pytest.fixture
+def roi(bank_db):
+    return ROISimulatorTool(SQLiteRepository(bank_db))
+
+
+def _set_bist_return(db_path, value):
+    con = sqlite3.connect(db_path)
+    with con:
+        con.execute("UPDATE asset_performance SET ortalama_yillik_getiri = ? WHERE varlik_sinifi = 'BIST 100 Hisseleri'",
+                    (value,))
+    con.close()
+
+
+def test_same_parameters_give_identical_results(bank_db):
+    # önbellek kapalı, ayrı örnekler: tekrar üretilebilirlik yalnızca parametrelerden gelir
+    a = ROISimulatorTool(SQLiteRepository(bank_db), cache_size=0)
+    b = ROISimulatorTool(SQLiteRepository(bank_db), cache_size=0)
+    assert a.run(PORTFOLIO, 1000, 10) == b.run(PORTFOLIO, 1000, 10)
+    assert a.stress_test(PORTFOLIO, 1000, 10) == b.stress_test(PORTFOLIO, 1000, 10)
+    assert a.run(PORTFOLIO, 1000, 10) != a.run(PORTFOLIO, 1000, 11)
+    assert a.run(PORTFOLIO, 1000, 10)["average_outcome"] != a.run(PORTFOLIO, 1000.5, 10)["average_outcome"]
+    assert a.cache_stats()["size"] == 0 and a.cache_stats()["hits"] == 0
+
+
+def test_hits_misses_and_defensive_copies(roi):
+    first = roi.run(PORTFOLIO, 1000, 10)
+    first["asset_contributions"].clear()
+    first["average_outcome"] = -1
+    second = roi.run(PORTFOLIO, 1000, 10)
+    assert second["average_outcome"] > 0 and len(second["asset_contributions"]) == 4
+    assert second == roi.run(PORTFOLIO, 1000, 10)
+    roi.stress_test(PORTFOLIO, 1000, 10)
+
+    stats = roi.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+    assert stats["hit_rate"] == 0.5 and stats["reloads"] == 0
+
+    # hatalar önbelleğe yazılmaz
+    assert roi.run("Yok", 1000, 1) == roi.run("Yok", 1000, 1) == {"error": "Portfolio 'Yok' not found."}
+    assert roi.cache_stats()["misses"] == 4 and roi.cache_stats()["size"] == 2
+
+
+def test_lru_evicts_oldest(bank_db):
+    roi = ROISimulatorTool(SQLiteRepository(bank_db), cache_size=2)
+    for years in (1, 2, 1, 3):   # 1 yeniden kullanılır → 2 çıkarılır
+        roi.run(PORTFOLIO, 1000, years, num_simulations=100)
+    assert roi.cache_stats()["size"] == 2
+    hits = roi.cache_stats()["hits"]
+    roi.run(PORTFOLIO, 1000, 1, num_simulations=100)
+    assert roi.cache_stats()["hits"] == hits + 1
+    roi.run(PORTFOLIO, 1000, 2, num_simulations=100)
+    assert roi.cache_stats()["hits"] == hits + 1
+
+
+def test_source_table_write_reloads_and_revert_reproduces(roi, bank_db):
+    original = roi.run(PORTFOLIO, 1000, 10)
+    version = roi.cache_stats()["data_version"]
+
+    _set_bist_return(bank_db, 26)
+    changed = roi.run(PORTFOLIO, 1000, 10)
+    stats = roi.cache_stats()
+    assert stats["reloads"] == 1 and stats["data_version"] != version
+    assert stats["size"] == 1 and stats["hits"] == 0
+    assert changed["expected_annual_return"] == pytest.approx(original["expected_annual_return"] + 0.003, abs=1e-4)
+    assert changed["average_outcome"] > original["average_outcome"]
+
+    _set_bist_return(bank_db, 25)
+    assert roi.run(PORTFOLIO, 1000, 10) == original
+    assert roi.cache_stats()["reloads"] == 2
+
+
+def test_failed_reload_keeps_snapshot_and_version(roi, bank_db, monkeypatch):
+    original = roi.run(PORTFOLIO, 1000, 10)
+    data, version = roi._data, roi.cache_stats()["data_version"]
+
+    def broken():
+        raise RuntimeError("db down")
+
+    _set_bist_return(bank_db, 26)
+    monkeypatch.setattr(roi.repo, "get_asset_performance_data", broken)
+    with pytest.raises(RuntimeError, match="db down"):
+        roi.run(PORTFOLIO, 1000, 10)
+    assert roi._data is data
+    assert roi.cache_stats()["data_version"] == version and roi.cache_stats()["size"] == 1
+
+    monkeypatch.undo()
+    assert roi.run(PORTFOLIO, 1000, 10) != original
+    assert roi.cache_stats()["reloads"] == 1
+
+
+def test_concurrent_identical_requests_share_one_computation(roi, monkeypatch):
+    calls = []
+    release = threading.Event()
+    simulate = ROISimulatorTool._simulate
+
+    def slow(data, *args):
+        calls.append(args)
+        release.wait(10)
+        return simulate(data, *args)
+
+    monkeypatch.setattr(ROISimulatorTool, "_simulate", slow)
+    results = [None] * THREADS
+
+    def worker(i):
+        results[i] = roi.run(PORTFOLIO, 1000, 10)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 10
+    while roi.cache_stats()["coalesced"] < THREADS - 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results) and len({id(r) for r in results}) == THREADS
+    stats = roi.cache_stats()
+    assert (stats["misses"], stats["coalesced"], stats["size"]) == (1, THREADS - 1, 1)
+    assert roi._inflight == {}
+
+
+def test_coalesced_waiters_see_the_failure(roi, monkeypatch):
+    release = threading.Event()
+
+    def failing(data, *args):
+        release.wait(10)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(ROISimulatorTool, "_simulate", failing)
+    errors = []
+
+    def worker():
+        try:
+            roi.run(PORTFOLIO, 1000, 10)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 10
+    while roi.cache_stats()["coalesced"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert errors == ["boom"] * 3
+    assert roi._inflight == {} and roi.cache_stats()["size"] == 0
+
+
+def test_cache_disabled_without_data_versions(raw_bank_db):
+    roi = ROISimulatorTool(SQLiteRepository(raw_bank_db))
+    assert roi.run(PORTFOLIO, 1000, 5) == roi.run(PORTFOLIO, 1000, 5)
+    stats = roi.cache_stats()
+    assert stats["data_version"] is None
+    assert (stats["hits"], stats["misses"], stats["size"]) == (0, 2, 0)
@@ -0,0 +1,102 @@
+# backend/tests/test_roi_compiled.py
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.asset_mc import correlation_matrix
+from mcp_server.tools.roi_simulator_tool import ROISimulatorTool
+
+
+@pytest.fixture
+def roi(bank_db):
+    return ROISimulatorTool(SQLiteRepository(bank_db))
+
+
+def reference_stats(db_path, portfolio_name):
+    """user-050 öncesi istek başına yol: tabloları pandas ile okuyup portföyü baştan hesaplar."""
+    con = sqlite3.connect(db_path)
+    try:
+        assets = pd.read_sql_query("SELECT * FROM asset_performance", con).set_index("varlik_sinifi")
+        mixes = pd.read_sql_query("SELECT * FROM portfolio_mixes", con)
+        pairs = con.execute("SELECT asset_a, asset_b, correlation FROM asset_correlations").fetchall()
+    finally:
+        con.close()
+    mix = mixes[mixes["portfoy_adi"] == portfolio_name].iloc[0]["varlik_dagilimi"]
+    alloc = {a.strip(): float(p) for p, a in re.findall(r"%(\d+)\s*([^,]+)", mix)}
+    names = list(alloc)
+    w = np.array([alloc[a] for a in names]) / sum(alloc.values())
+    r = assets.loc[names, "ortalama_yillik_getiri"].to_numpy(dtype=float) / 100
+    v = assets.loc[names, "yillik_volatilite"].to_numpy(dtype=float) / 100
+    C = correlation_matrix(list(assets.index), pairs)
+    idx = [list(assets.index).index(a) for a in names]
+    cov = np.outer(v, v) * C[np.ix_(idx, idx)]
+    variance = w @ cov @ w
+    return names, w, float(w @ r), float(np.sqrt(variance)), w * (cov @ w) / variance
+
+
+def _insert_portfolio(db_path, name, allocation):
+    con = sqlite3.connect(db_path)
+    with con:
+        con.execute("INSERT INTO portfolio_mixes (portfoy_adi, risk_seviyesi, varlik_dagilimi) VALUES (?, 'orta', ?)",
+                    (name, allocation))
+    con.close()
+
+
+def test_compiled_stats_match_per_request_computation(roi, bank_db):
+    data = roi._data
+    con = sqlite3.connect(bank_db)
+    names = [r[0] for r in con.execute("SELECT DISTINCT portfoy_adi FROM portfolio_mixes")]
+    con.close()
+    assert set(names) == set(data._portfolio_index)
+
+    for name in names:
+        assets, w, ret, vol, shares = reference_stats(bank_db, name)
+        row, got_assets, idx, weights = data._portfolio_inputs(name)
+        assert got_assets == assets, name
+        assert weights == pytest.approx(w, abs=1e-12)
+        assert data._weights[row].sum() == pytest.approx(1.0)
+        assert data._portfolio_returns[row] == pytest.approx(ret, abs=1e-12)
+        assert data._portfolio_vols[row] == pytest.approx(vol, abs=1e-12)
+        assert data._risk_shares[row, idx] == pytest.approx(shares, abs=1e-12)
+        L = data._portfolio_chol[row]
+        assert L @ L.T == pytest.approx(data._corr[np.ix_(idx, idx)], abs=1e-12)
+
+        res = roi.run(name, 1000, 2, num_simulations=50)
+        assert res["expected_annual_return"] == round(ret, 4)
+        assert res["annual_volatility"] == round(vol, 4)
+        assert [c["risk_share"] for c in res["asset_contributions"]] == [round(float(s), 4) for s in shares]
+
+
+def test_inserted_portfolio_is_available_after_reload(roi, bank_db):
+    assert roi.run("Yeni Portföy", 1000, 1) == {"error": "Portfolio 'Yeni Portföy' not found."}
+    _insert_portfolio(bank_db, "Yeni Portföy", "%70 TL Mevduat - Fon, %30 Altın (Gram) - ETF")
+    # aynı ad tekrar eklenirse ilk satır geçerli
+    _insert_portfolio(bank_db, "Yeni Portföy", "%100 Kripto Varlıklar")
+
+    res = roi.run("Yeni Portföy", 1000, 1, num_simulations=50)
+    assert roi.cache_stats()["reloads"] == 1
+    assert [(c["asset"], c["weight"]) for c in res["asset_contributions"]] == \
+        [("TL Mevduat - Fon", 0.7), ("Altın (Gram) - ETF", 0.3)]
+    assert res["expected_annual_return"] == round(reference_stats(bank_db, "Yeni Portföy")[2], 4)
+
+
+def test_bad_mixes_report_errors_without_breaking_others(roi, bank_db):
+    _insert_portfolio(bank_db, "Bozuk Portföy", "her şey biraz")
+    _insert_portfolio(bank_db, "Eksik Portföy", "%50 TL Mevduat, %50 Gümüş")
+    parse_error = {"error": "Could not parse asset allocation for portfolio 'Bozuk Portföy'."}
+    missing_error = {"error": "Asset 'Gümüş' found in portfolio mix but not in asset performance data."}
+
+    assert roi.run("Bozuk Portföy", 1000, 1) == parse_error
+    assert roi.stress_test("Bozuk Portföy", 1000, 1) == parse_error
+    assert roi.run("Eksik Portföy", 1000, 1) == missing_error
+    assert roi.stress_test("Eksik Portföy", 1000, 1) == missing_error
+    assert "error" not in roi.run("Dengeli Portföy", 1000, 1, num_simulations=50)
+
+    data = roi._data
+    for name in ("Bozuk Portföy", "Eksik Portföy"):
+        row = data._portfolio_index[name]
+        assert not data._weights[row].any() and data._portfolio_chol[row] is None
@@ -0,0 +1,127 @@
+# backend/tests/test_roi_stress.py
+import sqlite3
+from collections import defaultdict
+
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+from mcp_server.tools.asset_mc import base_asset
+from mcp_server.tools.roi_simulator_tool import SCENARIO_ASSET_ALIASES, ROISimulatorTool
+
+SIMS = 4000
+
+
+@pytest.fixture
+def roi(bank_db):
+    return ROISimulatorTool(SQLiteRepository(bank_db))
+
+
+def reference_shocks(db_path):
+    """macro_scenarios satırlarından (senaryo, temel sınıf) → (getiri, volatilite) ortalaması, düz Python ile."""
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    rows = defaultdict(int)
+    con = sqlite3.connect(db_path)
+    try:
+        for scenario, asset, ret, vol in con.execute(
+                "SELECT ekonomik_senaryo, etkilenen_varlik, getiri_etikisi, volatilite_etikisi FROM macro_scenarios"):
+            target = SCENARIO_ASSET_ALIASES.get(asset.strip(), asset.strip())
+            acc = sums[(scenario, target)]
+            acc[0] += float(ret.replace("+", "")) / 100
+            acc[1] += float(vol.replace("+", "")) / 100
+            acc[2] += 1
+            rows[scenario] += 1
+    finally:
+        con.close()
+    return {k: (r / n, v / n) for k, (r, v, n) in sums.items()}, dict(rows)
+
+
+def test_scenarios_are_ranked_worst_first(roi, bank_db):
+    res = roi.stress_test("Dengeli Portföy", 1000, 10, num_simulations=SIMS)
+    _, rows = reference_shocks(bank_db)
+    scenarios = res["scenarios"]
+
+    assert sorted(s["scenario"] for s in scenarios) == sorted(rows)
+    assert {s["scenario"]: s["source_rows"] for s in scenarios} == rows
+    assert [s["rank"] for s in scenarios] == list(range(1, len(rows) + 1))
+    changes = [s["change_vs_baseline"] for s in scenarios]
+    assert changes == sorted(changes)
+
+    base = res["baseline"]["average_outcome"]
+    assert res["total_invested"] == 120_000
+    for s in scenarios:
+        assert s["change_vs_baseline"] == pytest.approx(s["average_outcome"] - base, abs=0.02)
+        assert s["change_pct"] == pytest.approx(s["change_vs_baseline"] / base, abs=1e-4)
+        assert 0.0 <= s["loss_probability"] <= 1.0
+    assert [r["scenario"] for r in res["ui_component"]["scenarios"]] == [s["scenario"] for s in scenarios]
+
+
+def test_baseline_matches_plain_run(roi):
+    res = roi.stress_test("Dengeli Portföy", 1000, 10, num_simulations=20_000)
+    run = roi.run("Dengeli Portföy", 1000, 10, num_simulations=20_000)
+    base = res["baseline"]
+    assert base["expected_annual_return"] == run["expected_annual_return"]
+    assert base["annual_volatility"] == run["annual_volatility"]
+    # farklı tohumlar: yalnızca dağılım aynı
+    assert base["average_outcome"] == pytest.approx(run["average_outcome"], rel=0.02)
+    assert base["bad_scenario_outcome"] == pytest.approx(run["bad_scenario_outcome (25th percentile)"], rel=0.03)
+    assert base["good_scenario_outcome"] == pytest.approx(run["good_scenario_outcome (75th percentile)"], rel=0.03)
+
+
+@pytest.mark.parametrize("portfolio", ["Dengeli Portföy", "Korumalı Portföy", "Büyüme Portföyü", "Varyant Portföy"])
+def test_asset_shocks_follow_averaged_table_rows(bank_db, portfolio):
+    con = sqlite3.connect(bank_db)
+    with con:
+        con.execute("INSERT INTO portfolio_mixes (portfoy_adi, risk_seviyesi, varlik_dagilimi) VALUES (?, ?, ?)",
+                    ("Varyant Portföy", "orta", "%50 Altın (Gram) - ETF, %30 TL Mevduat - Fon, %20 Kripto Varlıklar - Spot"))
+    con.close()
+    roi = ROISimulatorTool(SQLiteRepository(bank_db))
+    shocks, _ = reference_shocks(bank_db)
+    res = roi.stress_test(portfolio, 1000, 5, num_simulations=500)
+    assets = {c["asset"]: c for c in roi.run(portfolio, 1000, 5, num_simulations=10)["asset_contributions"]}
+
+    for s in res["scenarios"]:
+        expected = {}
+        for asset, c in assets.items():
+            ret, vol = shocks.get((s["scenario"], base_asset(asset)), (0.0, 0.0))
+            # şoklanmış parametreler kırpılır: getiri ≥ -%99, volatilite ≥ 0
+            ret = max(c["expected_annual_return"] + ret, -0.99) - c["expected_annual_return"]
+            vol = max(c["annual_volatility"] + vol, 0.0) - c["annual_volatility"]
+            if ret or vol:
+                expected[asset] = (ret, vol)
+        got = {a["asset"]: (a["return_shock"], a["volatility_shock"]) for a in s["asset_shocks"]}
+        assert got.keys() == expected.keys(), s["scenario"]
+        for asset, (ret, vol) in expected.items():
+            assert got[asset] == pytest.approx((ret, vol), abs=1e-4), (s["scenario"], asset)
+
+
+def test_unaffected_scenario_has_zero_change_on_shared_draws(roi):
+    # Likidite Bolluğu yalnızca BIST/ABD/Kripto'yu etkiler; Korumalı Portföy'de bunlar yok
+    res = roi.stress_test("Korumalı Portföy", 1000, 10, num_simulations=SIMS)
+    liquidity = next(s for s in res["scenarios"] if s["scenario"] == "Likidite Bolluğu")
+    assert liquidity["asset_shocks"] == []
+    assert liquidity["change_vs_baseline"] == 0.0
+    assert liquidity["average_outcome"] == res["baseline"]["average_outcome"]
+    assert liquidity["loss_probability"] == res["baseline"]["loss_probability"]
+
+
+def test_positive_return_shock_ranks_last(roi):
+    # Likidite Bolluğu Büyüme Portföyü'nün tüm varlıklarında getiriyi artırır → ortalama artar
+    data = roi._data
+    row, assets, idx, weights = data._portfolio_inputs("Büyüme Portföyü")
+    k = 1 + data._scenario_names.index("Likidite Bolluğu")
+    assert (data._stress_returns[k, idx] >= data._stress_returns[0, idx]).all()
+    res = roi.stress_test("Büyüme Portföyü", 1000, 10, num_simulations=SIMS)
+    liquidity = next(s for s in res["scenarios"] if s["scenario"] == "Likidite Bolluğu")
+    assert liquidity["change_vs_baseline"] > 0
+    assert liquidity["rank"] == len(res["scenarios"])
+
+
+def test_stress_errors(roi, bank_db):
+    assert roi.stress_test("Yok", 1000, 1) == {"error": "Portfolio 'Yok' not found."}
+
+    con = sqlite3.connect(bank_db)
+    with con:
+        con.execute("DELETE FROM macro_scenarios")
+    con.close()
+    assert ROISimulatorTool(SQLiteRepository(bank_db)).stress_test("Dengeli Portföy", 1000, 1) == \
+        {"error": "No macro scenarios available."}
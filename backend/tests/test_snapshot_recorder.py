@@ -0,0 +1,142 @@
+# backend/tests/test_snapshot_recorder.py
+import sqlite3
+import threading
+
+from mcp_server.data.snapshot_recorder import SnapshotRecorder
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+TXNS = [{"txn_id": 1, "amount": -10.0}, {"txn_id": 2, "amount": 25.5}]
+
+
+class _GatedRepo:
+    """Writer'ı ilk batch'te bekletir; kuyruk bu sırada test tarafından doldurulur."""
+
+    def __init__(self, fail=False, pruned=0):
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.written = []
+        self.fail = fail
+        self.pruned = pruned
+        self.prune_calls = 0
+
+    def save_transaction_snapshots(self, jobs):
+        self.entered.set()
+        assert self.gate.wait(10)
+        if self.fail:
+            raise sqlite3.OperationalError("database is locked")
+        self.written += [j["limit"] for j in jobs]
+        return sum(len(j["transactions"]) for j in jobs)
+
+    def prune_transaction_snapshots(self):
+        self.prune_calls += 1
+        return {"deleted_snapshots": self.pruned}
+
+
+def _submit(rec, tag):
+    # iş kimliği olarak limit kullanılır
+    return rec.submit(account_id=1, from_date=None, to_date=None, limit=tag, transactions=TXNS)
+
+
+def _block_writer(rec, repo):
+    assert _submit(rec, 0)["queued"] == 2
+    assert repo.entered.wait(10)  # iş 0 writer'da, kuyruk boş
+
+
+def test_drop_newest_rejects_new_work_when_full():
+    repo = _GatedRepo()
+    rec = SnapshotRecorder(repo, max_queue=3, batch_jobs=1, drop_policy="drop_newest", prune_interval_s=0)
+    _block_writer(rec, repo)
+    results = [_submit(rec, tag) for tag in (1, 2, 3, 4, 5)]
+    assert [r.get("dropped", False) for r in results] == [False, False, False, True, True]
+    assert results[3]["queued"] == 0
+    assert rec.stats()["queue_depth"] == 3
+
+    repo.gate.set()
+    rec.flush()
+    assert repo.written == [0, 1, 2, 3]
+    stats = rec.stats()
+    assert {k: stats[k] for k in ("submitted", "dropped", "written_jobs", "written_rows", "batches", "failed_jobs")} == \
+        {"submitted": 4, "dropped": 2, "written_jobs": 4, "written_rows": 8, "batches": 4, "failed_jobs": 0}
+    assert stats["queue_depth"] == 0 and stats["drop_policy"] == "drop_newest"
+    rec.stop()
+
+
+def test_drop_oldest_evicts_the_oldest_job():
+    repo = _GatedRepo()
+    rec = SnapshotRecorder(repo, max_queue=3, batch_jobs=8, drop_policy="drop_oldest", prune_interval_s=0)
+    _block_writer(rec, repo)
+    results = [_submit(rec, tag) for tag in (1, 2, 3, 4, 5)]
+    assert all(r["queued"] == 2 and not r.get("dropped") for r in results)
+
+    repo.gate.set()
+    rec.flush()
+    assert repo.written == [0, 3, 4, 5]
+    stats = rec.stats()
+    # kabul edilen 6 işten 2'si sonradan atıldı
+    assert (stats["submitted"], stats["dropped"], stats["written_jobs"], stats["batches"]) == (6, 2, 4, 2)
+    rec.stop()
+
+
+def test_unknown_policy_falls_back_to_drop_newest():
+    assert SnapshotRecorder(_GatedRepo(), drop_policy="yok").drop_policy == "drop_newest"
+
+
+def test_failed_writes_and_prunes_are_counted():
+    repo = _GatedRepo(fail=True, pruned=7)
+    repo.gate.set()
+    rec = SnapshotRecorder(repo, batch_jobs=4, prune_interval_s=3600)
+    for tag in range(6):
+        _submit(rec, tag)
+    rec.stop()
+    stats = rec.stats()
+    assert (stats["failed_jobs"], stats["written_jobs"], stats["batches"]) == (6, 0, 0)
+    # saklama politikası ilk batch'ten sonra bir kez, sonra aralık dolana kadar çalışmaz
+    assert repo.prune_calls == 1 and stats["pruned"] == 7
+
+
+def test_stop_on_a_full_drop_oldest_queue_writes_every_job():
+    repo = _GatedRepo()
+    rec = SnapshotRecorder(repo, max_queue=2, batch_jobs=1, drop_policy="drop_oldest", prune_interval_s=0)
+    _block_writer(rec, repo)
+    _submit(rec, 1)
+    _submit(rec, 2)
+    stopper = threading.Thread(target=rec.stop)
+    stopper.start()  # kuyruk dolu: uyandırma işareti konamaz, writer Event'i görmeli
+    repo.gate.set()
+    stopper.join(10)
+    assert not stopper.is_alive()
+    assert repo.written == [0, 1, 2]
+    assert rec.stats()["written_jobs"] == 3 and rec.stats()["queue_depth"] == 0
+
+
+def test_stop_flushes_queued_jobs_to_the_database(bank_db):
+    repo = SQLiteRepository(bank_db)
+    con = sqlite3.connect(bank_db)
+    before = con.execute("SELECT (SELECT COUNT(*) FROM snapshot_header), (SELECT COUNT(*) FROM snapshot_items)").fetchone()
+    account_id, customer_id = con.execute(
+        "SELECT account_id, customer_id FROM accounts WHERE account_id IN (SELECT account_id FROM txns) LIMIT 1"
+    ).fetchone()
+    con.close()
+    rows = repo.list_transactions(account_id, customer_id, limit=20)
+    assert rows
+
+    rec = SnapshotRecorder(repo, max_queue=500, batch_jobs=16, prune_interval_s=0)
+    for _ in range(100):
+        assert rec.submit(account_id, None, None, 20, rows)["queued"] == len(rows)
+    rec.stop()
+
+    con = sqlite3.connect(bank_db)
+    after = con.execute("SELECT (SELECT COUNT(*) FROM snapshot_header), (SELECT COUNT(*) FROM snapshot_items)").fetchone()
+    con.close()
+    stats = rec.stats()
+    assert after[0] - before[0] == 100
+    # written_rows = yazılan item satırı (aynı liste tekrarında delta snapshot'lar satır eklemez)
+    assert stats["written_jobs"] == 100 and stats["written_rows"] == after[1] - before[1] >= len(rows)
+    assert 100 / 16 <= stats["batches"] <= 100
+    assert stats["dropped"] == 0 and stats["failed_jobs"] == 0
+
+
+def test_empty_listing_is_not_queued():
+    rec = SnapshotRecorder(_GatedRepo())
+    assert rec.submit(1, None, None, 10, [])["queued"] == 0
+    assert rec._thread is None and rec.stats()["submitted"] == 0
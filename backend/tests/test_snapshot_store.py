@@ -0,0 +1,121 @@
+# backend/tests/test_snapshot_store.py
+import random
+import sqlite3
+
+import pytest
+
+from mcp_server.data import snapshot_store
+from mcp_server.data.migrations import run_migrations
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+
+@pytest.fixture
+def repo(bank_db):
+    # taşınmış eski snapshot'lar sayımları karıştırmasın
+    con = sqlite3.connect(bank_db)
+    con.execute("DELETE FROM snapshot_items")
+    con.execute("DELETE FROM snapshot_header")
+    con.commit()
+    con.close()
+    return SQLiteRepository(bank_db)
+
+
+def _listing_jobs(repo, n, seed=1):
+    """Aynı hesapların art arda listelenmesi; her seferinde baştan 0..3 satır kayar."""
+    rnd = random.Random(seed)
+    con = sqlite3.connect(repo.db_path)
+    accounts = [a for (a,) in con.execute(
+        "SELECT account_id FROM txns GROUP BY account_id HAVING COUNT(*) >= 60 LIMIT 5")]
+    owner = dict(con.execute("SELECT account_id, customer_id FROM accounts"))
+    con.close()
+    jobs = []
+    for _ in range(n):
+        acc = rnd.choice(accounts)
+        rows = repo.list_transactions(acc, owner[acc], limit=50)[rnd.randint(0, 3):]
+        jobs.append({"snapshot_at": "2099-01-01 00:00:00", "account_id": acc, "from_date": None,
+                     "to_date": None, "limit": 50, "transactions": rows})
+    return jobs
+
+
+def _ids(snapshot):
+    return [t["txn_id"] for t in snapshot["transactions"]]
+
+
+def test_delta_snapshots_round_trip(repo):
+    jobs = _listing_jobs(repo, 60)
+    repo.save_transaction_snapshots(jobs[:30])
+    repo.save_transaction_snapshots(jobs[30:])
+
+    con = sqlite3.connect(repo.db_path)
+    sids = [r[0] for r in con.execute("SELECT snapshot_id FROM snapshot_header ORDER BY snapshot_id")]
+    max_chain = con.execute("SELECT MAX(chain_len) FROM snapshot_header").fetchone()[0]
+    con.close()
+    assert len(sids) == 60
+    assert max_chain < snapshot_store.SNAPSHOT_FULL_EVERY
+    for sid, job in zip(sids, jobs):
+        assert _ids(repo.get_transaction_snapshot(sid)) == [t["txn_id"] for t in job["transactions"]]
+
+    report = repo.transaction_snapshot_report()
+    assert report["delta"] > 0
+    assert report["stored_items"] < report["logical_items"]
+
+
+def test_prune_rebases_surviving_deltas(repo):
+    jobs = _listing_jobs(repo, 40)
+    repo.save_transaction_snapshots(jobs)
+    con = sqlite3.connect(repo.db_path)
+    sids = [r[0] for r in con.execute("SELECT snapshot_id FROM snapshot_header ORDER BY snapshot_id")]
+    con.close()
+    by_account = {}
+    for sid, job in zip(sids, jobs):
+        by_account.setdefault(job["account_id"], []).append((sid, job))
+
+    res = repo.prune_transaction_snapshots(max_age_days=100000, keep_per_account=3)
+    assert res["deleted_snapshots"] == sum(max(0, len(v) - 3) for v in by_account.values())
+
+    for kept in by_account.values():
+        for sid, job in kept[-3:]:
+            assert _ids(repo.get_transaction_snapshot(sid)) == [t["txn_id"] for t in job["transactions"]]
+        for sid, _ in kept[:-3]:
+            assert repo.get_transaction_snapshot(sid) is None
+    con = sqlite3.connect(repo.db_path)
+    orphans = con.execute(
+        "SELECT COUNT(*) FROM snapshot_items WHERE snapshot_id NOT IN (SELECT snapshot_id FROM snapshot_header)"
+    ).fetchone()[0]
+    con.close()
+    assert orphans == 0
+
+    # prune sonrası yeni yazım doğru tabandan devam eder
+    repo.save_transaction_snapshots(jobs[:1])
+    con = sqlite3.connect(repo.db_path)
+    newest = con.execute("SELECT MAX(snapshot_id) FROM snapshot_header").fetchone()[0]
+    con.close()
+    assert _ids(repo.get_transaction_snapshot(newest)) == [t["txn_id"] for t in jobs[0]["transactions"]]
+
+
+def test_legacy_snapshots_are_migrated_with_their_values(raw_bank_db):
+    con = sqlite3.connect(raw_bank_db)
+    legacy = {}
+    for r in con.execute(
+        "SELECT snapshot_at, account_id, range_from, range_to, request_limit, "
+        "txn_id, txn_date, amount, txn_type, description FROM txn_snapshots ORDER BY snapshot_id"
+    ):
+        legacy.setdefault(r[:5], {})[r[5]] = r[6:]
+    con.close()
+
+    run_migrations(raw_bank_db)
+    repo = SQLiteRepository(raw_bank_db)
+    con = sqlite3.connect(raw_bank_db)
+    heads = con.execute(
+        "SELECT snapshot_id, snapshot_at, account_id, range_from, range_to, request_limit "
+        "FROM snapshot_header ORDER BY snapshot_id"
+    ).fetchall()
+    assert not con.execute("SELECT 1 FROM sqlite_master WHERE name = 'txn_snapshots'").fetchone()
+    con.close()
+
+    assert len(heads) == len(legacy)
+    for h in heads[::25]:
+        snap = repo.get_transaction_snapshot(h[0])
+        got = {t["txn_id"]: (t["txn_date"], t["amount"], t["txn_type"], t["description"])
+               for t in snap["transactions"]}
+        assert got == legacy[tuple(h[1:])]
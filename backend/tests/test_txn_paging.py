@@ -0,0 +1,88 @@
+# backend/tests/test_txn_paging.py
+import sqlite3
+
+import pytest
+
+from mcp_server.data.sqlite_repo import SQLiteRepository
+
+ACCOUNT, CUSTOMER = 54, 12
+SAME_DATE = "2025-09-30 12:00:00"
+
+
+@pytest.fixture
+def repo(bank_db):
+    # aynı txn_date'e sahip 23 işlem: sayfa sınırları bu grubun ortasına düşer
+    con = sqlite3.connect(bank_db)
+    con.executemany(
+        "INSERT INTO txns (account_id, amount, txn_type, txn_date, description) VALUES (?, ?, 'ödeme', ?, 'test')",
+        [(ACCOUNT, -float(i + 1), SAME_DATE) for i in range(23)],
+    )
+    con.commit()
+    con.close()
+    return SQLiteRepository(bank_db)
+
+
+def _all_ids(repo, from_date=None, to_date=None):
+    con = sqlite3.connect(repo.db_path)
+    sql = "SELECT txn_id FROM txns WHERE account_id = ?"
+    params = [ACCOUNT]
+    if from_date:
+        sql += " AND txn_date >= ?"
+        params.append(from_date)
+    if to_date:
+        sql += " AND txn_date <= ?"
+        params.append(to_date)
+    ids = [r[0] for r in con.execute(sql + " ORDER BY txn_date DESC, txn_id ASC", params)]
+    con.close()
+    return ids
+
+
+def _walk(repo, limit, **kw):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = repo.list_transactions_page(ACCOUNT, CUSTOMER, limit=limit, cursor=cursor, **kw)
+        ids += [t["txn_id"] for t in page["transactions"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize("limit", [1, 5, 7, 23, 50])
+def test_pages_cover_equal_dates_without_gaps_or_duplicates(repo, limit):
+    expected = _all_ids(repo)
+    ids, _ = _walk(repo, limit)
+    assert ids == expected
+    assert len(set(ids)) == len(ids)
+
+
+def test_pages_respect_date_range(repo):
+    rng = {"from_date": "2025-06-01", "to_date": "2025-12-31"}
+    ids, pages = _walk(repo, 4, **rng)
+    assert ids == _all_ids(repo, "2025-06-01", "2025-12-31")
+    assert pages > 1
+
+
+def test_iter_transactions_matches_paging(repo):
+    streamed = [t["txn_id"] for t in repo.iter_transactions(ACCOUNT, CUSTOMER, chunk_size=6)]
+    assert streamed == _all_ids(repo)
+
+    first = repo.list_transactions_page(ACCOUNT, CUSTOMER, limit=10)
+    rest = [t["txn_id"] for t in repo.iter_transactions(ACCOUNT, CUSTOMER, cursor=first["next_cursor"])]
+    assert rest == _all_ids(repo)[10:]
+
+
+def test_cursor_is_bound_to_account_and_range(repo):
+    page = repo.list_transactions_page(ACCOUNT, CUSTOMER, limit=5, from_date="2025-01-01")
+    cursor = page["next_cursor"]
+    with pytest.raises(ValueError):
+        repo.list_transactions_page(ACCOUNT, CUSTOMER, limit=5, cursor=cursor)
+    with pytest.raises(ValueError):
+        repo.list_transactions_page(18, 33, limit=5, cursor=cursor, from_date="2025-01-01")
+    with pytest.raises(ValueError):
+        repo.list_transactions_page(ACCOUNT, CUSTOMER, limit=5, cursor="not-a-cursor")
+
+
+def test_other_customer_sees_nothing(repo):
+    page = repo.list_transactions_page(ACCOUNT, CUSTOMER + 1, limit=5)
+    assert page == {"transactions": [], "next_cursor": None}
@@ -0,0 +1,190 @@
+# export_store.py
+"""
+Dışa aktarma deposu: ödeme planı / işlem geçmişi dosyaları (CSV, opsiyonel XLSX).
+
+- Satırlar iterator'dan dosyaya akıtılır → export boyutundan bağımsız sabit bellek
+- Dosya önce .part olarak yazılır, bitince atomik rename → yarım dosya servis edilmez
+- Her export tahmin edilemez, kısa ömürlü bir handle ile döner (EXPORT_TTL_S)
+- Meta (sahip, dosya adı, süre) <handle>.json yan dosyasında → MCP server yazar,
+  FastAPI /exports/{handle} aynı dizinden okur (iki süreç aynı EXPORT_DIR'i görür)
+- owner_id verilen export'u yalnızca o müşteri indirebilir
+- Süresi dolanlar yeni export yazılırken temizlenir
+"""
+import csv
+import json
+import os
+import re
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+try:  # opsiyonel XLSX desteği
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover
+    Workbook = None
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(_ROOT, "exports"))
+EXPORT_TTL_S = int(os.getenv("EXPORT_TTL_S", "900"))          # indirme linkinin ömrü
+EXPORT_CHUNK_BYTES = 64 * 1024                                 # endpoint okuma parçası
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+_HANDLE_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class ExportStore:
+    def __init__(self, root: str = EXPORT_DIR, ttl_s: int = EXPORT_TTL_S):
+        self.root = root
+        self.ttl_s = ttl_s
+        os.makedirs(self.root, exist_ok=True)
+
+    # ----------------- yazma -----------------
+    def write(
+        self,
+        fmt: str,
+        header: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        filename: str,
+        owner_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        rows'u fmt ("csv" | "xlsx") dosyasına akıtır, meta döner:
+            {"handle", "url", "filename", "format", "rows", "bytes", "expires_at"}
+        """
+        fmt = (fmt or "csv").lower()
+        if fmt not in FORMATS:
+            raise ValueError("format must be 'csv' or 'xlsx'")
+        if fmt == "xlsx" and Workbook is None:
+            raise ValueError("xlsx export requires openpyxl")
+
+        self.purge_expired()
+        handle = secrets.token_urlsafe(24)
+        path = self._data_path(handle)
+        tmp = path + ".part"
+        try:
+            if fmt == "csv":
+                count = self._write_csv(tmp, header, rows)
+            else:
+                count = self._write_xlsx(tmp, header, rows)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        expires = time.time() + self.ttl_s
+        meta = {
+            "handle": handle,
+            "filename": f"{filename}.{fmt}",
+            "format": fmt,
+            "media_type": FORMATS[fmt],
+            "rows": count,
+            "bytes": os.path.getsize(path),
+            "owner_id": owner_id,
+            "expires_ts": expires,
+        }
+        with open(self._meta_path(handle), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return self.public_meta(meta)
+
+    @staticmethod
+    def _write_csv(path: str, header: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        count = 0
+        # utf-8-sig: Excel Türkçe karakterleri doğru açsın
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            for row in rows:
+                w.writerow(row)
+                count += 1
+        return count
+
+    @staticmethod
+    def _write_xlsx(path: str, header: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        count = 0
+        wb = Workbook(write_only=True)  # write_only: satırlar bellekte tutulmaz
+        ws = wb.create_sheet()
+        ws.append(list(header))
+        for row in rows:
+            ws.append(list(row))
+            count += 1
+        wb.save(path)
+        return count
+
+    # ----------------- okuma -----------------
+    def open(self, handle: str, owner_id: Optional[int] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Geçerli export için (dosya yolu, meta); yoksa/süresi dolduysa/sahibi farklıysa None.
+        """
+        if not isinstance(handle, str) or not _HANDLE_RE.match(handle):
+            return None
+        try:
+            with open(self._meta_path(handle), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("expires_ts", 0) < time.time():
+            self._remove(handle)
+            return None
+        if meta.get("owner_id") is not None and meta["owner_id"] != owner_id:
+            return None
+        path = self._data_path(handle)
+        if not os.path.exists(path):
+            return None
+        return path, meta
+
+    @staticmethod
+    def iter_file(path: str, chunk_size: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    # ----------------- bakım -----------------
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            handle = name[:-5]
+            try:
+                with open(self._meta_path(handle), encoding="utf-8") as f:
+                    expired = json.load(f).get("expires_ts", 0) < now
+            except (OSError, ValueError):
+                expired = True
+            if expired:
+                self._remove(handle)
+                removed += 1
+        return removed
+
+    def _remove(self, handle: str) -> None:
+        for p in (self._data_path(handle), self._meta_path(handle)):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    def _data_path(self, handle: str) -> str:
+        return os.path.join(self.root, f"{handle}.bin")
+
+    def _meta_path(self, handle: str) -> str:
+        return os.path.join(self.root, f"{handle}.json")
+
+    @staticmethod
+    def public_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "handle": meta["handle"],
+            "url": f"/exports/{meta['handle']}",
+            "filename": meta["filename"],
+            "format": meta["format"],
+            "rows": meta["rows"],
+            "bytes": meta["bytes"],
+            "expires_at": datetime.fromtimestamp(meta["expires_ts"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        }
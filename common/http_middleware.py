@@ -5,57 +5,65 @@ import time
 import uuid
 from typing import Optional
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import URL, Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from common.logging_setup import get_logger
 
 
-class CorrelationLoggingMiddleware(BaseHTTPMiddleware):
+class CorrelationLoggingMiddleware:
     """
+    Saf ASGI middleware (BaseHTTPMiddleware yok → istek başına ek task/stream yok, streaming bozulmaz)
     - Her HTTP isteğine corr_id ekler (yoksa üretir)
-    - İstek süresini ölçer
+    - İstek süresini ölçer: ilk byte'a kadar (ttfb_ms) ve toplam (duration_ms)
     - JSON log yazar (dosya + stdout)
     - Yanıta X-Request-ID header'ını koyar
     """
 
-    def __init__(self, app, logger=None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, logger=None):
+        self.app = app
         self.log = logger or get_logger("chat_backend", "chat-backend.log", service="chat-backend")
 
-    async def dispatch(self, request: Request, call_next):
-        corr_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-        request.state.corr_id = corr_id  # endpoint içinde erişim için
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        corr_id = Headers(scope=scope).get("X-Request-ID") or str(uuid.uuid4())
+        # endpoint içinde request.state.corr_id ile erişim için
+        scope.setdefault("state", {})["corr_id"] = corr_id
 
         t0 = time.perf_counter()
-        response: Optional[Response] = None
+        status: Optional[int] = None
+        ttfb: Optional[int] = None
+
+        async def send_with_corr_id(message: Message) -> None:
+            nonlocal status, ttfb
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                ttfb = int((time.perf_counter() - t0) * 1000)
+                headers = MutableHeaders(scope=message)
+                if "X-Request-ID" not in headers:
+                    headers.append("X-Request-ID", corr_id)
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_with_corr_id)
         except Exception as e:
             # Beklenmeyen tüm HTTP hataları
             self.log.error("http_unhandled_error", extra={
                 "event": "http_unhandled_error",
                 "corr_id": corr_id,
                 "error": str(e),
-                "meta": {"path": str(request.url), "method": request.method},
+                "meta": {"path": str(URL(scope=scope)), "method": scope.get("method")},
             })
             raise
         finally:
             dur = int((time.perf_counter() - t0) * 1000)
-            # Yanıta corr_id header'ı eklemeyi dene
-            try:
-                if response is not None and "X-Request-ID" not in response.headers:
-                    response.headers["X-Request-ID"] = corr_id
-            except Exception:
-                # Yanıt akışı başlamış olabilir; kritik değil
-                pass
-
             self.log.info("http_request", extra={
                 "event": "http_request",
                 "corr_id": corr_id,
-                "meta": {"path": request.url.path, "method": request.method, "status": getattr(response, "status_code", None)},
+                "meta": {"path": scope.get("path"), "method": scope.get("method"), "status": status, "ttfb_ms": ttfb},
                 "duration_ms": dur,
             })
 
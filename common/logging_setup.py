@@ -1,17 +1,39 @@
 # logging_setup.py
-import json, logging, os, sys
-from logging.handlers import RotatingFileHandler
+import atexit, json, logging, os, queue, random, sys, threading
+from logging.handlers import QueueHandler, RotatingFileHandler
 from datetime import datetime, timezone
 
+try:  # opsiyonel hızlı JSON encoder
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 LOG_DIR = os.getenv("LOG_DIR", "logs")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_JSON = os.getenv("LOG_JSON", "1") in ("1", "true", "True")
+# Kuyruk tabanlı loglama: istek yolunda sadece enqueue, format + I/O listener thread'inde
+LOG_QUEUE = os.getenv("LOG_QUEUE", "1") in ("1", "true", "True")
+# Listener'ın tek seferde yazacağı en fazla kayıt sayısı
+LOG_BATCH_SIZE = max(1, int(os.getenv("LOG_BATCH_SIZE", "256")))
+# Event bazlı örnekleme, örn: "http_request=0.05,tool_call=0.5" (WARNING ve üstü her zaman yazılır)
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+
+def _dumps(payload: dict) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload).decode("utf-8")
+        except TypeError:
+            pass  # orjson'un desteklemediği tip → stdlib'e düş
+    return json.dumps(payload, ensure_ascii=False)
+
+
 class JSONFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload = {
-            "ts": datetime.now(timezone.utc).isoformat(),
+            # kayıt listener thread'inde formatlanabilir → zaman damgası kaydın oluştuğu an
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "service": getattr(record, "service", "unknown"),
             "event": getattr(record, "event", record.msg if isinstance(record.msg, str) else "log"),
@@ -23,6 +45,7 @@ class JSONFormatter(logging.Formatter):
             "ok": getattr(record, "ok", None),
             "error": getattr(record, "error", None),
             "meta": getattr(record, "meta", None),
+            "sample_rate": getattr(record, "sample_rate", None),
         }
         # msg string ise ek meta olarak koy
         if isinstance(record.msg, str):
@@ -30,7 +53,152 @@ class JSONFormatter(logging.Formatter):
         # extra dict geldiyse birleştir
         if isinstance(record.args, dict):
             payload.update(record.args)
-        return json.dumps({k: v for k, v in payload.items() if v is not None}, ensure_ascii=False)
+        return _dumps({k: v for k, v in payload.items() if v is not None})
+
+
+def _parse_sample_rates(spec: str) -> dict:
+    rates = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        event, _, rate = part.partition("=")
+        try:
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class EventSampler(logging.Filter):
+    """
+    Event adına göre örnekleme. Hatalar (WARNING+, ok=False veya error alanı olan kayıtlar)
+    her zaman geçer; diğerleri verilen oranla tutulur ve kayda sample_rate yazılır.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, "ok", None) is False or getattr(record, "error", None):
+            return True
+        event = getattr(record, "event", record.msg)
+        rate = self.rates.get(event) if isinstance(event, str) else None
+        if rate is None or rate >= 1.0:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        return False
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Kaydı formatlamadan kuyruğa koyar; format işi listener thread'ine kalır."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _write_rotating(handler: RotatingFileHandler, records: list) -> None:
+    """
+    Kayıtları sırayla yazar; bir sonraki kayıt dosyayı maxBytes'a ulaştıracaksa önce döndürür.
+    Sınır byte cinsindendir (Türkçe metin UTF-8'de çok byte'lıdır); iki rollover arası tek write.
+    """
+    encoding = handler.encoding or "utf-8"
+    pending, size = [], handler.stream.tell()
+    for r in records:
+        chunk = handler.format(r) + handler.terminator
+        length = len(chunk.encode(encoding))
+        if handler.maxBytes > 0 and size + length >= handler.maxBytes and size > 0:
+            if pending:
+                handler.stream.write("".join(pending))
+                pending = []
+            handler.doRollover()
+            size = handler.stream.tell()
+        pending.append(chunk)
+        size += length
+    if pending:
+        handler.stream.write("".join(pending))
+
+
+def _write_batch(handler: logging.Handler, records: list) -> None:
+    records = [r for r in records if r.levelno >= handler.level and handler.filter(r)]
+    if not records:
+        return
+    # akışı olmayan / ertelenmiş açılışlı handler → standart emit (açma + rollover handler'ın kendisinde)
+    if (not isinstance(handler, logging.StreamHandler) or handler.stream is None
+            or getattr(handler, "delay", False)):
+        for r in records:
+            handler.handle(r)
+        return
+    handler.acquire()
+    try:
+        if isinstance(handler, RotatingFileHandler):
+            _write_rotating(handler, records)
+        else:
+            handler.stream.write("".join(handler.format(r) + handler.terminator for r in records))
+        handler.flush()  # batch başına tek flush
+    except Exception:
+        handler.handleError(records[0])
+    finally:
+        handler.release()
+
+
+class BatchingQueueListener:
+    """
+    Kuyruktan LOG_BATCH_SIZE'a kadar kaydı toplar, her handler'a tek write + flush ile yazar.
+    Kendi tüketici thread'i ve durdurma işaretiyle çalışır; stop() kuyrukta kalan her kaydı yazdıktan sonra döner.
+    """
+
+    _STOP = object()
+
+    def __init__(self, q, *handlers, batch_size: int = LOG_BATCH_SIZE):
+        self.queue = q
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = []
+            record = self.queue.get()
+            while True:
+                if record is self._STOP:
+                    stop = True
+                    break
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                for handler in self.handlers:
+                    _write_batch(handler, batch)
+
+
+_listeners = []
+
+
+@atexit.register
+def _stop_listeners():
+    # Süreç kapanırken kuyrukta kalanları yaz
+    while _listeners:
+        _listeners.pop().stop()
+
 
 def get_logger(name: str, filename: str, service: str):
     logger = logging.getLogger(name)
@@ -42,8 +210,18 @@ def get_logger(name: str, filename: str, service: str):
     fh.setFormatter(fmt)
     sh = logging.StreamHandler(sys.stdout)
     sh.setFormatter(fmt)
-    logger.addHandler(fh)
-    logger.addHandler(sh)
+    rates = _parse_sample_rates(LOG_SAMPLE_RATES)
+    if rates:
+        logger.addFilter(EventSampler(rates))
+    if LOG_QUEUE:
+        q = queue.SimpleQueue()
+        logger.addHandler(_DeferredQueueHandler(q))
+        listener = BatchingQueueListener(q, fh, sh)
+        listener.start()
+        _listeners.append(listener)
+    else:
+        logger.addHandler(fh)
+        logger.addHandler(sh)
     # varsayılan extra
     logger = logging.LoggerAdapter(logger, extra={"service": service})
     return logger
@@ -39,12 +39,17 @@ import PortfoliosCard from './components/PortfoliosCard'
 import InterestQuoteCard from './components/InterestQuoteCard'
 import InterestCalculatorModal from './components/InterestCalculatorModal'
 import AmortizationTableCard from './components/AmortizationTableCard'
+import LoanQuoteGridCard from './components/LoanQuoteGridCard'
+import ExportDownloadCard from './components/ExportDownloadCard'
+import LoanSimulationCard from './components/LoanSimulationCard'
 import LoanAmortizationModal from './components/LoanAmortizationModal'
 import ROISimulationCard from './components/ROISimulationCard'
+import PortfolioStressCard from './components/PortfolioStressCard'
 import ROISimulationModal from './components/ROISimulationModal'
 import PaymentConfirmationModal from './components/PaymentConfirmationModal'
 import PaymentTransferModal from './components/PaymentTransferModal'
 import PaymentReceiptCard from './components/PaymentReceiptCard'
+import PaymentBatchCard from './components/PaymentBatchCard'
 import SmartNotification from './components/SmartNotification'
 import UserGuide from './components/UserGuide'
 import VoiceInputButton from './components/VoiceInputButton'
@@ -431,6 +436,8 @@ function App() {
           title: session.title,
           createdAt: new Date(session.created_at),
           updatedAt: new Date(session.updated_at),
+          messageCount: session.message_count || 0,
+          lastMessagePreview: session.last_message_preview || '',
           isNew: false
         }))
         
@@ -943,7 +950,8 @@ function App() {
         if (toolData.ok && toolData.confirm_required && toolData.preview) {
           paymentData = {
             ...toolData.preview,
-            customer_id: parseInt(toolData.suggested_client_ref) || 1
+            customer_id: parseInt(toolData.suggested_client_ref) || 1,
+            confirm_token: toolData.confirm_token
           }
           shouldShowPaymentModal = true
           // Override bot message text to show the precheck message
@@ -1109,7 +1117,8 @@ function App() {
         if (toolData.ok && toolData.confirm_required && toolData.preview) {
           paymentData = {
             ...toolData.preview,
-            customer_id: parseInt(toolData.suggested_client_ref) || 1
+            customer_id: parseInt(toolData.suggested_client_ref) || 1,
+            confirm_token: toolData.confirm_token
           }
           shouldShowPaymentModal = true
           // Override bot message text to show the precheck message
@@ -1230,7 +1239,8 @@ function App() {
         if (toolData.ok && toolData.confirm_required && toolData.preview) {
           paymentData = {
             ...toolData.preview,
-            customer_id: parseInt(toolData.suggested_client_ref) || 1
+            customer_id: parseInt(toolData.suggested_client_ref) || 1,
+            confirm_token: toolData.confirm_token
           }
           shouldShowPaymentModal = true
           // Override bot message text to show the precheck message
@@ -1277,6 +1287,36 @@ function App() {
     )).sort((a, b) => new Date(b.updatedAt) - new Date(a.updatedAt)))
   }
 
+  // İşlem listesinde "daha fazla göster": sonraki sayfa LLM'e uğramadan API'den alınır, aynı karta eklenir
+  const handleTransactionsShowMore = async (messageId, data) => {
+    if (!data?.next_cursor || !userInfo?.token) return
+    const params = new URLSearchParams({ cursor: data.next_cursor })
+    if (data.range?.from) params.set('from_date', data.range.from)
+    if (data.range?.to) params.set('to_date', data.range.to)
+    if (data.limit) params.set('limit', String(data.limit))
+    try {
+      const response = await fetch(`http://127.0.0.1:8000/accounts/${data.account_id}/transactions?${params}`, {
+        headers: { 'Authorization': `Bearer ${userInfo.token}` }
+      })
+      const page = await response.json()
+      if (!response.ok) {
+        addNotification({ type: 'error', title: 'İşlem Geçmişi', message: page.detail || 'Sonraki sayfa alınamadı.', duration: 5000 })
+        return
+      }
+      const appendPage = (list) => list.map(m => (
+        m.id === messageId && m.ui_component?.type === 'transactions_list'
+          ? { ...m, ui_component: { ...m.ui_component, items: [...(m.ui_component.items || []), ...page.items], next_cursor: page.next_cursor } }
+          : m
+      ))
+      setMessages(prev => appendPage(prev))
+      setChatHistory(prev => prev[currentChatId]
+        ? { ...prev, [currentChatId]: { ...prev[currentChatId], messages: appendPage(prev[currentChatId].messages || []) } }
+        : prev)
+    } catch (error) {
+      console.error('İşlem sayfası alınamadı:', error)
+    }
+  }
+
   const handleROIChartShow = (data) => {
     setRoiChartData(data)
     setShowROIChart(true)
@@ -1285,6 +1325,7 @@ function App() {
   const handlePaymentConfirmation = async (paymentData) => {
     try {
       const noteText = paymentData.note ? `, note="${paymentData.note}"` : ''
+      const tokenText = paymentData.confirm_token ? `, confirm_token=${paymentData.confirm_token}` : ''
       const userMessage = `Transferi onaylıyorum.`
       
       // Add user message to chat first
@@ -1299,7 +1340,7 @@ function App() {
       setMessages(messagesWithUser)
       
       // Call the payment tool with confirm=true
-      const apiMessage = `Transfer onayı: ${paymentData.from_account} numaralı hesabımdan ${paymentData.to_account} numaralı hesabıma ${paymentData.amount} ${paymentData.currency} gönder${noteText}. confirm=True, customer_id=${paymentData.customer_id}`
+      const apiMessage = `Transfer onayı: ${paymentData.from_account} numaralı hesabımdan ${paymentData.to_account} numaralı hesabıma ${paymentData.amount} ${paymentData.currency} gönder${noteText}. confirm=True${tokenText}, customer_id=${paymentData.customer_id}`
       
       const response = await fetch('http://127.0.0.1:8000/chat', {
         method: 'POST',
@@ -1357,6 +1398,56 @@ function App() {
     }
   }
 
+  // Toplu transfer onayı: kart doğrudan API'yi çağırır (LLM onay adımı değildir); aynı token tekrar gönderilirse ilk sonuç döner
+  const handlePaymentBatchConfirm = async (confirmToken) => {
+    try {
+      const response = await fetch('http://127.0.0.1:8000/payments/batch/confirm', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${userInfo.token}` },
+        body: JSON.stringify({ confirm_token: confirmToken })
+      })
+      const result = await response.json()
+      if (!response.ok || !result.results) {
+        addNotification({
+          type: 'error',
+          title: 'Toplu Transfer Hatası',
+          message: result.message || result.detail || 'Toplu transfer işlenemedi.',
+          duration: 5000
+        })
+        return false
+      }
+      const resultMessage = {
+        id: messages.length + 1,
+        text: `Toplu transfer tamamlandı: ${result.posted} işlendi, ${result.failed} başarısız.`,
+        sender: 'bot',
+        timestamp: new Date(),
+        ui_component: { type: 'payment_batch_result', data: result }
+      }
+      const updatedMessages = [...messages, resultMessage]
+      setMessages(updatedMessages)
+      setChatHistory(prev => ({
+        ...prev,
+        [currentChatId]: { ...prev[currentChatId], messages: updatedMessages, updatedAt: new Date() }
+      }))
+      addNotification({
+        type: result.ok ? 'success' : 'warning',
+        title: 'Toplu Transfer',
+        message: `${result.posted} transfer işlendi${result.failed ? `, ${result.failed} başarısız` : ''}.`,
+        duration: 5000
+      })
+      return true
+    } catch (error) {
+      console.error('Batch confirmation error:', error)
+      addNotification({
+        type: 'error',
+        title: 'Toplu Transfer Hatası',
+        message: 'Toplu transfer sırasında bir hata oluştu.',
+        duration: 5000
+      })
+      return false
+    }
+  }
+
   const handleLoanAmortizationSubmit = async ({ principal, term, rate, currency }) => {
     const rateText = rate ? `, Faiz oranı %${rate}` : ''
     const userMessage = {
@@ -1412,7 +1503,8 @@ function App() {
         if (toolData.ok && toolData.confirm_required && toolData.preview) {
           paymentData = {
             ...toolData.preview,
-            customer_id: parseInt(toolData.suggested_client_ref) || 1
+            customer_id: parseInt(toolData.suggested_client_ref) || 1,
+            confirm_token: toolData.confirm_token
           }
           shouldShowPaymentModal = true
           // Override bot message text to show the precheck message
@@ -1523,7 +1615,8 @@ function App() {
         if (toolData.ok && toolData.confirm_required && toolData.preview) {
           paymentData = {
             ...toolData.preview,
-            customer_id: parseInt(toolData.suggested_client_ref) || 1
+            customer_id: parseInt(toolData.suggested_client_ref) || 1,
+            confirm_token: toolData.confirm_token
           }
           shouldShowPaymentModal = true
           // Override bot message text to show the precheck message
@@ -1749,6 +1842,31 @@ function App() {
   }
 
   // PDF indirme fonksiyonu
+  // MCP export deposundaki dosyayı indir (/exports/{handle}, yetkili istek)
+  const handleExportDownload = async (exportInfo) => {
+    if (!exportInfo?.url || !userInfo?.token) return
+    try {
+      const response = await fetch(`http://127.0.0.1:8000${exportInfo.url}`, {
+        headers: { 'Authorization': `Bearer ${userInfo.token}` }
+      })
+      if (!response.ok) {
+        alert('Dosya bulunamadı veya indirme linkinin süresi doldu.')
+        return
+      }
+      const blob = await response.blob()
+      const url = URL.createObjectURL(blob)
+      const link = document.createElement('a')
+      link.href = url
+      link.download = exportInfo.filename || 'export'
+      document.body.appendChild(link)
+      link.click()
+      document.body.removeChild(link)
+      URL.revokeObjectURL(url)
+    } catch (error) {
+      console.error('Export indirme hatası:', error)
+    }
+  }
+
   const handleDownloadPDF = async (receipt, event) => {
     try {
       // jsPDF ve html2canvas import et
@@ -2079,6 +2197,7 @@ function App() {
                           hour: '2-digit',
                           minute: '2-digit'
                         })}
+                        {chat.messageCount > 0 && ` · ${chat.messageCount} mesaj`}
                       </div>
                     </div>
                     {chatList.length > 1 && !chat.isNew && (
@@ -2227,6 +2346,9 @@ function App() {
                           const mapped = {
                             account_id: ui.account_id,
                             customer_id: ui.customer_id,
+                            next_cursor: ui.next_cursor,
+                            range: ui.range,
+                            limit: ui.limit,
                             transactions: (ui.items || []).map((it, idx) => ({
                               transaction_id: it.id ?? idx,
                               transaction_date: it.datetime || it.date,
@@ -2239,7 +2361,7 @@ function App() {
                               account_id: it.account_id || ui.account_id,
                             }))
                           }
-                          return <TransactionsCard data={mapped} />
+                          return <TransactionsCard data={mapped} onShowMore={(d) => handleTransactionsShowMore(message.id, d)} />
                         })()
                       )}
                       {message.ui_component.type === 'portfolios_card' && (
@@ -2251,9 +2373,24 @@ function App() {
                       {message.ui_component.type === 'amortization_table_card' && (
                         <AmortizationTableCard cardData={message.ui_component} />
                       )}
+                      {message.ui_component.type === 'loan_quote_grid_card' && (
+                        <LoanQuoteGridCard cardData={message.ui_component} />
+                      )}
+                      {message.ui_component.type === 'loan_simulation_card' && (
+                        <LoanSimulationCard cardData={message.ui_component} />
+                      )}
+                      {message.ui_component.type === 'export_download_card' && (
+                        <ExportDownloadCard cardData={message.ui_component} onDownload={handleExportDownload} />
+                      )}
                       {message.ui_component.type === 'roi_simulation_card' && (
                         <ROISimulationCard cardData={message.ui_component} onShowChart={handleROIChartShow} />
                       )}
+                      {message.ui_component.type === 'portfolio_stress_card' && (
+                        <PortfolioStressCard cardData={message.ui_component} />
+                      )}
+                      {(message.ui_component.type === 'payment_batch_confirmation' || message.ui_component.type === 'payment_batch_result') && (
+                        <PaymentBatchCard cardData={message.ui_component} onConfirm={handlePaymentBatchConfirm} />
+                      )}
                       {message.ui_component.type === 'payment_receipt' && (
                         <PaymentReceiptCard 
                           cardData={message.ui_component} 
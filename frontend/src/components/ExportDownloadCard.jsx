@@ -0,0 +1,41 @@
+import './ExportDownloadCard.css'
+
+const ExportDownloadCard = ({ cardData, onDownload }) => {
+  if (!cardData || cardData.type !== 'export_download_card') return null
+
+  const formatSize = (bytes) => {
+    const n = Number(bytes)
+    if (isNaN(n)) return '—'
+    if (n < 1024) return `${n} B`
+    if (n < 1024 * 1024) return `${(n / 1024).toFixed(1)} KB`
+    return `${(n / (1024 * 1024)).toFixed(1)} MB`
+  }
+
+  return (
+    <div className="export-download-card">
+      <div className="export-download-info">
+        <div className="export-download-title">{cardData.title || 'Dışa Aktarım'}</div>
+        <div className="export-download-meta">
+          {cardData.filename} · {cardData.rows} satır · {formatSize(cardData.bytes)}
+        </div>
+        {cardData.expires_at && (
+          <div className="export-download-expiry">Link geçerlilik: {cardData.expires_at} (UTC)</div>
+        )}
+      </div>
+      <button
+        className="export-download-button"
+        onClick={() => onDownload && onDownload(cardData)}
+        title="Dosyayı indir"
+      >
+        <svg width="20" height="20" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
+          <path d="M21 15V19C21 20.1 20.1 21 19 21H5C3.9 21 3 20.1 3 19V15" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round"/>
+          <path d="M7 10L12 15L17 10" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round"/>
+          <path d="M12 15V3" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round"/>
+        </svg>
+        <span>İndir</span>
+      </button>
+    </div>
+  )
+}
+
+export default ExportDownloadCard
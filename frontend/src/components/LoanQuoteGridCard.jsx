@@ -0,0 +1,87 @@
+import './LoanQuoteGridCard.css'
+
+const LoanQuoteGridCard = ({ cardData }) => {
+  if (!cardData || cardData.type !== 'loan_quote_grid_card') return null
+
+  const columns = cardData.columns || []
+  const rows = cardData.rows || []
+  const best = cardData.best
+
+  const formatCurrency = (amount, currency = 'TRY') => {
+    if (amount === undefined || amount === null || isNaN(parseFloat(amount))) return '—'
+    if (currency === 'TRY') {
+      return `${parseFloat(amount).toFixed(2).replace('.', ',').replace(/\B(?=(\d{3})+(?!\d))/g, '.')} ${currency}`
+    }
+    return `${parseFloat(amount).toFixed(2)} ${currency}`
+  }
+
+  const formatPercentage = (rate) => {
+    if (rate === undefined || rate === null || isNaN(parseFloat(rate))) return '—'
+    return `%${(parseFloat(rate) * 100).toFixed(2)}`
+  }
+
+  return (
+    <div className="loan-quote-grid-card">
+      <div className="loan-quote-grid-header">
+        <div className="loan-quote-grid-icon">
+          <svg width="24" height="24" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
+            {/* Tablo Icon */}
+            <rect x="3" y="4" width="18" height="16" rx="2" stroke="currentColor" strokeWidth="2"/>
+            <path d="M3 10h18M9 4v16" stroke="currentColor" strokeWidth="2"/>
+          </svg>
+        </div>
+        <div className="loan-quote-grid-title">{cardData.title || 'Kredi Teklif Karşılaştırması'}</div>
+      </div>
+
+      <div className="loan-quote-grid-table-wrapper">
+        <table className="loan-quote-grid-table">
+          <thead>
+            <tr>
+              <th>Anapara</th>
+              <th>Vade</th>
+              {columns.map((c, idx) => (
+                <th key={idx}>
+                  <div>{c.label}</div>
+                  <div className="loan-quote-grid-rate">{formatPercentage(c.annual_rate)}</div>
+                </th>
+              ))}
+            </tr>
+          </thead>
+          <tbody>
+            {rows.map((r, idx) => (
+              <tr key={idx}>
+                <td>{formatCurrency(r.principal, cardData.currency)}</td>
+                <td>{r.term_months} ay</td>
+                {columns.map((_, cIdx) => (
+                  <td key={cIdx}>
+                    <div className="loan-quote-grid-installment">
+                      {formatCurrency((r.installment || [])[cIdx], cardData.currency)}
+                    </div>
+                    {r.effective_annual_rate ? (
+                      <div className="loan-quote-grid-interest">
+                        Yıllık maliyet: {formatPercentage(r.effective_annual_rate[cIdx])}
+                      </div>
+                    ) : (
+                      <div className="loan-quote-grid-interest">
+                        Faiz: {formatCurrency((r.total_interest || [])[cIdx], cardData.currency)}
+                      </div>
+                    )}
+                  </td>
+                ))}
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </div>
+      {best ? (
+        <div className="loan-quote-grid-note">
+          En düşük efektif maliyet: {formatCurrency(best.principal, cardData.currency)} · {best.term_months} ay · {best.rate_label} ({formatPercentage(best.effective_annual_rate)}, ücretler dahil)
+        </div>
+      ) : (
+        <div className="loan-quote-grid-note">Tutarlar aylık taksittir; altında toplam faiz gösterilir.</div>
+      )}
+    </div>
+  )
+}
+
+export default LoanQuoteGridCard
@@ -0,0 +1,66 @@
+import './LoanSimulationCard.css'
+
+const LoanSimulationCard = ({ cardData }) => {
+  if (!cardData || cardData.type !== 'loan_simulation_card') return null
+
+  const base = cardData.base || {}
+  const scenario = cardData.scenario || {}
+
+  const formatCurrency = (amount, currency = 'TRY') => {
+    if (amount === undefined || amount === null || isNaN(parseFloat(amount))) return '—'
+    if (currency === 'TRY') {
+      return `${parseFloat(amount).toFixed(2).replace('.', ',').replace(/\B(?=(\d{3})+(?!\d))/g, '.')} ${currency}`
+    }
+    return `${parseFloat(amount).toFixed(2)} ${currency}`
+  }
+
+  const rows = [
+    { label: 'Aylık Taksit', base: formatCurrency(base.installment, cardData.currency), scenario: formatCurrency(scenario.installment, cardData.currency) },
+    { label: 'Vade', base: `${base.term_months ?? '—'} ay`, scenario: `${scenario.term_months ?? '—'} ay` },
+    { label: 'Toplam Faiz', base: formatCurrency(base.total_interest, cardData.currency), scenario: formatCurrency(scenario.total_interest, cardData.currency) },
+    { label: 'Toplam Ödeme', base: formatCurrency(base.total_payment, cardData.currency), scenario: formatCurrency(scenario.total_payment, cardData.currency) },
+  ]
+
+  return (
+    <div className="loan-simulation-card">
+      <div className="loan-simulation-header">
+        <div className="loan-simulation-title">Erken Ödeme / Yapılandırma Senaryosu</div>
+        <div className="loan-simulation-subtitle">
+          {formatCurrency(cardData.principal, cardData.currency)} · {cardData.event_count} olay
+        </div>
+      </div>
+
+      <table className="loan-simulation-table">
+        <thead>
+          <tr>
+            <th></th>
+            <th>Mevcut Plan</th>
+            <th>Senaryo</th>
+          </tr>
+        </thead>
+        <tbody>
+          {rows.map((r) => (
+            <tr key={r.label}>
+              <td>{r.label}</td>
+              <td>{r.base}</td>
+              <td>{r.scenario}</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+
+      <div className="loan-simulation-results">
+        <div className="loan-simulation-result">
+          <div className="loan-simulation-result-label">Faiz Tasarrufu</div>
+          <div className="loan-simulation-result-value">{formatCurrency(cardData.interest_saved, cardData.currency)}</div>
+        </div>
+        <div className="loan-simulation-result">
+          <div className="loan-simulation-result-label">Vade Kısalması</div>
+          <div className="loan-simulation-result-value">{cardData.term_reduction_months} ay</div>
+        </div>
+      </div>
+    </div>
+  )
+}
+
+export default LoanSimulationCard
@@ -0,0 +1,81 @@
+import React, { useState } from 'react'
+import './PaymentBatchCard.css'
+
+// payment_batch_confirmation: ön kontrol sonucu + "Onayla" (LLM'e uğramadan /payments/batch/confirm)
+// payment_batch_result: commit sonucu (kalem bazında)
+const PaymentBatchCard = ({ cardData, onConfirm }) => {
+  const [status, setStatus] = useState('idle') // idle | sending | done
+  if (!cardData || !cardData.data) return null
+
+  const data = cardData.data
+  const isResult = cardData.type === 'payment_batch_result'
+  const rows = isResult ? (data.results || []) : (data.items || [])
+
+  const formatCurrency = (amount, currency = 'TRY') => {
+    if (amount === undefined || amount === null || isNaN(parseFloat(amount))) return '—'
+    return new Intl.NumberFormat('tr-TR', {
+      style: 'currency',
+      currency: currency || 'TRY',
+      minimumFractionDigits: 2,
+      maximumFractionDigits: 2
+    }).format(amount)
+  }
+
+  const handleConfirm = async () => {
+    if (status !== 'idle' || !onConfirm) return
+    setStatus('sending')
+    const ok = await onConfirm(data.confirm_token)
+    setStatus(ok ? 'done' : 'idle')
+  }
+
+  return (
+    <div className="payment-batch-card">
+      <div className="payment-batch-header">
+        <div className="payment-batch-title">{isResult ? 'Toplu Transfer Sonucu' : 'Toplu Transfer Onayı'}</div>
+        <div className="payment-batch-subtitle">
+          {isResult
+            ? `${data.posted} işlendi · ${data.failed} başarısız · Toplam ${formatCurrency(data.total_amount)}`
+            : `${data.count} kalem · Toplam ${formatCurrency(data.total_amount)} · ${data.atomic ? 'Hepsi ya da hiçbiri' : 'Geçerli kalemler işlenir'}`}
+        </div>
+      </div>
+
+      <table className="payment-batch-table">
+        <thead>
+          <tr>
+            <th>#</th>
+            <th>Gönderen → Alıcı</th>
+            <th>Tutar</th>
+            <th>Durum</th>
+          </tr>
+        </thead>
+        <tbody>
+          {rows.map((r) => {
+            const item = isResult ? (r.txn || {}) : r
+            return (
+              <tr key={r.index}>
+                <td>{r.index + 1}</td>
+                <td>{item.from_account ? `${item.from_account} → ${item.to_account}` : '—'}</td>
+                <td>{formatCurrency(item.amount, item.currency)}</td>
+                <td className={r.ok ? 'positive' : 'negative'}>{r.ok ? (isResult ? 'İşlendi' : 'Uygun') : r.message}</td>
+              </tr>
+            )
+          })}
+        </tbody>
+      </table>
+
+      {!isResult && (
+        <div className="payment-batch-actions">
+          <button
+            className="payment-batch-confirm"
+            onClick={handleConfirm}
+            disabled={status !== 'idle' || !data.confirm_token}
+          >
+            {status === 'sending' ? 'İşleniyor...' : status === 'done' ? 'Onaylandı' : 'Onayla'}
+          </button>
+        </div>
+      )}
+    </div>
+  )
+}
+
+export default PaymentBatchCard
@@ -0,0 +1,61 @@
+import './PortfolioStressCard.css'
+
+const PortfolioStressCard = ({ cardData }) => {
+  if (!cardData || cardData.type !== 'portfolio_stress_card') return null
+
+  const baseline = cardData.baseline || {}
+  const scenarios = cardData.scenarios || []
+
+  const formatCurrency = (amount) => {
+    if (amount === undefined || amount === null || isNaN(parseFloat(amount))) return '—'
+    return new Intl.NumberFormat('tr-TR', {
+      style: 'currency',
+      currency: 'TRY',
+      minimumFractionDigits: 2,
+      maximumFractionDigits: 2
+    }).format(amount)
+  }
+
+  const formatPercentage = (value) => {
+    if (value === undefined || value === null || isNaN(parseFloat(value))) return '—'
+    const pct = parseFloat(value) * 100
+    return `${pct > 0 ? '+' : ''}${pct.toFixed(2)}%`
+  }
+
+  return (
+    <div className="portfolio-stress-card">
+      <div className="portfolio-stress-header">
+        <div className="portfolio-stress-title">Makro Stres Testi · {cardData.portfolio_name}</div>
+        <div className="portfolio-stress-subtitle">
+          {formatCurrency(cardData.monthly_investment)} / ay · {cardData.years} yıl · Baz senaryo ortalaması {formatCurrency(baseline.average_outcome)}
+        </div>
+      </div>
+
+      <table className="portfolio-stress-table">
+        <thead>
+          <tr>
+            <th>#</th>
+            <th>Senaryo</th>
+            <th>Ortalama Sonuç</th>
+            <th>Baza Göre</th>
+            <th>Zarar Olasılığı</th>
+          </tr>
+        </thead>
+        <tbody>
+          {scenarios.map((s) => (
+            <tr key={s.scenario}>
+              <td>{s.rank}</td>
+              <td>{s.scenario}</td>
+              <td>{formatCurrency(s.average_outcome)}</td>
+              <td className={s.change_vs_baseline < 0 ? 'negative' : 'positive'}>{formatPercentage(s.change_pct)}</td>
+              <td>{(s.loss_probability * 100).toFixed(1)}%</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+      <div className="portfolio-stress-note">Tüm senaryolar aynı rastgele çekilişlerle simüle edilir; en kötüden en iyiye sıralıdır.</div>
+    </div>
+  )
+}
+
+export default PortfolioStressCard
@@ -11,7 +11,9 @@ const ROISimulationCard = ({ cardData, onShowChart }) => {
     average_outcome,
     good_scenario_outcome,
     bad_scenario_outcome,
-    num_simulations_run
+    num_simulations_run,
+    annual_volatility,
+    asset_contributions = []
   } = cardData
 
 
@@ -133,7 +135,28 @@ const ROISimulationCard = ({ cardData, onShowChart }) => {
               {formatCurrency(bad_scenario_outcome)} - {formatCurrency(good_scenario_outcome)}
             </span>
           </div>
+          {annual_volatility !== undefined && (
+            <div className="analysis-item">
+              <span className="analysis-label">Yıllık Volatilite (korelasyonlu):</span>
+              <span className="analysis-value">{formatPercentage(annual_volatility * 100)}</span>
+            </div>
+          )}
         </div>
+
+        {/* Varlık Katkıları */}
+        {asset_contributions.length > 0 && (
+          <div className="detailed-analysis asset-contributions">
+            <div className="asset-contributions-title">Varlık Katkıları (ağırlık · sonuç payı · risk payı)</div>
+            {asset_contributions.map((c) => (
+              <div className="analysis-item" key={c.asset}>
+                <span className="analysis-label">{c.asset}</span>
+                <span className="analysis-value">
+                  {formatPercentage(c.weight * 100)} · {formatPercentage(c.outcome_share * 100)} · {formatPercentage(c.risk_share * 100)}
+                </span>
+              </div>
+            ))}
+          </div>
+        )}
       </div>
     </div>
   )
@@ -1,7 +1,7 @@
 import React from 'react';
 import './TransactionsCard.css';
 
-const TransactionsCard = ({ data }) => {
+const TransactionsCard = ({ data, onShowMore }) => {
   if (!data || !data.transactions || data.transactions.length === 0) {
     return (
       <div className="transactions-card">
@@ -157,6 +157,12 @@ const TransactionsCard = ({ data }) => {
             {data.transactions.length} işlem gösteriliyor
           </div>
         )}
+
+        {data.next_cursor && onShowMore && (
+          <button className="transactions-more" onClick={() => onShowMore(data)}>
+            Daha fazla göster
+          </button>
+        )}
       </div>
     </div>
   );